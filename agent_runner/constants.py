@@ -69,6 +69,14 @@ PROCESS_INITIALIZATION_TIMEOUT_SECONDS = 20.0
 NON_CORE_PROCESS_TIMEOUT_SECONDS = 15.0
 PROCESS_WAIT_TIMEOUT_SECONDS = 5.0
 STDERR_READ_TIMEOUT_SECONDS = 0.1
+STDIO_REQUEST_TIMEOUT_SECONDS = 30.0  # Per-request wait for a multiplexed stdio JSON-RPC response
+STDIO_MAX_IN_FLIGHT = 16  # Concurrent requests allowed on a single stdio MCP process
+STDIO_READ_CHUNK_BYTES = 65536  # Chunked reads avoid the 64KB readline() limit
+STDIO_MAX_LINE_BYTES = 4 * 1024 * 1024  # Longer stdio response lines are reduced while streaming, never buffered whole
+STDIO_OVERSIZED_RESULT_CHARS = 32768  # Size of the windowed result handed on for an oversized response
+SSE_REQUEST_TIMEOUT_SECONDS = 20.0  # Wait for session readiness / matching response event
+SSE_RECONNECT_MAX_DELAY_SECONDS = 30.0  # Cap for background SSE reconnect backoff
+SSE_RECONNECT_MAX_ATTEMPTS = 8  # Consecutive failed connects before an SSE session gives up
 
 # Error Messages
 ERROR_STDERR_READ_FAILED = "Failed to read stderr: {error}"
@@ -0,0 +1,247 @@
+"""
+Embedding Service - pooled, micro-batched embedding client.
+
+All embedding traffic (memory facts, tool indexing, semantic search) goes through
+one shared httpx connection pool. Concurrent single-text requests are coalesced by
+a short batching window into multi-input calls:
+  - Ollama:  POST /api/embed      {"model": ..., "input": [...]}
+  - Gateway: POST /v1/embeddings  {"model": ..., "input": [...]}
+Older Ollama builds without /api/embed fall back to per-text /api/embeddings.
+When a PersistentEmbeddingCache is attached, cache hits never reach the queue.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger("agent_runner.embedding_service")
+
+OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://127.0.0.1:11434").rstrip("/")
+GATEWAY_BASE = os.getenv("GATEWAY_BASE", "http://127.0.0.1:5455")
+ROUTER_AUTH_TOKEN = os.getenv("ROUTER_AUTH_TOKEN")
+DEFAULT_EMBED_MODEL = "ollama:mxbai-embed-large:latest"
+
+EMBED_MAX_BATCH = int(os.getenv("EMBED_MAX_BATCH", "64"))  # Texts per upstream call
+EMBED_BATCH_WINDOW_S = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5")) / 1000.0  # Coalescing window
+EMBED_MAX_CONCURRENT_BATCHES = 4  # Upstream calls in flight at once
+EMBED_TIMEOUT_S = 30.0
+
+
+class EmbeddingService:
+    """
+    Shared embedding client with a micro-batching queue.
+
+    Callers await get_embedding()/get_embeddings(); a single worker drains the queue,
+    groups pending texts by model and sends them as one request per group.
+    Results are raw vectors (or None on failure) - normalization is the caller's job.
+    """
+
+    def __init__(self, state=None, max_batch: int = EMBED_MAX_BATCH, batch_window: float = EMBED_BATCH_WINDOW_S, cache=None):
+        self.state = state
+        self.cache = cache  # Optional common.caching.PersistentEmbeddingCache
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._batch_semaphore: Optional[asyncio.Semaphore] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._legacy_ollama = False  # Set when /api/embed is unavailable
+        self.stats = {"texts": 0, "batches": 0, "upstream_calls": 0, "failures": 0, "max_batch_seen": 0}
+
+    @property
+    def model(self) -> str:
+        return self.state.embedding_model if self.state else DEFAULT_EMBED_MODEL
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=EMBED_TIMEOUT_S,
+                limits=httpx.Limits(max_keepalive_connections=EMBED_MAX_CONCURRENT_BATCHES, max_connections=EMBED_MAX_CONCURRENT_BATCHES * 2),
+            )
+        return self._client
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._batch_semaphore = asyncio.Semaphore(EMBED_MAX_CONCURRENT_BATCHES)
+            self._worker = asyncio.create_task(self._batch_loop())
+
+    async def get_embedding(self, text: Any) -> Optional[List[float]]:
+        """Embed one text. Concurrent callers are coalesced into shared upstream calls."""
+        if isinstance(text, list):
+            logger.warning(f"EmbeddingService: received LIST (len={len(text)}). Joining with newlines.")
+            text = "\n".join(str(t) for t in text)
+        text = str(text)
+        model = self.model
+        if self.cache is not None:
+            if not self.cache.loaded:
+                # Header scan + cross-process flock: keep it off the event loop
+                await asyncio.to_thread(self.cache.open)
+            cached = self.cache.get(model, text)
+            if cached is not None:
+                return cached
+
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((model, text, future))
+        vector = await future
+
+        if self.cache is not None and vector:
+            if self.cache.needs_activation(model, len(vector)):
+                await asyncio.to_thread(self.cache.activate, model, len(vector))
+            self.cache.set(model, text, vector)
+            if self.cache.needs_flush():
+                await asyncio.to_thread(self.cache.write_index, self.cache.index_snapshot())
+        return vector
+
+    async def get_embeddings(self, texts: List[Any]) -> List[Optional[List[float]]]:
+        """Embed many texts; they are queued together and sent in max_batch sized calls."""
+        if not texts:
+            return []
+        return list(await asyncio.gather(*(self.get_embedding(t) for t in texts)))
+
+    async def _batch_loop(self) -> None:
+        while True:
+            first = await self._queue.get()
+            batch = [first]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Drain anything already queued without waiting further
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            await self._batch_semaphore.acquire()
+            task = asyncio.create_task(self._run_batch(batch))
+            task.add_done_callback(lambda _t: self._batch_semaphore.release())
+
+    async def _run_batch(self, batch: List[Tuple[str, str, asyncio.Future]]) -> None:
+        by_model: Dict[str, List[Tuple[str, asyncio.Future]]] = {}
+        for model, text, future in batch:
+            by_model.setdefault(model, []).append((text, future))
+
+        self.stats["batches"] += 1
+        self.stats["texts"] += len(batch)
+        self.stats["max_batch_seen"] = max(self.stats["max_batch_seen"], len(batch))
+
+        for model, items in by_model.items():
+            texts = [text for text, _ in items]
+            try:
+                vectors = await self._embed_batch(model, texts)
+            except Exception as e:
+                logger.warning(f"Failed to get embedding batch ({len(texts)} texts): {e}")
+                vectors = [None] * len(texts)
+            for (_, future), vector in zip(items, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    async def _embed_batch(self, model: str, texts: List[str]) -> List[Optional[List[float]]]:
+        # Direct Ollama Bypass (Reliability)
+        if "ollama" in model or "mxbai" in model:
+            vectors = await self._embed_ollama(model.replace("ollama:", ""), texts)
+            if vectors is not None:
+                return vectors
+            # Fallthrough to Gateway
+
+        breaker = getattr(self.state, "mcp_circuit_breaker", None) if self.state else None
+        if breaker and not breaker.is_allowed(model):
+            logger.warning(f"Embedding Short-Circuited: Model '{model}' is broken.")
+            return [None] * len(texts)
+
+        headers = {}
+        if ROUTER_AUTH_TOKEN:
+            headers["Authorization"] = f"Bearer {ROUTER_AUTH_TOKEN}"
+        try:
+            self.stats["upstream_calls"] += 1
+            resp = await self._get_client().post(
+                f"{GATEWAY_BASE}/v1/embeddings",
+                json={"model": model, "input": texts},
+                headers=headers,
+                timeout=EMBED_TIMEOUT_S,
+            )
+            if resp.status_code == 200:
+                if breaker:
+                    breaker.record_success(model)
+                data = sorted(resp.json().get("data", []), key=lambda d: d.get("index", 0))
+                vectors = [d.get("embedding") for d in data]
+                if len(vectors) == len(texts):
+                    return vectors
+                logger.warning(f"Gateway returned {len(vectors)} embeddings for {len(texts)} inputs")
+            else:
+                logger.warning(f"Embedding failed HTTP {resp.status_code}: {resp.text}")
+        except Exception as e:
+            logger.warning(f"Failed to get embedding: {e}")
+
+        self.stats["failures"] += 1
+        if breaker:
+            breaker.record_failure(model)
+        return [None] * len(texts)
+
+    async def _embed_ollama(self, model: str, texts: List[str]) -> Optional[List[Optional[List[float]]]]:
+        client = self._get_client()
+        try:
+            if not self._legacy_ollama:
+                self.stats["upstream_calls"] += 1
+                resp = await client.post(f"{OLLAMA_BASE}/api/embed", json={"model": model, "input": texts}, timeout=EMBED_TIMEOUT_S)
+                if resp.status_code == 200:
+                    vectors = resp.json().get("embeddings") or []
+                    if len(vectors) == len(texts):
+                        return vectors
+                    logger.warning(f"Ollama returned {len(vectors)} embeddings for {len(texts)} inputs")
+                    return None
+                if resp.status_code != 404:
+                    logger.warning(f"Ollama Direct Embedding failed {resp.status_code}: {resp.text}")
+                    return None
+                logger.info("Ollama /api/embed not available; using legacy /api/embeddings")
+                self._legacy_ollama = True
+
+            async def _one(text: str) -> Optional[List[float]]:
+                self.stats["upstream_calls"] += 1
+                r = await client.post(f"{OLLAMA_BASE}/api/embeddings", json={"model": model, "prompt": text}, timeout=EMBED_TIMEOUT_S)
+                return r.json().get("embedding") if r.status_code == 200 else None
+
+            vectors = await asyncio.gather(*(_one(t) for t in texts))
+            return None if all(v is None for v in vectors) else list(vectors)
+        except Exception as e:
+            logger.warning(f"Ollama Direct failed: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats["avg_batch_size"] = round(stats["texts"] / stats["batches"], 2) if stats["batches"] else 0.0
+        if self.cache is not None:
+            stats["cache"] = self.cache.get_stats()
+        return stats
+
+    async def aclose(self) -> None:
+        if self._worker and not self._worker.done():
+            self._worker.cancel()
+        if self._client and not self._client.is_closed:
+            await self._client.aclose()
+        if self.cache is not None:
+            self.cache.flush()
+
+
+_fallback_service: Optional[EmbeddingService] = None
+
+
+def get_embedding_service(state=None) -> EmbeddingService:
+    """Shared service: MemoryServer's instance when available, else a process-wide one."""
+    global _fallback_service
+    memory = getattr(state, "memory", None) if state else None
+    if memory is not None and getattr(memory, "embedder", None) is not None:
+        return memory.embedder
+    if _fallback_service is None:
+        from common.caching import get_persistent_embedding_cache
+        _fallback_service = EmbeddingService(state, cache=get_persistent_embedding_cache())
+    return _fallback_service
@@ -14,6 +14,10 @@ import agent_runner.intent as intent
 from agent_runner.executor import ToolExecutor
 from common.notifications import notify_critical
 from common.budget import get_budget_tracker
+from common.caching import get_request_coalescer
+from common.model_profiles import get_model_profiles
+from common.ollama_residency import get_residency_scheduler
+from common.sse_stream import SSEFrameParser, StreamChunk, stream_confidence, DONE as SSE_DONE
 from common.constants import (
     OBJ_MODEL, ROLE_SYSTEM, ROLE_TOOL,
     DEFAULT_FALLBACK_MODEL, DEFAULT_CONTEXT_PRUNE_LIMIT
@@ -25,10 +29,16 @@ from agent_runner.nexus import Nexus
 from agent_runner.hallucination_detector import HallucinationDetector, DetectorConfig
 from agent_runner.knowledge_base import KnowledgeBase
 from agent_runner.memory_client import DirectMemoryClient
-import math
+from agent_runner.prefix_cache import PromptSegmentCache
 
 logger = logging.getLogger("agent_runner")
 STREAM_DEBUG_ENABLED = os.getenv("STREAM_DEBUG", "").lower() in ("1", "true", "yes")
+# Request logprobs for the stream confidence score (costs payload size on every token)
+STREAM_LOGPROBS_ENABLED = os.getenv("STREAM_LOGPROBS", "true").lower() in ("1", "true", "yes")
+# Architecture facts have no change signal, so their prompt segment is re-read at most this often
+ARCH_CONTEXT_SEGMENT_TTL = int(os.getenv("ARCH_CONTEXT_SEGMENT_TTL", "300"))
+# Segments making up the cacheable static prefix, in prompt order
+STATIC_PREFIX_SEGMENTS = ("static", "tool_menu", "architecture")
 
 
 def _redact_preview(text: Any) -> str:
@@ -40,6 +50,24 @@ def _redact_preview(text: Any) -> str:
     preview = re.sub(r"[A-Za-z0-9]{16,}", "***", preview)
     return preview[:80]
 
+
+def _with_context_appended(user_messages: List[Dict[str, Any]], context: str) -> List[Dict[str, Any]]:
+    """
+    Copy-on-write: a new list sharing every history message except the last
+    user message, which is replaced by a shallow copy carrying `context`.
+    """
+    messages = list(user_messages)
+    if messages and messages[-1].get("role") == "user" and context:
+        last = messages[-1]
+        content = last.get("content")
+        if isinstance(content, list):
+            content = content + [{"type": "text", "text": context}]
+        else:
+            content = (content or "") + context
+        messages[-1] = {**last, "content": content}
+    return messages
+
+
 class AgentEngine:
     def __init__(self, state: AgentState, memory_client=None):
         self.state = state
@@ -54,6 +82,9 @@ class AgentEngine:
         self._conversation_cache_size = 10  # Cache up to 10 conversations
         self._initialized = False
 
+        # Memoized prompt segments (static instructions, tool menu, architecture, alerts)
+        self.prompt_segments = PromptSegmentCache()
+
         # Initialize hallucination detection system
         detector_config = DetectorConfig(
             enabled=self.state.hallucination_detection_enabled,
@@ -196,6 +227,10 @@ class AgentEngine:
         """Delegate discovery to executor."""
         await self.executor.discover_mcp_tools()
 
+    async def start_mcp_discovery(self) -> bool:
+        """Delegate boot discovery (snapshot warm start) to executor."""
+        return await self.executor.start_mcp_discovery()
+
     async def get_all_tools(self, messages: Optional[List[Dict[str, Any]]] = None) -> List[Dict[str, Any]]:
         """Delegate tool gathering to executor."""
         return await self.executor.get_all_tools(messages)
@@ -283,25 +318,10 @@ class AgentEngine:
             payload.update(kwargs)
 
             # [Optimization] Inject Context Window Limit
-            # Smart Context Sizing: Allocate VRAM where it matters (Brain) and save it elsewhere.
-            # Smart Context Sizing: Allocate VRAM where it matters (Brain) and save it elsewhere.
-            CONTEXT_WINDOW_MAP = {
-                "llama3.3:70b": 32768,      # Brain (Deep Context)
-                "ollama:llama3.3:70b": 32768, # Brain (Deep Context - Prefix Variant)
-                "qwen2.5:32b": 32768,        # 32k Unified
-                "ollama:qwen2.5:32b": 32768,
-                "llama3.1:latest": 32768,    # 32k Unified
-                "ollama:llama3.1:latest": 32768,
-                "llama3.2:latest": 32768,    # 32k Unified
-                "ollama:llama3.2:latest": 32768,
-                "llama3.2-vision:latest": 32768, # 32k Unified
-                "ollama:llama3.2-vision:latest": 32768,
-                "qwen2.5:7b-instruct": 32768, # 32k Unified
-                "ollama:qwen2.5:7b-instruct": 32768,
-            }
-
-            # Determine target context: Use Map -> Fallback to Env -> Default 32k
-            target_ctx = CONTEXT_WINDOW_MAP.get(final_model, int(os.getenv("OLLAMA_NUM_CTX", "32768")))
+            # One profile per model (shared with the router) so num_ctx never diverges and forces a reload
+            target_ctx = get_model_profiles().resolve(attempt_model).num_ctx
+            # Interactive use keeps the residency scheduler's view current so background work waits
+            get_residency_scheduler().touch(attempt_model)
 
             if "options" not in payload:
                 payload["options"] = {"num_ctx": target_ctx}
@@ -318,10 +338,13 @@ class AgentEngine:
                 logger.debug(f"Cost audit logging failed: {e}")
             
             try:
-                # 3. Attempt Call
-                resp = await client.post(url, json=payload, headers=headers, timeout=self.state.http_timeout)
-                resp.raise_for_status()
-                data = resp.json()
+                # 3. Attempt Call (identical in-flight payloads share one upstream request)
+                async def _post(url=url, payload=payload):
+                    resp = await client.post(url, json=payload, headers=headers, timeout=self.state.http_timeout)
+                    resp.raise_for_status()
+                    return resp.json()
+
+                data = await get_request_coalescer().run({"url": url, **payload}, _post)
                 
                 # 4. Success -> Record and Return
                 self.state.mcp_circuit_breaker.record_success(attempt_model)
@@ -399,6 +422,11 @@ class AgentEngine:
         if not hasattr(self, "registry_cache") or self.registry_cache is None:
             await self._load_registry_cache()
 
+        # Registry edits reset registry_cache, which changes the version key
+        version = (self.state.internet_available, getattr(self, "registry_cache", None))
+        return await self.prompt_segments.get("static", version, self._render_static_prompt)
+
+    async def _render_static_prompt(self) -> str:
         # Build the base instructions based on internet availability
         env_instructions = get_base_system_instructions(self.state.internet_available)
 
@@ -554,8 +582,7 @@ class AgentEngine:
                 memory_status_msg = f"\nSYSTEM ALERT: Long-term memory retrieval failed ({str(e)}). Context injection skipped."
 
         # Check for service outages via circuit breaker
-        open_breakers = [name for name, b in self.state.mcp_circuit_breaker.get_status().items() if b["state"] == "open"]
-        service_alerts = get_service_alerts(open_breakers, memory_status_msg)
+        service_alerts = await self._get_service_alerts(memory_status_msg)
 
         # Files Context
         upload_dir = os.path.join(self.state.agent_fs_root, "uploads")
@@ -708,15 +735,8 @@ class AgentEngine:
         # Construct Messages
         messages = [{"role": ROLE_SYSTEM, "content": static_system_prompt}]
 
-        # Clone user messages to avoid mutating the input list
-        import copy
-        processed_user_messages = copy.deepcopy(user_messages)
-
-        # Inject Dynamic Context into the LAST User Message
-        if processed_user_messages and processed_user_messages[-1].get("role") == "user":
-            processed_user_messages[-1]["content"] += dynamic_context
-
-        messages += processed_user_messages
+        # Inject Dynamic Context into the LAST User Message (input list is not mutated)
+        messages += _with_context_appended(user_messages, dynamic_context)
         return messages, static_system_prompt
 
     async def _construct_message_sequence(self, user_messages: List[Dict[str, Any]], skip_refinement: bool) -> Tuple[List[Dict[str, Any]], str]:
@@ -735,29 +755,20 @@ class AgentEngine:
             (messages, cache_identifier, dynamic_diff)
         """
         # PHASE 3: Build static prefix for caching
-        static_prefix = await self._build_static_prefix(user_messages, skip_refinement)
+        static_prefix, prefix_hash = await self._build_static_prefix(user_messages, skip_refinement)
 
         # Get cache identifier (creates cache if needed)
         cache_identifier, is_new_cache = await self.prefix_cache.get_or_create_cache(
-            static_prefix, conversation_id
+            static_prefix, conversation_id, prefix_hash=prefix_hash
         )
 
         # Build dynamic conversation diff
         dynamic_diff = await self._build_dynamic_conversation_diff(user_messages, conversation_state, skip_refinement)
 
         # For cached prefixes, we only send the dynamic diff
-        # The prefix is referenced by cache_identifier
-        messages = []
-
-        # Add user messages with dynamic context injected
-        import copy
-        processed_user_messages = copy.deepcopy(user_messages)
-
-        # Inject dynamic context into the LAST user message
-        if processed_user_messages and processed_user_messages[-1].get("role") == "user":
-            processed_user_messages[-1]["content"] += dynamic_diff
-
-        messages += processed_user_messages
+        # The prefix is referenced by cache_identifier.
+        # Inject dynamic context into the LAST user message (history is shared, not copied)
+        messages = _with_context_appended(user_messages, dynamic_diff)
 
         # Log cache performance
         cache_status = "NEW_CACHE" if is_new_cache else "CACHE_HIT"
@@ -765,17 +776,25 @@ class AgentEngine:
 
         return messages, cache_identifier, dynamic_diff
 
-    async def _build_static_prefix(self, user_messages: List[Dict[str, Any]], skip_refinement: bool) -> str:
-        """Build the static prefix that gets cached (PHASE 3)"""
+    async def _build_static_prefix(self, user_messages: List[Dict[str, Any]], skip_refinement: bool) -> Tuple[str, str]:
+        """
+        Build the static prefix that gets cached (PHASE 3).
+
+        Each part is a memoized segment, so only segments whose version key
+        changed are rebuilt. Returns (prefix, fingerprint); the fingerprint is
+        derived from per-segment digests and identifies the prefix without
+        hashing it.
+        """
         prefix_parts = []
 
         # 1. System instructions (static)
         static_system = await self._get_static_prompt()
         prefix_parts.append(f"[SYSTEM PROMPT - STATIC/CACHED]\n{static_system}")
 
-        # 2. Available tools (changes when tools change, but cached per combination)
-        # Note: In a full implementation, this would be included in the cache key
-        # For now, we'll focus on the core system prompt caching
+        # 2. Available tools (rebuilt by MCP discovery; the summary string is its own version)
+        tool_menu = await self._get_tool_menu()
+        if tool_menu:
+            prefix_parts.append(f"[AVAILABLE TOOLS - STATIC/CACHED]\n{tool_menu}")
 
         # 3. Architecture context (stable from Phase 1)
         try:
@@ -785,7 +804,27 @@ class AgentEngine:
         except Exception as e:
             logger.debug(f"Architecture context not available for prefix: {e}")
 
-        return "\n\n".join(prefix_parts)
+        return "\n\n".join(prefix_parts), self.prompt_segments.fingerprint(STATIC_PREFIX_SEGMENTS)
+
+    async def _get_tool_menu(self) -> str:
+        """Tool menu segment (executor.tool_menu_summary, memoized on the summary itself)."""
+        summary = getattr(self.executor, "tool_menu_summary", "") or ""
+
+        async def build() -> str:
+            return summary
+
+        return await self.prompt_segments.get("tool_menu", summary, build)
+
+    async def _get_service_alerts(self, memory_status_msg: str = "") -> str:
+        """Service alert segment, keyed by the set of open circuit breakers."""
+        open_breakers = tuple(sorted(
+            name for name, b in self.state.mcp_circuit_breaker.get_status().items() if b["state"] == "open"
+        ))
+
+        async def build() -> str:
+            return get_service_alerts(list(open_breakers), memory_status_msg)
+
+        return await self.prompt_segments.get("alerts", (open_breakers, memory_status_msg), build)
 
     async def _build_dynamic_conversation_diff(self, user_messages: List[Dict[str, Any]],
                                              conversation_state, skip_refinement: bool) -> str:
@@ -813,8 +852,7 @@ class AgentEngine:
         dynamic_parts.append(f"\n[CURRENT CONTEXT - DYNAMIC]\n{context_header}")
 
         # Service alerts (can change but usually stable)
-        open_breakers = [name for name, b in self.state.mcp_circuit_breaker.get_status().items() if b["state"] == "open"]
-        service_alerts = get_service_alerts(open_breakers, "")
+        service_alerts = await self._get_service_alerts()
         if service_alerts:
             dynamic_parts.append(f"\n[SYSTEM ALERTS - DYNAMIC]\n{service_alerts}")
 
@@ -870,8 +908,7 @@ class AgentEngine:
         context_appendix.append(f"\n[CURRENT CONTEXT]\n{dynamic_header}")
 
         # Service alerts (can change but usually stable)
-        open_breakers = [name for name, b in self.state.mcp_circuit_breaker.get_status().items() if b["state"] == "open"]
-        service_alerts = get_service_alerts(open_breakers, "")
+        service_alerts = await self._get_service_alerts()
         if service_alerts:
             context_appendix.append(f"\n[SYSTEM ALERTS]\n{service_alerts}")
 
@@ -1186,6 +1223,12 @@ class AgentEngine:
 
     async def _get_architecture_context(self) -> str:
         """Get architecture context facts in parallel-friendly format with caching."""
+        version = int(time.time() // ARCH_CONTEXT_SEGMENT_TTL) if ARCH_CONTEXT_SEGMENT_TTL > 0 else time.time()
+        return await self.prompt_segments.get(
+            "architecture", version, self._render_architecture_context, keep_empty=False
+        )
+
+    async def _render_architecture_context(self) -> str:
         try:
             # PHASE 4: Use memory cache for architecture facts (changes infrequently)
             arch_facts = await self.memory_cache.query_facts_cached(
@@ -1673,7 +1716,7 @@ class AgentEngine:
         return response
 
     async def call_gateway_streaming(self, messages: List[Dict[str, Any]], model: Optional[str] = None, tools: Optional[List[Dict[str, Any]]] = None):
-        """Yields SSE events from the Model Gateway."""
+        """Yields StreamChunk objects (lazily decoded SSE events) from the Model Gateway."""
         target_model = model or self.state.agent_model
 
         # Offline Fallback
@@ -1711,13 +1754,14 @@ class AgentEngine:
                 "tool_choice": "auto",
                 "stream": True,
                 "stream_options": {"include_usage": True}, # Request precise billing data
-                "logprobs": True, # Request confidence data
-                "top_logprobs": 1
             }
+            if STREAM_LOGPROBS_ENABLED:
+                payload["logprobs"] = True # Request confidence data
+                payload["top_logprobs"] = 1
 
-            # [Optimization] Inject Context Window Limit
-            # Default to 32768 to match Resident Model Policy (Formula 1)
-            target_ctx = int(os.getenv("OLLAMA_NUM_CTX", "32768"))
+            # [Optimization] Inject Context Window Limit (model profile, Resident Model Policy)
+            target_ctx = get_model_profiles().resolve(attempt_model).num_ctx
+            get_residency_scheduler().touch(attempt_model)
             if "options" not in payload:
                 payload["options"] = {"num_ctx": target_ctx}
             elif "num_ctx" not in payload["options"]:
@@ -1734,65 +1778,52 @@ class AgentEngine:
                 finish_reason = None
                 provider_req_id = None
 
-                # Confidence Calculation
-                total_prob = 0.0
-                confidence_count = 0
+                # Confidence: logprob chunks are kept and only decoded once, after the stream
+                logprob_chunks = []
 
                 # Streaming Call
                 async with client.stream("POST", url, json=payload, headers=headers, timeout=self.state.http_timeout) as response:
                     response.raise_for_status()
                     provider_req_id = response.headers.get("x-request-id", "")
 
-                    async for line in response.aiter_lines():
-                        if not line.strip():
-                            continue
-                        if line.startswith("data: "):
-                            data_str = line[6:]
-                            if data_str == "[DONE]":
+                    parser = SSEFrameParser()
+                    done = False
+                    async for raw in response.aiter_bytes():
+                        for data_bytes in parser.feed(raw):
+                            if data_bytes == SSE_DONE:
+                                done = True
                                 break
-                            try:
-                                data = json.loads(data_str)
-
-                                # 1. Capture Usage (if present)
-                                if "usage" in data and data["usage"]:
-                                    exact_usage = data["usage"]
-
-                                # 2. Capture Content & Finish Reason
-                                if "choices" in data and len(data["choices"]) > 0:
-                                    choice = data["choices"][0]
-                                    delta = choice.get("delta", {})
-
-                                    # TTFT Check
-                                    if delta.get("content") and t_first is None:
+                            if not data_bytes.startswith(b"{"):
+                                continue
+                            chunk = StreamChunk(data_bytes)
+
+                            # 1. Capture Usage (if present; usually only the final chunk)
+                            usage = chunk.usage
+                            if usage:
+                                exact_usage = usage
+
+                            # 2. Capture Content & Finish Reason
+                            if chunk.has_choices:
+                                # TTFT Check
+                                if chunk.content:
+                                    if t_first is None:
                                         t_first = time.time()
                                         first_latency = (t_first - t0_stream) * 1000
                                         logger.info(f"PERF: ⚡ STREAM INITIALIZED. TTFT: {first_latency:.2f}ms")
-                                    if delta.get("content"):
-                                        token_count += 1
-
-                                    if choice.get("finish_reason"):
-                                        finish_reason = choice.get("finish_reason")
-
-                                    # 3. Capture Logprobs (Confidence)
-                                    # OpenAI/Grok format: choices[0].logprobs.content[].logprob
-                                    if choice.get("logprobs") and choice["logprobs"].get("content"):
-                                        # Note: In streaming, 'content' might be a list of 1 item corresponding to the delta
-                                        # But usually logprobs come with the token.
-                                        # Check format: 'logprobs': {'content': [{'token': 'The', 'logprob': -0.001, ...}]}
-                                        content_probs = choice["logprobs"].get("content", [])
-                                        for cp in content_probs:
-                                            if "logprob" in cp:
-                                                # Convert log-prob to linear prob: e^logprob
-                                                # -0.001 -> 0.999
-                                                try:
-                                                    prob = math.exp(cp["logprob"])
-                                                    total_prob += prob
-                                                    confidence_count += 1
-                                                except: pass # overflow/math error
-
-                                yield data
-                            except Exception:
-                                pass
+                                    token_count += 1
+
+                                chunk_finish = chunk.finish_reason
+                                if chunk_finish:
+                                    finish_reason = chunk_finish
+
+                                # 3. Capture Logprobs (Confidence) - decoded lazily at the end
+                                # OpenAI/Grok format: choices[0].logprobs.content[].logprob
+                                if STREAM_LOGPROBS_ENABLED and chunk.has_logprobs:
+                                    logprob_chunks.append(chunk)
+
+                            yield chunk
+                        if done:
+                            break
 
                 # If we finished the stream successfully
                 duration = time.time() - t0_stream
@@ -1800,7 +1831,7 @@ class AgentEngine:
                 tps = token_count / max(0.1, duration)
 
                 # Calculate Confidence
-                avg_confidence = (total_prob / confidence_count) if confidence_count > 0 else 0.0
+                avg_confidence = stream_confidence(logprob_chunks) or 0.0
 
                 # Prepare Metadata
                 meta = {
@@ -1834,7 +1865,7 @@ class AgentEngine:
 
                     cost = tracker.estimate_cost(attempt_model, p_tok, c_tok)
                     if cost > 0:
-                        tracker.record_usage("agent_runner", cost)
+                        tracker.record_usage("agent_runner", cost, model=attempt_model, request_type="agent_stream")
                         meta["cost_usd"] = round(cost, 6)
                 except Exception as budget_e:
                     logger.warning(f"Failed to record budget cost: {budget_e}")
@@ -1902,32 +1933,35 @@ class AgentEngine:
             has_started_thinking = False
             try:
                 async for chunk in self.call_gateway_streaming(messages, model, active_tools):
-                    if not chunk.get("choices") or len(chunk["choices"]) == 0:
+                    if isinstance(chunk, dict):
+                        chunk = StreamChunk.from_dict(chunk)
+                    if not chunk.has_choices:
                         continue
 
-                    delta = chunk["choices"][0].get("delta", {})
+                    token = chunk.content
 
                     if STREAM_DEBUG_ENABLED:
+                        delta = chunk.data["choices"][0].get("delta", {})
                         logger.info(
                             f"[STREAM_DEBUG] delta_keys={list(delta.keys())} "
-                            f"content_preview={_redact_preview(delta.get('content'))}"
+                            f"content_preview={_redact_preview(token)}"
                         )
 
                     # A. Content Token
-                    if "content" in delta and delta["content"]:
-                        token = delta["content"]
+                    if token:
                         current_content += token
                         content_emitted = True
                         yield {"type": "token", "content": token}
 
                     # B. Tool Calls (Accumulation)
-                    if "tool_calls" in delta and delta["tool_calls"]:
+                    tool_call_deltas = chunk.tool_calls
+                    if tool_call_deltas:
                         # Emit one-time thinking start signal
                         if not has_started_thinking:
                             yield {"type": "thinking_start", "count": 1}
                             has_started_thinking = True
 
-                        for tc_chunk in delta["tool_calls"]:
+                        for tc_chunk in tool_call_deltas:
                             idx = tc_chunk.get("index") # usually 0 or int
                             if idx is None:
                                 idx = 0 # Safety for some providers
@@ -9,6 +9,7 @@ import httpx
 from agent_runner.state import AgentState
 from agent_runner.quality_tiers import QualityTier, get_tier_config
 from agent_runner.tool_categories import detect_query_capabilities, get_tools_for_capabilities, resolve_capability_conflicts
+from agent_runner.tool_catalog import QUERY_DOMAINS, QUERY_KEYWORD_CATEGORIES, ToolCatalog
 from agent_runner.tools import fs as fs_tools
 from agent_runner.tools import mcp as mcp_tools
 from agent_runner.tools import system as system_tools
@@ -36,6 +37,20 @@ from common.unified_tracking import track_event, EventSeverity, EventCategory
 
 logger = logging.getLogger("agent_runner.executor")
 
+# On-disk tool catalog (system/tool_registry.json); bump when the layout changes
+TOOL_CATALOG_SNAPSHOT_VERSION = 2
+# Serve the last snapshot at boot and refresh MCP servers in the background
+MCP_WARM_START = os.getenv("MCP_WARM_START", "true").lower() in ("1", "true", "yes")
+# Servers discovered concurrently (each server is still serialized on its own lock)
+MCP_DISCOVERY_CONCURRENCY = max(1, int(os.getenv("MCP_DISCOVERY_CONCURRENCY", "8")))
+
+
+def _server_config_fingerprint(cfg: Dict[str, Any]) -> str:
+    """Identity of a server's launch config; snapshot entries for a changed config are discarded."""
+    import hashlib
+    stable = {k: v for k, v in cfg.items() if k not in ("env", "enabled", "disabled_reason")}
+    return hashlib.sha1(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()[:12]
+
 class ToolExecutor:
     def __init__(self, state: AgentState):
         self.state = state
@@ -44,12 +59,20 @@ class ToolExecutor:
         # Future: Integrate with CacheInvalidator for automatic TTL and DB timestamp validation.
         self.mcp_tool_cache: Dict[str, List[Dict[str, Any]]] = {}
         self.tool_menu_summary = ""
+        # Servers whose cached tools came from the on-disk snapshot and are not yet confirmed live
+        self._snapshot_servers: set = set()
+        self._server_discovery_locks: Dict[str, asyncio.Lock] = {}
+        self._background_discovery: Optional[asyncio.Task] = None
         self.tool_impls = self._init_tool_impls()
 
         # [CONTEXT-DIET] Store definitions by category for dynamic loading
         self.tool_categories = self._init_tool_categories()
         # Flat list for legacy support / fallback
         self.tool_definitions = [t for cats in self.tool_categories.values() for t in cats]
+        # Indexed catalog, rebuilt only when the tool set changes (see _get_catalog)
+        self._catalog: Optional[ToolCatalog] = None
+        self._catalog_key: Optional[tuple] = None
+        self._catalog_version = 0
 
     def _init_tool_impls(self) -> Dict[str, Any]:
         return {
@@ -763,9 +786,9 @@ class ToolExecutor:
             logger.info(f"[{server_name}] Already initialized with cached tools; skipping rediscovery.")
             return True
 
-        # Protect caches: if we already have tools cached for this server, avoid disabling on refresh failures
+        # Protect caches: if we already have live tools cached for this server, avoid disabling on refresh failures
         effective_disable_on_failure = disable_on_failure
-        if server_name in self.mcp_tool_cache:
+        if server_name in self.mcp_tool_cache and server_name not in self._snapshot_servers:
             effective_disable_on_failure = False
 
         from agent_runner.tools.mcp import perform_pulse_check, PulseCheckFailed, tool_mcp_proxy # Added imports
@@ -838,7 +861,7 @@ class ToolExecutor:
                             "parameters": rt.get("inputSchema", {"type": "object", "properties": {}})
                         }
                     })
-                self.mcp_tool_cache[server_name] = defs
+                self._store_server_tools(server_name, defs)
 
                 logger.info(f"✅ Discovered {len(defs)} tools from MCP server '{server_name}'")
                 
@@ -932,13 +955,157 @@ class ToolExecutor:
                     pass
                 return False
 
+    def _store_server_tools(self, server_name: str, tools: Optional[List[Dict[str, Any]]]):
+        """
+        Publish one server's tools (None removes the server).
+
+        The catalog dict is replaced rather than mutated, so readers iterating
+        mcp_tool_cache across an await never see a half-updated catalog.
+        """
+        catalog = dict(self.mcp_tool_cache)
+        if tools is None:
+            catalog.pop(server_name, None)
+        else:
+            catalog[server_name] = tools
+        self.mcp_tool_cache = catalog
+        self._snapshot_servers.discard(server_name)
+
+    def remove_server_tools(self, server_name: str) -> List[Dict[str, Any]]:
+        """Unpublish a removed/disabled server's tools (catalog swap, menu and vector index). Returns them."""
+        removed = self.mcp_tool_cache.get(server_name)
+        if removed is None:
+            return []
+        self._store_server_tools(server_name, None)
+        self._build_tool_menu()
+        if getattr(self.state, "vector_store", None):
+            self.state.vector_store.remove_tools([t.get("function", {}).get("name") for t in removed or []])
+        return removed or []
+
+    def _tool_registry_path(self) -> str:
+        return os.path.join(self.state.agent_fs_root, "system", "tool_registry.json")
+
+    def _build_tool_menu(self):
+        menu_lines = []
+        for srv, tools in self.mcp_tool_cache.items():
+            if not tools:
+                continue
+            # [FIX] Include ALL servers (including Core) in the menu
+            # Improve Menu: Include first tool description for context
+            desc = (tools[0]["function"].get("description") or "")[:60] + "..."
+            t_names = [t["function"]["name"] for t in tools[:5]]
+            menu_lines.append(f"- Server '{srv}': {desc}\n  Tools: {', '.join(t_names)}")
+
+        if menu_lines:
+            self.tool_menu_summary = "\n".join(menu_lines)
+        else:
+            self.tool_menu_summary = "(No external tools available)"
+
+    def _persist_tool_registry(self):
+        """Write the catalog snapshot (atomically: temp file + rename)."""
+        # [FEATURE REQUEST]: Formally track all functions.
+        # We persist the full registry to disk so the Agent can "read about itself".
+        try:
+            registry_path = self._tool_registry_path()
+            os.makedirs(os.path.dirname(registry_path), exist_ok=True)
+
+            live = {srv: tools for srv, tools in self.mcp_tool_cache.items() if srv not in self._snapshot_servers}
+            full_registry = {
+                "version": TOOL_CATALOG_SNAPSHOT_VERSION,
+                "timestamp": time.time(),
+                "native_tools": self.tool_definitions,
+                "mcp_tools": live,
+                "server_fingerprints": {
+                    srv: _server_config_fingerprint(self.state.mcp_servers.get(srv, {})) for srv in live
+                }
+            }
+
+            tmp_path = f"{registry_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(full_registry, f, indent=2)
+            os.replace(tmp_path, registry_path)
+
+            logger.info(f"Persisted Tool Registry to {registry_path}")
+        except Exception as e:
+            logger.warning(f"Failed to persist tool registry: {e}")
+
+    def _publish_catalog(self):
+        """Refresh everything derived from mcp_tool_cache (menu, snapshot, vector index)."""
+        self._build_tool_menu()
+        logger.info(f"Generated Maître d' Menu: {self.tool_menu_summary}")
+        self._persist_tool_registry()
+
+        # Keep the in-process tool vector index in step with the discovered catalog
+        if getattr(self.state, "vector_store", None):
+            catalog = [t for cats in self.tool_categories.values() for t in cats]
+            catalog += [t for tools in self.mcp_tool_cache.values() for t in (tools or [])]
+            asyncio.create_task(self.state.vector_store.sync_local_index(catalog))
+
+    def load_tool_snapshot(self) -> int:
+        """
+        Seed mcp_tool_cache from the on-disk catalog snapshot.
+
+        Only enabled servers whose config is unchanged since the snapshot was
+        written are restored. Returns the number of servers restored.
+        """
+        try:
+            with open(self._tool_registry_path(), "r") as f:
+                snapshot = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable tool registry snapshot: {e}")
+            return 0
+
+        if not isinstance(snapshot, dict) or snapshot.get("version") != TOOL_CATALOG_SNAPSHOT_VERSION:
+            logger.info("Tool registry snapshot is from an older layout; cold discovery required")
+            return 0
+
+        fingerprints = snapshot.get("server_fingerprints") or {}
+        catalog = dict(self.mcp_tool_cache)
+        restored = []
+        for server_name, tools in (snapshot.get("mcp_tools") or {}).items():
+            cfg = self.state.mcp_servers.get(server_name)
+            if not cfg or not cfg.get("enabled", True) or server_name in catalog:
+                continue
+            if fingerprints.get(server_name) != _server_config_fingerprint(cfg):
+                continue
+            catalog[server_name] = tools or []
+            restored.append(server_name)
+
+        if restored:
+            self.mcp_tool_cache = catalog
+            self._snapshot_servers.update(restored)
+            self._build_tool_menu()
+            age = time.time() - float(snapshot.get("timestamp") or 0)
+            logger.info(f"Warm start: restored {len(restored)} MCP servers from tool snapshot ({age:.0f}s old)")
+        return len(restored)
+
+    async def start_mcp_discovery(self) -> bool:
+        """
+        Boot entry point for MCP discovery.
+
+        With a usable snapshot the catalog is served immediately and live
+        discovery runs in the background (returns True). Otherwise discovery
+        runs inline, as before (returns False).
+        """
+        if MCP_WARM_START and self.load_tool_snapshot():
+            self._background_discovery = asyncio.create_task(self.discover_mcp_tools())
+            return True
+        await self.discover_mcp_tools()
+        return False
+
+    async def wait_for_discovery(self) -> None:
+        """Wait for the background discovery started by a warm start (no-op otherwise)."""
+        if self._background_discovery is not None:
+            await asyncio.shield(self._background_discovery)
+
     async def discover_mcp_tools(self):
         """Discover tools from all configured MCP servers with improved error handling and retries."""
         logger.info(f"Starting MCP discovery. Servers: {list(self.state.mcp_servers.keys())}")
-        
-        # [FIX] Discover servers with limited parallelism to prevent resource exhaustion
-        import asyncio
-        semaphore = asyncio.Semaphore(1)  # Max 1 concurrent discovery (Sequential Startup to prevent stdio deadlocks)
+
+        # Servers are discovered concurrently; each one is serialized on its own lock (stdio
+        # processes and their locks are per server, so a slow server only delays itself)
+        semaphore = asyncio.Semaphore(MCP_DISCOVERY_CONCURRENCY)
 
         # [FIX] Prevent concurrent discovery runs in the same process
         if not hasattr(self.state, "mcp_discovery_lock"):
@@ -950,75 +1117,38 @@ class ToolExecutor:
 
         try:
             async def discover_with_semaphore(server_name: str, cfg: dict):
-                async with semaphore:
+                server_lock = self._server_discovery_locks.setdefault(server_name, asyncio.Lock())
+                async with semaphore, server_lock:
                     return await self._discover_single_server(server_name, cfg)
-            
+
             # Create discovery tasks
+            names = []
             tasks = []
             for server_name in list(self.state.mcp_servers.keys()):
                 cfg = self.state.mcp_servers[server_name]
-                
+
                 # Skip Disabled Servers
                 if not cfg.get("enabled", True):
                     if server_name in self.mcp_tool_cache:
-                        del self.mcp_tool_cache[server_name]
+                        self._store_server_tools(server_name, None)
                     logger.info(f"Skipping disabled MCP server: {server_name}")
                     continue
-                
+
+                names.append(server_name)
                 tasks.append(discover_with_semaphore(server_name, cfg))
-            
-            # Execute discoveries in parallel (with semaphore limit)
+
             if tasks:
                 results = await asyncio.gather(*tasks, return_exceptions=True)
                 successful = sum(1 for r in results if r is True)
                 logger.info(f"MCP Discovery complete: {successful}/{len(tasks)} servers succeeded")
-            
-            menu_lines = []
-            
-            from agent_runner.constants import CORE_MCP_SERVERS
-            core_servers = CORE_MCP_SERVERS
-            
-            for srv, tools in self.mcp_tool_cache.items():
-                if not tools:
-                    continue
-                # [FIX] Include ALL servers (including Core) in the menu
-                # if srv in core_servers:
-                #    continue
-                
-                # Improve Menu: Include first tool description for context
-                desc = ""
-                if tools:
-                    desc = tools[0]["function"].get("description", "")[:60] + "..."
-                
-                t_names = [t["function"]["name"] for t in tools[:5]]
-                line = f"- Server '{srv}': {desc}\n  Tools: {', '.join(t_names)}"
-                menu_lines.append(line)
-            
-            if menu_lines:
-                self.tool_menu_summary = "\n".join(menu_lines)
-            else:
-                self.tool_menu_summary = "(No external tools available)"
-                
-            logger.info(f"Generated Maître d' Menu: {self.tool_menu_summary}")
-            
-            # [FEATURE REQUEST]: Formally track all functions.
-            # We persist the full registry to disk so the Agent can "read about itself".
-            try:
-                registry_path = os.path.join(self.state.agent_fs_root, "system", "tool_registry.json")
-                os.makedirs(os.path.dirname(registry_path), exist_ok=True)
-                
-                full_registry = {
-                    "timestamp": time.time(),
-                    "native_tools": self.tool_definitions,
-                    "mcp_tools": self.mcp_tool_cache
-                }
-                
-                with open(registry_path, "w") as f:
-                    json.dump(full_registry, f, indent=2)
-                    
-                logger.info(f"Persisted Tool Registry to {registry_path}")
-            except Exception as e:
-                logger.warning(f"Failed to persist tool registry: {e}")
+
+                # Snapshot entries that could not be confirmed live are stale
+                for server_name, result in zip(names, results):
+                    if result is not True and server_name in self._snapshot_servers:
+                        logger.warning(f"[{server_name}] Dropping snapshot tools: live discovery failed")
+                        self._store_server_tools(server_name, None)
+
+            self._publish_catalog()
 
         finally:
             # Release discovery lock
@@ -1096,22 +1226,37 @@ class ToolExecutor:
 
         return tool_recommendations
 
+    def _get_catalog(self) -> ToolCatalog:
+        """
+        Current ToolCatalog. mcp_tool_cache is replaced on every discovery
+        update, so (identity, size) of the two sources detects a changed tool set.
+        """
+        key = (id(self.tool_categories), id(self.mcp_tool_cache), len(self.mcp_tool_cache))
+        if self._catalog is None or key != self._catalog_key:
+            self._catalog_version += 1
+            self._catalog = ToolCatalog(self._catalog_version, self.tool_categories, self.mcp_tool_cache)
+            self._catalog_key = key
+            logger.debug(f"Tool catalog v{self._catalog_version} built ({len(self._catalog)} tools)")
+        return self._catalog
+
     async def get_all_tools(self, messages: Optional[List[Dict[str, Any]]] = None, precomputed_intent: Optional[Dict[str, Any]] = None, quality_tier: Optional['QualityTier'] = None, precomputed_router_analysis: Optional[Any] = None, capability_analysis: Optional[Dict[str, Any]] = None) -> List[Dict[str, Any]]:
         """Combine built-in tools with discovered MCP tools, filtering by Intent Menu via Context Diet.
         
         Args:
             precomputed_intent: If provided, use this instead of classifying again (for parallelism)
         """
+        catalog = self._get_catalog()
+
         # [CONTEXT-DIET] Start with minimal core set
         # Always include CORE (Time/Location), THINKING (Internal Monologue), and EXPLORATION (self-awareness tools)
         tools = []
-        tools.extend(self.tool_categories.get("core", []))
-        tools.extend(self.tool_categories.get("thinking", []))
-        tools.extend(self.tool_categories.get("memory", []))
+        tools.extend(catalog.category("core"))
+        tools.extend(catalog.category("thinking"))
+        tools.extend(catalog.category("memory"))
         # Always include exploration tools (get_component_map, get_active_configuration, get_llm_roles) so AI can answer questions about itself
-        tools.extend(self.tool_categories.get("exploration", []))
+        tools.extend(catalog.category("exploration"))
         # Always include admin tools for system introspection and configuration
-        tools.extend(self.tool_categories.get("admin", []))
+        tools.extend(catalog.category("admin"))
                 
         target_servers = set()
         capability_analysis = None
@@ -1146,14 +1291,10 @@ class ToolExecutor:
                             logger.info(f"⚡️ VECTOR MATCH: Found {len(vector_tools)} tools: {vector_tool_names}")
                             
                             # Add matched tools to the selection list
-                            # The vector store returns 'tool_definition' objects which match our internal format
-                            # We must fetch the FULL definition from our categories because the DB might only have metadata
-                            # Optimization: Use the names to filter from self.tool_definitions
-                            
+                            # We must fetch the FULL definition from the catalog because the DB might only have metadata
                             for vt in vector_tools:
                                 v_name = vt.get("name")
-                                # Find the full implementation
-                                full_tool = next((t for t in self.tool_definitions if t.get("function", {}).get("name") == v_name), None)
+                                full_tool = catalog.native.get(v_name)
                                 if full_tool:
                                     tools.append(full_tool)
                                     target_servers.add(f"vector_match:{v_name}") # Tag for debugging
@@ -1174,39 +1315,27 @@ class ToolExecutor:
         
         # [FEATURE: SYSTEM AWARENESS] Inject Context Tags
         # We classify tools by origin (Local vs Remote) to help Agent reasoning.
-        def _tag_tools(tool_list: List[Dict[str, Any]], tag: str) -> List[Dict[str, Any]]:
-            tagged = []
-            for t in tool_list:
-                # Deep copy to avoid mutating cache
-                if not t: continue
-                new_t = t.copy()
-                if "function" in new_t:
-                    new_t["function"] = new_t["function"].copy()
-                    desc = new_t["function"].get("description", "")
-                    # Prevent double tagging
-                    if not desc.startswith("["):
-                        new_t["function"]["description"] = f"{tag} {desc}"
-                tagged.append(new_t)
-            return tagged
+        # Tagged payloads are prebuilt once per catalog and shared by reference.
 
         # Legacy Maître d' based loading (fallback/compatibility)
         if "filesystem" in target_servers:
-            tools.extend(_tag_tools(self.tool_categories.get("filesystem", []), "[LOCAL SYSTEM]"))
-            tools.extend(_tag_tools(self.tool_categories.get("cleanup", []), "[LOCAL SYSTEM]"))
+            tools.extend(catalog.tagged("filesystem", "[LOCAL SYSTEM]"))
+            tools.extend(catalog.tagged("cleanup", "[LOCAL SYSTEM]"))
 
         if "system" in target_servers or "admin" in target_servers:
-             tools.extend(_tag_tools(self.tool_categories.get("system", []), "[LOCAL SYSTEM]"))
-             tools.extend(_tag_tools(self.tool_categories.get("admin", []), "[LOCAL SYSTEM]"))
+             tools.extend(catalog.tagged("system", "[LOCAL SYSTEM]"))
+             tools.extend(catalog.tagged("admin", "[LOCAL SYSTEM]"))
              
              # Also add Graph tools if system/admin is requested, or if "graph" is explicit
              if "graph" in target_servers or "system" in target_servers:
-                 tools.extend(_tag_tools(self.tool_categories.get("graph", []), "[VISUALIZATION]"))
+                 tools.extend(catalog.tagged("graph", "[VISUALIZATION]"))
 
         if "memory" in target_servers or "project-memory" in target_servers:
              # Memory is internal but safe, maybe [MEMORY] tag? For now leave generic or [INTERNAL]
-             tools.extend(_tag_tools(self.tool_categories.get("memory", []), "[INTERNAL MEMORY]"))
-                
-        for server_name, server_tools in self.mcp_tool_cache.items():
+             tools.extend(catalog.tagged("memory", "[INTERNAL MEMORY]"))
+
+        from agent_runner.constants import CORE_MCP_SERVERS
+        for server_name, payloads in catalog.mcp_payloads.items():
             server_cfg = self.state.mcp_servers.get(server_name, {})
             
             # [FIX] Filter out disabled servers - don't expose their tools to LLM
@@ -1216,7 +1345,6 @@ class ToolExecutor:
             if server_cfg.get("requires_internet") and not self.state.internet_available:
                 continue
 
-            from agent_runner.constants import CORE_MCP_SERVERS
             is_core = server_name in CORE_MCP_SERVERS
             
             # [OPTIMIZATION] Avoid loading 'filesystem' MCP if we already have native tools
@@ -1225,41 +1353,9 @@ class ToolExecutor:
                 is_core = False # Manual override to prevent auto-loading
                 
             if is_core or (server_name in target_servers):
-                # MCP Tools are harder to classify. Core ones like 'fetch' are REMOTE.
-                # Project-specific ones might be Local.
-                # For now, we default to [MCP] to distinguish them.
-                # If specific server is known, we could tag better.
-                tag = "[MCP]"
-                if server_name in ["fetch", "tavily-search", "github"]:
-                    tag = "[REMOTE]"
-                elif server_name in ["postgres", "filesystem-mcp"]: # hypothetical
-                    tag = "[LOCAL SYSTEM]"
-                
-                # [OPTIMIZATION] Filter 'project-memory' tools to reduce context bloat (Latency Fix)
-                # Only expose Core User tools. Hide admin/maintenance tools unless requested.
-                if server_name == "project-memory":
-                    allowed_memory_tools = {
-                        "store_fact", "delete_fact", "query_facts", "semantic_search",
-                        "record_tool_result", "index_tools", "store_source", "list_sources",
-                        "store_advice", "consult_advice"
-                    }
-                    # Filter tools before wrapping
-                    server_tools = [t for t in server_tools if t.get("function", {}).get("name") in allowed_memory_tools]
-                
-                # Wrap and Tag
-                tagged_mcp = _tag_tools(server_tools, tag)
-                
-                for t in tagged_mcp:
-                    orig_func = t.get("function", {})
-                    wrapped = {
-                        "type": "function",
-                        "function": {
-                            "name": f"mcp__{server_name}__{orig_func.get('name')}",
-                            "description": orig_func.get("description"), # Already tagged by helper
-                            "parameters": orig_func.get("parameters")
-                        }
-                    }
-                    tools.append(wrapped)
+                # Already wrapped (mcp__server__tool), tagged ([MCP]/[REMOTE]/[LOCAL SYSTEM]) and,
+                # for project-memory, filtered to the core user tools (Latency Fix)
+                tools.extend(payloads)
 
         
         # [FIX] FINAL DEDUPLICATION (Massive Latency Fix)
@@ -1541,14 +1637,8 @@ class ToolExecutor:
             # This enables Vector Search results (which return clean names) to be executed correctly.
             found_server = None
             
-            # 1. Fast Lookup (Optimization would be a separate dict, but iteration is fine for <1000 tools)
-            for server_name, tools in self.mcp_tool_cache.items():
-                for t in tools:
-                    if t["function"]["name"] == name:
-                        found_server = server_name
-                        break
-                if found_server:
-                    break
+            # 1. Fast Lookup (catalog name -> server index)
+            found_server = self._get_catalog().server_of.get(name)
             
             if found_server:
                 # ROUTING SUCCESS: We found the server for this tool.
@@ -1657,20 +1747,7 @@ class ToolExecutor:
         """
         Locate the JSON schema for a tool by name from native tool definitions or MCP cache.
         """
-        # Native tool definitions
-        for t in self.tool_definitions:
-            fn = t.get("function", {})
-            if fn.get("name") == name:
-                return fn.get("parameters", {})
-
-        # MCP tool definitions
-        for tools in self.mcp_tool_cache.values():
-            for t in tools or []:
-                fn = t.get("function", {})
-                if fn.get("name") == name:
-                    return fn.get("parameters", {})
-
-        return None
+        return self._get_catalog().schema(name)
 
     async def tool_knowledge_search(self, state: AgentState, query: str, kb_id: str = "default", filters: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Query the RAG server for deep content."""
@@ -1860,32 +1937,10 @@ class ToolExecutor:
     def _filter_tools_by_keywords(self, query: str, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter tools based on keyword matching in query."""
         query_lower = query.lower()
-        filtered_tools = []
-
-        # Define keyword mappings to tool categories
-        keyword_mappings = {
-            'file': ['filesystem', 'file'],
-            'directory': ['filesystem', 'file'],
-            'list': ['filesystem', 'file'],
-            'read': ['filesystem', 'file'],
-            'write': ['filesystem', 'file'],
-            'search': ['search', 'web_search'],
-            'find': ['search', 'filesystem'],
-            'weather': ['weather'],
-            'time': ['system', 'utility'],
-            'date': ['system', 'utility'],
-            'run': ['system', 'execution'],
-            'execute': ['system', 'execution'],
-            'code': ['code', 'programming'],
-            'python': ['code', 'programming'],
-            'memory': ['memory', 'knowledge'],
-            'remember': ['memory', 'knowledge'],
-            'recall': ['memory', 'knowledge']
-        }
 
         # Find relevant categories
         relevant_categories = set()
-        for keyword, categories in keyword_mappings.items():
+        for keyword, categories in QUERY_KEYWORD_CATEGORIES.items():
             if keyword in query_lower:
                 relevant_categories.update(categories)
 
@@ -1893,16 +1948,9 @@ class ToolExecutor:
         if not relevant_categories:
             return tools
 
-        # Filter tools by category
-        for tool in tools:
-            tool_name = tool.get('function', {}).get('name', '').lower()
-            tool_desc = tool.get('function', {}).get('description', '').lower()
-
-            # Check if tool matches relevant categories
-            for category in relevant_categories:
-                if category in tool_name or category in tool_desc:
-                    filtered_tools.append(tool)
-                    break
+        # Filter tools by category (keyword sets are precomputed per catalog payload)
+        catalog = self._get_catalog()
+        filtered_tools = [tool for tool in tools if catalog.keywords(tool) & relevant_categories]
 
         # If no tools matched, return a reasonable subset (top 15)
         if not filtered_tools:
@@ -1913,28 +1961,13 @@ class ToolExecutor:
     def _filter_tools_by_domain(self, query: str, tools: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Filter tools based on query domain analysis."""
         query_lower = query.lower()
+        catalog = self._get_catalog()
 
-        # Domain detection
-        if any(word in query_lower for word in ['file', 'directory', 'read', 'write', 'list']):
-            # File system domain
-            domain_tools = [t for t in tools if 'file' in t.get('function', {}).get('name', '').lower()]
-            return domain_tools[:12] if domain_tools else tools[:12]
-
-        elif any(word in query_lower for word in ['search', 'find', 'look']):
-            # Search domain
-            domain_tools = [t for t in tools if 'search' in t.get('function', {}).get('name', '').lower()]
-            return domain_tools[:10] if domain_tools else tools[:10]
-
-        elif any(word in query_lower for word in ['weather', 'temperature', 'forecast']):
-            # Weather domain
-            domain_tools = [t for t in tools if 'weather' in t.get('function', {}).get('name', '').lower()]
-            return domain_tools[:5] if domain_tools else tools[:5]
-
-        elif any(word in query_lower for word in ['run', 'execute', 'code']):
-            # Execution domain
-            domain_tools = [t for t in tools if any(x in t.get('function', {}).get('name', '').lower()
-                                                   for x in ['run', 'execute', 'code'])]
-            return domain_tools[:8] if domain_tools else tools[:8]
+        # Domain detection (first matching domain wins)
+        for query_words, name_words, limit in QUERY_DOMAINS:
+            if any(word in query_lower for word in query_words):
+                domain_tools = [t for t in tools if catalog.name_keywords(t) & name_words]
+                return domain_tools[:limit] if domain_tools else tools[:limit]
 
         # Default: return top tools
         return tools[:15]
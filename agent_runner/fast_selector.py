@@ -16,7 +16,8 @@ logger = logging.getLogger("fast_selector")
 class FastToolSelector:
     """
     High-performance tool selector using Vector Search (RAG) instead of LLM reasoning.
-    Reduces tool selection latency from ~4s (LLM) to <100ms (DB).
+    Reduces tool selection latency from ~4s (LLM) to <100ms (DB), or to the cost of
+    the query embedding alone when the in-process tool index is populated.
     """
 
     @staticmethod
@@ -54,7 +55,18 @@ class FastToolSelector:
                 logger.warning("FastSelector: Failed to generate embedding (zero vector). Returning all tools.")
                 return all_tools
 
-            # 2. Vector Search against 'tool_definition' table
+            # 2a. In-process index (one matmul, no DB hop) when it has been populated
+            vector_store = getattr(getattr(memory_server, "state", None), "vector_store", None)
+            local_index = getattr(vector_store, "local_index", None)
+            if local_index is not None and len(local_index):
+                selected_names = {name for name, _ in local_index.search(embedding, k=limit)}
+                filtered_tools = [t for t in all_tools if t["function"]["name"] in selected_names]
+                if filtered_tools:
+                    latency = (time.time() - t0) * 1000
+                    logger.info(f"FastSelector: Selected {len(filtered_tools)}/{len(all_tools)} tools in {latency:.2f}ms (local index)")
+                    return filtered_tools
+
+            # 2b. Vector Search against 'tool_definition' table
             # We assume tools are already indexed in this table.
             # We select name and score.
             # Using <|4|> (Euclidean k-NN) for efficient retrieval.
@@ -15,10 +15,12 @@ Architecture:
 """
 
 import asyncio
+import hashlib
 import json
 import logging
 import re
 import time
+from collections import OrderedDict
 from dataclasses import dataclass, field
 from typing import Dict, List, Any, Optional, Tuple, Callable
 from enum import Enum
@@ -26,6 +28,8 @@ import math
 import httpx
 
 from agent_runner.state import AgentState
+from common.metrics_core import LatencyHistogram
+from common.ollama_residency import Priority, get_residency_scheduler
 from common.unified_tracking import track_event, EventSeverity, EventCategory
 
 logger = logging.getLogger("agent_runner.hallucination_detector")
@@ -43,6 +47,13 @@ class HallucinationSeverity(Enum):
     HIGH = "high"        # Significant factual errors
     CRITICAL = "critical" # Dangerous misinformation
 
+SEVERITY_RANK = {
+    HallucinationSeverity.LOW: 0,
+    HallucinationSeverity.MEDIUM: 1,
+    HallucinationSeverity.HIGH: 2,
+    HallucinationSeverity.CRITICAL: 3,
+}
+
 @dataclass
 class DetectionResult:
     """Result of hallucination detection."""
@@ -53,6 +64,8 @@ class DetectionResult:
     layer_results: Dict[str, Any]
     processing_time_ms: float
     recommendations: List[str] = field(default_factory=list)
+    detector_timings_ms: Dict[str, float] = field(default_factory=dict)
+    early_exit: bool = False
 
     def to_dict(self) -> Dict[str, Any]:
         return {
@@ -62,7 +75,9 @@ class DetectionResult:
             "detected_issues": self.detected_issues,
             "layer_results": self.layer_results,
             "processing_time_ms": self.processing_time_ms,
-            "recommendations": self.recommendations
+            "recommendations": self.recommendations,
+            "detector_timings_ms": self.detector_timings_ms,
+            "early_exit": self.early_exit
         }
 
 @dataclass
@@ -88,6 +103,13 @@ class DetectorConfig:
     max_processing_time_ms: int = 500
     enable_caching: bool = True
     cache_ttl_seconds: int = 300
+    cache_max_entries: int = 1024          # LRU bound on result_cache
+    max_concurrent_llm_checks: int = 2     # LLM-backed detectors in flight at once
+    llm_check_timeout_s: float = 8.0       # Budget per LLM-backed detector; late ones are dropped
+    llm_max_defer_s: float = 3.0           # Residency wait for the auditor model; capped at half of llm_check_timeout_s
+    detector_timeout_s: float = 1.0        # Budget per non-LLM detector
+    early_exit_severity: str = "high"      # Stop scheduling detectors once the verdict reaches this severity
+    skip_llm_when_clean: bool = True       # Run LLM-backed detectors only if cheap detectors found issues
 
     # Learning settings
     learning_enabled: bool = True
@@ -96,8 +118,10 @@ class DetectorConfig:
 class LLMHallucinationAnalyzer:
     """LLM-based hallucination analysis using llama3.2:latest."""
 
-    def __init__(self, ollama_base: str = "http://127.0.0.1:11434", model_name: str = "llama3.3:70b"):
+    def __init__(self, ollama_base: str = "http://127.0.0.1:11434", model_name: str = "llama3.3:70b",
+                 max_defer_s: Optional[float] = None):
         self.ollama_base = ollama_base.rstrip("/")
+        self.max_defer_s = max_defer_s  # None: the residency scheduler's own bound
         # [FIX] Strip 'ollama:' prefix for API compatibility
         self.model_name = model_name.replace("ollama:", "") if model_name else model_name
         self.client = None
@@ -124,10 +148,16 @@ class LLMHallucinationAnalyzer:
         }
 
         try:
-            response = await self.client.post(
-                f"{self.ollama_base}/api/generate",
-                json=payload
-            )
+            # Audits are background work: run once the auditor model is resident rather than evicting the chat model
+            async with get_residency_scheduler().slot(
+                self.model_name, Priority.BACKGROUND, max_defer_s=self.max_defer_s
+            ) as keep_alive:
+                if keep_alive:
+                    payload["keep_alive"] = keep_alive
+                response = await self.client.post(
+                    f"{self.ollama_base}/api/generate",
+                    json=payload
+                )
             response.raise_for_status()
             result = response.json()
             return result.get("response", "").strip()
@@ -246,6 +276,15 @@ Analysis (JSON only):"""
             await self.client.aclose()
             self.client = None
 
+@dataclass
+class DetectionRun:
+    """Scheduling state for one detect_hallucinations call."""
+    issues: List[Dict[str, Any]] = field(default_factory=list)  # completion order, for early exit
+    timings_ms: Dict[str, float] = field(default_factory=dict)
+    cancelled: List[str] = field(default_factory=list)
+    early_exit: bool = False
+
+
 class HallucinationDetector:
     """
     Multi-layered hallucination detection system.
@@ -268,17 +307,28 @@ class HallucinationDetector:
             DetectionLayer.FACTUAL: []
         }
 
-        # Caching for performance
-        self.result_cache: Dict[str, Tuple[DetectionResult, float]] = {}
+        # Caching for performance (LRU, keyed by a hash of the full response + query + context)
+        self.result_cache: "OrderedDict[str, Tuple[DetectionResult, float]]" = OrderedDict()
+        self._llm_semaphore = asyncio.Semaphore(max(1, self.config.max_concurrent_llm_checks))
+        self.llm_timeouts = 0
+        self.detector_timeouts = 0
+        self.early_exits = 0
+        self.llm_skipped = 0
+        self.detectors_cancelled = 0
+        self.detector_latency: Dict[str, LatencyHistogram] = {}
 
         # Learning data
         self.feedback_history: List[Dict[str, Any]] = []
 
         # LLM analyzer
         # [FIX] Use dynamic model from config (Auditor Role) to prevent thrashing
-        auditor_model = state.auditor_model if state else "ollama:llama3.3:70b"
+        auditor_model = getattr(state, "auditor_model", None) or "ollama:llama3.3:70b"
         logger.info(f"🛡️ HallucinationDetector initializing with model: {auditor_model}")
-        self.llm_analyzer = LLMHallucinationAnalyzer(model_name=auditor_model)
+        # Deferral must end well inside the detector deadline, or waiting audits are cancelled instead of delayed
+        self.llm_analyzer = LLMHallucinationAnalyzer(
+            model_name=auditor_model,
+            max_defer_s=min(self.config.llm_max_defer_s, self.config.llm_check_timeout_s / 2),
+        )
 
         # Initialize detectors
         self._initialize_detectors()
@@ -315,6 +365,12 @@ class HallucinationDetector:
             self._verify_llm_factual_consistency,
         ]
 
+        # Detectors that call the auditor model; bounded by _llm_semaphore and llm_check_timeout_s
+        self._llm_detectors = {
+            self._detect_llm_semantic_coherence.__name__,
+            self._verify_llm_factual_consistency.__name__,
+        }
+
     async def detect_hallucinations(
         self,
         response: str,
@@ -354,51 +410,70 @@ class HallucinationDetector:
             cached_result, cache_time = self.result_cache[cache_key]
             if time.time() - cache_time < self.config.cache_ttl_seconds:
                 logger.debug("Returning cached hallucination detection result")
+                self.result_cache.move_to_end(cache_key)
                 return cached_result
+            del self.result_cache[cache_key]
 
         # Prepare analysis context
         analysis_context = self._prepare_analysis_context(
             response, context, user_query, conversation_history, model_info
         )
 
-        # Run detection layers
+        # Run detection layers. Cheap detectors go first, layer by layer; the
+        # LLM-backed ones run last, together, and only if something looked off.
+        run = DetectionRun()
         layer_results = {}
-        all_issues = []
 
         # Layer 1: Statistical (fastest)
         if DetectionLayer.STATISTICAL in self.detectors:
-            stat_issues = await self._run_detection_layer(
-                DetectionLayer.STATISTICAL, analysis_context
+            layer_results["statistical"] = await self._run_detection_layer(
+                DetectionLayer.STATISTICAL, analysis_context, run, include_llm=False
             )
-            layer_results["statistical"] = stat_issues
-            all_issues.extend(stat_issues)
 
         # Layer 2: Semantic (medium)
-        if DetectionLayer.SEMANTIC in self.detectors:
-            semantic_issues = await self._run_detection_layer(
-                DetectionLayer.SEMANTIC, analysis_context
+        if DetectionLayer.SEMANTIC in self.detectors and not run.early_exit:
+            layer_results["semantic"] = await self._run_detection_layer(
+                DetectionLayer.SEMANTIC, analysis_context, run, include_llm=False
             )
-            layer_results["semantic"] = semantic_issues
-            all_issues.extend(semantic_issues)
 
         # Layer 3: Factual (thorough, only if needed)
         factual_needed = (
-            len(all_issues) > 0 or  # If earlier layers found issues
+            len(run.issues) > 0 or  # If earlier layers found issues
             self._requires_factual_check(analysis_context)  # Or if query type requires it
         )
 
-        if factual_needed and DetectionLayer.FACTUAL in self.detectors:
-            factual_issues = await self._run_detection_layer(
-                DetectionLayer.FACTUAL, analysis_context
+        if factual_needed and DetectionLayer.FACTUAL in self.detectors and not run.early_exit:
+            layer_results["factual"] = await self._run_detection_layer(
+                DetectionLayer.FACTUAL, analysis_context, run, include_llm=False
             )
-            layer_results["factual"] = factual_issues
-            all_issues.extend(factual_issues)
+
+        # LLM-backed detectors of the layers that ran
+        llm_jobs = [
+            (layer, detector_func)
+            for layer in (DetectionLayer.SEMANTIC, DetectionLayer.FACTUAL)
+            if layer.value in layer_results
+            for detector_func in self.detectors[layer]
+            if detector_func.__name__ in self._llm_detectors
+        ]
+        if llm_jobs and not run.early_exit:
+            if run.issues or not self.config.skip_llm_when_clean:
+                llm_results = await self._schedule(llm_jobs, analysis_context, run)
+                for layer, issues in llm_results.items():
+                    layer_results[layer.value].extend(issues)
+            else:
+                self.llm_skipped += 1
+
+        if run.early_exit:
+            self.early_exits += 1
+        all_issues = [issue for issues in layer_results.values() for issue in issues]
 
         # Calculate overall result
         result = self._calculate_overall_result(all_issues, layer_results)
 
         # Generate recommendations
         result.recommendations = self._generate_recommendations(result, analysis_context)
+        result.detector_timings_ms = run.timings_ms
+        result.early_exit = run.early_exit
 
         # Performance tracking
         processing_time = (time.time() - start_time) * 1000
@@ -407,9 +482,12 @@ class HallucinationDetector:
         # Cache result
         if self.config.enable_caching:
             self.result_cache[cache_key] = (result, time.time())
+            self.result_cache.move_to_end(cache_key)
+            while len(self.result_cache) > self.config.cache_max_entries:
+                self.result_cache.popitem(last=False)
 
         # Log performance
-        if processing_time > 100:
+        if processing_time > self.config.max_processing_time_ms:
             logger.warning("Hallucination detection took %.2fms (threshold: %dms)",
                           processing_time, self.config.max_processing_time_ms)
 
@@ -434,21 +512,102 @@ class HallucinationDetector:
     async def _run_detection_layer(
         self,
         layer: DetectionLayer,
-        context: Dict[str, Any]
+        context: Dict[str, Any],
+        run: Optional[DetectionRun] = None,
+        include_llm: bool = True
     ) -> List[Dict[str, Any]]:
-        """Run all detectors for a specific layer."""
-        issues = []
-
-        for detector_func in self.detectors[layer]:
-            try:
-                layer_issues = await detector_func(context)
-                if layer_issues:
-                    issues.extend(layer_issues)
-            except Exception as e:
-                logger.warning("Detector %s failed: %s", detector_func.__name__, e)
-                continue
+        """Run the detectors of a layer concurrently (issues keep detector order)."""
+        jobs = [
+            (layer, detector_func) for detector_func in self.detectors[layer]
+            if include_llm or detector_func.__name__ not in self._llm_detectors
+        ]
+        results = await self._schedule(jobs, context, run or DetectionRun())
+        return results.get(layer, [])
 
-        return issues
+    async def _schedule(
+        self,
+        jobs: List[Tuple[DetectionLayer, Callable]],
+        context: Dict[str, Any],
+        run: DetectionRun
+    ) -> Dict[DetectionLayer, List[Dict[str, Any]]]:
+        """
+        Fan out detectors, collecting issues as they finish. Once the issues seen
+        so far reach early_exit_severity the rest are cancelled and run.early_exit
+        is set, so the caller skips the remaining layers.
+        """
+        tasks = {asyncio.create_task(self._run_detector(detector_func, context, run)): i
+                 for i, (_, detector_func) in enumerate(jobs)}
+        results: List[List[Dict[str, Any]]] = [[] for _ in jobs]
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    results[tasks[task]] = task.result()
+                    run.issues.extend(results[tasks[task]])
+                if self._reached_early_exit(run.issues):
+                    run.early_exit = True
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+                run.cancelled.append(jobs[tasks[task]][1].__name__)
+            self.detectors_cancelled += len(pending)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        by_layer: Dict[DetectionLayer, List[Dict[str, Any]]] = {}
+        for (layer, _), issues in zip(jobs, results):
+            by_layer.setdefault(layer, []).extend(issues)
+        return by_layer
+
+    def _reached_early_exit(self, issues: List[Dict[str, Any]]) -> bool:
+        if not issues or not self.config.early_exit_severity:
+            return False
+        severity = self._calculate_overall_result(issues, {}).severity
+        return SEVERITY_RANK[severity] >= SEVERITY_RANK[HallucinationSeverity(self.config.early_exit_severity)]
+
+    async def _run_detector(
+        self,
+        detector_func: Callable,
+        context: Dict[str, Any],
+        run: Optional[DetectionRun] = None
+    ) -> List[Dict[str, Any]]:
+        """Run one detector under its deadline; failures and timeouts yield no issues."""
+        name = detector_func.__name__
+        is_llm = name in self._llm_detectors
+        timeout = self.config.llm_check_timeout_s if is_llm else self.config.detector_timeout_s
+        start = time.perf_counter()
+        try:
+            if is_llm:
+                async with self._llm_semaphore:
+                    start = time.perf_counter()
+                    return await asyncio.wait_for(detector_func(context), timeout=timeout) or []
+            return await asyncio.wait_for(detector_func(context), timeout=timeout) or []
+        except asyncio.TimeoutError:
+            if is_llm:
+                self.llm_timeouts += 1
+            else:
+                self.detector_timeouts += 1
+            logger.warning("Detector %s exceeded %.1fs budget; skipped", name, timeout)
+        except asyncio.CancelledError:
+            # Cancelled by early exit: not a latency sample
+            start = None
+            raise
+        except Exception as e:
+            logger.warning("Detector %s failed: %s", name, e)
+        finally:
+            if start is not None:
+                self._record_latency(name, (time.perf_counter() - start) * 1000, run)
+        return []
+
+    def _record_latency(self, name: str, elapsed_ms: float, run: Optional[DetectionRun]):
+        if run is not None:
+            run.timings_ms[name] = elapsed_ms
+        hist = self.detector_latency.get(name)
+        if hist is None:
+            hist = self.detector_latency[name] = LatencyHistogram()
+        hist.observe(elapsed_ms)
 
     def _calculate_overall_result(
         self,
@@ -520,15 +679,14 @@ class HallucinationDetector:
         user_query: Optional[str]
     ) -> str:
         """Generate cache key for response caching."""
-        # Create a hash of key components
-        import hashlib
+        # Hash the full response: responses sharing a prefix must not share a verdict
         key_components = [
-            response[:500],  # First 500 chars
+            response,
             user_query or "",
             json.dumps(context, sort_keys=True, default=str) if context else ""
         ]
-        key_string = "|".join(key_components)
-        return hashlib.md5(key_string.encode()).hexdigest()
+        key_string = "\x1f".join(key_components)
+        return hashlib.sha256(key_string.encode("utf-8", errors="replace")).hexdigest()
 
     def _prepare_analysis_context(
         self,
@@ -1216,6 +1374,12 @@ class HallucinationDetector:
             "enabled": self.config.enabled,
             "feedback_count": len(self.feedback_history),
             "cache_size": len(self.result_cache),
+            "llm_timeouts": self.llm_timeouts,
+            "detector_timeouts": self.detector_timeouts,
+            "early_exits": self.early_exits,
+            "llm_skipped": self.llm_skipped,
+            "detectors_cancelled": self.detectors_cancelled,
+            "detector_latency_ms": {name: hist.summary() for name, hist in self.detector_latency.items()},
             "layers": [layer.value for layer in self.detectors.keys()],
             "llm_analyzer": "enabled" if self.llm_analyzer else "disabled",
             "config": {
@@ -1229,4 +1393,99 @@ class HallucinationDetector:
     async def cleanup(self):
         """Clean up resources."""
         if self.llm_analyzer:
-            await self.llm_analyzer.close()
\ No newline at end of file
+            await self.llm_analyzer.close()
+
+
+class HallucinationDetectionService:
+    """
+    Process-wide detector shared across requests.
+
+    Keeps one HallucinationDetector (and so its result cache and auditor HTTP
+    client) alive instead of building one per response. check() runs inline;
+    submit() runs detection off the response path and records the verdict as
+    an annotation that can be fetched later by response id.
+    """
+
+    def __init__(self, state: Any, config: Optional[DetectorConfig] = None, max_annotations: int = 512):
+        self.detector = HallucinationDetector(state, config or DetectorConfig(enabled=True))
+        self.max_annotations = max_annotations
+        self.annotations: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Task] = {}
+        self.stats = {"inline_checks": 0, "background_checks": 0, "failures": 0}
+
+    async def check(self, response: str, **kwargs) -> DetectionResult:
+        self.stats["inline_checks"] += 1
+        return await self.detector.detect_hallucinations(response, **kwargs)
+
+    def submit(self, response_id: str, response: str, **kwargs) -> asyncio.Task:
+        """Schedule detection in the background; the result lands in annotations[response_id]."""
+        self.stats["background_checks"] += 1
+        self._record(response_id, {"status": "pending", "submitted_at": time.time()})
+        task = asyncio.create_task(self._run_background(response_id, response, kwargs))
+        self._pending[response_id] = task
+        task.add_done_callback(lambda _t, rid=response_id: self._pending.pop(rid, None))
+        return task
+
+    async def _run_background(self, response_id: str, response: str, kwargs: Dict[str, Any]):
+        try:
+            result = await self.detector.detect_hallucinations(response, **kwargs)
+            self._record(response_id, {"status": "done", "completed_at": time.time(), "result": result.to_dict()})
+            if result.is_hallucination:
+                logger.warning(f"HALLUCINATION DETECTED (async) in {response_id}: "
+                               f"severity={result.severity.value}, confidence={result.confidence:.2f}")
+        except Exception as e:
+            self.stats["failures"] += 1
+            logger.error(f"Background hallucination check failed for {response_id}: {e}")
+            self._record(response_id, {"status": "error", "completed_at": time.time(), "error": str(e)})
+
+    def _record(self, response_id: str, annotation: Dict[str, Any]):
+        self.annotations[response_id] = {"response_id": response_id, **annotation}
+        self.annotations.move_to_end(response_id)
+        while len(self.annotations) > self.max_annotations:
+            self.annotations.popitem(last=False)
+
+    async def get_annotation(self, response_id: str, wait_s: float = 0.0) -> Optional[Dict[str, Any]]:
+        """Annotation for a response, optionally waiting up to wait_s for a pending check."""
+        task = self._pending.get(response_id)
+        if task is not None and wait_s > 0:
+            await asyncio.wait({task}, timeout=wait_s)
+        return self.annotations.get(response_id)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "pending": len(self._pending),
+            "annotations": len(self.annotations),
+            "detector": self.detector.get_stats()
+        }
+
+    async def close(self):
+        pending = list(self._pending.values())
+        for task in pending:
+            task.cancel()
+        await asyncio.gather(*pending, return_exceptions=True)
+        await self.detector.cleanup()
+
+
+_detection_service: Optional[HallucinationDetectionService] = None
+
+
+def get_detection_service(state: Any = None, config: Optional[DetectorConfig] = None) -> HallucinationDetectionService:
+    """Get the process-wide detection service (created on first use)."""
+    global _detection_service
+    if _detection_service is None:
+        _detection_service = HallucinationDetectionService(state, config)
+    return _detection_service
+
+
+def get_detection_stats() -> Dict[str, Any]:
+    """Stats of the process-wide service, or {} if it was never created (does not build it)."""
+    return _detection_service.get_stats() if _detection_service is not None else {}
+
+
+async def close_detection_service() -> None:
+    """Cancel pending background checks and close the auditor client (shutdown)."""
+    global _detection_service
+    service, _detection_service = _detection_service, None
+    if service is not None:
+        await service.close()
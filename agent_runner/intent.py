@@ -10,96 +10,41 @@ from pathlib import Path
 
 logger = logging.getLogger("agent_runner.intent")
 from agent_runner.db_utils import run_query
+from common.caching import get_persistent_ttl_cache
+
+INTENT_CACHE_TTL = 86400  # 24h
+
 
 class PersistentIntentCache:
     """Persistent cache for Maître d' intent classifications with 24h TTL"""
 
     def __init__(self, cache_file: str = "maitre_d_cache.json", max_entries: int = 10000):
+        # The JSON file is the pre-SQLite format; it is imported once when the cache opens at startup
         self.cache_file = Path(__file__).parent / cache_file
-        self.max_entries = max_entries
-        self.cache = self._load_cache()
-        self.hits = 0
-        self.misses = 0
-
-    def _load_cache(self) -> Dict[str, Any]:
-        """Load cache from disk"""
-        if self.cache_file.exists():
-            try:
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                logger.warning(f"Failed to load intent cache: {e}")
-        return {}
-
-    def _save_cache(self):
-        """Save cache to disk"""
-        try:
-            # Clean expired entries before saving
-            self._cleanup_expired()
-
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.cache, f, indent=2)
-        except Exception as e:
-            logger.warning(f"Failed to save intent cache: {e}")
-
-    def _cleanup_expired(self):
-        """Remove expired entries"""
-        current_time = time.time()
-        expired_keys = []
-
-        for key, entry in self.cache.items():
-            if current_time - entry.get('timestamp', 0) > 86400:  # 24 hours
-                expired_keys.append(key)
-
-        for key in expired_keys:
-            del self.cache[key]
-
-        # If still too many entries, remove oldest
-        if len(self.cache) > self.max_entries:
-            # Sort by timestamp and keep newest
-            sorted_entries = sorted(self.cache.items(),
-                                  key=lambda x: x[1].get('timestamp', 0),
-                                  reverse=True)
-            self.cache = dict(sorted_entries[:self.max_entries])
+        self.store = get_persistent_ttl_cache(
+            "intent", INTENT_CACHE_TTL, max_entries, legacy_json=self.cache_file
+        )
 
     def get(self, query_hash: str) -> Optional[Dict[str, Any]]:
         """Get cached result if valid"""
-        if query_hash in self.cache:
-            entry = self.cache[query_hash]
-            if time.time() - entry.get('timestamp', 0) < 86400:  # 24h TTL
-                self.hits += 1
-                logger.info(f"Maître d' Cache HIT: {query_hash[:16]}... (TTL: {86400 - int(time.time() - entry['timestamp'])}s)")
-                return entry['result']
-            else:
-                # Expired, remove it
-                del self.cache[query_hash]
-
-        self.misses += 1
-        return None
+        result = self.store.get(query_hash)
+        if result is not None:
+            logger.info(f"Maître d' Cache HIT: {query_hash[:16]}...")
+        return result
 
     def put(self, query_hash: str, result: Dict[str, Any]):
-        """Store result in cache"""
-        self.cache[query_hash] = {
-            'timestamp': time.time(),
-            'result': result,
-            'query_hash': query_hash
-        }
-
-        # Save to disk periodically (every 10 entries)
-        if (self.hits + self.misses) % 10 == 0:
-            self._save_cache()
+        """Store result in cache (persisted in the background)"""
+        self.store.set(query_hash, result)
 
     def get_stats(self) -> Dict[str, Any]:
         """Get cache statistics"""
-        total_requests = self.hits + self.misses
-        hit_rate = self.hits / total_requests if total_requests > 0 else 0
-
+        stats = self.store.get_stats()
         return {
-            'total_entries': len(self.cache),
-            'hit_rate': hit_rate,
-            'hits': self.hits,
-            'misses': self.misses,
-            'cache_file': str(self.cache_file)
+            'total_entries': stats['size'],
+            'hit_rate': stats['hit_rate'],
+            'hits': stats['hits'],
+            'misses': stats['misses'],
+            'cache_file': stats['db_path']
         }
 
 # Global cache instance
@@ -158,6 +158,17 @@ async def on_startup():
         state.degraded_reasons.append("state_init_failed")
         logger.warning("⚠️ Continuing in degraded mode - some features may be unavailable")
 
+    # Local KV caches (intent, router analysis) and the embedding cache: open + legacy import
+    # here, in worker threads, off the request path
+    try:
+        import agent_runner.intent, agent_runner.router_analyzer  # noqa: F401 - registers their caches
+        from common.caching import get_persistent_embedding_cache, open_persistent_ttl_caches
+        await open_persistent_ttl_caches()
+        await asyncio.to_thread(get_persistent_embedding_cache().open)
+    except Exception as e:
+        logger.warning(f"Persistent caches not loaded: {e}")
+        startup_warnings.append(f"Persistent caches not loaded: {e}")
+
     # Initialize Memory Server (Internal Access) [Phase 13 fix]
     # MOVED UP: Must enforce schema BEFORE ConfigManager (triggered by MCP load) writes to DB.
     # NOTE: state.initialize() already creates memory server, but we need to ensure it's initialized
@@ -344,54 +355,25 @@ async def on_startup():
         await load_mcp_servers(state)
         logger.info(f"Loaded {len(state.mcp_servers)} MCP server configs. Starting discovery...")
         await _send_startup_monitor_message(state, f"🔍 Discovering {len(state.mcp_servers)} MCP servers...")
-        await engine.discover_mcp_tools()
-        mcp_duration = time.time() - mcp_start
-        total_tools = sum(len(tools) for tools in engine.executor.mcp_tool_cache.values())
-        
-        # Track failed servers (disabled during discovery)
-        from agent_runner.constants import CORE_MCP_SERVERS
-        core_failed_servers = []
-        non_core_failed_servers = []
-        
-        for server_name, cfg in state.mcp_servers.items():
-            if not cfg.get("enabled", True):
-                if server_name not in engine.executor.mcp_tool_cache:
-                    if server_name in CORE_MCP_SERVERS:
-                        core_failed_servers.append(server_name)
-                    else:
-                        non_core_failed_servers.append(server_name)
-        
-        logger.info(f"MCP Discovery complete: {len(engine.executor.mcp_tool_cache)}/{len(state.mcp_servers)} servers, {total_tools} tools (took {mcp_duration:.2f}s)")
-        await _send_startup_monitor_message(state, f"✅ MCP Discovery: {len(engine.executor.mcp_tool_cache)}/{len(state.mcp_servers)} servers, {total_tools} tools ({mcp_duration:.1f}s)")
-        
-        # Core service failures are CRITICAL
-        if core_failed_servers:
-            error_msg = f"CRITICAL: Core MCP service(s) failed during discovery: {', '.join(core_failed_servers)}. System functionality severely degraded."
-            logger.error(error_msg)
-            startup_issues.append(error_msg)
-            # Don't block startup, but mark as critical issue
-        
-        # Non-core failures are warnings
-        if non_core_failed_servers:
-            warning_msg = f"MCP Discovery: {len(non_core_failed_servers)} non-core server(s) failed and were disabled: {', '.join(non_core_failed_servers)}"
-            logger.warning(warning_msg)
-            startup_warnings.append(warning_msg)
-        
-        # Index all tools in database for semantic search
-        if hasattr(engine, 'executor') and hasattr(state, 'memory') and state.memory:
-            try:
-                all_tool_defs = engine.executor.tool_definitions
-                index_result = await state.memory.index_tools(all_tool_defs)
-                if index_result.get("ok"):
-                    logger.info(f"Indexed {index_result.get('indexed', 0)} tools in database for semantic search")
-                else:
-                    warning_msg = f"Tool indexing failed: {index_result.get('error', 'Unknown error')}"
-                    logger.warning(warning_msg)
-                    startup_warnings.append(warning_msg)
-            except Exception as e:
-                warning_msg = f"Failed to index tools: {e}"
-                logger.warning(warning_msg, exc_info=True)
-                startup_warnings.append(warning_msg)
+        warm_start = await engine.start_mcp_discovery()
+        if warm_start:
+            snapshot_tools = sum(len(tools) for tools in engine.executor.mcp_tool_cache.values())
+            logger.info(
+                f"MCP tools served from snapshot ({len(engine.executor.mcp_tool_cache)} servers, "
+                f"{snapshot_tools} tools); live discovery continues in the background"
+            )
+            await _send_startup_monitor_message(state, f"⚡ MCP tools served from snapshot ({snapshot_tools} tools)")
+
+            async def report_background_discovery():
+                try:
+                    await engine.executor.wait_for_discovery()
+                    await _report_mcp_discovery(state, engine, mcp_start, [], [])
+                except Exception as e:
+                    logger.error(f"Background MCP discovery failed: {e}", exc_info=True)
+
+            asyncio.create_task(report_background_discovery())
+        else:
+            await _report_mcp_discovery(state, engine, mcp_start, startup_issues, startup_warnings)
     except Exception as e:
         mcp_duration = time.time() - mcp_start
         error_msg = f"Failed to load MCP servers after {mcp_duration:.2f}s: {e}"
@@ -596,7 +578,7 @@ async def on_startup():
         sorter.state = state
         await sorter.start()
         state.log_sorter = sorter # Persist in state for shutdown or access
-        logger.info(f"Log Sorter Service started: running={'✅' if sorter.running else '❌'}, interval={sorter.interval}s")
+        logger.info(f"Log Sorter Service started: running={'✅' if sorter.running else '❌'}, mode={sorter.mode}")
     except Exception as e:
         # [FIX] Change from critical to warning - log sorter is non-essential
         logger.warning(f"Log Sorter Service unavailable: {e}", exc_info=True)
@@ -711,6 +693,61 @@ async def _clear_chat_window(state: AgentState):
     })
     logger.debug("Chat window clear command queued via Nexus")
 
+async def _report_mcp_discovery(state: AgentState, engine, mcp_start: float, startup_issues: list, startup_warnings: list):
+    """
+    Log discovery results, account for failed servers and index the tools.
+    Runs inline after a cold discovery, or from a background task once the
+    live discovery behind a warm start finishes.
+    """
+    mcp_duration = time.time() - mcp_start
+    total_tools = sum(len(tools) for tools in engine.executor.mcp_tool_cache.values())
+    
+    # Track failed servers (disabled during discovery)
+    from agent_runner.constants import CORE_MCP_SERVERS
+    core_failed_servers = []
+    non_core_failed_servers = []
+    
+    for server_name, cfg in state.mcp_servers.items():
+        if not cfg.get("enabled", True):
+            if server_name not in engine.executor.mcp_tool_cache:
+                if server_name in CORE_MCP_SERVERS:
+                    core_failed_servers.append(server_name)
+                else:
+                    non_core_failed_servers.append(server_name)
+    
+    logger.info(f"MCP Discovery complete: {len(engine.executor.mcp_tool_cache)}/{len(state.mcp_servers)} servers, {total_tools} tools (took {mcp_duration:.2f}s)")
+    await _send_startup_monitor_message(state, f"✅ MCP Discovery: {len(engine.executor.mcp_tool_cache)}/{len(state.mcp_servers)} servers, {total_tools} tools ({mcp_duration:.1f}s)")
+    
+    # Core service failures are CRITICAL
+    if core_failed_servers:
+        error_msg = f"CRITICAL: Core MCP service(s) failed during discovery: {', '.join(core_failed_servers)}. System functionality severely degraded."
+        logger.error(error_msg)
+        startup_issues.append(error_msg)
+        # Don't block startup, but mark as critical issue
+    
+    # Non-core failures are warnings
+    if non_core_failed_servers:
+        warning_msg = f"MCP Discovery: {len(non_core_failed_servers)} non-core server(s) failed and were disabled: {', '.join(non_core_failed_servers)}"
+        logger.warning(warning_msg)
+        startup_warnings.append(warning_msg)
+    
+    # Index all tools in database for semantic search
+    if hasattr(engine, 'executor') and hasattr(state, 'memory') and state.memory:
+        try:
+            all_tool_defs = engine.executor.tool_definitions
+            index_result = await state.memory.index_tools(all_tool_defs)
+            if index_result.get("ok"):
+                logger.info(f"Indexed {index_result.get('indexed', 0)} tools in database for semantic search")
+            else:
+                warning_msg = f"Tool indexing failed: {index_result.get('error', 'Unknown error')}"
+                logger.warning(warning_msg)
+                startup_warnings.append(warning_msg)
+        except Exception as e:
+            warning_msg = f"Failed to index tools: {e}"
+            logger.warning(warning_msg, exc_info=True)
+            startup_warnings.append(warning_msg)
+
+
 async def _send_startup_monitor_message(state: AgentState, message: str):
     """
     Send a monitor message during startup that will appear in the chat window.
@@ -1479,6 +1516,17 @@ async def on_shutdown():
     # [FIX] Ensure MCP subprocesses are killed to prevent orphans
     logger.info("Cleaning up MCP processes...")
     await state.cleanup_all_stdio_processes()
+    from agent_runner.transports.sse import close_sse_sessions
+    await close_sse_sessions(state)
+    if getattr(state, "memory", None):
+        await state.memory.aclose()
+    from common.caching import close_persistent_ttl_caches, get_persistent_embedding_cache
+    get_persistent_embedding_cache().close()
+    close_persistent_ttl_caches()
+    from common.budget import get_budget_tracker
+    get_budget_tracker().close()
+    from common.unified_tracking import get_unified_tracker
+    await get_unified_tracker().close()
     
     logger.info("Cleanup complete.")
 
@@ -2,11 +2,18 @@ import asyncio
 import json
 import os
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 import httpx
 from datetime import datetime
 import re
 import threading
+from functools import lru_cache
+from typing import NamedTuple
+
+try:
+    from surrealdb import AsyncSurreal
+except ImportError:  # SDK not installed: HTTP /sql with LET-prefixed params only
+    AsyncSurreal = None
 
 # Configuration
 SURREAL_URL = os.getenv("SURREAL_URL", "http://localhost:8000")
@@ -18,6 +25,12 @@ SURREAL_DB = os.getenv("SURREAL_DB", "memory")
 GATEWAY_BASE = os.getenv("GATEWAY_BASE", "http://127.0.0.1:5455")
 ROUTER_AUTH_TOKEN = os.getenv("ROUTER_AUTH_TOKEN")
 
+# "rpc": persistent WebSocket session, params sent out-of-band (typed, no LET text)
+# "http": stateless POST /sql with params serialized as LET statements
+SURREAL_QUERY_MODE = os.getenv("SURREAL_QUERY_MODE", "rpc").lower()
+RPC_RETRY_INTERVAL = 30.0  # Seconds to stay on HTTP after an RPC connect or query failure
+PREPARED_QUERY_CACHE_SIZE = 512
+
 # Embedding dimension (default for most embedding models)
 EMBEDDING_DIMENSION = 1024
 
@@ -27,6 +40,31 @@ QUERY_TIMEOUT = 10.0  # Default query timeout
 KEEPALIVE_EXPIRY = 30.0  # Connection keepalive expiry
 MAX_RETRIES = 3  # Maximum retry attempts
 RETRY_DELAY_BASE = 0.5  # Base delay for exponential backoff
+WRITE_BATCH_SIZE = 100  # Records per round-trip for execute_batch()
+
+# Single-statement fact upsert (usable per record inside execute_batch).
+# On re-store, confidence only ever rises: math::max of stored and new value.
+FACT_UPSERT_SQL = """
+IF count((SELECT id FROM fact WHERE entity = $e AND relation = $r AND target = $t AND kb_id = $kb LIMIT 1)) > 0 THEN
+    (UPDATE fact SET
+        context = $c,
+        content = $txt,
+        embedding = $emb,
+        confidence = math::min([1.0, math::max([confidence, $conf])]),
+        created_at = time::now()
+    WHERE entity = $e AND relation = $r AND target = $t AND kb_id = $kb)
+ELSE
+    (CREATE fact SET
+        entity = $e,
+        relation = $r,
+        target = $t,
+        context = $c,
+        content = $txt,
+        embedding = $emb,
+        kb_id = $kb,
+        confidence = $conf)
+END;
+"""
 
 # Set up unified logging
 import logging
@@ -51,6 +89,49 @@ def _normalize_embedding(vec: Optional[List[float]]) -> List[float]:
     return normalized[:EMBEDDING_DIMENSION]
 
 
+class PreparedQuery(NamedTuple):
+    error: Optional[str]  # Safety-check failure message, if any
+    has_transaction: bool
+
+
+@lru_cache(maxsize=PREPARED_QUERY_CACHE_SIZE)
+def _prepare_query(query: str) -> PreparedQuery:
+    """Safety/transaction analysis, done once per distinct query text (queries are static templates)."""
+    # SurrealQL safety check: block SQL-style patterns (HAVING/LIKE/SQL wildcards)
+    upper_q = query.upper()
+    error = None
+    if " HAVING " in upper_q or " LIKE " in upper_q or re.search(r"%[^\\s]*%", query):
+        error = f"SurrealQL validation failed: disallowed SQL pattern in query: {query}"
+    has_transaction = "BEGIN TRANSACTION" in upper_q or "COMMIT TRANSACTION" in upper_q or "ROLLBACK" in upper_q
+    return PreparedQuery(error, has_transaction and "TRANSACTION" in upper_q)
+
+
+def _to_native(value: Any) -> Any:
+    """Params for the RPC (CBOR) encoder: containers recurse, unknown objects become str (as json default=str did)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, (list, tuple)):
+        if all(type(v) is float for v in value):  # Embedding fast path
+            return list(value)
+        return [_to_native(v) for v in value]
+    if isinstance(value, dict):
+        return {str(k): _to_native(v) for k, v in value.items()}
+    return str(value)
+
+
+def _from_native(value: Any) -> Any:
+    """RPC results to the JSON shapes the HTTP endpoint returns (RecordID -> 'table:id', datetimes -> ISO)."""
+    if value is None or isinstance(value, (str, bool, int, float)):
+        return value
+    if isinstance(value, list):
+        return [_from_native(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _from_native(v) for k, v in value.items()}
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
 class MemoryServer:
     def __init__(self, state=None):
         self.state = state
@@ -90,6 +171,22 @@ class MemoryServer:
         self.max_retries = MAX_RETRIES  # Retry connection failures
         self.retry_delay_base = RETRY_DELAY_BASE  # Base delay for exponential backoff
 
+        # Persistent RPC session (see SURREAL_QUERY_MODE); HTTP stays as the fallback
+        self.query_mode = SURREAL_QUERY_MODE if AsyncSurreal else "http"
+        base = SURREAL_URL.replace("localhost", "127.0.0.1").rstrip("/")
+        for suffix in ("/rpc", "/sql"):
+            if base.endswith(suffix):
+                base = base[: -len(suffix)]
+        self.rpc_url = base.replace("http://", "ws://").replace("https://", "wss://")
+        self._rpc = None
+        self._rpc_lock = asyncio.Lock()
+        self._rpc_retry_at = 0.0
+
+        # Shared, pooled embedding client (coalesces concurrent requests into batches)
+        from agent_runner.embedding_service import EmbeddingService
+        from common.caching import get_persistent_embedding_cache
+        self.embedder = EmbeddingService(state, cache=get_persistent_embedding_cache())
+
     def _serializable(self, obj: Any) -> Any:
         """Recursively convert SurrealDB objects to JSON-serializable types."""
         if isinstance(obj, list):
@@ -107,45 +204,105 @@ class MemoryServer:
             self.initialized = True
             logger.info(f"Initialized HTTP Client for {self.url}")
 
-    async def _execute_query(self, query: str, params: dict = None, raise_on_error: bool = False, **kwargs) -> Any:
-        """Execute a SurrealQL query using HTTP REST API with retry logic for connection failures."""
-        # SurrealQL safety check: block SQL-style patterns (HAVING/LIKE/SQL wildcards)
-        upper_q = query.upper()
-        if " HAVING " in upper_q or " LIKE " in upper_q or re.search(r"%[^\\s]*%", query):
-            msg = f"SurrealQL validation failed: disallowed SQL pattern in query: {query}"
-            logger.error(msg)
-            if raise_on_error:
-                raise ValueError(msg)
+    @staticmethod
+    def _let_prefix(params: Optional[dict], suffix: str = "") -> str:
+        prefix = ""
+        for k, v in (params or {}).items():
+            val_json = json.dumps(v, default=str)
+            prefix += f"LET ${k}{suffix} = {val_json};\n"
+        return prefix
+
+    async def _get_rpc(self):
+        """Connected RPC session, or None when HTTP should be used."""
+        if self.query_mode != "rpc" or time.time() < self._rpc_retry_at:
             return None
+        if self._rpc is not None:
+            return self._rpc
+        async with self._rpc_lock:
+            if self._rpc is None:
+                conn = AsyncSurreal(self.rpc_url)
+                try:
+                    await asyncio.wait_for(conn.connect(), timeout=self.query_timeout)
+                    await conn.signin({"username": SURREAL_USER, "password": SURREAL_PASS})
+                    await conn.use(SURREAL_NS, SURREAL_DB)
+                    self._rpc = conn
+                    logger.info(f"SurrealDB RPC session open: {self.rpc_url}")
+                except Exception as e:
+                    self._rpc_retry_at = time.time() + RPC_RETRY_INTERVAL
+                    logger.warning(f"SurrealDB RPC unavailable ({e}); using HTTP for {RPC_RETRY_INTERVAL:.0f}s")
+                    try:
+                        await conn.close()
+                    except Exception:
+                        pass
+        return self._rpc
+
+    async def _drop_rpc(self) -> None:
+        conn, self._rpc = self._rpc, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
 
-        # Check if this query contains transaction operations
-        has_transaction = "BEGIN TRANSACTION" in upper_q or "COMMIT TRANSACTION" in upper_q or "ROLLBACK" in upper_q
-
-        # Explicitly set NS/DB in SQL to avoid Header issues
-        use_prefix = f"USE NS {SURREAL_NS} DB {SURREAL_DB};\n"
-
-        final_sql = query
-        if params:
-            prefix = ""
-            for k, v in params.items():
-                val_json = json.dumps(v, default=str)
-                prefix += f"LET ${k} = {val_json};\n"
-            final_sql = prefix + query
-
-        final_sql = use_prefix + final_sql
+    async def _rpc_query(self, query: str, params: Optional[dict], timeout: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+        """
+        Run a query over the RPC session with typed, out-of-band params.
+        Returns per-statement results ([{status, result, time}]) or None if the
+        caller should fall back to HTTP.
+        """
+        rpc = await self._get_rpc()
+        if rpc is None:
+            return None
+        try:
+            response = await asyncio.wait_for(rpc.query_raw(query, _to_native(params or {})), timeout=timeout or HTTP_TIMEOUT)
+        except Exception as e:
+            self._rpc_retry_at = time.time() + RPC_RETRY_INTERVAL
+            logger.warning(
+                f"SurrealDB RPC query failed ({type(e).__name__}: {e}); using HTTP for {RPC_RETRY_INTERVAL:.0f}s"
+            )
+            await self._drop_rpc()
+            return None
+        if response.get("error"):
+            # Request-level failure (e.g. parse error): report it like the HTTP endpoint would
+            return [{"status": "ERR", "result": str(response["error"].get("message", response["error"]))}]
+        return _from_native(response.get("result") or [])
 
-        # Retry logic for connection failures
-        last_error = None
+    async def _post_sql(self, final_sql: str, **kwargs) -> httpx.Response:
+        """POST a SurrealQL script, retrying connection failures with exponential backoff."""
         for attempt in range(self.max_retries):
             try:
-                response = await self.client.post(
+                return await self.client.post(
                     self.url, 
                     content=final_sql, 
                     auth=self.auth, 
                     headers=self.headers,
                     **kwargs
                 )
-                
+            except (httpx.ConnectError, httpx.NetworkError, httpx.TimeoutException) as e:
+                if attempt >= self.max_retries - 1:
+                    raise
+                # Exponential backoff: 0.5s, 1s, 2s
+                delay = self.retry_delay_base * (2 ** attempt)
+                logger.warning(f"Database connection failed (attempt {attempt + 1}/{self.max_retries}): {e}. Retrying in {delay:.1f}s...")
+                await asyncio.sleep(delay)
+
+    async def _execute_query(self, query: str, params: dict = None, raise_on_error: bool = False, **kwargs) -> Any:
+        """Execute a SurrealQL query using HTTP REST API with retry logic for connection failures."""
+        prepared = _prepare_query(query)
+        if prepared.error:
+            logger.error(prepared.error)
+            if raise_on_error:
+                raise ValueError(prepared.error)
+            return None
+
+        try:
+            data = await self._rpc_query(query, params, kwargs.get("timeout"))
+            if data is None:
+                # Explicitly set NS/DB in SQL to avoid Header issues
+                use_prefix = f"USE NS {SURREAL_NS} DB {SURREAL_DB};\n"
+                final_sql = use_prefix + self._let_prefix(params) + query
+                response = await self._post_sql(final_sql, **kwargs)
+
                 if response.status_code != 200:
                     msg = f"Query Error HTTP {response.status_code}: {response.text}"
                     if raise_on_error:
@@ -156,60 +313,126 @@ class MemoryServer:
                     else:
                         logger.error(msg)
                     return None
-                
                 data = response.json()
-                if isinstance(data, list) and data:
-                    last_res = data[-1]
-                    if last_res.get("status") == "OK":
-                        self.last_successful_query = time.time()
-                        return last_res.get("result")
-                    else:
-                        # Handle transaction failures - attempt rollback if transaction was active
-                        if has_transaction and "TRANSACTION" in upper_q:
-                            logger.warning("Transaction failed, attempting rollback...")
-                            try:
-                                await self._execute_query("ROLLBACK;", raise_on_error=False)
-                                logger.info("Transaction rolled back successfully")
-                            except Exception as rollback_error:
-                                logger.error(f"Failed to rollback transaction: {rollback_error}")
-
-                        # [PATCH] Silence "already exists" noise
-                        result_msg = str(last_res.get("result", ""))
-                        if "already exists" in result_msg:
-                            logger.debug(f"DB entity already exists: {result_msg}")
-                            return None
-
-                        if raise_on_error:
-                            raise Exception(f"Query Logic Error: {last_res}")
-                        logger.error(f"Query Logic Error: {last_res}")
-                        return None
-                return data
 
-            except (httpx.ConnectError, httpx.NetworkError, httpx.TimeoutException) as e:
-                last_error = e
-                if attempt < self.max_retries - 1:
-                    # Exponential backoff: 0.5s, 1s, 2s
-                    delay = self.retry_delay_base * (2 ** attempt)
-                    logger.warning(f"Database connection failed (attempt {attempt + 1}/{self.max_retries}): {e}. Retrying in {delay:.1f}s...")
-                    await asyncio.sleep(delay)
-                    continue
+            if isinstance(data, list) and data:
+                last_res = data[-1]
+                if last_res.get("status") == "OK":
+                    self.last_successful_query = time.time()
+                    return last_res.get("result")
                 else:
-                    # Final attempt failed
+                    # Handle transaction failures - attempt rollback if transaction was active
+                    if prepared.has_transaction:
+                        logger.warning("Transaction failed, attempting rollback...")
+                        try:
+                            await self._execute_query("ROLLBACK;", raise_on_error=False)
+                            logger.info("Transaction rolled back successfully")
+                        except Exception as rollback_error:
+                            logger.error(f"Failed to rollback transaction: {rollback_error}")
+
+                    # [PATCH] Silence "already exists" noise
+                    result_msg = str(last_res.get("result", ""))
+                    if "already exists" in result_msg:
+                        logger.debug(f"DB entity already exists: {result_msg}")
+                        return None
+
                     if raise_on_error:
-                        raise e
-                    logger.error(f"Execution Error after {self.max_retries} attempts: {e}")
+                        raise Exception(f"Query Logic Error: {last_res}")
+                    logger.error(f"Query Logic Error: {last_res}")
                     return None
+            return data
+
+        except (httpx.ConnectError, httpx.NetworkError, httpx.TimeoutException) as e:
+            # Final retry failed
+            if raise_on_error:
+                raise e
+            logger.error(f"Execution Error after {self.max_retries} attempts: {e}")
+            return None
+        except Exception as e:
+            # Non-connection errors don't retry
+            if raise_on_error:
+                raise e
+            logger.error(f"Execution Error: {e}")
+            return None
+
+    async def execute_batch(self, statement: str, records: List[Dict[str, Any]], batch_size: int = WRITE_BATCH_SIZE, transaction: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        Run one single-statement template for many parameter sets in few round-trips.
+
+        Each record's params are bound under a per-record suffix ($name -> $name__3),
+        so up to `batch_size` records share one round-trip. SurrealDB reports a status per
+        statement, which gives per-record errors. With transaction=True each batch is
+        all-or-nothing instead, and a failure is reported against every record in it.
+
+        Returns {"ok", "written", "failed", "errors": [{"index", "error"}], "round_trips"}.
+        """
+        summary = {"ok": True, "written": 0, "failed": 0, "errors": [], "round_trips": 0}
+        statement = statement.strip().rstrip(";")
+        prepared = _prepare_query(statement)
+        if prepared.error:
+            raise ValueError(prepared.error)
+        if not records:
+            return summary
+
+        begin, commit = ("BEGIN TRANSACTION;\n", "COMMIT TRANSACTION;\n") if transaction else ("", "")
+        batch_size = max(1, batch_size)
+        for start in range(0, len(records), batch_size):
+            chunk = records[start:start + batch_size]
+            bound_statements = []
+            bound_params = []
+            for i, params in enumerate(chunk):
+                suffix = f"__{i}"
+                bound = statement
+                for k in params:
+                    bound = re.sub(rf"\${re.escape(k)}\b", f"${k}{suffix}", bound)
+                bound_statements.append(bound + ";\n")
+                bound_params.append({f"{k}{suffix}": v for k, v in params.items()})
+
+            summary["round_trips"] += 1
+            errors: Dict[int, str] = {}
+            try:
+                # RPC: params travel out-of-band, so the response holds only our statements
+                merged = {k: v for params in bound_params for k, v in params.items()}
+                data = await self._rpc_query(begin + "".join(bound_statements) + commit, merged, kwargs.get("timeout"))
+                offset = 1 if transaction else 0
+                result_slots = [offset + i for i in range(len(chunk))]
+                if data is None:
+                    # HTTP: USE + (LETs, statement) per record; track each statement's response index
+                    parts = [f"USE NS {SURREAL_NS} DB {SURREAL_DB};\n", begin]
+                    result_slots = []
+                    n_statements = 1 + offset
+                    for bound, params in zip(bound_statements, bound_params):
+                        parts.append(self._let_prefix(params))
+                        parts.append(bound)
+                        n_statements += len(params)
+                        result_slots.append(n_statements)
+                        n_statements += 1
+                    parts.append(commit)
+                    response = await self._post_sql("".join(parts), **kwargs)
+                    if response.status_code != 200:
+                        raise Exception(f"Query Error HTTP {response.status_code}: {response.text}")
+                    data = response.json()
+
+                for i, slot in enumerate(result_slots):
+                    res = data[slot] if isinstance(data, list) and slot < len(data) else None
+                    if not res or res.get("status") != "OK":
+                        errors[i] = str(res.get("result") if res else "missing statement result")
+                if transaction and errors:
+                    first = next(iter(errors.values()))
+                    errors = {i: first for i in range(len(chunk))}
             except Exception as e:
-                # Non-connection errors don't retry
-                if raise_on_error:
-                    raise e
-                logger.error(f"Execution Error: {e}")
-                return None
-        
-        # Should never reach here, but handle it
-        if raise_on_error and last_error:
-            raise last_error
-        return None
+                errors = {i: str(e) for i in range(len(chunk))}
+
+            if len(errors) < len(chunk):
+                self.last_successful_query = time.time()
+            summary["written"] += len(chunk) - len(errors)
+            summary["failed"] += len(errors)
+            summary["errors"].extend({"index": start + i, "error": err} for i, err in sorted(errors.items()))
+
+        summary["ok"] = summary["failed"] == 0
+        if summary["failed"]:
+            logger.warning(f"Batch write: {summary['failed']}/{len(records)} records failed (first: {summary['errors'][0]['error']})")
+        return summary
 
     async def execute_query(self, query: str, params: dict = None, raise_on_error: bool = False, **kwargs) -> Any:
         """
@@ -632,6 +855,8 @@ END;"""
             # Close existing client if it exists
             if hasattr(self, 'client') and self.client:
                 await self.client.aclose()
+            await self._drop_rpc()
+            self._rpc_retry_at = 0.0
             
             # Create new client
             self.client = httpx.AsyncClient(
@@ -653,6 +878,12 @@ END;"""
             self.initialized = False
             return False
 
+    async def aclose(self) -> None:
+        """Close the RPC session and HTTP pool (shutdown)."""
+        await self._drop_rpc()
+        if self.client and not self.client.is_closed:
+            await self.client.aclose()
+
     async def list_memory_banks(self):
         """List all unique memory bank IDs."""
         await self.ensure_connected()
@@ -678,69 +909,45 @@ END;"""
         return {"ok": True}
 
     async def get_embedding(self, text: str) -> List[float]:
-        embedding: Optional[List[float]] = None
+        """Embed a single text via the shared, micro-batched EmbeddingService."""
         try:
-            model = self.state.embedding_model if self.state else "ollama:mxbai-embed-large:latest"
-            
-            # Direct Ollama Bypass (Reliability)
-            logger.debug(f"Using embed model: {model}")
-            if "ollama" in model or "mxbai" in model:
-                 try:
-                     async with httpx.AsyncClient() as client:
-                        clean_model = model.replace("ollama:", "")
-
-                        prompt_text = text
-                        if isinstance(text, list):
-                            logger.warning(f"MemoryServer: get_embedding received LIST (len={len(text)}). Joining with newlines.")
-                            prompt_text = "\n".join([str(t) for t in text])
-                        
-                        resp = await client.post(
-                            "http://127.0.0.1:11434/api/embeddings",
-                            json={"model": clean_model, "prompt": prompt_text},
-                            timeout=30.0
-                        )
-                        if resp.status_code == 200:
-                            return _normalize_embedding(resp.json().get("embedding"))
-                        logger.warning(f"Ollama Direct Embedding failed {resp.status_code}: {resp.text}")
-                 except Exception as eo:
-                     logger.warning(f"Ollama Direct failed: {eo}")
-                     # Fallthrough to Gateway
-
-            # Circuit Breaker Check
-            if self.state and hasattr(self.state, "mcp_circuit_breaker"):
-                 if not self.state.mcp_circuit_breaker.is_allowed(model):
-                     logger.warning(f"Embedding Short-Circuited: Model '{model}' is broken.")
-                     return _normalize_embedding([0.0] * EMBEDDING_DIMENSION)
-            
-            headers = {}
-            if ROUTER_AUTH_TOKEN:
-                headers["Authorization"] = f"Bearer {ROUTER_AUTH_TOKEN}"
-            async with httpx.AsyncClient(verify=False) as client:
-                resp = await client.post(
-                    f"{GATEWAY_BASE}/v1/embeddings",
-                    json={"model": model, "input": text},
-                    headers=headers,
-                    timeout=10.0
-                )
-                if resp.status_code == 200:
-                    if self.state and hasattr(self.state, "mcp_circuit_breaker"):
-                         self.state.mcp_circuit_breaker.record_success(model)
-                    embedding = resp.json()["data"][0]["embedding"]
-                    return _normalize_embedding(embedding)
-                logger.warning(f"Embedding failed HTTP {resp.status_code}: {resp.text}")
-                if self.state and hasattr(self.state, "mcp_circuit_breaker"):
-                     self.state.mcp_circuit_breaker.record_failure(model)
-                     
+            return _normalize_embedding(await self.embedder.get_embedding(text))
         except Exception as e:
             logger.warning(f"Failed to get embedding: {e}")
-            if self.state and hasattr(self.state, "mcp_circuit_breaker"):
-                 m = self.state.embedding_model if self.state else "unknown"
-                 self.state.mcp_circuit_breaker.record_failure(m)
-                 
-        return _normalize_embedding(embedding)
+            return _normalize_embedding(None)
 
+    async def get_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """Embed many texts in as few upstream calls as possible."""
+        try:
+            vectors = await self.embedder.get_embeddings(texts)
+        except Exception as e:
+            logger.warning(f"Failed to get embeddings: {e}")
+            vectors = [None] * len(texts)
+        return [_normalize_embedding(v) for v in vectors]
 
+    @staticmethod
+    def _fact_text(entity: Any, relation: Any, target: Any, context: Any) -> str:
+        return f"{entity} {relation} {target} {context}"
 
+    @classmethod
+    def _fact_params(cls, entity: str, relation: str, target: str, context: Any, confidence: float, embedding: List[float]) -> Dict[str, Any]:
+        """Bind parameters for FACT_UPSERT_SQL."""
+        # Default to 'default' if no kb_id provided
+        kb_id = str(context).split("extracted from ")[-1] if "extracted from" in str(context) else "default"
+        if isinstance(context, dict) and "kb_id" in context:
+            kb_id = context["kb_id"]
+        elif not context:
+            kb_id = "default"
+        return {
+            "e": str(entity),
+            "r": str(relation),
+            "t": str(target),
+            "c": str(context),
+            "txt": cls._fact_text(entity, relation, target, context),
+            "emb": embedding,
+            "conf": confidence,
+            "kb": kb_id
+        }
 
     async def correct_fact(self, entity: str, relation: str, target: str, correction: str):
         """
@@ -777,91 +984,96 @@ END;"""
             logger.error(f"Failed to correct fact: {e}")
             return {"ok": False, "error": str(e)}
 
-    async def store_fact(self, entity: str, relation: str, target: str, context: Any = "", confidence: float = 1.0):
-        """
-        Store or update a fact with a 'truth/confidence' score.
-        confidence 1.0 = User-provided / Ground Truth
-        confidence 0.5-0.8 = Agent-inferred
-        confidence < 0.4 = Vague/Suspect
-        """
-        await self.ensure_connected()
-        if not self.initialized: return {"ok": False, "error": "DB not connected"}
-
+    @staticmethod
+    def _clean_fact(entity: Any, relation: Any, target: Any, confidence: Any) -> Union[str, Tuple[str, str, str, float]]:
+        """Validate and sanitize fact fields; returns an error message or the cleaned tuple."""
         # Input validation to prevent data corruption
         if not entity or not isinstance(entity, (str, int, float)):
-            return {"ok": False, "error": "Entity must be a non-empty string or number"}
+            return "Entity must be a non-empty string or number"
         if not relation or not isinstance(relation, (str, int, float)):
-            return {"ok": False, "error": "Relation must be a non-empty string or number"}
+            return "Relation must be a non-empty string or number"
         if not target or not isinstance(target, (str, int, float)):
-            return {"ok": False, "error": "Target must be a non-empty string or number"}
+            return "Target must be a non-empty string or number"
 
         # Validate confidence score
         try:
             confidence = float(confidence)
             if not (0.0 <= confidence <= 1.0):
-                return {"ok": False, "error": "Confidence must be between 0.0 and 1.0"}
+                return "Confidence must be between 0.0 and 1.0"
         except (ValueError, TypeError):
-            return {"ok": False, "error": "Confidence must be a valid number"}
+            return "Confidence must be a valid number"
 
         # Sanitize inputs to prevent injection
         entity = str(entity).strip()[:500]  # Reasonable length limit
         relation = str(relation).strip()[:500]
         target = str(target).strip()[:2000]  # Allow longer targets
         if len(entity) == 0 or len(relation) == 0 or len(target) == 0:
-            return {"ok": False, "error": "Entity, relation, and target cannot be empty after sanitization"}
-        
-        # Default to 'default' if no kb_id provided
-        kb_id = str(context).split("extracted from ")[-1] if "extracted from" in str(context) else "default"
-        # We'll allow explicit kb_id via a kwarg in a moment, but for now we detect or default.
-        if isinstance(context, dict) and "kb_id" in context:
-            kb_id = context["kb_id"]
-        elif not context:
-            kb_id = "default"
+            return "Entity, relation, and target cannot be empty after sanitization"
+        return entity, relation, target, confidence
+
+    async def store_facts(self, facts: List[Dict[str, Any]], confidence: float = 1.0):
+        """
+        Bulk version of store_fact: embeds all facts in batched calls and upserts
+        them WRITE_BATCH_SIZE per round-trip. Each fact is {entity, relation, target,
+        context?, confidence?}; invalid ones are reported in errors and skipped.
+        """
+        await self.ensure_connected()
+        if not self.initialized: return {"ok": False, "error": "DB not connected"}
+
+        valid: List[Tuple[int, str, str, str, Any, float]] = []
+        errors: List[Dict[str, Any]] = []
+        for i, fact in enumerate(facts):
+            cleaned = self._clean_fact(fact.get("entity"), fact.get("relation"), fact.get("target"),
+                                       fact.get("confidence", confidence))
+            if isinstance(cleaned, str):
+                errors.append({"index": i, "error": cleaned})
+            else:
+                valid.append((i, *cleaned[:3], fact.get("context", ""), cleaned[3]))
+        if not valid:
+            return {"ok": not errors, "written": 0, "failed": len(errors), "errors": errors, "round_trips": 0}
+
+        try:
+            embeddings = await self.get_embeddings([self._fact_text(e, r, t, c) for _, e, r, t, c, _ in valid])
+            records = [self._fact_params(e, r, t, c, conf, emb) for (_, e, r, t, c, conf), emb in zip(valid, embeddings)]
+            result = await self.execute_batch(FACT_UPSERT_SQL, records)
+        except Exception as e:
+            logger.error(f"Failed to store facts: {e}")
+            return {"ok": False, "error": str(e)}
+
+        # Map batch indices back to positions in the caller's list
+        errors.extend({"index": valid[err["index"]][0], "error": err["error"]} for err in result["errors"])
+        result["errors"] = sorted(errors, key=lambda err: err["index"])
+        result["failed"] = len(errors)
+        result["ok"] = not errors
+        logger.debug(f"Stored {result['written']}/{len(facts)} facts in {result['round_trips']} round-trips")
+        return result
+
+    async def store_fact(self, entity: str, relation: str, target: str, context: Any = "", confidence: float = 1.0, embedding: Optional[List[float]] = None):
+        """
+        Store or update a fact with a 'truth/confidence' score.
+        confidence 1.0 = User-provided / Ground Truth
+        confidence 0.5-0.8 = Agent-inferred
+        confidence < 0.4 = Vague/Suspect
+        embedding: precomputed vector (bulk callers embed in one batch up front)
+        """
+        await self.ensure_connected()
+        if not self.initialized: return {"ok": False, "error": "DB not connected"}
+
+        cleaned = self._clean_fact(entity, relation, target, confidence)
+        if isinstance(cleaned, str):
+            return {"ok": False, "error": cleaned}
+        entity, relation, target, confidence = cleaned
         
         try:
             # Use lock for critical database operations to prevent race conditions
             with self._operation_lock:
                 # Generate embedding for the fact
-                fact_text = f"{entity} {relation} {target} {context}"
-                embedding = await self.get_embedding(fact_text)
+                if embedding is None:
+                    embedding = await self.get_embedding(self._fact_text(entity, relation, target, context))
 
-                # Atomic UPSERT with Confidence Logic using SurrealQL logic
+                # Atomic single-statement UPSERT with confidence logic
                 # If we hear it again, confidence increases (math::max of old and new).
-                sql = """
-                BEGIN TRANSACTION;
-                LET $existing = (SELECT id, confidence FROM fact WHERE entity = $e AND relation = $r AND target = $t AND kb_id = $kb LIMIT 1);
-                IF count($existing) > 0 THEN
-                    UPDATE fact SET
-                        context = $c,
-                        content = $txt,
-                        embedding = $emb,
-                        confidence = math::min([1.0, math::max([$existing[0].confidence, $conf])]),
-                        created_at = time::now()
-                    WHERE entity = $e AND relation = $r AND target = $t AND kb_id = $kb;
-                ELSE
-                    CREATE fact SET
-                        entity = $e,
-                        relation = $r,
-                        target = $t,
-                        context = $c,
-                        content = $txt,
-                        embedding = $emb,
-                        kb_id = $kb,
-                        confidence = $conf;
-                END;
-                COMMIT TRANSACTION;
-                """
-
-                await self._execute_query(sql, {
-                    "e": str(entity),
-                    "r": str(relation),
-                    "t": str(target),
-                    "c": str(context),
-                    "txt": fact_text,
-                    "emb": embedding,
-                    "conf": confidence,
-                    "kb": kb_id
-                })
+                await self._execute_query(FACT_UPSERT_SQL, self._fact_params(entity, relation, target, context, confidence, embedding))
             logger.debug(f"Stored fact: {entity} {relation} {target} (Confidence: {confidence})")
             return {"ok": True}
         except Exception as e:
@@ -940,17 +1152,23 @@ END;"""
         try:
             # Basic splitting (paragraph based)
             chunks = [p for p in content.split('\n\n') if p.strip()]
-
-            for i, chunk in enumerate(chunks):
-                if not chunk.strip(): continue
-                # Store chunk as a separate fact for searchability
-                await self.store_fact(
-                    entity=f"ContentChunk_{i}",
-                    relation="belongs_to",
-                    target=f"kb_{kb_id}",
-                    context={"kb_id": kb_id, "chunk_index": i, "sovereign": True},
-                    confidence=0.8  # Lower confidence for auto-chunked content
-                )
+            contexts = [{"kb_id": kb_id, "chunk_index": i, "sovereign": True} for i in range(len(chunks))]
+
+            # Embed all chunks in batched calls up front
+            embeddings = await self.get_embeddings([
+                self._fact_text(f"ContentChunk_{i}", "belongs_to", f"kb_{kb_id}", contexts[i])
+                for i in range(len(chunks))
+            ])
+
+            # Store each chunk as a separate fact for searchability, WRITE_BATCH_SIZE per round-trip
+            records = [
+                self._fact_params(f"ContentChunk_{i}", "belongs_to", f"kb_{kb_id}", contexts[i],
+                                  0.8,  # Lower confidence for auto-chunked content
+                                  embeddings[i])
+                for i in range(len(chunks))
+            ]
+            result = await self.execute_batch(FACT_UPSERT_SQL, records)
+            logger.info(f"Stored {result['written']}/{len(records)} chunks for {kb_id} in {result['round_trips']} round-trips")
         except Exception as e:
             logger.warning(f"Failed to add content chunks for {kb_id}: {e}")
             # Don't fail the whole sync for chunking issues
@@ -1175,39 +1393,40 @@ END;"""
     async def index_tools(self, tool_defs: List[Dict[str, Any]]):
         await self.ensure_connected()
         if not self.initialized: return {"ok": False, "error": "DB not connected"}
-        count = 0
         
         # Import security defaults
         from agent_runner.tool_security import tool_requires_admin
         
-        for td in tool_defs:
-            func = td.get("function", {})
-            name = func.get("name")
-            desc = func.get("description", "")
-            if not name: continue
-            emb = await self.get_embedding(f"{name}: {desc}")
-            
-            # Get security requirement from code defaults
-            requires_admin = tool_requires_admin(name)
-            
-            # This is a multi-statement query block, _execute_query handles return of LAST statement properly?
-            # Creating complex logic might need updates. For now assuming simple update/create works.
-            res = await self._execute_query("""
-                UPDATE tool_definition SET 
-                    description = $desc, 
+        named = [td.get("function", {}) for td in tool_defs]
+        named = [func for func in named if func.get("name")]
+        embeddings = await self.get_embeddings([f"{func['name']}: {func.get('description', '')}" for func in named])
+
+        records = [
+            {
+                "name": func["name"],
+                "desc": func.get("description", ""),
+                "emb": emb,
+                # Get security requirement from code defaults
+                "requires_admin": tool_requires_admin(func["name"]),
+            }
+            for func, emb in zip(named, embeddings)
+        ]
+        result = await self.execute_batch("""
+            IF count((SELECT id FROM tool_definition WHERE name = $name)) > 0 THEN
+                (UPDATE tool_definition SET
+                    description = $desc,
                     embedding = $emb,
                     requires_admin = $requires_admin
-                WHERE name = $name;
-                IF count(SELECT * FROM tool_definition WHERE name = $name) == 0 THEN
-                    CREATE tool_definition SET 
-                        name = $name, 
-                        description = $desc, 
-                        embedding = $emb,
-                        requires_admin = $requires_admin
-                END;
-            """, {"name": name, "desc": desc, "emb": emb, "requires_admin": requires_admin})
-            if res is not None:
-                count += 1
+                WHERE name = $name)
+            ELSE
+                (CREATE tool_definition SET
+                    name = $name,
+                    description = $desc,
+                    embedding = $emb,
+                    requires_admin = $requires_admin)
+            END
+        """, records)
+        count = result["written"]
         return {"ok": True, "indexed": count}
 
     async def get_memory_stats(self):
@@ -1267,21 +1486,19 @@ END;"""
                 return {"ok": True, "messsage": "No facts to reindex."}
             
             facts = res
-            count = 0
             logger.info(f"Starting re-index of {len(facts)} facts...")
             
-            # 2. Re-embed each
-            for f in facts:
-                fact_text = f"{f.get('entity', '')} {f.get('relation', '')} {f.get('target', '')}"
-                embedding = await self.get_embedding(fact_text)
-                # logger.info(f"DEBUG: Embedding Len: {len(embedding)} Sample: {embedding[:3]}")
-                
-                # 3. Update
-                upd_res = await self._execute_query("UPDATE fact SET embedding = $emb WHERE id = type::thing($id) RETURN AFTER", {"id": f['id'], "emb": embedding})
-                # logger.info(f"DEBUG: Update Result: {upd_res}")
-                count += 1
-                if count % 10 == 0:
-                    logger.info(f"Re-indexed {count}/{len(facts)}...")
+            # 2. Re-embed (batched)
+            embeddings = await self.get_embeddings([
+                f"{f.get('entity', '')} {f.get('relation', '')} {f.get('target', '')}" for f in facts
+            ])
+            # 3. Update (batched)
+            result = await self.execute_batch(
+                "UPDATE fact SET embedding = $emb WHERE id = type::thing($id)",
+                [{"id": f['id'], "emb": embedding} for f, embedding in zip(facts, embeddings)]
+            )
+            count = result["written"]
+            logger.info(f"Re-indexed {count}/{len(facts)} facts in {result['round_trips']} round-trips")
             
             return {"ok": True, "reindexed_count": count}
         except Exception as e:
@@ -1592,15 +1809,21 @@ END;"""
             # logger.error(f"DEBUG: Error in store_episode: {e}")
             return {"ok": False, "error": str(e)}
 
-    async def get_unconsolidated_episodes(self, limit: int = 10):
-        """Get episodes that haven't been consolidated into facts yet."""
+    async def get_unconsolidated_episodes(self, limit: int = 10, after: Optional[str] = None):
+        """
+        Get episodes that haven't been consolidated into facts yet, oldest first.
+        Pass the last episode's timestamp as `after` to fetch the next page.
+        Embeddings are not returned.
+        """
         await self.ensure_connected()
         if not self.initialized: return {"ok": False, "error": "DB not connected"}
         try:
             # Fixed: Restore WHERE consolidated = false
+            cursor = "AND timestamp > type::datetime($after) " if after else ""
             res = await self._execute_query(
-                "SELECT * FROM episode WHERE consolidated = false ORDER BY timestamp ASC LIMIT $limit",
-                {"limit": limit}
+                "SELECT request_id, messages, timestamp FROM episode WHERE consolidated = false "
+                f"{cursor}ORDER BY timestamp ASC LIMIT $limit",
+                {"limit": limit, "after": after} if after else {"limit": limit}
             )
             if res is None:
                 return {"ok": False, "error": "Query execution failed"}
@@ -1619,6 +1842,23 @@ END;"""
         except Exception as e:
             return {"ok": False, "error": str(e)}
 
+    async def mark_episodes_consolidated(self, request_ids: List[str]):
+        """Mark many episodes as processed in one statement."""
+        await self.ensure_connected()
+        if not self.initialized: return {"ok": False, "error": "DB not connected"}
+        if not request_ids:
+            return {"ok": True, "updated": 0}
+        try:
+            res = await self._execute_query(
+                "UPDATE episode SET consolidated = true WHERE request_id INSIDE $rids RETURN NONE",
+                {"rids": list(request_ids)}
+            )
+            if res is None:
+                return {"ok": False, "error": "Query execution failed"}
+            return {"ok": True, "updated": len(request_ids)}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
     async def prune_offboarded_mcp_servers(self, active_servers: List[str]):
         """Remove MCP servers from intelligence that are no longer configured."""
         await self.ensure_connected()
@@ -1848,8 +2088,10 @@ async def main():
             Tool(name="process_memories", description="Force processing of recent chats into memory.", inputSchema={"type":"object","properties":{}}),
             Tool(name="optimize_memory", description="Run optimization/integrity checks on the memory database.", inputSchema={"type":"object","properties":{}}),
             Tool(name="store_episode", description="Store a conversation episode.", inputSchema={"type":"object","properties":{"request_id":{"type":"string"},"messages":{"type":"array","items":{"type":"object"}}},"required":["request_id","messages"]}),
-            Tool(name="get_unconsolidated_episodes", description="Get unconsolidated episodes.", inputSchema={"type":"object","properties":{"limit":{"type":"integer"}}}),
+            Tool(name="get_unconsolidated_episodes", description="Get unconsolidated episodes.", inputSchema={"type":"object","properties":{"limit":{"type":"integer"},"after":{"type":"string","description":"Timestamp of the last episode of the previous page."}}}),
             Tool(name="mark_episode_consolidated", description="Mark episode as consolidated.", inputSchema={"type":"object","properties":{"request_id":{"type":"string"}},"required":["request_id"]}),
+            Tool(name="mark_episodes_consolidated", description="Mark many episodes as consolidated.", inputSchema={"type":"object","properties":{"request_ids":{"type":"array","items":{"type":"string"}}},"required":["request_ids"]}),
+            Tool(name="store_facts", description="Store many facts in one batched write.", inputSchema={"type":"object","properties":{"facts":{"type":"array","items":{"type":"object"}},"confidence":{"type":"number"}},"required":["facts"]}),
             # Source Authority
             Tool(name="store_source", description="Store/Update a trusted source.", inputSchema={"type":"object","properties":{"url":{"type":"string"},"title":{"type":"string"},"author":{"type":"string"},"reliability":{"type":"number"},"summary":{"type":"string"}},"required":["url","title"]}),
             Tool(name="list_sources", description="List trusted sources.", inputSchema={"type":"object","properties":{"limit":{"type":"integer"}}}),
@@ -1884,6 +2126,8 @@ async def main():
             elif name == "store_episode": res = await memory.store_episode(**args)
             elif name == "get_unconsolidated_episodes": res = await memory.get_unconsolidated_episodes(**args)
             elif name == "mark_episode_consolidated": res = await memory.mark_episode_consolidated(**args)
+            elif name == "mark_episodes_consolidated": res = await memory.mark_episodes_consolidated(**args)
+            elif name == "store_facts": res = await memory.store_facts(**args)
             elif name == "store_source": res = await memory.store_source(**args)
             elif name == "list_sources": res = await memory.list_sources(**args)
             elif name == "store_advice": res = await memory.store_advice(**args)
@@ -1,183 +1,270 @@
+import asyncio
 import logging
 import json
-import fcntl
 import os
-import contextlib
 import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 from agent_runner.state import AgentState
 from common.constants import OBJ_MODEL
+from common.file_lock import AsyncFileLock
+from common.ollama_residency import background_slot
 from common.sovereign import get_sovereign_model
 
 logger = logging.getLogger("agent_runner.memory_tasks")
 
-@contextlib.contextmanager
-def memory_lock(state: AgentState):
+MEMORY_LOCK_TIMEOUT_S = float(os.getenv("MEMORY_LOCK_TIMEOUT_S", "600"))
+
+_memory_locks: Dict[str, AsyncFileLock] = {}
+
+
+def memory_lock(state: AgentState, shared: bool = False, timeout: Optional[float] = MEMORY_LOCK_TIMEOUT_S):
     """
-    File-based mutex to ensure atomic memory operations.
+    Cross-process mutex to ensure atomic memory operations.
     Prevents Backup from running during Consolidation (and vice-versa).
+    Writers take it exclusively; readers (backup export) may share it.
+    Waiting never blocks the event loop; raises asyncio.TimeoutError after `timeout`.
     """
-    from pathlib import Path
-    lock_path = Path(state.agent_fs_root) / "memory.lock"
-    # Ensure lock file exists
-    if not lock_path.exists():
-        lock_path.touch()
-        
-    f = open(lock_path, "r+")
+    lock_path = str(Path(state.agent_fs_root) / "memory.lock")
+    lock = _memory_locks.get(lock_path)
+    if lock is None:
+        from common.observability import get_observability
+        lock = _memory_locks[lock_path] = AsyncFileLock(lock_path, get_observability().metrics, "memory_lock")
+    return lock.acquire(shared=shared, timeout=timeout)
+
+# Consolidation pipeline sizing
+CONSOLIDATION_PAGE_SIZE = 25     # Episodes per fetch; also one bulk fact write + one flag update
+CONSOLIDATION_MAX_PAGES = 20     # Upper bound on pages drained per cycle
+EXTRACTION_CONCURRENCY = 4       # Concurrent extraction calls to the summarizer
+
+_last_drain_rate = 0.0  # Episodes/sec of the most recent cycle
+
+
+def _consolidation_metrics():
+    """Counters for the consolidation pipeline, registered on first use."""
+    from common.observability import get_observability
+    m = get_observability().metrics
+    m.gauge("memory_consolidation_drain_rate", lambda: _last_drain_rate,
+            "Episodes consolidated per second in the last cycle")
+    return (
+        m.counter("memory_episodes_consolidated_total", "Episodes marked consolidated"),
+        m.counter("memory_facts_stored_total", "Facts written by consolidation"),
+    )
+
+
+def _tool_payload(res: Dict[str, Any]) -> Dict[str, Any]:
+    """Unwrap a project-memory tool result (direct dict or MCP text content)."""
+    tool_res = res.get("result", {}) or {}
+    if "content" in tool_res and tool_res["content"]:
+        return json.loads(tool_res["content"][0]["text"])
+    return tool_res
+
+
+async def _fetch_episode_page(state: AgentState, after: Optional[str]) -> List[Dict[str, Any]]:
+    from agent_runner.tools.mcp import tool_mcp_proxy
+    args: Dict[str, Any] = {"limit": CONSOLIDATION_PAGE_SIZE}
+    if after:
+        args["after"] = after
+    res = await tool_mcp_proxy(state, "project-memory", "get_unconsolidated_episodes", args)
+    if not res.get("ok"):
+        raise RuntimeError(f"Failed to get episodes: {res.get('error', res)}")
+    payload = _tool_payload(res)
+    if payload.get("ok") is False:
+        raise RuntimeError(f"Failed to get episodes: {payload.get('error')}")
+    return payload.get("episodes", [])
+
+
+def _parse_facts(content: str) -> List[Dict[str, Any]]:
+    # Handle potential non-JSON output wrappers
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0]
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0]
+    fact_data = json.loads(content)
+    facts = fact_data.get("facts", []) if isinstance(fact_data, dict) else fact_data
+    if not isinstance(facts, list):
+        return []
+    return [f for f in facts if isinstance(f, dict) and all(k in f for k in ("entity", "relation", "target"))]
+
+
+async def _extract_facts(state: AgentState, ep: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Ask the summarizer for facts in one episode. Never raises.
+    Returns None only for retryable failures (transport error, 429/5xx) so the
+    episode stays queued. Unparseable output and other model errors are
+    non-retryable and yield [], like an episode with nothing to extract, so
+    the episode is marked consolidated and cannot block the queue.
+    """
+    request_id = ep["request_id"]
+    messages = ep["messages"]
+
+    if isinstance(messages, str):
+        try: messages = json.loads(messages)
+        except: pass
+
+    # Check for empty messages
+    if not messages: return []
+
+    # Optimization: Skip very short meaningless episodes (e.g. just "hi")
+    # Simple heuristic: if total content length < 10 chars, skip
+    total_len = sum(len(str(m.get("content",""))) for m in messages)
+    if total_len < 10:
+        logger.debug(f"Skipping episode {request_id} (too short: {total_len} chars)")
+        return []
+
+    logger.debug(f"Extracting facts from episode {request_id}")
+    extraction_prompt = (
+        "Extract key facts from the following conversation as a JSON array of objects with "
+        "'entity', 'relation', 'target', and 'context' fields. "
+        "Only extract meaningful, long-term facts. If no facts are found, return an empty array [].\n\n"
+        "Conversation:\n" + json.dumps(messages, indent=2)
+    )
+
     try:
-        # Try non-blocking first to log status
-        try:
-            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
-        except BlockingIOError:
-            logger.info(f"Waiting for memory lock ({lock_path})...")
-            # Blocking acquisition
-            fcntl.flock(f, fcntl.LOCK_EX)
-            
-        logger.debug("Acquired memory lock")
-        yield
-    finally:
-        fcntl.flock(f, fcntl.LOCK_UN)
-        f.close()
-        logger.debug("Released memory lock")
+        client = await state.get_http_client()
+        url = f"{state.gateway_base}/v1/chat/completions"
+
+        # [SOVEREIGN] Use centralized model for summarization
+        summarizer = get_sovereign_model("summarizer", "ollama:mistral:latest")
+        payload = {
+            OBJ_MODEL: summarizer,
+            "messages": [{"role": "user", "content": extraction_prompt}],
+            "response_format": {"type": "json_object"}
+        }
+
+        # Background work: wait until the summarizer is resident (or Ollama is idle)
+        async with background_slot(summarizer) as keep_alive:
+            if keep_alive:
+                payload["keep_alive"] = keep_alive
+            resp = await client.post(url, json=payload, timeout=60.0)
+    except Exception as e:
+        logger.error(f"Failed to process episode {request_id}: {e}")
+        return None
+
+    if resp.status_code == 429 or resp.status_code >= 500:
+        logger.warning(f"Model unavailable for {request_id}: {resp.status_code} - {resp.text}")
+        return None
+    if resp.status_code != 200:
+        logger.warning(f"Model error for {request_id}: {resp.status_code} - {resp.text}")
+        return []
+
+    try:
+        facts = _parse_facts(resp.json()["choices"][0]["message"]["content"])
+    except Exception as e:
+        logger.warning(f"Failed to parse extraction result for {request_id}: {e}")
+        return []
+
+    for fact in facts:
+        fact.setdefault("context", f"Extracted from {request_id}")
+    logger.debug(f"Episode {request_id}: Extracted {len(facts)} facts")
+    return facts
+
+
+async def _commit_page(state: AgentState, request_ids: List[str], facts: List[Dict[str, Any]]) -> int:
+    """
+    One bulk fact upsert plus one bulk flag update for a page.
+    Returns the number of facts written; raises if the page must be retried.
+    """
+    from agent_runner.tools.mcp import tool_mcp_proxy
+    written = 0
+    if facts:
+        res = await tool_mcp_proxy(state, "project-memory", "store_facts", {"facts": facts})
+        payload = _tool_payload(res) if res.get("ok") else res
+        if "written" not in payload:
+            # Nothing was attempted (DB down, embedding failure): leave episodes for the next cycle
+            raise RuntimeError(f"Bulk fact write failed: {payload.get('error')}")
+        written = payload["written"]
+        if payload.get("failed"):
+            logger.warning(f"Consolidation: {payload['failed']} facts rejected: {payload.get('errors', [])[:3]}")
+
+    # Only episodes whose extraction succeeded (possibly with no facts) are marked
+    res = await tool_mcp_proxy(state, "project-memory", "mark_episodes_consolidated", {"request_ids": request_ids})
+    payload = _tool_payload(res) if res.get("ok") else res
+    if not payload.get("ok"):
+        raise RuntimeError(f"Failed to mark episodes consolidated: {payload.get('error')}")
+    return written
+
 
 async def memory_consolidation_task(state: AgentState):
     """
-    Periodically fetches unconsolidated episodes and extracts facts.
+    Drains unconsolidated episodes and extracts facts.
+
+    Pipeline per cycle: the next page is fetched while the current one is
+    extracted (EXTRACTION_CONCURRENCY summarizer calls at a time), then the
+    page's facts go out in one store_facts call (embedded server-side in
+    batches) followed by one mark_episodes_consolidated call. memory_lock is
+    held only for that write, never across the model calls. Episodes whose
+    extraction hit a retryable failure are left for the next cycle; a page
+    where every extraction did (summarizer down) ends the cycle.
     """
+    global _last_drain_rate
     logger.info("Starting memory consolidation cycle")
+    episodes_counter, facts_counter = _consolidation_metrics()
+    started = time.monotonic()
+    processed = stored = pages = failed = 0
     try:
-        with memory_lock(state):
-            from agent_runner.tools.mcp import tool_mcp_proxy
-            
-            # 1. Get unconsolidated episodes
-        res = await tool_mcp_proxy(state, "project-memory", "get_unconsolidated_episodes", {"limit": 5})
-        if not res.get("ok"):
-            logger.error(f"Failed to get episodes: {res}")
-            return
-        
-        # Parse MCP Tool Result to get episodes
-        episodes = []
-        try:
-            tool_res = res.get("result", {})
-            logger.info(f"DEBUG: Memory Tool Response keys: {tool_res.keys()}")
-            # Check if directly in dict (unlikely via MCP) or in content text
-            if "episodes" in tool_res:
-                episodes = tool_res["episodes"]
-            elif "content" in tool_res:
-                # Standard MCP return: List of Content objects
-                text = tool_res["content"][0]["text"]
-                inner = json.loads(text)
-                episodes = inner.get("episodes", [])
-        except Exception as e:
-            logger.error(f"Failed to parse episodes from memory response: {e}")
-            return
-
-        if not episodes:
-            return
-            
-        logger.info(f"Consolidating {len(episodes)} episodes")
-        
-        # 2. Extract facts using Parallel Execution
-        # We use a semaphore to limit concurrency to avoid rate limits
-        sem = asyncio.Semaphore(10) # 10 concurrent requests
-        
-        async def process_episode(ep):
+        sem = asyncio.Semaphore(EXTRACTION_CONCURRENCY)
+
+        async def extract(ep):
             async with sem:
-                request_id = ep["request_id"]
-                messages = ep["messages"]
-                
-                if isinstance(messages, str):
-                    try: messages = json.loads(messages)
-                    except: pass
-                
-                # Check for empty messages
-                if not messages: return
-
-                # Optimization: Skip very short meaningless episodes (e.g. just "hi")
-                # Simple heuristic: if total content length < 10 chars, skip
-                total_len = sum(len(str(m.get("content",""))) for m in messages)
-                if total_len < 10:
-                    logger.debug(f"Skipping episode {request_id} (too short: {total_len} chars)")
-                    # Still mark as consolidated so we don't re-process
-                    await tool_mcp_proxy(state, "project-memory", "mark_episode_consolidated", {"request_id": request_id})
-                    return
-
-                logger.debug(f"Extracting facts from episode {request_id}")
-                extraction_prompt = (
-                    "Extract key facts from the following conversation as a JSON array of objects with "
-                    "'entity', 'relation', 'target', and 'context' fields. "
-                    "Only extract meaningful, long-term facts. If no facts are found, return an empty array [].\n\n"
-                    "Conversation:\n" + json.dumps(messages, indent=2)
-                )
-                
-                try:
-                    client = await state.get_http_client()
-                    url = f"{state.gateway_base}/v1/chat/completions"
-                    
-                    payload = {
-                        # [SOVEREIGN] Use centralized model for summarization
-                        OBJ_MODEL: get_sovereign_model("summarizer", "ollama:mistral:latest"),
-                        "messages": [{"role": "user", "content": extraction_prompt}],
-                        "response_format": {"type": "json_object"}
-                    }
-
-                    resp = await client.post(url, json=payload, timeout=60.0)
-                    if resp.status_code == 200:
-                        data = resp.json()
-                        content = data["choices"][0]["message"]["content"]
-                        try:
-                            # Handle potential non-JSON output wrappers
-                            if "```json" in content:
-                                content = content.split("```json")[1].split("```")[0]
-                            elif "```" in content:
-                                content = content.split("```")[1].split("```")[0]
-                                
-                            fact_data = json.loads(content)
-                            facts = fact_data.get("facts", []) if isinstance(fact_data, dict) else fact_data
-                            
-                            if isinstance(facts, list) and facts:
-                                count = 0
-                                for fact in facts:
-                                    if all(k in fact for k in ["entity", "relation", "target"]):
-                                        await tool_mcp_proxy(state, "project-memory", "store_fact", {
-                                            "entity": fact["entity"],
-                                            "relation": fact["relation"],
-                                            "target": fact["target"],
-                                            "context": fact.get("context", f"Extracted from {request_id}")
-                                        })
-                                        count += 1
-                                logger.info(f"Episode {request_id}: Extracted {count} facts")
-                            else:
-                                logger.debug(f"Episode {request_id}: No facts found")
-                                
-                        except Exception as e:
-                            logger.warning(f"Failed to parse extraction result for {request_id}: {e}")
-                    else:
-                        logger.warning(f"Model error for {request_id}: {resp.status_code} - {resp.text}")
+                return await _extract_facts(state, ep)
 
-                except Exception as e:
-                    logger.error(f"Failed to process episode {request_id}: {e}")
-                
-                # Always mark consolidated on success or non-retryable error to progress queue
-                try:
-                    await tool_mcp_proxy(state, "project-memory", "mark_episode_consolidated", {"request_id": request_id})
-                except Exception as e:
-                    logger.error(f"Failed to mark episode {request_id} consolidated: {e}")
+        page = await _fetch_episode_page(state, None)
+        while page:
+            pages += 1
+            # Stage 1: prefetch the next page behind the current extraction
+            next_page = None
+            if pages < CONSOLIDATION_MAX_PAGES and len(page) == CONSOLIDATION_PAGE_SIZE:
+                next_page = asyncio.create_task(_fetch_episode_page(state, str(page[-1].get("timestamp"))))
+
+            try:
+                # Stage 2: bounded-concurrency extraction
+                results = await asyncio.gather(*(extract(ep) for ep in page))
+                done = [ep["request_id"] for ep, ep_facts in zip(page, results) if ep_facts is not None]
+                facts = [fact for ep_facts in results if ep_facts for fact in ep_facts]
+                failed += len(page) - len(done)
+                if done:
+                    # Stage 3: one bulk write + one flag update
+                    async with memory_lock(state):
+                        stored += await _commit_page(state, done, facts)
+            except BaseException:
+                if next_page:
+                    next_page.cancel()
+                raise
 
-        # Execute parallel batch
-        import asyncio
-        await asyncio.gather(*(process_episode(ep) for ep in episodes))
-        logger.info(f"Consolidation cycle complete. Processed {len(episodes)} episodes.")
+            if not done:
+                if next_page:
+                    next_page.cancel()
+                logger.warning(f"Consolidation: extraction failed for all {len(page)} episodes; retrying next cycle")
+                break
+
+            processed += len(done)
+            episodes_counter.inc(len(done))
+            facts_counter.inc(len(facts))
+            logger.info(f"Consolidated {len(done)}/{len(page)} episodes ({len(facts)} facts)")
+            page = await next_page if next_page else []
 
     except Exception as e:
         logger.error(f"Memory consolidation task error: {e}")
 
+    elapsed = time.monotonic() - started
+    if processed:
+        _last_drain_rate = processed / elapsed if elapsed > 0 else float(processed)
+        logger.info(
+            f"Consolidation cycle complete. Processed {processed} episodes, stored {stored} facts "
+            f"in {pages} pages ({_last_drain_rate:.2f} episodes/s)."
+        )
+    if failed:
+        logger.warning(f"Consolidation: {failed} episodes failed extraction and stay queued")
+    return {"episodes": processed, "facts": stored, "pages": pages, "failed": failed, "drain_rate": _last_drain_rate}
+
 async def memory_backup_task(state: AgentState):
     """
     Periodically triggers a full SQL export of the database.
     """
     logger.info("Starting scheduled memory backup")
     try:
-        with memory_lock(state):
+        async with memory_lock(state, shared=True):
             from agent_runner.tools.mcp import tool_mcp_proxy
             res = await tool_mcp_proxy(state, "project-memory", "trigger_backup", {})
             if res.get("ok"):
@@ -193,7 +280,7 @@ async def optimize_memory_task(state: AgentState):
     """
     logger.debug("Starting scheduled memory optimization")
     try:
-        with memory_lock(state):
+        async with memory_lock(state):
             from agent_runner.tools.mcp import tool_mcp_proxy
             res = await tool_mcp_proxy(state, "project-memory", "optimize_memory", {})
             if res.get("ok"):
@@ -210,7 +297,7 @@ async def memory_audit_task(state: AgentState):
     """
     logger.info("Starting memory audit cycle")
     try:
-        with memory_lock(state):
+        async with memory_lock(state):
             from agent_runner.tools.mcp import tool_mcp_proxy
             from agent_runner.engine import AgentEngine
             
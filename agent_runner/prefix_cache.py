@@ -15,7 +15,7 @@ Key Features:
 import hashlib
 import time
 import logging
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Optional, Tuple, Hashable, Callable, Awaitable, Iterable
 from dataclasses import dataclass, field
 from collections import OrderedDict
 import asyncio
@@ -109,16 +109,22 @@ class PrefixCacheManager:
         # Use SHA256 for collision resistance, truncate to 16 chars for readability
         return hashlib.sha256(prefix_content.encode('utf-8')).hexdigest()[:16]
 
-    async def get_or_create_cache(self, prefix_content: str, conversation_id: str) -> Tuple[str, bool]:
+    async def get_or_create_cache(self, prefix_content: str, conversation_id: str,
+                                  prefix_hash: Optional[str] = None) -> Tuple[str, bool]:
         """
         Get existing cache or create new one for the prefix
 
+        Args:
+            prefix_hash: Precomputed hash (e.g. PromptSegmentCache.fingerprint);
+                skips hashing the full prefix when given
+
         Returns:
             (cache_identifier, is_new_cache)
         """
         self.metrics["total_requests"] += 1
 
-        prefix_hash = self.generate_prefix_hash(prefix_content)
+        if prefix_hash is None:
+            prefix_hash = self.generate_prefix_hash(prefix_content)
 
         # Check for existing cache
         if prefix_hash in self.cache:
@@ -296,4 +302,76 @@ Memory Usage: {stats['memory_usage_estimate']:,} bytes
             for i, entry in enumerate(top_entries, 1):
                 report += f"{i}. {entry.prefix_hash[:8]}: {entry.hit_count} hits, {len(entry.conversation_ids)} convs\n"
 
-        return report.strip()
\ No newline at end of file
+        return report.strip()
+
+@dataclass
+class PromptSegment:
+    """One memoized prompt segment and the version key it was built for"""
+    version: Hashable
+    content: str
+    digest: str
+    built_at: float = field(default_factory=time.time)
+
+
+class PromptSegmentCache:
+    """
+    Memoizes individual prompt segments (static instructions, tool menu,
+    architecture context, alerts) under their own version keys.
+
+    A segment is rebuilt only when the version key the caller passes differs
+    from the one it was built for, so a turn where nothing changed costs one
+    tuple comparison per segment. Each segment's digest is computed once at
+    build time; fingerprint() combines digests so the assembled prefix never
+    has to be re-hashed.
+    """
+
+    def __init__(self):
+        self._segments: Dict[str, PromptSegment] = {}
+        self.metrics = {"hits": 0, "rebuilds": 0, "invalidations": 0}
+
+    async def get(self, name: str, version: Hashable, build: Callable[[], Awaitable[str]],
+                  keep_empty: bool = True) -> str:
+        """
+        Return segment `name` for `version`, awaiting build() only on a version change.
+
+        keep_empty=False leaves an empty result unmemoized (for segments whose
+        backing store may simply not be ready yet).
+        """
+        segment = self._segments.get(name)
+        if segment is not None and segment.version == version:
+            self.metrics["hits"] += 1
+            return segment.content
+
+        content = await build()
+        self.metrics["rebuilds"] += 1
+        if content or keep_empty:
+            self._segments[name] = PromptSegment(
+                version=version,
+                content=content,
+                digest=hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+            )
+        else:
+            self._segments.pop(name, None)
+        return content
+
+    def invalidate(self, name: Optional[str] = None):
+        """Drop one segment (or all) so the next get() rebuilds it"""
+        if name is None:
+            self.metrics["invalidations"] += len(self._segments)
+            self._segments.clear()
+        elif self._segments.pop(name, None) is not None:
+            self.metrics["invalidations"] += 1
+
+    def fingerprint(self, names: Iterable[str]) -> str:
+        """Stable hash of the named segments' current contents (missing segments count as empty)"""
+        digests = [f"{name}:{seg.digest if (seg := self._segments.get(name)) else ''}" for name in names]
+        return hashlib.sha256("|".join(digests).encode("utf-8")).hexdigest()[:16]
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.metrics["hits"] + self.metrics["rebuilds"]
+        return {
+            **self.metrics,
+            "hit_rate": self.metrics["hits"] / total if total else 0,
+            "segments": {name: {"bytes": len(seg.content), "age": time.time() - seg.built_at}
+                         for name, seg in self._segments.items()}
+        }
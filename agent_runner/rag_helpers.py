@@ -8,6 +8,7 @@ import re
 from typing import Any, Dict
 from pathlib import Path
 from agent_runner.service_registry import ServiceRegistry
+from common.ollama_residency import background_slot
 from common.sovereign import get_sovereign_model
 
 logger = logging.getLogger("agent_runner.rag_helpers")
@@ -290,7 +291,11 @@ async def _ingest_content(file_path: Path, content: str, state: Any, http_client
             "messages": [{"role": "user", "content": lib_prompt}],
             "response_format": {"type": "json_object"}
         }
-        lib_resp = await http_client.post(f"{state.gateway_base}/v1/chat/completions", json=lib_payload, headers={"X-Skip-Refinement": "true"}, timeout=30.0)
+        # Background work: defer until the task model is resident (or Ollama is idle)
+        async with background_slot(state.task_model) as keep_alive:
+            if keep_alive:
+                lib_payload["keep_alive"] = keep_alive
+            lib_resp = await http_client.post(f"{state.gateway_base}/v1/chat/completions", json=lib_payload, headers={"X-Skip-Refinement": "true"}, timeout=30.0)
         
         if lib_resp.status_code == 200:
             raw_content = lib_resp.json()["choices"][0]["message"]["content"]
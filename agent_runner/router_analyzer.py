@@ -17,12 +17,13 @@ from common.message_utils import extract_text_content
 import os
 import re
 import threading
-from collections import OrderedDict
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional
 import hashlib
 import time
 
+from common.caching import get_persistent_ttl_cache
+
 logger = logging.getLogger(__name__)
 
 # Import unified tracking for categorization analytics
@@ -60,12 +61,10 @@ _router_circuit_breaker: Dict[str, Any] = {
 ROUTER_CIRCUIT_BREAKER_THRESHOLD = 5  # Disable after 5 failures
 ROUTER_CIRCUIT_BREAKER_RESET_TIME = 60.0  # Reset after 60 seconds
 
-# Thread-safe LRU cache for router analyses
-# NOTE: Cache invalidation framework available in agent_runner/cache_helpers.py
-# For now, using in-memory cache with TTL. Future: Integrate with DB timestamp validation.
-_router_cache: OrderedDict[str, tuple[float, 'RouterAnalysis']] = OrderedDict()
-_cache_lock = threading.Lock()
-_cache_max_size = 100
+# Router analyses: in-memory LRU/TTL index over the shared SQLite cache store,
+# so analyses survive restarts without a database round trip per lookup
+_cache_max_size = int(os.getenv("ROUTER_CACHE_MAX_ENTRIES", "1000"))
+_router_cache = get_persistent_ttl_cache("router_analysis", ROUTER_CACHE_TTL, _cache_max_size)
 
 # Cached tool category map (built once)
 _tool_category_map: Optional[Dict[str, str]] = None
@@ -528,12 +527,41 @@ def _normalize_query_for_cache(query: str) -> str:
     return ' '.join(intent_words)
 
 
+def _analysis_to_dict(analysis: 'RouterAnalysis') -> Dict[str, Any]:
+    return {
+        "complexity": analysis.complexity,
+        "query_type": analysis.query_type,
+        "domain": analysis.domain,
+        "tool_categories": analysis.tool_categories,
+        "recommended_tools": analysis.recommended_tools,
+        "recommended_model": analysis.recommended_model,
+        "can_use_local": analysis.can_use_local,
+        "estimated_cost": analysis.estimated_cost,
+        "estimated_input_tokens": analysis.estimated_input_tokens,
+        "estimated_output_tokens": analysis.estimated_output_tokens,
+        "optimal_context_window": analysis.optimal_context_window,
+        "is_ambiguous": analysis.is_ambiguous,
+        "requires_clarification": analysis.requires_clarification,
+        "clarification_questions": analysis.clarification_questions,
+        "confidence": analysis.confidence,
+        "reasoning": analysis.reasoning,
+    }
+
+
 async def _get_cached_analysis(cache_key: str, memory_server: Optional[Any] = None) -> Optional['RouterAnalysis']:
     """
-    Get cached analysis from database (source of truth) with in-memory fallback.
-    Database is checked first, in-memory cache is performance optimization.
+    Get cached analysis from the local persistent store, falling back to the
+    database (shared with other instances) on a miss.
     """
-    # 1. Check database first (source of truth)
+    # 1. Local store (in-memory; loaded from SQLite at startup)
+    cached = _router_cache.get(cache_key)
+    if cached is not None:
+        try:
+            return RouterAnalysis(**cached)
+        except Exception as e:
+            logger.warning(f"Failed to parse locally cached analysis: {e}")
+
+    # 2. Database
     if memory_server:
         try:
             from agent_runner.db_utils import run_query_with_memory
@@ -553,58 +581,26 @@ async def _get_cached_analysis(cache_key: str, memory_server: Optional[Any] = No
                         analysis_dict = json.loads(analysis_json)
                         # Reconstruct RouterAnalysis from dict
                         analysis = RouterAnalysis(**analysis_dict)
-                        # Update in-memory cache for fast access
-                        with _cache_lock:
-                            _router_cache[cache_key] = (time.time(), analysis)
-                            _router_cache.move_to_end(cache_key)
+                        _router_cache.set(cache_key, analysis_dict)
                         logger.debug(f"Router cache hit from database: {cache_key[:8]}")
                         return analysis
                     except Exception as e:
                         logger.warning(f"Failed to parse cached analysis from DB: {e}")
         except Exception as e:
-            logger.debug(f"Database cache lookup failed, using in-memory: {e}")
-    
-    # 2. Fallback to in-memory cache (performance optimization)
-    with _cache_lock:
-        if cache_key in _router_cache:
-            cached_time, cached_analysis = _router_cache[cache_key]
-            if time.time() - cached_time < ROUTER_CACHE_TTL:
-                # Move to end (LRU)
-                _router_cache.move_to_end(cache_key)
-                return cached_analysis
-            else:
-                # Cache expired
-                del _router_cache[cache_key]
+            logger.debug(f"Database cache lookup failed: {e}")
     return None
 
 
 async def _set_cached_analysis(cache_key: str, analysis: 'RouterAnalysis', memory_server: Optional[Any] = None) -> None:
     """
-    Store cached analysis in database (source of truth) and update in-memory cache.
-    Database is primary, in-memory is performance optimization.
+    Store cached analysis in the local persistent store and the database.
     """
-    # 1. Store in database (source of truth)
+    analysis_dict = _analysis_to_dict(analysis)
+    _router_cache.set(cache_key, analysis_dict)
+
     if memory_server:
         try:
             from agent_runner.db_utils import run_query_with_memory
-            analysis_dict = {
-                "complexity": analysis.complexity,
-                "query_type": analysis.query_type,
-                "domain": analysis.domain,
-                "tool_categories": analysis.tool_categories,
-                "recommended_tools": analysis.recommended_tools,
-                "recommended_model": analysis.recommended_model,
-                "can_use_local": analysis.can_use_local,
-                "estimated_cost": analysis.estimated_cost,
-                "estimated_input_tokens": analysis.estimated_input_tokens,
-                "estimated_output_tokens": analysis.estimated_output_tokens,
-                "optimal_context_window": analysis.optimal_context_window,
-                "is_ambiguous": analysis.is_ambiguous,
-                "requires_clarification": analysis.requires_clarification,
-                "clarification_questions": analysis.clarification_questions,
-                "confidence": analysis.confidence,
-                "reasoning": analysis.reasoning,
-            }
             analysis_json = json.dumps(analysis_dict)
             expires_at = time.time() + ROUTER_CACHE_TTL
             
@@ -623,15 +619,6 @@ async def _set_cached_analysis(cache_key: str, analysis: 'RouterAnalysis', memor
             logger.debug(f"Router cache stored in database: {cache_key[:8]}")
         except Exception as e:
             logger.warning(f"Failed to store router cache in DB: {e}")
-    
-    # 2. Update in-memory cache (performance optimization)
-    with _cache_lock:
-        _router_cache[cache_key] = (time.time(), analysis)
-        _router_cache.move_to_end(cache_key)
-        
-        # Evict oldest if over limit
-        while len(_router_cache) > _cache_max_size:
-            _router_cache.popitem(last=False)  # Remove oldest
 
 
 async def analyze_query(
@@ -6,6 +6,7 @@ import aiofiles
 import yaml
 from typing import Dict, Any, Optional
 from fastapi import APIRouter, Body, Request, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
 from pathlib import Path
 
 from agent_runner.agent_runner import get_shared_state, get_shared_engine
@@ -13,6 +14,10 @@ from agent_runner.state import AgentState
 from agent_runner.background_tasks import get_task_manager
 from agent_runner.constants import MODEL_ROLES
 from common.observability import get_observability
+from common.caching import get_request_coalescer
+from common.metrics_core import PROMETHEUS_CONTENT_TYPE
+from common.ollama_residency import get_residency_scheduler
+from common.unified_tracking import get_unified_tracker
 from agent_runner.db_utils import run_query
 
 router = APIRouter()
@@ -208,9 +213,18 @@ async def metrics():
                 "cache_hit_rate": round(system_metrics.efficiency.cache_hit_rate, 2),
                 "avg_wait_ms": round(system_metrics.efficiency.semaphore_wait_time_avg_ms, 2)
             }
-        }
+        },
+        "embeddings": state.memory.embedder.get_stats() if getattr(state, "memory", None) else None,
+        "coalescing": get_request_coalescer().get_stats(),
+        "ollama_residency": get_residency_scheduler().get_stats(),
+        "events": get_unified_tracker().get_stats()
     }
 
+@router.get("/metrics/prometheus")
+async def metrics_prometheus():
+    """Observability counters and latency histograms in Prometheus text format."""
+    return PlainTextResponse(get_observability().render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @router.get("/startup-status")
 async def startup_status():
     """
@@ -10,6 +10,7 @@ from fastapi.responses import JSONResponse, StreamingResponse
 from common.constants import OBJ_CHAT_COMPLETION, OBJ_MODEL
 from common.logging_utils import log_time
 from common.message_utils import extract_text_content, normalize_message_content
+from common.sse_stream import ChunkFrameEncoder
 from agent_runner.agent_runner import get_shared_state, get_shared_engine
 from agent_runner.quality_eval import evaluate_completion
 from agent_runner.models import ChatCompletionRequest, ChatCompletionResponse, ErrorResponse
@@ -85,6 +86,7 @@ async def chat_completions(request: Request):
                 try:
                     async with log_time(f"Agent Stream [{request_id}]", level=logging.INFO, logger_override=logger):
                         content_seen = False
+                        token_frames = None  # ChunkFrameEncoder, built on first token
 
                         # Check for system events to inject (from startup, health checks, etc.)
                         if hasattr(state, 'system_event_queue') and state.system_event_queue:
@@ -214,21 +216,11 @@ async def chat_completions(request: Request):
                                 elif evt_type == "token":
                                     content = event.get("content", "")
                                     if content:
-                                        chunk = {
-                                            "id": f"chatcmpl-{request_id}",
-                                            "object": "chat.completion.chunk",
-                                            "created": int(time.time()),
-                                            "model": requested_model or "agent",
-                                            "choices": [
-                                                {
-                                                    "index": 0,
-                                                    "delta": {"content": content},
-                                                    "finish_reason": None
-                                                }
-                                            ]
-                                        }
+                                        # Hot path: only the token text is JSON-encoded per chunk
+                                        if token_frames is None:
+                                            token_frames = ChunkFrameEncoder(f"chatcmpl-{request_id}", requested_model or "agent")
                                         logger.debug(f"Sending token chunk: {content[:50]}...")
-                                        yield f"data: {json.dumps(chunk)}\n\n"
+                                        yield token_frames.content(content)
                                         content_seen = True
 
                                 elif evt_type == "control_ui":
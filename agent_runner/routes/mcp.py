@@ -109,8 +109,7 @@ async def remove_mcp_server_endpoint(name: str = Body(..., embed=True)):
         
         if success:
             # 2. Clear Tool Cache
-            if name in engine.executor.mcp_tool_cache:
-                del engine.executor.mcp_tool_cache[name]
+            if engine.executor.remove_server_tools(name):
                 logger.info(f"Cleared tool cache for removed MCP server '{name}'")
             
             return {"ok": True, "message": f"Successfully removed server '{name}'"}
@@ -132,8 +131,7 @@ async def toggle_mcp_endpoint(name: str = Body(..., embed=True), enabled: bool =
         return {"ok": False, "error": "Server not found"}
         
     if not enabled:
-         if name in engine.executor.mcp_tool_cache:
-             del engine.executor.mcp_tool_cache[name]
+         engine.executor.remove_server_tools(name)
     else:
         # Re-discover tools (will re-spawn process if stdio)
         await engine.discover_mcp_tools()
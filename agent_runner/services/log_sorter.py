@@ -1,21 +1,75 @@
 
 import asyncio
+import json
 import logging
 import os
+import re
 import time
 import httpx
 import aiofiles
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from common.lexicon import LexiconRegistry
+from common.metrics_core import Counter
 from common.sovereign import get_sovereign_model, get_sovereign_port
 
+try:
+    from surrealdb import AsyncSurreal
+except ImportError:  # SDK not installed: poll mode only
+    AsyncSurreal = None
+
 logger = logging.getLogger("agent_runner.services.log_sorter")
 
+# "live": LIVE SELECT pushes new rows; a periodic sweep catches anything missed
+# "poll": fetch unhandled rows on every interval (fallback without the SDK)
+LOG_SORTER_MODE = os.getenv("LOG_SORTER_MODE", "live").lower()
+LOG_SORTER_QUEUE_MAX = int(os.getenv("LOG_SORTER_QUEUE_MAX", "20000"))  # Local intake queue bound
+LOG_SORTER_SHED_DEPTH = int(os.getenv("LOG_SORTER_SHED_DEPTH", "5000"))  # Backlog past which rows are deleted unread
+LOG_SORTER_MIN_BATCH = 50
+LOG_SORTER_MAX_BATCH = 1000
+LOG_SORTER_LINGER_S = 0.05   # Wait this long for a small batch to fill before classifying it
+LOG_SORTER_SWEEP_S = 60.0    # Catch-up sweep interval in live mode
+LIVE_RETRY_S = 30.0          # Back-off after a LIVE subscription failure
+
+# Acknowledge a whole batch in one statement; rows carry their own classification
+ACK_SQL = (
+    "FOR $row IN $rows { UPDATE type::thing('diagnostic_log', $row.k) SET handled = true, "
+    "classification = $row.c, severity = $row.s, needs_review = $row.r RETURN NONE; };"
+)
+SHED_SQL = "FOR $k IN $keys { DELETE type::thing('diagnostic_log', $k) RETURN NONE; };"
+
+
+def _record_key(record_id: Any) -> Any:
+    """
+    Key part of a diagnostic_log id, typed as stored so type::thing() addresses the same record.
+    RecordID(_, 42) / 'diagnostic_log:42' -> 42; 'diagnostic_log:abc' / 'diagnostic_log:⟨12⟩' -> 'abc' / '12'.
+    """
+    if hasattr(record_id, "table_name") and hasattr(record_id, "id"):
+        return record_id.id  # SDK RecordID (LIVE notifications)
+    key = str(record_id).split(":", 1)[-1]
+    if key.startswith(("⟨", "`")):
+        return key.strip("⟨⟩`")
+    return int(key) if re.fullmatch(r"-?\d+", key) else key
+
+
 class LogSorterService:
+    """
+    Classifies diagnostic_log rows against the lexicon.
+
+    New rows are pushed into a local bounded queue (by a LIVE query, the
+    catch-up sweep, or submit()). One drainer takes everything queued, up to
+    LOG_SORTER_MAX_BATCH, classifies it, and acknowledges the batch with a
+    single FOR-loop UPDATE. Past LOG_SORTER_SHED_DEPTH queued rows it deletes
+    instead of classifying (load shedding). A row's key stays in
+    _pending_keys from submit() until its batch is acknowledged, and a sweep
+    also skips rows released while its SELECT was in flight, so a sweep never
+    re-queues a row the LIVE feed already delivered.
+    """
+
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.running = False
         self.interval = 5.0 # Seconds
+        self.mode = LOG_SORTER_MODE if AsyncSurreal else "poll"
         self.registry = LexiconRegistry(
             config_dir=os.path.join(os.getcwd(), "config", "lexicons")
         )
@@ -32,6 +86,16 @@ class LogSorterService:
             timeout=30.0,
             limits=httpx.Limits(max_keepalive_connections=10, max_connections=20)
         )
+
+        # Intake: rows waiting to be classified, and keys queued or in flight (dedupes live vs sweep)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=LOG_SORTER_QUEUE_MAX)
+        self._pending_keys: set = set()
+        self._open_sweeps: List[set] = []  # Per in-flight sweep: keys acknowledged since its SELECT went out
+        self._tasks: List[asyncio.Task] = []
+        self._live = None
+        self.rows_processed = Counter("log_sorter_rows_total")
+        self.rows_shed = Counter("log_sorter_shed_total")
+        self.drain_rate = 0.0  # Rows/sec, smoothed over recent batches
         
         # Resilience State (Phase 3.5)
         self._seen_hashes = {}
@@ -40,169 +104,245 @@ class LogSorterService:
         self._cb_open = False
         self._cb_failures = 0
         self._cb_last_failure = 0.0
-        logger.debug(f"LogSorter initialized: URL={self.surreal_url}")
+        self._register_metrics()
+        logger.debug(f"LogSorter initialized: URL={self.surreal_url}, mode={self.mode}")
+
+    def _register_metrics(self):
+        try:
+            from common.observability import get_observability
+            m = get_observability().metrics
+        except Exception as e:
+            logger.debug(f"LogSorter metrics unavailable: {e}")
+            return
+        m.gauge("log_sorter_queue_depth", lambda: self._queue.qsize(), "Diagnostic log rows waiting to be classified")
+        m.gauge("log_sorter_drain_rate", lambda: self.drain_rate, "Diagnostic log rows classified per second")
+        self.rows_processed = m.counter("log_sorter_rows_total", "Diagnostic log rows classified")
+        self.rows_shed = m.counter("log_sorter_shed_total", "Diagnostic log rows deleted by load shedding")
 
     async def start(self):
-        """Start the background sorting loop."""
+        """Start intake (live subscription or polling) and the batch drainer."""
         logger.debug("LogSorter start() called")
         if self.running:
             return
         self.running = True
-        logger.info("LogSorter Service started.")
-        asyncio.create_task(self._loop())
+        logger.info(f"LogSorter Service started ({self.mode} mode).")
+        self._tasks = [asyncio.create_task(self._drain_loop()), asyncio.create_task(self._sweep_loop())]
+        if self.mode == "live":
+            self._tasks.append(asyncio.create_task(self._live_loop()))
 
     async def stop(self):
         self.running = False
         logger.info("LogSorter Service stopping...")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._close_live()
         # Close HTTP client
         await self.client.aclose()
 
-    async def _loop(self):
+    def submit(self, row: Dict[str, Any]) -> bool:
+        """Queue one diagnostic_log row for classification. False if already queued or the queue is full."""
+        key = _record_key(row.get("id", ""))
+        if key == "" or key in self._pending_keys:
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            return False
+        self._pending_keys.add(key)
+        return True
+
+    async def _sql(self, query: str, params: Optional[Dict[str, Any]] = None) -> Optional[List[Dict[str, Any]]]:
+        """POST /sql with params bound as LET statements; returns per-statement results."""
+        lets = "".join(f"LET ${k} = {json.dumps(v, default=str)}; " for k, v in (params or {}).items())
+        resp = await self.client.post(
+            f"{self.surreal_url}/sql",
+            content=f"USE NS {self.surreal_ns}; USE DB {self.surreal_db}; {lets}{query}",
+            auth=(self.surreal_user, self.surreal_pass),
+            headers={"Accept": "application/json"}
+        )
+        if resp.status_code != 200:
+            logger.error(f"LogSorter query failed: {resp.status_code} {resp.text[:200]}")
+            return None
+        data = resp.json()
+        return data if isinstance(data, list) else None
+
+    # --- Intake ---------------------------------------------------------
+
+    async def _sweep(self) -> int:
+        """Queue unhandled rows that are not already queued. Returns rows added."""
+        room = LOG_SORTER_QUEUE_MAX - self._queue.qsize()
+        if room < LOG_SORTER_MIN_BATCH:
+            return 0
+        released: set = set()
+        self._open_sweeps.append(released)
+        try:
+            data = await self._sql(
+                "SELECT * FROM diagnostic_log WHERE handled != true ORDER BY timestamp ASC LIMIT $limit;",
+                {"limit": min(room, LOG_SORTER_MAX_BATCH * 5)}
+            )
+        finally:
+            self._open_sweeps.remove(released)
+        rows = next((item["result"] for item in reversed(data or [])
+                     if item.get("status") == "OK" and isinstance(item.get("result"), list)), [])
+        # Rows acknowledged while the SELECT was in flight come back stale (handled = false)
+        return sum(1 for row in rows if _record_key(row.get("id", "")) not in released and self.submit(row))
+
+    async def _sweep_loop(self):
+        """Poll mode: the only intake. Live mode: startup backlog plus a safety net for missed notifications."""
+        from agent_runner.constants import SLEEP_LOG_SORTER
         while self.running:
             try:
-                await self._process_batch()
+                added = await self._sweep()
+                if added:
+                    logger.debug(f"LogSorter sweep queued {added} rows")
             except Exception as e:
-                logger.error(f"Error in LogSorter loop: {e}", exc_info=True)
-            
-            from agent_runner.constants import SLEEP_LOG_SORTER
-            await asyncio.sleep(self.interval or SLEEP_LOG_SORTER)
+                logger.error(f"Error in LogSorter sweep: {e}", exc_info=True)
+            delay = LOG_SORTER_SWEEP_S if self.mode == "live" and self._live else (self.interval or SLEEP_LOG_SORTER)
+            await asyncio.sleep(delay)
 
-    async def _process_batch(self):
-        # [BACKPRESSURE] Stop fetching if local queue is busy
-        # User requested cap to avoid 62k backlog situations turning into error floods.
-        if self._llm_queue.qsize() > 50:
-            # Queue is half full (max 100). Let it drain.
-            return
+    async def _live_loop(self):
+        """Hold a LIVE SELECT on diagnostic_log and push CREATE notifications into the queue."""
+        base = self.surreal_url.replace("localhost", "127.0.0.1").rstrip("/")
+        rpc_url = base.replace("http://", "ws://").replace("https://", "wss://") + "/rpc"
+        while self.running:
+            conn = AsyncSurreal(rpc_url)
+            try:
+                await conn.connect()
+                await conn.signin({"username": self.surreal_user, "password": self.surreal_pass})
+                await conn.use(self.surreal_ns, self.surreal_db)
+                live_id = await conn.live("diagnostic_log")
+                self._live = conn
+                logger.info("LogSorter LIVE subscription on diagnostic_log open")
+                # Anything created before the subscription was registered
+                await self._sweep()
+                async for note in await conn.subscribe_live(live_id):
+                    if isinstance(note, dict) and "action" in note:
+                        if str(note["action"]).upper() != "CREATE":
+                            continue
+                        note = note.get("result")
+                    if isinstance(note, dict) and not note.get("handled"):
+                        self.submit(note)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"LogSorter LIVE subscription lost ({e}); sweeping every {self.interval:.0f}s")
+            finally:
+                await self._close_live(conn)
+            await asyncio.sleep(LIVE_RETRY_S)
 
-        # [LOAD SHEDDING] Immediate Destruction Mode
-        shedding_load = self._llm_queue.qsize() > 1000
-        
-        # 1. Fetch unhandled logs
-        # Embed USE statement to ensure correct namespace
-        query = f"USE NS {self.surreal_ns}; USE DB {self.surreal_db}; SELECT * FROM diagnostic_log WHERE handled IS NONE ORDER BY timestamp ASC LIMIT 50;"
-        
-        try:
-            # Use persistent client for connection pooling
-            resp = await self.client.post(
-                f"{self.surreal_url}/sql", 
-                content=query, 
-                auth=(self.surreal_user, self.surreal_pass),
-                headers={"Accept": "application/json"}
-            )
-            
-            if resp.status_code != 200:
-                logger.error(f"Failed to fetch logs: {resp.text}")
-                return
+    async def _close_live(self, conn=None):
+        conn = conn or self._live
+        if conn is self._live:
+            self._live = None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception:
+                pass
 
-                data = resp.json()
-                # Surreal returns array of results. Last one is SELECT.
-                if not data or not isinstance(data, list):
-                    return
-                
-                # Find the result that has 'result' list
-                results = []
-                for item in data:
-                    if item.get("status") == "OK" and isinstance(item.get("result"), list):
-                         res_list = item.get("result", [])
-                         if res_list:
-                             results = res_list
-                             break
-                
-                if not results: return
+    # --- Drain ----------------------------------------------------------
 
-                updates = []
-                # Stream File (async)
-                stream_path = os.path.join(os.getcwd(), "logs", "live_stream.md")
-                os.makedirs(os.path.dirname(stream_path), exist_ok=True)
+    async def _next_batch(self) -> List[Dict[str, Any]]:
+        """Block for the first row, then take whatever is queued (adaptive batch size)."""
+        batch = [await self._queue.get()]
+        if self._queue.qsize() < LOG_SORTER_MIN_BATCH:
+            await asyncio.sleep(LOG_SORTER_LINGER_S)
+        while len(batch) < LOG_SORTER_MAX_BATCH and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
 
-                ids_to_shred = [] # For Immediate Destruction
-                stream_lines = []  # Collect lines for async write
+    async def _drain_loop(self):
+        while self.running:
+            batch = await self._next_batch()
+            start = time.monotonic()
+            try:
+                await self._process_batch(batch)
+            except Exception as e:
+                logger.error(f"Failed processing LogSorter batch: {e}", exc_info=True)
+            finally:
+                for row in batch:
+                    key = _record_key(row.get("id", ""))
+                    self._pending_keys.discard(key)
+                    for released in self._open_sweeps:
+                        released.add(key)
+            elapsed = max(time.monotonic() - start, 1e-6)
+            rate = len(batch) / elapsed
+            self.drain_rate = rate if not self.drain_rate else 0.8 * self.drain_rate + 0.2 * rate
 
-                for log_entry in results:
-                    log_id = log_entry["id"]
-                    msg = log_entry.get("message", "")
-                    service = log_entry.get("service", "unknown")
-                    timestamp = log_entry.get("timestamp", "")
-                    
-                    if not log_id: continue
+    async def _process_batch(self, results: List[Dict[str, Any]]):
+        # [LOAD SHEDDING] Immediate Destruction Mode
+        # User requested cap to avoid 62k backlog situations turning into error floods.
+        shedding_load = self._queue.qsize() > LOG_SORTER_SHED_DEPTH
 
-                    if shedding_load:
-                        # [LOAD SHEDDING] Bitbucket (Immediate Destruction)
-                        # We collect IDs to DELETE them in one go.
-                        ids_to_shred.append(log_id)
-                        continue
+        acks = []
+        # Stream File (async)
+        stream_path = os.path.join(os.getcwd(), "logs", "live_stream.md")
+        os.makedirs(os.path.dirname(stream_path), exist_ok=True)
 
-                    # Classify
-                    result = self.registry.classify(service, msg)
-                    
-                    if result.label != "NOISE":
-                        # --- FAST LANE (Known Signal) ---
-                        # 1. Output to Stream
-                        stream_lines.append(f"{timestamp} {result.formatted_message}\n")
-                        
-                        # 2. Mark handled
-                        updates.append(f"UPDATE {log_id} SET handled = true, classification = '{result.label}', severity = '{result.severity}', needs_review = false;")
-                        
-                        # 3. Trigger Context Snapshot if CRITICAL (Future Phase)
-                        if result.severity == "CRITICAL":
-                            asyncio.create_task(self._capture_context(log_id))
-                            
-                    else:
-                        # --- SLOW LANE (Unknown / Noise) ---
-                        # 1. Output to Stream (Visual Feedback for Unknowns)
-                        stream_lines.append(f"{timestamp} [UNKNOWN] {msg}\n")
-
-                        # 2. Mark for Review
-                        updates.append(f"UPDATE {log_id} SET handled = true, classification = 'UNKNOWN', needs_review = true;")
-                        
-                        # 3. Trigger Async Analysis (Throttle logic needed here, for now just fire)
-                        # We only analyze unique unknowns to save cost.
-                        # QUEUE LLM ANALYSIS instead of firing async task
-                        try:
-                            self._llm_queue.put_nowait((log_id, msg, timestamp))
-                        except asyncio.QueueFull:
-                            # If even the queue is full (persistent overload), we drop.
-                            logger.warning(f"LogSorter Queue Full. Dropping analysis for {log_id}")
-
-                # Write all lines at once (async)
-                if stream_lines:
-                    async with aiofiles.open(stream_path, "a") as sf:
-                        await sf.writelines(stream_lines)
+        keys_to_shred = [] # For Immediate Destruction
+        stream_lines = []  # Collect lines for async write
+
+        for log_entry in results:
+            log_id = log_entry.get("id")
+            msg = log_entry.get("message", "")
+            service = log_entry.get("service", "unknown")
+            timestamp = log_entry.get("timestamp", "")
+            
+            if not log_id: continue
+
+            if shedding_load:
+                # [LOAD SHEDDING] Bitbucket (Immediate Destruction)
+                # We collect IDs to DELETE them in one go.
+                keys_to_shred.append(_record_key(log_id))
+                continue
+
+            # Classify
+            result = self.registry.classify(service, msg)
+            
+            if result.label != "NOISE":
+                # --- FAST LANE (Known Signal) ---
+                # 1. Output to Stream
+                stream_lines.append(f"{timestamp} {result.formatted_message}\n")
+                
+                # 2. Mark handled
+                acks.append({"k": _record_key(log_id), "c": result.label, "s": result.severity, "r": False})
                 
-                # Execute Destruction Batch
-                if ids_to_shred:
-                    # Construct DELETE query
-                    # DELETE FROM diagnostic_log WHERE id IN ['diagnostic_log:1', 'diagnostic_log:2']
-                    # SurrealDB IDs need to be properly formatted/quoted if complex, but default output usually works.
-                    # Safest is update handled=true (archive) but user wants destruction.
-                    id_list = ", ".join([f"{uid}" for uid in ids_to_shred]) # IDs come as strings with colons usually
-                    delete_query = f"USE NS {self.surreal_ns}; USE DB {self.surreal_db}; DELETE {id_list};"
+                # 3. Trigger Context Snapshot if CRITICAL (Future Phase)
                     
-                    # Use persistent client
-                    await self.client.post(
-                        f"{self.surreal_url}/sql", 
-                        content=delete_query, 
-                        auth=(self.surreal_user, self.surreal_pass),
-                        headers={"Accept": "application/json"}
-                    )
-                    logger.warning(f"[LOAD SHEDDING] Vaporized {len(ids_to_shred)} logs due to overload.")
-
-                # Execute Update Batch
-                if updates:
-                    update_query = f"USE NS {self.surreal_ns}; USE DB {self.surreal_db}; " + " ".join(updates)
-                    # Use persistent client
-                    await self.client.post(
-                        f"{self.surreal_url}/sql", 
-                        content=update_query, 
-                        auth=(self.surreal_user, self.surreal_pass),
-                        headers={"Accept": "application/json"}
-                    )
+            else:
+                # --- SLOW LANE (Unknown / Noise) ---
+                # 1. Output to Stream (Visual Feedback for Unknowns)
+                stream_lines.append(f"{timestamp} [UNKNOWN] {msg}\n")
 
-        except Exception as e:
-            logger.error(f"Failed processing LogSorter batch: {e}")
-            # The original code had `return []` here, but it's not needed as this is a void method.
-            # Keeping it as a void method.
+                # 2. Mark for Review
+                acks.append({"k": _record_key(log_id), "c": "UNKNOWN", "s": None, "r": True})
                 
+                # 3. Trigger Async Analysis (Throttle logic needed here, for now just fire)
+                # We only analyze unique unknowns to save cost.
+                # QUEUE LLM ANALYSIS instead of firing async task
+                try:
+                    self._llm_queue.put_nowait((log_id, msg, timestamp))
+                except asyncio.QueueFull:
+                    # If even the queue is full (persistent overload), we drop.
+                    logger.debug(f"LogSorter Queue Full. Dropping analysis for {log_id}")
+
+        # Write all lines at once (async)
+        if stream_lines:
+            async with aiofiles.open(stream_path, "a") as sf:
+                await sf.writelines(stream_lines)
+        
+        # Execute Destruction Batch (one statement)
+        if keys_to_shred:
+            await self._sql(SHED_SQL, {"keys": keys_to_shred})
+            self.rows_shed.inc(len(keys_to_shred))
+            logger.warning(f"[LOAD SHEDDING] Vaporized {len(keys_to_shred)} logs due to overload.")
+
+        # Acknowledge the batch (one statement)
+        if acks:
+            await self._sql(ACK_SQL, {"rows": acks})
+            self.rows_processed.inc(len(acks))
 
     async def _perform_llm_analysis(self, log_id: str, msg: str):
         """Performs LLM analysis for unknown logs, with resilience."""
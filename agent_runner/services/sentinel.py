@@ -1,12 +1,12 @@
 import json
 import os
-import re
 import logging
 from agent_runner.db_utils import run_query
 import asyncio
 from typing import Dict, Any, Optional, Tuple
 from pathlib import Path
 from agent_runner.state import AgentState
+from common.lexicon import PatternMatcher
 
 logger = logging.getLogger("agent_runner.services.sentinel")
 
@@ -30,6 +30,7 @@ class Sentinel:
         self.state = state
         self.lexicon_path = Path(state.agent_fs_root).parent / "config" / "lexicons" / "command_safety.json"
         self._memory_cache = {"approved": [], "blocked": []}
+        self._matcher: Optional[PatternMatcher] = None
         # Database is source of truth - sync from DB on init
         # Local JSON is just a performance cache for Tier 2 lookups
         self._load_memory()
@@ -49,6 +50,7 @@ class Sentinel:
             try:
                 with open(self.lexicon_path, "r") as f:
                     self._memory_cache = json.load(f)
+                self._matcher = None
             except Exception as e:
                 logger.warning(f"Failed to load Sentinel memory from cache: {e}")
         else:
@@ -57,6 +59,7 @@ class Sentinel:
 
     def _save_memory(self):
         """Persist learned patterns to disk."""
+        self._matcher = None  # Recompile on next evaluate()
         try:
             self.lexicon_path.parent.mkdir(parents=True, exist_ok=True)
             with open(self.lexicon_path, "w") as f:
@@ -78,25 +81,24 @@ class Sentinel:
             return True, "Tier 1: Safe Binary"
             
         # --- TIER 2: LEARNED MEMORY ---
-        for entry in self._memory_cache.get("approved", []):
-            try:
-                if re.match(entry["pattern"], cmd_stripped):
-                    return True, f"Tier 2: {entry['reason']}"
-            except re.error:
-                continue
-                
-        for entry in self._memory_cache.get("blocked", []):
-            try:
-                if re.match(entry["pattern"], cmd_stripped):
-                    return False, f"Tier 2 BLOCKED: {entry['reason']}"
-            except re.error:
-                continue
+        hit = self._tier2().match(cmd_stripped)
+        if hit:
+            allowed, reason = hit[0]
+            return allowed, (f"Tier 2: {reason}" if allowed else f"Tier 2 BLOCKED: {reason}")
 
         # --- TIER 3: LLM SENTINEL ---
         # If we fall through to here, we need help.
         logger.info(f"Sentinel checking novel command: {binary}...")
         return await self._llm_evaluate(cmd_stripped)
 
+    def _tier2(self) -> PatternMatcher:
+        """Learned patterns compiled into one matcher (approved before blocked, first match wins)."""
+        if self._matcher is None:
+            items = [(e["pattern"], (True, e.get("reason", "Learned pattern"))) for e in self._memory_cache.get("approved", [])]
+            items += [(e["pattern"], (False, e.get("reason", "Learned pattern"))) for e in self._memory_cache.get("blocked", [])]
+            self._matcher = PatternMatcher(items, anchored=True)
+        return self._matcher
+
     async def _llm_evaluate(self, command: str) -> Tuple[bool, str]:
         """Ask the Router/Safety model to classify the command."""
         try:
@@ -159,6 +159,8 @@ class AgentState:
         self.stdio_process_locks: Dict[str, asyncio.Lock] = {}
         self.stdio_process_initialized: Dict[str, bool] = {}
         self.stdio_process_health: Dict[str, float] = {}
+        self.stdio_multiplexers: Dict[str, Any] = {}  # server -> StdioMultiplexer (demuxes responses by id)
+        self.sse_sessions: Dict[str, Any] = {}  # server -> SSESession (persistent event stream)
         self.mcp_subprocess_semaphore = asyncio.Semaphore(5)
         self.last_user_query: str = "" # Store last user query for analytics
 
@@ -897,6 +899,10 @@ class AgentState:
                 del self.stdio_processes[name]
             except Exception as e:
                 logger.error(f"Error terminating MCP server '{name}': {e}", exc_info=True)
+
+        session = self.sse_sessions.pop(name, None)
+        if session is not None:
+            await session.close()
                 
         # 2. Update In-Memory State
         del self.mcp_servers[name]
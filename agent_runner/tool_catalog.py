@@ -0,0 +1,192 @@
+"""
+Indexed, immutable tool catalog.
+
+A ToolCatalog is built once per change of the tool set (native categories +
+MCP discovery) and then only read. It holds name/server/category indexes and
+the pre-tagged, pre-wrapped payloads that get_all_tools hands to the model, so
+per-turn tool assembly is a handful of dict lookups and list extends instead
+of scans and copies over every tool. Payload dicts are shared by reference and
+must be treated as read-only.
+"""
+
+import logging
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger("agent_runner.tool_catalog")
+
+# MCP servers whose tools are tagged as remote / local rather than the generic [MCP]
+REMOTE_MCP_SERVERS = ("fetch", "tavily-search", "github")
+LOCAL_MCP_SERVERS = ("postgres", "filesystem-mcp")
+
+# project-memory exposes maintenance tools too; only these are offered to the model
+PROJECT_MEMORY_TOOLS = frozenset({
+    "store_fact", "delete_fact", "query_facts", "semantic_search",
+    "record_tool_result", "index_tools", "store_source", "list_sources",
+    "store_advice", "consult_advice"
+})
+
+# Keyword fallback filter: query keyword -> words to look for in a tool's name + description
+QUERY_KEYWORD_CATEGORIES: Dict[str, Tuple[str, ...]] = {
+    "file": ("filesystem", "file"),
+    "directory": ("filesystem", "file"),
+    "list": ("filesystem", "file"),
+    "read": ("filesystem", "file"),
+    "write": ("filesystem", "file"),
+    "search": ("search", "web_search"),
+    "find": ("search", "filesystem"),
+    "weather": ("weather",),
+    "time": ("system", "utility"),
+    "date": ("system", "utility"),
+    "run": ("system", "execution"),
+    "execute": ("system", "execution"),
+    "code": ("code", "programming"),
+    "python": ("code", "programming"),
+    "memory": ("memory", "knowledge"),
+    "remember": ("memory", "knowledge"),
+    "recall": ("memory", "knowledge"),
+}
+
+# Domain fallback filter, first match wins: (query words, words to look for in a tool's name, max tools)
+QUERY_DOMAINS: Tuple[Tuple[Tuple[str, ...], FrozenSet[str], int], ...] = (
+    (("file", "directory", "read", "write", "list"), frozenset({"file"}), 12),
+    (("search", "find", "look"), frozenset({"search"}), 10),
+    (("weather", "temperature", "forecast"), frozenset({"weather"}), 5),
+    (("run", "execute", "code"), frozenset({"run", "execute", "code"}), 8),
+)
+
+# Substrings the catalog precomputes per payload, derived from the filters above
+KEYWORD_VOCABULARY = tuple(dict.fromkeys(w for words in QUERY_KEYWORD_CATEGORIES.values() for w in words))
+NAME_VOCABULARY = tuple(dict.fromkeys(w for _, words, _ in QUERY_DOMAINS for w in sorted(words)))
+
+
+def tool_name(tool: Dict[str, Any]) -> Optional[str]:
+    return (tool.get("function") or {}).get("name")
+
+
+def tag_tool(tool: Dict[str, Any], tag: str) -> Dict[str, Any]:
+    """Copy of `tool` with its description prefixed by `tag` (already-tagged descriptions are kept)."""
+    tagged = dict(tool)
+    if "function" in tagged:
+        fn = dict(tagged["function"])
+        desc = fn.get("description") or ""
+        if not desc.startswith("["):
+            fn["description"] = f"{tag} {desc}"
+        tagged["function"] = fn
+    return tagged
+
+
+def mcp_tag(server_name: str) -> str:
+    if server_name in REMOTE_MCP_SERVERS:
+        return "[REMOTE]"
+    if server_name in LOCAL_MCP_SERVERS:
+        return "[LOCAL SYSTEM]"
+    return "[MCP]"
+
+
+class ToolCatalog:
+    """Read-only snapshot of native + MCP tools with lookup indexes."""
+
+    def __init__(self, version: int, categories: Dict[str, List[Dict[str, Any]]],
+                 mcp_tools: Dict[str, List[Dict[str, Any]]]):
+        self.version = version
+        self.categories: Dict[str, Tuple[Dict[str, Any], ...]] = {
+            cat: tuple(t for t in tools if t) for cat, tools in categories.items()
+        }
+
+        # Native tools by name (first category wins, matching the flat definition list)
+        self.native: Dict[str, Dict[str, Any]] = {}
+        for tools in self.categories.values():
+            for t in tools:
+                name = tool_name(t)
+                if name and name not in self.native:
+                    self.native[name] = t
+
+        # Raw MCP tools by name -> server, and wrapped/tagged payloads per server
+        self.mcp_servers: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        self.mcp_by_name: Dict[str, Dict[str, Any]] = {}
+        self.server_of: Dict[str, str] = {}
+        self.mcp_payloads: Dict[str, Tuple[Dict[str, Any], ...]] = {}
+        for server_name, tools in mcp_tools.items():
+            tools = tuple(t for t in (tools or []) if t)
+            self.mcp_servers[server_name] = tools
+            for t in tools:
+                name = tool_name(t)
+                if name and name not in self.server_of:
+                    self.server_of[name] = server_name
+                    self.mcp_by_name[name] = t
+            self.mcp_payloads[server_name] = self._wrap_server(server_name, tools)
+
+        self._tagged: Dict[Tuple[str, str], Tuple[Dict[str, Any], ...]] = {}
+        # id(payload) -> matching vocabulary words; only payloads built here are indexed
+        self._keywords: Dict[int, FrozenSet[str]] = {}
+        self._name_keywords: Dict[int, FrozenSet[str]] = {}
+        for payloads in self.mcp_payloads.values():
+            self._index_keywords(payloads)
+        for tools in self.categories.values():
+            self._index_keywords(tools)
+
+    @staticmethod
+    def _wrap_server(server_name: str, tools: Iterable[Dict[str, Any]]) -> Tuple[Dict[str, Any], ...]:
+        if server_name == "project-memory":
+            tools = [t for t in tools if tool_name(t) in PROJECT_MEMORY_TOOLS]
+        tag = mcp_tag(server_name)
+        wrapped = []
+        for t in tools:
+            fn = tag_tool(t, tag).get("function", {})
+            wrapped.append({
+                "type": "function",
+                "function": {
+                    "name": f"mcp__{server_name}__{fn.get('name')}",
+                    "description": fn.get("description"),
+                    "parameters": fn.get("parameters")
+                }
+            })
+        return tuple(wrapped)
+
+    def _index_keywords(self, payloads: Iterable[Dict[str, Any]]):
+        for t in payloads:
+            fn = t.get("function") or {}
+            name = (fn.get("name") or "").lower()
+            text = name + " " + (fn.get("description") or "").lower()
+            self._keywords[id(t)] = frozenset(w for w in KEYWORD_VOCABULARY if w in text)
+            self._name_keywords[id(t)] = frozenset(w for w in NAME_VOCABULARY if w in name)
+
+    def category(self, name: str) -> Tuple[Dict[str, Any], ...]:
+        return self.categories.get(name, ())
+
+    def tagged(self, category: str, tag: str) -> Tuple[Dict[str, Any], ...]:
+        """Category tools with `tag` applied; built once per catalog."""
+        key = (category, tag)
+        payloads = self._tagged.get(key)
+        if payloads is None:
+            payloads = tuple(tag_tool(t, tag) for t in self.category(category))
+            self._index_keywords(payloads)
+            self._tagged[key] = payloads
+        return payloads
+
+    def schema(self, name: str) -> Optional[Dict[str, Any]]:
+        """JSON schema for a native or raw MCP tool name."""
+        tool = self.native.get(name) or self.mcp_by_name.get(name)
+        if tool is None:
+            return None
+        return tool.get("function", {}).get("parameters", {})
+
+    def keywords(self, tool: Dict[str, Any]) -> FrozenSet[str]:
+        """Vocabulary words found in the tool's name/description."""
+        found = self._keywords.get(id(tool))
+        if found is None:
+            fn = tool.get("function") or {}
+            text = (fn.get("name") or "").lower() + " " + (fn.get("description") or "").lower()
+            found = frozenset(w for w in KEYWORD_VOCABULARY if w in text)
+        return found
+
+    def name_keywords(self, tool: Dict[str, Any]) -> FrozenSet[str]:
+        """Vocabulary words found in the tool's name."""
+        found = self._name_keywords.get(id(tool))
+        if found is None:
+            name = (tool_name(tool) or "").lower()
+            found = frozenset(w for w in NAME_VOCABULARY if w in name)
+        return found
+
+    def __len__(self) -> int:
+        return len(self.native) + sum(len(t) for t in self.mcp_servers.values())
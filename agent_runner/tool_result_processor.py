@@ -6,15 +6,34 @@ maintaining performance optimizations through adaptive truncation and
 selective retention strategies.
 """
 
+import codecs
 import json
+import os
 import re
 import logging
-from typing import Dict, Any, Optional, Tuple, List
+from typing import Dict, Any, Optional, Tuple, List, Union, Iterable, AsyncIterable
 from enum import Enum
 from dataclasses import dataclass
 
 logger = logging.getLogger("agent_runner.tool_result_processor")
 
+# Results up to this size are materialized and handled by the string strategies (full retention included);
+# anything larger is reduced on the fly to head/tail windows + error lines + structured keys.
+FULL_RETENTION_MAX_CHARS = int(os.getenv("TOOL_RESULT_FULL_RETENTION_MAX_CHARS", "65536"))
+STREAM_SLICE_CHARS = 65536
+
+ERROR_KEYWORDS = (
+    'error', 'failed', 'exception', 'critical', 'warning',
+    'cannot', 'unable', 'denied', 'invalid', 'not found',
+    'timeout', 'connection refused', 'permission'
+)
+_ERROR_RE = re.compile("|".join(re.escape(k) for k in ERROR_KEYWORDS), re.IGNORECASE)
+ESSENTIAL_KEYS = ('error', 'status', 'count', 'total', 'success', 'message')
+_KEY_RE = re.compile(
+    r'"(' + "|".join(ESSENTIAL_KEYS) + r')"\s*:\s*("(?:[^"\\\n]|\\.){0,200}"|-?\d+(?:\.\d+)?|true|false|null)'
+)
+_MAX_CARRY_CHARS = 4096  # longest partial line kept across chunks
+
 
 class QualityTier(Enum):
     """Quality tiers for result processing"""
@@ -41,7 +60,154 @@ class ToolPolicy:
     preserve_errors: bool = True
     preserve_counts: bool = True
     preserve_structure: bool = True
-    critical: bool = False  # Always retain full results for critical tools
+    critical: bool = False  # Always retain full results for critical tools (up to FULL_RETENTION_MAX_CHARS)
+
+
+class StreamingResultReducer:
+    """
+    Incremental reducer for one tool result.
+
+    Chunks (str or UTF-8 bytes) are buffered verbatim until the output passes
+    `full_limit`; from then on only a head window, a tail window, error lines
+    and essential JSON keys are kept, so memory stays around full_limit +
+    2 * max_chars however large the output gets.
+    """
+
+    _OVERLAP = 256  # re-scanned across chunk boundaries inside one very long line
+
+    def __init__(self, max_chars: int, full_limit: int = FULL_RETENTION_MAX_CHARS):
+        self.max_chars = max_chars
+        self.full_limit = max(full_limit, max_chars)
+        self._parts: Optional[List[str]] = []  # verbatim buffer until overflow
+        self._buffered = 0
+        self._decoder = None
+        self._carry = ""
+        self._skip = 0
+        self._first_char = ""
+        self.head = ""
+        self.tail = ""
+        self.error_lines: List[str] = []
+        self._error_chars = 0
+        self.keys: Dict[str, str] = {}
+        self.total_chars = 0
+        self.total_lines = 0
+        self.bytes_in = 0
+
+    @property
+    def overflowed(self) -> bool:
+        return self._parts is None
+
+    def feed(self, chunk: Union[str, bytes]):
+        if isinstance(chunk, (bytes, bytearray)):
+            self.bytes_in += len(chunk)
+            if self._decoder is None:
+                self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+            chunk = self._decoder.decode(chunk)
+        else:
+            self.bytes_in += len(chunk)
+        if chunk:
+            self._consume(chunk)
+
+    def _consume(self, chunk: str):
+        if not self._first_char:
+            stripped = chunk.lstrip()
+            if stripped:
+                self._first_char = stripped[0]
+        self.total_chars += len(chunk)
+        self.total_lines += chunk.count("\n")
+        self._scan(chunk)
+
+        if self._parts is not None:
+            self._parts.append(chunk)
+            self._buffered += len(chunk)
+            if self._buffered <= self.full_limit:
+                return
+            # Past the full-retention limit: keep windows only from here on
+            text = "".join(self._parts)
+            self._parts = None
+            self.head = text[:self.max_chars]
+            self.tail = text[-self.max_chars:]
+            return
+        self.tail = (self.tail + chunk[-self.max_chars:])[-self.max_chars:]
+
+    def _scan(self, chunk: str, final: bool = False):
+        """Collect error lines and essential keys from complete lines (or long-line fragments)."""
+        text = self._carry + chunk
+        skip = self._skip
+        cut = text.rfind("\n")
+        if final:
+            scan, self._carry, self._skip = text, "", 0
+        elif cut >= 0 and len(text) - cut - 1 <= _MAX_CARRY_CHARS:
+            scan, self._carry, self._skip = text[:cut + 1], text[cut + 1:], 0
+        elif len(text) > _MAX_CARRY_CHARS:
+            # One very long line (minified JSON, HTML): scan it now, keep an overlap for split matches
+            scan, self._carry, self._skip = text, text[-self._OVERLAP:], self._OVERLAP
+        else:
+            self._carry = text
+            return
+
+        last_line_start = -1
+        for m in _ERROR_RE.finditer(scan):
+            if m.end() <= skip or self._error_chars >= self.max_chars:
+                continue
+            start = scan.rfind("\n", 0, m.start()) + 1
+            if start == last_line_start:
+                continue
+            last_line_start = start
+            end = scan.find("\n", m.end())
+            end = len(scan) if end < 0 else end
+            if end - start > 200:
+                start = max(start, m.start() - 80)
+                end = start + 200
+            line = scan[start:end].strip()
+            self.error_lines.append(line)
+            self._error_chars += len(line) + 1
+
+        if len(self.keys) < len(ESSENTIAL_KEYS):
+            for m in _KEY_RE.finditer(scan):
+                self.keys.setdefault(m.group(1), m.group(2))
+
+    def finish(self) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """
+        (full_text, None) when the output stayed within full_limit, otherwise
+        (reduced_text, metadata) with the reduction fitted into max_chars.
+        """
+        if self._decoder is not None:
+            rest = self._decoder.decode(b"", final=True)
+            if rest:
+                self._consume(rest)
+        if self._parts is not None:
+            return "".join(self._parts), None
+        self._scan("", final=True)
+        return self._compose(), {
+            "truncated": True,
+            "strategy": "streaming_window",
+            "streamed": True,
+            "error_lines": len(self.error_lines),
+            "structured_keys": list(self.keys),
+            "total_lines": self.total_lines,
+            "adaptive_improved": bool(self.error_lines or self.keys),
+        }
+
+    def _compose(self) -> str:
+        budget = self.max_chars
+        marker = f"\n...[{self.total_chars} chars total, middle omitted]...\n"
+        avail = budget - len(marker)
+        if avail < 20:
+            return self.head[:max(budget - 3, 0)] + "..."
+
+        keys_text = ""
+        if self.keys and self._first_char in "{[":
+            keys_text = "{" + ", ".join(f'"{k}": {v}' for k, v in self.keys.items()) + "}\n"
+        errors_text = "\n".join(self.error_lines) + "\n" if self.error_lines else ""
+
+        keys_text = keys_text[:int(avail * 0.15)]
+        errors_text = errors_text[:int(avail * 0.25)]
+        rest = avail - len(keys_text) - len(errors_text)
+        head_n = int(rest * 0.6)
+        tail_n = rest - head_n
+        tail = self.tail[-tail_n:] if tail_n > 0 else ""
+        return (self.head[:head_n] + marker + keys_text + errors_text + tail)[:budget]
 
 
 class ToolResultProcessor:
@@ -58,8 +224,10 @@ class ToolResultProcessor:
             "full_retained": 0,
             "error_cases": 0,
             "adaptive_improvements": 0,
-            "ai_summaries": 0
+            "ai_summaries": 0,
+            "streamed": 0
         }
+        self.bytes_saved: Dict[str, int] = {}  # tool -> input size minus retained size
         self.summarizer_client = summarizer_client  # For AI-driven summarization
 
     def _initialize_tool_policies(self) -> Dict[str, ToolPolicy]:
@@ -140,6 +308,68 @@ class ToolResultProcessor:
         Returns:
             (processed_result, metadata)
         """
+        if not force_full and len(raw_result) > FULL_RETENTION_MAX_CHARS:
+            # Oversized: reduce in slices instead of parsing/splitting the whole string
+            return await self.process_tool_stream(
+                tool_name,
+                (raw_result[i:i + STREAM_SLICE_CHARS] for i in range(0, len(raw_result), STREAM_SLICE_CHARS)),
+                quality_tier=quality_tier,
+                conversation_context=conversation_context,
+            )
+        return await self._process_text(tool_name, raw_result, quality_tier, force_full, conversation_context)
+
+    async def process_tool_stream(
+        self,
+        tool_name: str,
+        chunks: Union[Iterable[Union[str, bytes]], AsyncIterable[Union[str, bytes]]],
+        quality_tier: QualityTier = QualityTier.MEDIUM,
+        force_full: bool = False,
+        conversation_context: Optional[Dict[str, Any]] = None
+    ) -> Tuple[str, Dict[str, Any]]:
+        """
+        Process a tool result that arrives as chunks, without materializing oversized output.
+
+        Output up to FULL_RETENTION_MAX_CHARS is handled exactly like process_tool_result
+        (force_full applies only within that limit); larger output is reduced while it streams.
+        """
+        policy = self._adjust_policy_for_tier(self.tool_policies.get(tool_name, ToolPolicy()), quality_tier)
+        reducer = StreamingResultReducer(policy.max_chars)
+        if hasattr(chunks, "__aiter__"):
+            async for chunk in chunks:
+                reducer.feed(chunk)
+        else:
+            for chunk in chunks:
+                reducer.feed(chunk)
+
+        text, metadata = reducer.finish()
+        if metadata is None:
+            return await self._process_text(tool_name, text, quality_tier, force_full, conversation_context)
+
+        self.quality_metrics["total_processed"] += 1
+        self.quality_metrics["truncated"] += 1
+        self.quality_metrics["streamed"] += 1
+        if metadata["adaptive_improved"]:
+            self.quality_metrics["adaptive_improvements"] += 1
+        if reducer.error_lines:
+            self.quality_metrics["error_cases"] += 1
+        self._record_savings(tool_name, reducer.bytes_in, len(text))
+
+        metadata.update({
+            "tool_name": tool_name,
+            "original_length": reducer.total_chars,
+            "processed_length": len(text),
+            "quality_tier": quality_tier.value
+        })
+        return text, metadata
+
+    async def _process_text(
+        self,
+        tool_name: str,
+        raw_result: str,
+        quality_tier: QualityTier,
+        force_full: bool,
+        conversation_context: Optional[Dict[str, Any]]
+    ) -> Tuple[str, Dict[str, Any]]:
         self.quality_metrics["total_processed"] += 1
 
         # Check if we should retain full result
@@ -169,6 +399,7 @@ class ToolResultProcessor:
         if self._contains_errors(raw_result):
             self.quality_metrics["error_cases"] += 1
 
+        self._record_savings(tool_name, len(raw_result), len(processed_result))
         metadata.update({
             "tool_name": tool_name,
             "original_length": len(raw_result),
@@ -178,6 +409,10 @@ class ToolResultProcessor:
 
         return processed_result, metadata
 
+    def _record_savings(self, tool_name: str, original: int, processed: int):
+        if original > processed:
+            self.bytes_saved[tool_name] = self.bytes_saved.get(tool_name, 0) + original - processed
+
     def _should_retain_full(self, tool_name: str, result: str, context: Optional[Dict[str, Any]]) -> bool:
         """Determine if result should be retained in full"""
         policy = self.tool_policies.get(tool_name, ToolPolicy())
@@ -419,13 +654,7 @@ class ToolResultProcessor:
 
     def _contains_errors(self, content: str) -> bool:
         """Check if content contains error indicators"""
-        error_keywords = [
-            'error', 'failed', 'exception', 'critical', 'warning',
-            'cannot', 'unable', 'denied', 'invalid', 'not found',
-            'failed', 'timeout', 'connection refused', 'permission'
-        ]
-        content_lower = content.lower()
-        return any(keyword in content_lower for keyword in error_keywords)
+        return _ERROR_RE.search(content) is not None
 
     def get_quality_metrics(self) -> Dict[str, Any]:
         """Get quality processing metrics"""
@@ -438,6 +667,9 @@ class ToolResultProcessor:
             if metrics["truncated"] > 0:
                 metrics["adaptive_improvement_rate"] = metrics["adaptive_improvements"] / metrics["truncated"]
 
+        # Characters for text results, bytes for byte streams
+        metrics["bytes_saved_by_tool"] = dict(self.bytes_saved)
+        metrics["bytes_saved_total"] = sum(self.bytes_saved.values())
         return metrics
 
     def update_tool_policy(self, tool_name: str, policy: ToolPolicy):
@@ -483,4 +715,5 @@ class ToolResultProcessor:
     def reset_metrics(self):
         """Reset quality metrics"""
         self.quality_metrics = {k: 0 for k in self.quality_metrics.keys()}
+        self.bytes_saved.clear()
         logger.info("Quality metrics reset")
\ No newline at end of file
@@ -0,0 +1,115 @@
+"""
+In-process tool vector index.
+
+Holds every tool embedding as one contiguous, L2-normalized float32 matrix so a
+query is a single matmul + argpartition instead of a SurrealDB round-trip or a
+per-tool Python loop. Rows are upserted/removed incrementally as MCP discovery
+changes the tool set; removal swaps the last row into the freed slot.
+"""
+
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger("agent_runner.tool_vector_index")
+
+
+class ToolVectorIndex:
+    """Dense cosine-similarity index over tool embeddings (exact top-k)."""
+
+    def __init__(self, initial_capacity: int = 256):
+        self.initial_capacity = initial_capacity
+        self.dim: Optional[int] = None
+        self._matrix: Optional[np.ndarray] = None  # (capacity, dim), rows [0, len) are live
+        self._names: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._meta: Dict[str, Dict[str, Any]] = {}
+        self.version = 0  # Bumped on every mutation
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def names(self) -> List[str]:
+        return list(self._names)
+
+    def get_meta(self, name: str) -> Dict[str, Any]:
+        return self._meta.get(name, {})
+
+    @staticmethod
+    def _normalize(vector: Iterable[float]) -> Optional[np.ndarray]:
+        vec = np.asarray(vector, dtype=np.float32).ravel()
+        norm = float(np.linalg.norm(vec))
+        if vec.size == 0 or norm == 0.0 or not np.isfinite(norm):
+            return None
+        return vec / norm
+
+    def _reset(self, dim: int) -> None:
+        if self.dim is not None:
+            logger.info(f"Tool index dimension changed ({self.dim} -> {dim}); rebuilding")
+        self.dim = dim
+        self._matrix = np.zeros((self.initial_capacity, dim), dtype=np.float32)
+        self._names.clear()
+        self._rows.clear()
+        self._meta.clear()
+
+    def upsert(self, name: str, vector: Iterable[float], meta: Optional[Dict[str, Any]] = None) -> bool:
+        """Insert or replace a tool vector. Zero/invalid vectors are rejected (returns False)."""
+        vec = self._normalize(vector)
+        if vec is None:
+            return False
+        if self.dim != vec.size:
+            self._reset(vec.size)
+
+        row = self._rows.get(name)
+        if row is None:
+            row = len(self._names)
+            if row >= self._matrix.shape[0]:
+                grown = np.zeros((self._matrix.shape[0] * 2, self.dim), dtype=np.float32)
+                grown[:row] = self._matrix[:row]
+                self._matrix = grown
+            self._names.append(name)
+            self._rows[name] = row
+        self._matrix[row] = vec
+        self._meta[name] = meta or {}
+        self.version += 1
+        return True
+
+    def remove(self, name: str) -> bool:
+        row = self._rows.pop(name, None)
+        if row is None:
+            return False
+        last = len(self._names) - 1
+        if row != last:
+            moved = self._names[last]
+            self._matrix[row] = self._matrix[last]
+            self._names[row] = moved
+            self._rows[moved] = row
+        self._names.pop()
+        self._meta.pop(name, None)
+        self.version += 1
+        return True
+
+    def search(self, query_vector: Iterable[float], k: int = 5, min_score: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Top-k tools by cosine similarity, best first."""
+        n = len(self._names)
+        if n == 0 or k <= 0:
+            return []
+        q = self._normalize(query_vector)
+        if q is None or q.size != self.dim:
+            return []
+
+        scores = self._matrix[:n] @ q
+        if k < n:
+            top = np.argpartition(scores, -k)[-k:]
+            top = top[np.argsort(scores[top])[::-1]]
+        else:
+            top = np.argsort(scores)[::-1]
+
+        results = [(self._names[i], float(scores[i])) for i in top]
+        if min_score is not None:
+            results = [(name, score) for name, score in results if score >= min_score]
+        return results
@@ -409,8 +409,7 @@ async def tool_toggle_mcp_server(state: AgentState, name: str, enabled: bool) ->
             return {"ok": False, "error": "Server not found"}
         
         if not enabled:
-            if name in engine.executor.mcp_tool_cache:
-                del engine.executor.mcp_tool_cache[name]
+            engine.executor.remove_server_tools(name)
         else:
             await engine.discover_mcp_tools()
         
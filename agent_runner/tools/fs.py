@@ -71,7 +71,9 @@ def tool_read_text(state: AgentState, path: str, max_bytes: Optional[int] = None
     max_b = max_bytes if max_bytes is not None else state.max_read_bytes
     if not p.exists() or not p.is_file():
         return {"root": str(root), "path": str(p.relative_to(root)), "exists": False, "is_file": False, "content": "", "truncated": False}
-    data = p.read_bytes()
+    # Read at most one byte past the limit instead of loading the whole file
+    with p.open("rb") as f:
+        data = f.read(max_b + 1)
     truncated = False
     if len(data) > max_b:
         data = data[:max_b]
@@ -7,7 +7,7 @@ from agent_runner.state import AgentState
 from common.constants import MCP_SCHEME_HTTP, MCP_SCHEME_SSE, MCP_SCHEME_STDIO
 from agent_runner.transports.http import call_http_mcp
 from agent_runner.transports.sse import call_sse_mcp
-from agent_runner.transports.stdio import get_or_create_stdio_process, initialize_stdio_process
+from agent_runner.transports.stdio import get_or_create_stdio_process, initialize_stdio_process, get_stdio_multiplexer
 
 from common.unified_tracking import track_event, EventSeverity, EventCategory
 
@@ -59,41 +59,15 @@ async def perform_pulse_check(state: AgentState, server_name: str, config: Dict[
         # 3. Deep Check (List Tools)
         # Some servers (like brave-search) might initialize fine but crash when asked for tools if config is missing.
         # We perform a 'tools/list' call to ensure the server is truly functional.
-        list_req = {
-            "jsonrpc": "2.0", 
-            "method": "tools/list", 
-            "params": {}, 
-            "id": int(time.time() * 1000) + 1
-        }
-        proc.stdin.write((json.dumps(list_req) + "\n").encode("utf-8"))
-        await proc.stdin.drain()
-        
-        # Read response (iterative read to avoid buffering issues)
-        # Give it 5 seconds as listing tools might load resources
         try:
-             # Just read line by line until we find the response ID
-             start_read = time.time()
-             got_response = False
-             while time.time() - start_read < 5.0:
-                 line = await asyncio.wait_for(proc.stdout.readline(), timeout=5.0)
-                 if not line: # EOF
-                     break
-                 
-                 try:
-                     resp = json.loads(line.decode("utf-8", errors="replace"))
-                     if resp.get("id") == list_req["id"]:
-                         if "error" in resp:
-                             raise PulseCheckFailed(f"Tool list returned error: {resp['error']}")
-                         got_response = True
-                         break
-                 except json.JSONDecodeError:
-                     continue
-            
-             if not got_response:
-                 raise PulseCheckFailed("Failed to receive tool list response (Timeout or Crash)")
-                 
+            mux = await get_stdio_multiplexer(state, server_name, proc)
+            resp = await mux.request("tools/list", {}, timeout=5.0)
+            if "error" in resp:
+                raise PulseCheckFailed(f"Tool list returned error: {resp['error']}")
         except asyncio.TimeoutError:
-             raise PulseCheckFailed("Timeout waiting for tool list response")
+            raise PulseCheckFailed("Timeout waiting for tool list response")
+        except ConnectionError:
+            raise PulseCheckFailed("Failed to receive tool list response (Timeout or Crash)")
 
         # 4. Success - Server survived the pulse check, handshake, and tool listing
         logger.info(f"[Darwinian] Server '{server_name}' PASSED pulse check (Handshake + Tool List OK).")
@@ -202,73 +176,24 @@ async def tool_mcp_proxy(state: AgentState, server: str, tool: str, arguments: D
                 state.mcp_circuit_breaker.record_failure(server, weight=2, error="Failed to initialize stdio process")
                 return {"ok": False, "error": "Failed to initialize stdio process"}
             
-            # Stdio communication logic
-            if server not in state.stdio_process_locks:
-                state.stdio_process_locks[server] = asyncio.Lock()
-
-                # Add timeout to prevent indefinite deadlocks (10 seconds max wait)
+            # Stdio communication: responses are demultiplexed by JSON-RPC id, so
+            # concurrent calls to the same server share the process instead of queueing.
+            mux = await get_stdio_multiplexer(state, server, proc)
             try:
-                await asyncio.wait_for(state.stdio_process_locks[server].acquire(), timeout=10.0)
-                try:
-                    req_id = rpc_body["id"]
-                    proc.stdin.write((json.dumps(rpc_body) + "\n").encode("utf-8"))
-                    await proc.stdin.drain()
-                    
-                    res = {"ok": False, "error": "Did not receive a valid response from stdio process"}
-                    
-                    # Retrieve response line-by-line. 
-                    # We loop to skip over potential debug/log lines from the server.
-                    # BUT: If we hit a read timeout (silence), we must abort, not retry.
-                    # [FIX] Use iterative read to avoid 64KB limit on readline()
-                    buffer = b""
-                    response_found = False
-                    
-                    start_time = time.time()
-                    while time.time() - start_time < 30.0:
-                        try:
-                            chunk = await asyncio.wait_for(proc.stdout.read(65536), timeout=5.0)
-                            if not chunk:
-                                 if not buffer:
-                                     break
-                            
-                            buffer += chunk
-                            
-                            while b'\n' in buffer:
-                                line, buffer = buffer.split(b'\n', 1)
-                                line_text = line.decode("utf-8", errors="replace").strip()
-                                if not line_text:
-                                    continue
-                                    
-                                try:
-                                    data = json.loads(line_text)
-                                    if data.get("id") == req_id:
-                                        if "result" in data:
-                                            res = {"ok": True, "result": data["result"]}
-                                            response_found = True
-                                        elif "error" in data:
-                                            res = {"ok": False, "error": data["error"]["message"]}
-                                            response_found = True
-                                        break
-                                except json.JSONDecodeError:
-                                    continue 
-                            
-                            if response_found:
-                                break
-                                
-                            if not chunk and not buffer:
-                                break
-                                
-                        except asyncio.TimeoutError:
-                            break # Timeout
-                        except Exception as e:
-                            logger.error(f"MCP Read Error: {e}")
-                            break
-                finally:
-                    state.stdio_process_locks[server].release()
+                data = await mux.request(method, params)
             except asyncio.TimeoutError:
-                logger.error(f"Timeout acquiring lock for MCP stdio call '{server}' (10s). Possible deadlock.")
-                return {"ok": False, "error": "Lock timeout - possible deadlock"}
-            
+                return {"ok": False, "error": "Did not receive a valid response from stdio process"}
+            except ConnectionError as e:
+                logger.error(f"MCP Read Error: {e}")
+                return {"ok": False, "error": "Did not receive a valid response from stdio process"}
+
+            if "result" in data:
+                res = {"ok": True, "result": data["result"]}
+            elif "error" in data:
+                error = data["error"]
+                res = {"ok": False, "error": error.get("message", str(error)) if isinstance(error, dict) else str(error)}
+            else:
+                res = {"ok": False, "error": "Did not receive a valid response from stdio process"}
             return res
         
         # Should not reach here - all schemes return
@@ -400,8 +325,7 @@ async def tool_remove_mcp_server(state: AgentState, name: str) -> Dict[str, Any]
             from agent_runner.service_registry import ServiceRegistry
             try:
                 engine = ServiceRegistry.get_engine()
-                if name in engine.executor.mcp_tool_cache:
-                    del engine.executor.mcp_tool_cache[name]
+                engine.executor.remove_server_tools(name)
             except RuntimeError:
                 logger.warning("Could not access engine to clear tool cache")
             
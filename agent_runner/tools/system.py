@@ -387,6 +387,10 @@ async def tool_add_lexicon_entry(state: AgentState, pattern: str, label: str, se
         # Save
         with open(target_file, "w") as f:
             yaml.dump(data, f, sort_keys=False)
+
+        # Recompile lexicons in this process before the next classification
+        from common.lexicon import invalidate_lexicons
+        invalidate_lexicons()
             
         logger.info(f"Learned new pattern: {label} -> {pattern}")
         return {"ok": True, "message": f"Successfully learned pattern for {label}"}
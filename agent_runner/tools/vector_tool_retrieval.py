@@ -14,6 +14,7 @@ from dataclasses import dataclass
 import numpy as np
 
 from agent_runner.state import AgentState
+from agent_runner.tool_vector_index import ToolVectorIndex
 
 logger = logging.getLogger("agent_runner.tools.vector_tool_retrieval")
 
@@ -26,40 +27,86 @@ class ToolVector:
     vector: Optional[List[float]] = None
     metadata: Optional[Dict[str, Any]] = None
 
+class _ToolVectorMap(dict):
+    """dict that bumps `version` on every mutation, so the derived index knows when to rebuild."""
+
+    version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def clear(self):
+        self.version += 1
+        super().clear()
+
+    def update(self, *args, **kwargs):
+        self.version += 1
+        super().update(*args, **kwargs)
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+
 class VectorToolRetriever:
     """Vector-based tool retrieval for scalable semantic search."""
 
     def __init__(self, state: AgentState):
         self.state = state
-        self.tool_vectors: Dict[str, ToolVector] = {}
+        self._tool_vectors = _ToolVectorMap()
         self.embedding_model = "mxbai-embed-large:latest"  # Use existing embedding model
         self.vector_dimension = 1024  # Dimension for mxbai-embed-large
         self.similarity_threshold = 0.7  # Minimum similarity for retrieval
         self.max_results = 20  # Maximum tools to retrieve
+        self._index: Optional[ToolVectorIndex] = None
+        self._index_version = -1  # tool_vectors.version the index was built from
 
     async def _get_embedding(self, text: str) -> Optional[List[float]]:
-        """Get vector embedding for text using Ollama."""
+        """Get vector embedding via the shared (batched, disk-cached) embedding service."""
         try:
-            import httpx
-
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"http://127.0.0.1:11434/api/embeddings",
-                    json={
-                        "model": self.embedding_model,
-                        "prompt": text
-                    }
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    return data.get("embedding")
-
+            from agent_runner.embedding_service import get_embedding_service
+            return await get_embedding_service(self.state).get_embedding(text)
         except Exception as e:
             logger.warning(f"Failed to get embedding: {e}")
 
         return None
 
+    @property
+    def tool_vectors(self) -> Dict[str, ToolVector]:
+        return self._tool_vectors
+
+    @tool_vectors.setter
+    def tool_vectors(self, value: Dict[str, ToolVector]) -> None:
+        self._tool_vectors = _ToolVectorMap(value)
+        self._index = None
+
+    def _get_index(self) -> ToolVectorIndex:
+        """Index over self.tool_vectors, rebuilt only after the mapping changes."""
+        if self._index is None or self._index_version != self._tool_vectors.version:
+            index = ToolVectorIndex(initial_capacity=max(len(self._tool_vectors), 1))
+            for tool_name, tool_vector in self._tool_vectors.items():
+                if tool_vector.vector:
+                    index.upsert(tool_name, tool_vector.vector)
+            self._index, self._index_version = index, self._tool_vectors.version
+        return self._index
+
     async def _calculate_similarity(self, query_vector: List[float], tool_vector: List[float]) -> float:
         """Calculate cosine similarity between two vectors."""
         try:
@@ -86,6 +133,7 @@ class VectorToolRetriever:
         logger.info(f"Building vector embeddings for {len(tool_definitions)} tools")
 
         tool_vectors = {}
+        pending = []
 
         for tool_def in tool_definitions:
             if tool_def.get("type") != "function":
@@ -111,9 +159,13 @@ class VectorToolRetriever:
                 if param_desc:
                     enriched_description += f" Parameters: {', '.join(param_desc)}."
 
-            # Get embedding
-            embedding = await self._get_embedding(enriched_description)
+            pending.append((tool_name, description, params, enriched_description))
+
+        # Embed all descriptions together (cache hits skip the model entirely)
+        from agent_runner.embedding_service import get_embedding_service
+        embeddings = await get_embedding_service(self.state).get_embeddings([p[3] for p in pending])
 
+        for (tool_name, description, params, enriched_description), embedding in zip(pending, embeddings):
             # Determine category (would need category mapping)
             category = "unknown"  # Placeholder - would map from existing categories
 
@@ -146,20 +198,10 @@ class VectorToolRetriever:
             logger.error("Failed to get query embedding")
             return []
 
-        # Calculate similarities
-        similarities = []
-        for tool_name, tool_vector in self.tool_vectors.items():
-            if tool_vector.vector:
-                similarity = await self._calculate_similarity(query_embedding, tool_vector.vector)
-                if similarity >= self.similarity_threshold:
-                    similarities.append((tool_name, similarity))
-
-        # Sort by similarity (highest first)
-        similarities.sort(key=lambda x: x[1], reverse=True)
-
-        # Return top results
+        # Score every tool with one matmul over the normalized vector matrix
+        index = self._get_index()
         max_results = limit or self.max_results
-        return similarities[:max_results]
+        return index.search(query_embedding, k=max_results, min_score=self.similarity_threshold)
 
     async def get_tool_definitions(self, tool_names: List[str]) -> List[Dict[str, Any]]:
         """Get full tool definitions for the specified tool names."""
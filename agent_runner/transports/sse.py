@@ -1,7 +1,12 @@
 import asyncio
+import itertools
 import json
 import logging
+import time
 from typing import Any, Dict, Optional, AsyncIterator
+from urllib.parse import urljoin
+
+import httpx
 
 from agent_runner.state import AgentState
 from agent_runner.transports.circuit_breaker import record_mcp_failure, reset_mcp_success
@@ -27,88 +32,231 @@ async def _parse_sse_events(stream) -> AsyncIterator[Dict[str, Any]]:
                 yield {"event": event_type or "message", "data": data}
 
 
-async def call_sse_mcp(state: AgentState, server: str, url: str, rpc_body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
-    """SSE transport aligned to the server's two-step protocol."""
-    client = await state.get_http_client()
-    sse_headers = headers.copy()
-    sse_headers["Accept"] = "text/event-stream, application/json"
-    sse_headers["Cache-Control"] = "no-cache"
+class SSESession:
+    """
+    Long-lived SSE session for one MCP server.
+
+    Keeps a single GET event stream open, remembers the negotiated /mcp/messages
+    endpoint, and routes response events to waiting callers by JSON-RPC id.
+    The stream is re-established in the background if it drops, so tool calls
+    only pay for the POST instead of a full handshake per call. Reconnects back
+    off exponentially; after SSE_RECONNECT_MAX_ATTEMPTS consecutive failures the
+    session gives up, fails its callers and is replaced on the next call.
+    """
+
+    def __init__(self, state: AgentState, server: str, url: str, headers: Dict[str, str]):
+        self.state = state
+        self.server = server
+        self.url = url
+        self.headers = headers.copy()
+        self.endpoint_url: Optional[str] = None
+        self._ready = asyncio.Event()
+        self._pending: Dict[Any, asyncio.Future] = {}
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._closed = False
+        self._task: Optional[asyncio.Task] = None
+        self._error: Optional[Exception] = None
+        self.stats = {"connects": 0, "reconnects": 0, "requests": 0, "handshake_failures": 0}
+
+    def start(self) -> None:
+        if self._closed:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    @property
+    def connected(self) -> bool:
+        return self._ready.is_set()
+
+    async def _run(self) -> None:
+        from agent_runner.constants import (
+            SLEEP_BRIEF_BACKOFF_BASE,
+            SSE_RECONNECT_MAX_ATTEMPTS,
+            SSE_RECONNECT_MAX_DELAY_SECONDS,
+        )
+
+        attempt = 0
+        sse_headers = self.headers.copy()
+        sse_headers["Accept"] = "text/event-stream, application/json"
+        sse_headers["Cache-Control"] = "no-cache"
+        # The stream is idle between calls, so only bound the connect phase
+        timeout = httpx.Timeout(self.state.http_timeout, read=None)
+
+        while not self._closed:
+            try:
+                client = await self.state.get_http_client()
+                async with client.stream("GET", self.url, headers=sse_headers, timeout=timeout) as stream_response:
+                    if stream_response.status_code >= 400:
+                        raise ConnectionError(f"HTTP {stream_response.status_code}")
+
+                    async for event in _parse_sse_events(stream_response.aiter_text()):
+                        if event["event"] == "endpoint":
+                            endpoint_url = self._parse_endpoint(event["data"])
+                            if endpoint_url:
+                                self.endpoint_url = endpoint_url
+                                self.stats["connects"] += 1
+                                attempt = 0
+                                self._ready.set()
+                            continue
+                        if event["event"] not in (None, "message", "event"):
+                            continue
+                        self._dispatch(event["data"])
+
+                if not self.endpoint_url:
+                    self.stats["handshake_failures"] += 1
+                    record_mcp_failure(self.state, self.server, error_context={"error": "missing endpoint event"})
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"[MCP:{self.server}] SSE stream dropped: {e}")
+                if not self.endpoint_url:
+                    record_mcp_failure(self.state, self.server, error_context={"error": str(e)})
+            finally:
+                self._ready.clear()
+                self.endpoint_url = None
+                self._fail_pending(ConnectionError(f"SSE stream for '{self.server}' disconnected"))
+
+            if self._closed:
+                break
+            attempt += 1
+            if attempt >= SSE_RECONNECT_MAX_ATTEMPTS:
+                self._error = ConnectionError(
+                    f"SSE server '{self.server}' unreachable after {attempt} connection attempts"
+                )
+                logger.warning(f"[MCP:{self.server}] {self._error}; giving up")
+                self._closed = True
+                self._fail_pending(self._error)
+                break
+            self.stats["reconnects"] += 1
+            await asyncio.sleep(min(SLEEP_BRIEF_BACKOFF_BASE * (2 ** (attempt - 1)), SSE_RECONNECT_MAX_DELAY_SECONDS))
+
+    def _parse_endpoint(self, data: str) -> Optional[str]:
+        try:
+            payload = json.loads(data)
+            uri = payload.get("uri") if isinstance(payload, dict) else None
+        except Exception:
+            # Some servers send the endpoint as a bare (possibly relative) URL
+            uri = data.strip() or None
+        if not uri:
+            logger.warning(f"SSE endpoint parse failed for '{self.server}': {data[:200]}")
+            return None
+        return urljoin(self.url, uri)
+
+    def _dispatch(self, data: str) -> None:
+        try:
+            data_obj = json.loads(data)
+        except Exception:
+            return
+        if not isinstance(data_obj, dict):
+            return
+        future = self._pending.get(data_obj.get("id"))
+        if future is not None and not future.done():
+            future.set_result(data_obj)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def _wait_ready(self) -> None:
+        """Wait for a negotiated endpoint, or raise once the session has given up."""
+        if self._closed:
+            raise self._error or ConnectionError(f"SSE session for '{self.server}' closed")
+        ready = asyncio.ensure_future(self._ready.wait())
+        try:
+            await asyncio.wait({ready, self._task}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            ready.cancel()
+        if not self._ready.is_set():
+            raise self._error or ConnectionError(f"SSE session for '{self.server}' closed")
 
-    from agent_runner.constants import DEFAULT_RETRY_ATTEMPTS, SLEEP_BRIEF_BACKOFF_BASE
+    async def request(self, rpc_body: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        """POST a JSON-RPC body over the shared session and await the matching response event."""
+        self.start()
+        await asyncio.wait_for(self._wait_ready(), timeout=timeout)
+
+        req_id = next(self._ids)
+        body = dict(rpc_body, id=req_id)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[req_id] = future
+        self.stats["requests"] += 1
+        try:
+            client = await self.state.get_http_client()
+            post_headers = self.headers.copy()
+            post_headers["Content-Type"] = "application/json"
+            post_resp = await client.post(self.endpoint_url, json=body, headers=post_headers, timeout=self.state.http_timeout)
+            if post_resp.status_code >= 400:
+                return {"ok": False, "status": post_resp.status_code, "error": f"Message POST failed (HTTP {post_resp.status_code})"}
+            return await asyncio.wait_for(future, timeout=timeout)
+        finally:
+            self._pending.pop(req_id, None)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._fail_pending(ConnectionError(f"SSE session for '{self.server}' closed"))
+
+
+def get_sse_session(state: AgentState, server: str, url: str, headers: Dict[str, str]) -> SSESession:
+    """Return the pooled session for this server, replacing it if the URL changed."""
+    session = state.sse_sessions.get(server)
+    if session is None or session.url != url or session._closed:
+        if session is not None:
+            asyncio.create_task(session.close())
+        session = SSESession(state, server, url, headers)
+        state.sse_sessions[server] = session
+    session.start()
+    return session
+
+
+async def close_sse_sessions(state: AgentState) -> None:
+    """Close every pooled SSE session (shutdown / reload)."""
+    for server in list(state.sse_sessions.keys()):
+        session = state.sse_sessions.pop(server, None)
+        if session is not None:
+            await session.close()
+
+
+async def call_sse_mcp(state: AgentState, server: str, url: str, rpc_body: Dict[str, Any], headers: Dict[str, str]) -> Dict[str, Any]:
+    """SSE transport over a persistent per-server session (endpoint negotiated once, reused per call)."""
+    from agent_runner.constants import DEFAULT_RETRY_ATTEMPTS, SLEEP_BRIEF_BACKOFF_BASE, SSE_REQUEST_TIMEOUT_SECONDS
 
     max_retries = DEFAULT_RETRY_ATTEMPTS
     base_delay = SLEEP_BRIEF_BACKOFF_BASE
+    session = get_sse_session(state, server, url, headers)
 
     for attempt in range(max_retries):
         try:
-            # Step 1: Open SSE stream (GET)
-            async with client.stream("GET", url, headers=sse_headers, timeout=state.http_timeout) as stream_response:
-                if stream_response.status_code >= 400:
-                    if stream_response.status_code >= 500 and attempt < max_retries - 1:
-                        await asyncio.sleep(base_delay * (2 ** attempt))
-                        continue
-                    record_mcp_failure(state, server)
-                    return {"ok": False, "status": stream_response.status_code, "error": f"HTTP {stream_response.status_code}"}
-
-                endpoint_url: Optional[str] = None
-                event_stream = _parse_sse_events(stream_response.aiter_text())
-
-                # Step 2: Read initial endpoint event to get /mcp/messages URL
-                async for event in event_stream:
-                    if event["event"] == "endpoint":
-                        try:
-                            payload = json.loads(event["data"])
-                            endpoint_url = payload.get("uri")
-                        except Exception as e:
-                            logger.warning(f"SSE endpoint parse failed: {e}")
-                        break
-                    # Ignore other events during handshake
-
-                if not endpoint_url:
-                    record_mcp_failure(state, server, error_context={"error": "missing endpoint event", "attempt": attempt + 1})
-                    if attempt < max_retries - 1:
-                        await asyncio.sleep(base_delay * (2 ** attempt))
-                        continue
-                    return {"ok": False, "error": "SSE handshake failed (no endpoint)"}
-
-                # Step 3: POST the RPC body to the messages endpoint
-                post_headers = headers.copy()
-                post_headers["Content-Type"] = "application/json"
-                post_resp = await client.post(endpoint_url, json=rpc_body, headers=post_headers, timeout=state.http_timeout)
-                if post_resp.status_code >= 400:
-                    record_mcp_failure(state, server)
-                    return {"ok": False, "status": post_resp.status_code, "error": f"Message POST failed (HTTP {post_resp.status_code})"}
-
-                # Step 4: Read SSE message events for matching id using same stream
-                async for event in event_stream:
-                    if event["event"] not in (None, "message", "event"):
-                        continue
-                    try:
-                        data_obj = json.loads(event["data"])
-                    except Exception:
-                        continue
-
-                    if data_obj.get("id") != rpc_body.get("id"):
-                        continue
-
-                    reset_mcp_success(state, server)
-                    if "result" in data_obj:
-                        return {"ok": True, "result": data_obj.get("result"), "id": data_obj.get("id")}
-                    if "error" in data_obj:
-                        return {"ok": False, "error": data_obj.get("error"), "id": data_obj.get("id")}
-
-                # If stream closed without a matching message
-                record_mcp_failure(state, server, error_context={"error": "no response message", "attempt": attempt + 1})
-                if attempt < max_retries - 1:
-                    await asyncio.sleep(base_delay * (2 ** attempt))
-                    continue
-                return {"ok": False, "error": "MCP SSE server did not return a valid response"}
-
-        except Exception as e:
+            data_obj = await session.request(rpc_body, timeout=SSE_REQUEST_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            record_mcp_failure(state, server, error_context={"error": "no response message", "attempt": attempt + 1})
+            return {"ok": False, "error": "MCP SSE server did not return a valid response"}
+        except ConnectionError as e:
+            # Stream dropped mid-call; the session reconnects in the background
             if attempt < max_retries - 1:
                 await asyncio.sleep(base_delay * (2 ** attempt))
                 continue
             record_mcp_failure(state, server)
             return {"ok": False, "error": f"Failed calling SSE MCP: {e}"}
+        except Exception as e:
+            record_mcp_failure(state, server)
+            return {"ok": False, "error": f"Failed calling SSE MCP: {e}"}
+
+        if "ok" in data_obj:
+            # POST rejected by the server
+            record_mcp_failure(state, server)
+            return data_obj
+
+        reset_mcp_success(state, server)
+        if "result" in data_obj:
+            return {"ok": True, "result": data_obj.get("result"), "id": rpc_body.get("id")}
+        if "error" in data_obj:
+            return {"ok": False, "error": data_obj.get("error"), "id": rpc_body.get("id")}
+        return {"ok": False, "error": "MCP SSE server did not return a valid response"}
 
     return {"ok": False, "error": "Max retries exceeded"}
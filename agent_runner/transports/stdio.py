@@ -3,9 +3,11 @@ import json
 import time
 import logging
 import atexit
+import itertools
+import re
 import weakref
 from pathlib import Path
-from typing import Any, List, Dict
+from typing import Any, List, Dict, Optional
 from common.logging_utils import log_json_event as _log_json_event
 from agent_runner.state import AgentState
 from agent_runner.constants import (
@@ -16,8 +18,14 @@ from agent_runner.constants import (
     PROCESS_INITIALIZATION_TIMEOUT_SECONDS,
     NON_CORE_PROCESS_TIMEOUT_SECONDS,
     PROCESS_WAIT_TIMEOUT_SECONDS,
-    STDERR_READ_TIMEOUT_SECONDS
+    STDERR_READ_TIMEOUT_SECONDS,
+    STDIO_REQUEST_TIMEOUT_SECONDS,
+    STDIO_MAX_IN_FLIGHT,
+    STDIO_READ_CHUNK_BYTES,
+    STDIO_MAX_LINE_BYTES,
+    STDIO_OVERSIZED_RESULT_CHARS
 )
+from agent_runner.tool_result_processor import StreamingResultReducer
 
 logger = logging.getLogger("agent_runner")
 
@@ -55,6 +63,250 @@ async def _log_stderr(server: str, stream: asyncio.StreamReader):
 # Servers that should maintain persistent connections (not killed after each call)
 PERSISTENT_SERVERS = {"thinking", "sequential-thinking", "project-memory"}
 
+
+# JSON-RPC id of an oversized response: in the head before "result" (Python SDK order)
+# or as the last member of the envelope (TypeScript SDK order)
+_RPC_ID_RE = re.compile(r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")')
+_RPC_ID_TAIL_RE = re.compile(
+    r'"id"\s*:\s*(-?\d+|"(?:[^"\\]|\\.)*")\s*(?:,\s*"jsonrpc"\s*:\s*"2\.0"\s*)?\}\s*$'
+)
+# Envelope structure (quotes inside the payload text are escaped, so "(?<!\\)" skips them)
+_RPC_KIND_RE = re.compile(r'(?<!\\)"(result|error)"\s*:')
+_RPC_ERROR_CODE_RE = re.compile(r'(?<!\\)"code"\s*:\s*(-?\d+)')
+_IS_ERROR_RE = re.compile(r'(?<!\\)"isError"\s*:\s*true\b')
+_BODY_START_RE = re.compile(r'(?<!\\)"(?:text|message)"\s*:\s*"')
+_BODY_END_RE = re.compile(r'(?<!\\)"\s*[,}\]]')
+JSONRPC_INTERNAL_ERROR = -32603
+
+
+def _envelope_body(text: str) -> str:
+    """The reduced window without the JSON envelope around the first text/message string."""
+    start = _BODY_START_RE.search(text[:4096])
+    if start:
+        text = text[start.end():]
+    # The first unescaped closing quote near the end closes the string
+    end = _BODY_END_RE.search(text, max(len(text) - 512, 0))
+    if end is not None:
+        text = text[:end.start()]
+    # The windows are raw JSON; undo the common escapes so the text reads as the tool output
+    return text.replace("\\n", "\n").replace("\\t", "\t").replace('\\"', '"')
+
+
+def _oversized_response(reducer: StreamingResultReducer) -> Optional[Dict[str, Any]]:
+    """
+    Stand-in JSON-RPC response for a line too long to buffer: its id plus the
+    windowed payload text, keeping the error/isError status of the original.
+    None when no envelope id can be recovered.
+    """
+    text, metadata = reducer.finish()
+    head = reducer.head or text
+    tail = reducer.tail or text
+    m = _RPC_ID_RE.search(head[:4096])
+    kind = _RPC_KIND_RE.search(head[:4096])
+    if m is None or (kind is not None and kind.start() < m.start()):
+        m = _RPC_ID_TAIL_RE.search(tail)
+    if m is None:
+        return None
+
+    reduced = dict(metadata or {}, original_bytes=reducer.bytes_in)
+    body = _envelope_body(text)
+    if kind is not None and kind.group(1) == "error":
+        code = _RPC_ERROR_CODE_RE.search(head, kind.end(), kind.end() + 512)
+        return {
+            "jsonrpc": "2.0",
+            "id": json.loads(m.group(1)),
+            "error": {
+                "code": int(code.group(1)) if code else JSONRPC_INTERNAL_ERROR,
+                "message": body,
+                "data": {"reduced": reduced},
+            },
+        }
+    return {
+        "jsonrpc": "2.0",
+        "id": json.loads(m.group(1)),
+        "result": {
+            "content": [{"type": "text", "text": body}],
+            "isError": bool(_IS_ERROR_RE.search(head[:4096]) or _IS_ERROR_RE.search(tail[-4096:])),
+            "reduced": reduced,
+        },
+    }
+
+
+class StdioMultiplexer:
+    """
+    Multiplexed JSON-RPC client for a single stdio MCP process.
+
+    One background reader task owns proc.stdout and resolves per-request futures
+    by JSON-RPC id, so many calls can be in flight on the same child process
+    instead of serializing the whole write-then-read cycle behind a lock.
+    Only the write itself is serialized (to keep request lines intact).
+    """
+
+    def __init__(self, server: str, proc: Any, max_in_flight: int = STDIO_MAX_IN_FLIGHT):
+        self.server = server
+        self.proc = proc
+        self._ids = itertools.count(int(time.time() * 1000))
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._write_lock = asyncio.Lock()
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self._closed = False
+        self._reader_task: Optional[asyncio.Task] = asyncio.create_task(self._read_loop())
+        self.stats = {"requests": 0, "responses": 0, "timeouts": 0, "orphaned": 0, "oversized": 0, "peak_in_flight": 0}
+
+    @property
+    def closed(self) -> bool:
+        return self._closed or self.proc.returncode is not None
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._pending)
+
+    async def request(self, method: str, params: Optional[Dict[str, Any]] = None, timeout: float = STDIO_REQUEST_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """Send a request and await its matching response. Returns the raw JSON-RPC response dict."""
+        if self.closed:
+            raise ConnectionError(f"Stdio process for '{self.server}' is closed")
+
+        async with self._in_flight:
+            req_id = next(self._ids)
+            future = asyncio.get_running_loop().create_future()
+            self._pending[req_id] = future
+            self.stats["requests"] += 1
+            self.stats["peak_in_flight"] = max(self.stats["peak_in_flight"], len(self._pending))
+            try:
+                body = {"jsonrpc": "2.0", "method": method, "params": params or {}, "id": req_id}
+                line = (json.dumps(body) + "\n").encode("utf-8")
+                async with self._write_lock:
+                    self.proc.stdin.write(line)
+                    await self.proc.stdin.drain()
+                return await asyncio.wait_for(future, timeout=timeout)
+            except asyncio.TimeoutError:
+                self.stats["timeouts"] += 1
+                raise
+            finally:
+                self._pending.pop(req_id, None)
+
+    async def notify(self, method: str, params: Optional[Dict[str, Any]] = None) -> None:
+        """Send a JSON-RPC notification (no response expected)."""
+        line = (json.dumps({"jsonrpc": "2.0", "method": method, "params": params or {}}) + "\n").encode("utf-8")
+        async with self._write_lock:
+            self.proc.stdin.write(line)
+            await self.proc.stdin.drain()
+
+    async def _read_loop(self) -> None:
+        # bytearray + scan offset: a long response line costs one amortized append per
+        # chunk instead of re-copying the whole buffer, and only new bytes are searched.
+        # A line past STDIO_MAX_LINE_BYTES is never held whole: the rest of it streams
+        # through a StreamingResultReducer and its caller gets the windowed result.
+        buffer = bytearray()
+        scanned = 0
+        spill: Optional[StreamingResultReducer] = None
+        try:
+            while True:
+                chunk = await self.proc.stdout.read(STDIO_READ_CHUNK_BYTES)
+                if not chunk:
+                    break
+                if spill is not None:
+                    newline = chunk.find(b"\n")
+                    if newline < 0:
+                        spill.feed(chunk)
+                        continue
+                    spill.feed(chunk[:newline])
+                    self._dispatch_oversized(spill)
+                    spill = None
+                    chunk = chunk[newline + 1:]
+                buffer += chunk
+                start = 0
+                newline = buffer.find(b"\n", scanned)
+                while newline >= 0:
+                    self._dispatch(buffer[start:newline])
+                    start = newline + 1
+                    newline = buffer.find(b"\n", start)
+                if start:
+                    del buffer[:start]
+                if len(buffer) > STDIO_MAX_LINE_BYTES:
+                    spill = StreamingResultReducer(STDIO_OVERSIZED_RESULT_CHARS, full_limit=STDIO_OVERSIZED_RESULT_CHARS)
+                    spill.feed(bytes(buffer))
+                    buffer.clear()
+                scanned = len(buffer)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[MCP:{self.server}] Stdio reader failed: {e}")
+        finally:
+            self._fail_pending(ConnectionError(f"Stdio process for '{self.server}' closed its output stream"))
+
+    def _dispatch(self, line: bytes) -> None:
+        line_text = line.decode("utf-8", errors="replace").strip()
+        if not line_text:
+            return
+        try:
+            data = json.loads(line_text)
+        except json.JSONDecodeError:
+            # Debug/log output from the server on stdout
+            return
+        if not isinstance(data, dict) or "id" not in data or "method" in data:
+            # Notifications and server-initiated requests are not routed to callers
+            return
+        self._resolve(data)
+
+    def _resolve(self, data: Dict[str, Any]) -> None:
+        future = self._pending.get(data["id"])
+        if future is None:
+            self.stats["orphaned"] += 1
+            logger.debug(f"[MCP:{self.server}] Dropping response for unknown/expired id {data['id']}")
+            return
+        if not future.done():
+            future.set_result(data)
+            self.stats["responses"] += 1
+
+    def _dispatch_oversized(self, reducer: StreamingResultReducer) -> None:
+        self.stats["oversized"] += 1
+        data = _oversized_response(reducer)
+        if data is None:
+            logger.warning(f"[MCP:{self.server}] Dropping {reducer.bytes_in} byte stdout line without a JSON-RPC id")
+            return
+        logger.info(f"[MCP:{self.server}] Response {data['id']} was {reducer.bytes_in} bytes; reduced while streaming")
+        self._resolve(data)
+
+    def _fail_pending(self, exc: Exception) -> None:
+        self._closed = True
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(exc)
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._reader_task and not self._reader_task.done():
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except (asyncio.CancelledError, Exception):
+                pass
+        self._fail_pending(ConnectionError(f"Stdio multiplexer for '{self.server}' closed"))
+
+
+async def get_stdio_multiplexer(state: AgentState, server: str, proc: Any) -> StdioMultiplexer:
+    """
+    Return the multiplexer bound to this server's current process, creating it if needed.
+    Must only be called after initialize_stdio_process(), which reads stdout directly.
+    A stale multiplexer (dead or bound to a replaced process) is swapped out before it is
+    closed, so concurrent callers never await between the lookup and the insert and all
+    share the one reader on stdout.
+    """
+    stale = state.stdio_multiplexers.get(server)
+    if stale is not None and stale.proc is proc and not stale.closed:
+        return stale
+    mux = StdioMultiplexer(server, proc)
+    state.stdio_multiplexers[server] = mux
+    if stale is not None:
+        await stale.close()
+        if stale.proc is not proc and stale.proc.stdin:
+            try:
+                stale.proc.stdin.close()
+            except Exception as e:
+                logger.debug(ERROR_PROCESS_STREAM_CLOSE_FAILED.format(error=e))
+    return mux
+
 async def get_or_create_stdio_process(state: AgentState, server: str, cmd: List[str], env: Dict[str, Any]) -> Any:
     """Get existing stdio process or create new one. Returns subprocess or None on error."""
     
@@ -300,6 +552,11 @@ async def cleanup_stdio_process(state: AgentState, server: str) -> None:
         return
     
     proc = state.stdio_processes[server]
+
+    mux = state.stdio_multiplexers.pop(server, None)
+    if mux is not None:
+        await mux.close()
+
     try:
         proc.terminate()
         try:
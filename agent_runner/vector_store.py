@@ -5,10 +5,30 @@ from typing import List, Dict, Any, Optional
 
 logger = logging.getLogger("agent_runner.vector_store")
 
+try:
+    from agent_runner.tool_vector_index import ToolVectorIndex
+except ImportError:  # numpy not installed: SurrealDB search only
+    ToolVectorIndex = None
+
+LOCAL_MIN_SCORE = 0.4  # Same cut-off as the SurrealDB query below
+
+TOOL_UPSERT_SQL = """
+UPSERT type::thing("tool_definition", $name) SET
+    name = $name,
+    description = $desc,
+    embedding = $emb,
+    requires_admin = $admin
+"""
+TOOL_DELETE_SQL = 'DELETE type::thing("tool_definition", $name) RETURN NONE'
+
+
 class ToolsetVectorIndex:
     """
     Manages semantic search for tool definitions using SurrealDB (vector search)
     and shared embeddings from state.memory.
+
+    Queries are answered from an in-process ToolVectorIndex (one matmul per query)
+    once it is populated; SurrealDB remains the persisted copy and the fallback.
     """
     
     def __init__(self, state):
@@ -16,6 +36,7 @@ class ToolsetVectorIndex:
         # self.memory accessed dynamically via property or state
         self.last_index_time = 0
         self.indexed_count = 0
+        self.local_index = ToolVectorIndex() if ToolVectorIndex else None
         
     @property
     def memory(self):
@@ -47,84 +68,147 @@ class ToolsetVectorIndex:
         except Exception as e:
             logger.warning(f"Failed to clear tool_definitions: {e}")
 
-        # We index concurrently for speed
-        tasks = []
-        for tool in tools:
-            tasks.append(self._upsert_tool(tool))
-            
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        success_count = sum(1 for r in results if isinstance(r, dict) and r.get("ok"))
-        self.indexed_count = success_count
-        self.last_index_time = asyncio.get_event_loop().time()
-        logger.info(f"Vector Store Indexing Complete: {success_count}/{len(tools)} tools active.")
-
-    async def _upsert_tool(self, tool: Dict[str, Any]) -> Dict[str, Any]:
-        """Process a single tool: Embed -> Upsert."""
+        # Embed all tools in batched calls, then write them in a few multi-record round-trips
+        records = []
         try:
-            # Handle both flat and OpenAI-style nested tool definitions
-            if "function" in tool:
-                name = tool["function"].get("name")
-                description = tool["function"].get("description", "")
-            else:
-                name = tool.get("name")
-                description = tool.get("description", "")
-            
-            if not name:
-                logger.warning(f"Skipping index for malformed tool: {tool}")
-                return {"ok": False}
-                
-            # Combine name and description for semantic richness
-            # "tavily-search: Search the web for current events..."
-            embedding_text = f"{name}: {description}"
-            
+            named = []
+            for tool in tools:
+                name, description = self._tool_fields(tool) if isinstance(tool, dict) else (None, "")
+                if not name:
+                    logger.warning(f"Skipping index for malformed tool: {tool}")
+                    continue
+                # Combine name and description for semantic richness
+                # "tavily-search: Search the web for current events..."
+                named.append((name, description, f"{name}: {description}"))
+
             # Use shared embedding logic (Ollama/Gateway)
-            # If memory is not ready or fails, this might be None
-            vector = await self.memory.get_embedding(embedding_text)
-            
-            if vector is None:
-                 logger.warning(f"Skipping index for {name}: Embedding returned None.")
-                 return {"ok": False}
-            
-            # Check for zero-vector (failure)
-            if all(v == 0.0 for v in vector):
-                logger.warning(f"Skipping index for {name}: Extraction failed (Zero Vector).")
-                return {"ok": False}
-                
+            vectors = await self.memory.get_embeddings([text for _, _, text in named])
+            for (name, description, text), vector in zip(named, vectors):
+                # Check for missing or zero-vector (failure)
+                if not vector or all(v == 0.0 for v in vector):
+                    logger.warning(f"Skipping index for {name}: Embedding failed (Zero Vector).")
+                    continue
+                self._index_local(name, description, text, vector)
+                records.append(self._tool_record(name, description, vector))
+
             # Upsert into SurrealDB
             # We use `tool_definition` table defined in memory_server schema
-            q = """
-            UPSERT type::thing("tool_definition", $name) SET
-                name = $name,
-                description = $desc,
-                embedding = $emb,
-                requires_admin = $admin;
-            """
-            
-            await self.memory.execute_query(q, {
-                "name": name,
-                "desc": description,
-                "emb": vector,
-                "admin": "admin" in name or "system" in name
-            })
-            return {"ok": True}
-            
+            result = await self.memory.execute_batch(TOOL_UPSERT_SQL, records)
+            success_count = result["written"]
         except Exception as e:
-            safe_name = tool.get('name') if isinstance(tool, dict) else 'Unknown'
-            logger.error(f"Failed to upsert tool {safe_name}: {e}")
-            return {"ok": False, "error": str(e)}
+            logger.error(f"Failed to index tools: {e}")
+            success_count = 0
+
+        self.indexed_count = success_count
+        self.last_index_time = asyncio.get_event_loop().time()
+        logger.info(f"Vector Store Indexing Complete: {success_count}/{len(tools)} tools active.")
+
+    @staticmethod
+    def _tool_fields(tool: Dict[str, Any]):
+        """(name, description) for both flat and OpenAI-style nested tool definitions."""
+        if "function" in tool:
+            return tool["function"].get("name"), tool["function"].get("description") or ""
+        return tool.get("name"), tool.get("description") or ""
+
+    @staticmethod
+    def _tool_record(name: str, description: str, vector: List[float]) -> Dict[str, Any]:
+        """Bind parameters for TOOL_UPSERT_SQL."""
+        return {"name": name, "desc": description, "emb": vector, "admin": "admin" in name or "system" in name}
+
+    def _index_local(self, name: str, description: str, text: str, vector: List[float]) -> None:
+        if self.local_index is not None:
+            self.local_index.upsert(name, vector, {"description": description, "text": text})
+
+    async def sync_local_index(self, tools: List[Dict[str, Any]], prune: bool = True) -> int:
+        """
+        Bring the in-process index (and tool_definition) in line with `tools`.
+        Only new or changed tools are embedded, in one batched call, and upserted
+        with one execute_batch; with prune=True, tools absent from the list are
+        dropped. Returns the number of tools (re-)embedded.
+        """
+        index = self.local_index
+        if index is None or self.memory is None:
+            return 0
+
+        wanted: Dict[str, tuple] = {}
+        for tool in tools:
+            if not isinstance(tool, dict):
+                continue
+            name, description = self._tool_fields(tool)
+            if name:
+                wanted[name] = (description, f"{name}: {description}")
+
+        if prune:
+            self.remove_tools([name for name in index.names() if name not in wanted])
+
+        stale = [(name, desc, text) for name, (desc, text) in wanted.items() if index.get_meta(name).get("text") != text]
+        if not stale:
+            return 0
+
+        vectors = await self.memory.get_embeddings([text for _, _, text in stale])
+        records = []
+        for (name, desc, text), vector in zip(stale, vectors):
+            if vector and any(vector):
+                self._index_local(name, desc, text, vector)
+                records.append(self._tool_record(name, desc, vector))
+        if records and self.memory.initialized:
+            try:
+                await self.memory.execute_batch(TOOL_UPSERT_SQL, records)
+            except Exception as e:
+                logger.warning(f"Failed to persist {len(records)} re-embedded tools: {e}")
+        logger.info(f"Local tool index synced: {len(records)} embedded, {len(index)} total.")
+        return len(records)
+
+    def remove_tools(self, names: List[str]) -> None:
+        """Drop tools from the in-process index now and from tool_definition in the background."""
+        names = [name for name in names if name]
+        if not names:
+            return
+        if self.local_index is not None:
+            for name in names:
+                self.local_index.remove(name)
+        if self.memory is None or not self.memory.initialized:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        def report(task: asyncio.Task) -> None:
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Failed to delete tool definitions {names}: {task.exception()}")
+
+        task = asyncio.create_task(self.memory.execute_batch(TOOL_DELETE_SQL, [{"name": name} for name in names]))
+        task.add_done_callback(report)
 
     async def search_tools(self, query: str, limit: int = 5) -> List[Dict[str, Any]]:
         """
         Semantic search for tools relevant to the query.
         Returns a list of tool definitions (name, description, score).
         """
-        if not self.memory or not self.memory.initialized:
+        if not self.memory:
+            return []
+        # Same normalization (padding/truncation to EMBEDDING_DIMENSION) as the indexed vectors
+        vector = await self.memory.get_embedding(query)
+        if not any(vector):
+            return []
+
+        index = self.local_index
+        if index is not None and len(index):
+            try:
+                local = [
+                    {"name": name, "description": index.get_meta(name).get("description", ""), "score": score}
+                    for name, score in index.search(vector, k=limit, min_score=LOCAL_MIN_SCORE)
+                ]
+                if local:
+                    return local
+            except Exception as e:
+                logger.warning(f"Local tool search failed, falling back to SurrealDB: {e}")
+
+        if not self.memory.initialized:
             return []
 
         try:
-            # 1. Embed user query
-            vector = await self.memory.get_embedding(query)
             
             # 2. Vector Search (Cosine Similarity)
             # vector::similarity::cosine(embedding, $query_vector)
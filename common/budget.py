@@ -1,58 +1,221 @@
 
+import asyncio
 import json
 import logging
+import math
+import sqlite3
+import threading
 import time
 import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 
-# Simple file-based budget tracker because we don't want a full database
+# Legacy single-float budget file; imported once into the ledger
 BUDGET_FILE = os.path.expanduser("~/ai/budget.json")
+BUDGET_LEDGER_DB = os.getenv("BUDGET_LEDGER_DB") or str(Path(__file__).parent.parent / "data" / "budget_ledger.db")
+BUDGET_WINDOW_S = 86400.0      # Rolling window check_budget() enforces
+BUDGET_BUCKET_S = 60           # Ledger granularity
+BUDGET_FLUSH_S = 2.0           # Write-behind delay
+BUDGET_RETENTION_S = 35 * 86400
 logger = logging.getLogger("common.budget")
 
+LedgerKey = Tuple[int, str, str, str]  # (bucket, provider, model, request_type)
+
+
 class BudgetTracker:
-    def __init__(self, daily_limit_usd: float = 10.00):
+    """
+    Spend ledger shared by the router and agent runner.
+
+    Costs are aggregated in memory per (minute bucket, provider, model,
+    request_type) and written behind in one transaction as additive upserts
+    into a SQLite (WAL) file, so several processes can record into the same
+    ledger. Each flush also re-reads the rolling-window total across all
+    processes; current_spend is that total plus this process's unflushed
+    costs, so check_budget() never touches disk.
+    """
+
+    def __init__(self, daily_limit_usd: float = 10.00, db_path: Optional[str] = None,
+                 window_s: float = BUDGET_WINDOW_S, flush_interval_s: float = BUDGET_FLUSH_S):
         self.daily_limit_usd = daily_limit_usd
-        self.current_spend = 0.0
-        self.last_reset = time.time()
+        self.db_path = Path(db_path or BUDGET_LEDGER_DB)
+        self.window_s = window_s
+        self.flush_interval_s = flush_interval_s
+        self.last_reset = 0.0
         self.alert_level = 0 # 0=None, 1=80%, 2=90%, 3=100%
+
+        self._synced_spend = 0.0    # Window total as of the last flush (all processes)
+        self._unflushed_spend = 0.0
+        self._pending: Dict[LedgerKey, List[float]] = {}  # key -> [cost_usd, calls]
+        self._lock = threading.Lock()      # pending + spend
+        self._db_lock = threading.Lock()   # connection
+        self._conn: Optional[sqlite3.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_prune = 0.0
+        self._synced_at = 0.0
+        self.flushes = 0
         self._load()
 
-    def _load(self):
+    @property
+    def current_spend(self) -> float:
+        return self._synced_spend + self._unflushed_spend
+
+    # --- Storage ---
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (first use) the ledger; call with _db_lock held."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cost_ledger ("
+                "bucket INTEGER NOT NULL, provider TEXT NOT NULL, model TEXT NOT NULL, "
+                "request_type TEXT NOT NULL, cost_usd REAL NOT NULL, calls INTEGER NOT NULL, "
+                "PRIMARY KEY (bucket, provider, model, request_type)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS budget_meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+            self._conn = conn
+            self._import_legacy(conn)
+        return self._conn
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """One-time import of ~/ai/budget.json (left in place)."""
+        if conn.execute("SELECT 1 FROM budget_meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        rows = [("legacy_imported", time.time())]
         try:
             if os.path.exists(BUDGET_FILE):
                 with open(BUDGET_FILE, "r") as f:
                     data = json.load(f)
-                    self.current_spend = data.get("current_spend", 0.0)
-                    self.last_reset = data.get("last_reset", time.time())
-                    self.daily_limit_usd = data.get("daily_limit_usd", self.daily_limit_usd)
-                    
-            # Check if we need to reset (Daily 00:00 UTC, or just 24h cycle? 24h is simpler)
-            if time.time() - self.last_reset > 86400:
-                self.reset()
+                rows.append(("daily_limit_usd", float(data.get("daily_limit_usd", self.daily_limit_usd))))
+                last_reset = float(data.get("last_reset", 0.0))
+                spend = float(data.get("current_spend", 0.0))
+                if spend > 0 and time.time() - last_reset < self.window_s:
+                    with conn:
+                        conn.execute(
+                            "INSERT OR IGNORE INTO cost_ledger VALUES (?, 'legacy', 'unknown', 'legacy', ?, 1)",
+                            (int(last_reset // BUDGET_BUCKET_S), spend),
+                        )
         except Exception as e:
-            logger.error(f"Failed to load budget: {e}")
+            logger.warning(f"Legacy budget import from {BUDGET_FILE} failed: {e}")
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO budget_meta VALUES (?, ?)", rows)
 
-    def _save(self):
+    def _first_bucket(self, now: float, window_s: Optional[float] = None) -> int:
+        """Oldest bucket inside the window. A reset excludes the whole minute it happened in."""
+        start = int((now - (window_s or self.window_s)) // BUDGET_BUCKET_S)
+        return max(start, math.ceil(self.last_reset / BUDGET_BUCKET_S))
+
+    def _load(self):
+        """Flush pending costs and re-read limit, reset marker and window spend from the ledger."""
+        batch = self._take_pending()
+        now = time.time()
         try:
-            with open(BUDGET_FILE, "w") as f:
-                json.dump({
-                    "current_spend": self.current_spend,
-                    "last_reset": self.last_reset,
-                    "daily_limit_usd": self.daily_limit_usd
-                }, f)
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    self._write(conn, batch)
+                    if now - self._last_prune > 3600:
+                        self._last_prune = now
+                        conn.execute("DELETE FROM cost_ledger WHERE bucket < ?",
+                                     (int((now - BUDGET_RETENTION_S) // BUDGET_BUCKET_S),))
+                meta = dict(conn.execute("SELECT key, value FROM budget_meta").fetchall())
+                self.daily_limit_usd = meta.get("daily_limit_usd", self.daily_limit_usd)
+                self.last_reset = meta.get("last_reset", 0.0)
+                spend = conn.execute(
+                    "SELECT COALESCE(SUM(cost_usd), 0) FROM cost_ledger WHERE bucket >= ?",
+                    (self._first_bucket(now),),
+                ).fetchone()[0]
+            with self._lock:
+                self._synced_spend = spend
+                self._unflushed_spend = sum(cost for cost, _ in self._pending.values())
+            self._synced_at = now
+            self.flushes += 1
+            if self.current_spend < 0.8 * self.daily_limit_usd:
+                # Spend rolled out of the window (or was reset elsewhere): re-arm alerts
+                self.alert_level = 0
         except Exception as e:
-            logger.error(f"Failed to save budget: {e}")
+            self._restore_pending(batch)
+            logger.error(f"Failed to load budget: {e}")
+
+    def _take_pending(self) -> Dict[LedgerKey, List[float]]:
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        return batch
+
+    def _restore_pending(self, batch: Dict[LedgerKey, List[float]]) -> None:
+        with self._lock:
+            for key, (cost, calls) in batch.items():
+                entry = self._pending.setdefault(key, [0.0, 0])
+                entry[0] += cost
+                entry[1] += calls
+
+    @staticmethod
+    def _write(conn: sqlite3.Connection, batch: Dict[LedgerKey, List[float]]) -> None:
+        conn.executemany(
+            "INSERT INTO cost_ledger VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (bucket, provider, model, request_type) DO UPDATE SET "
+            "cost_usd = cost_usd + excluded.cost_usd, calls = calls + excluded.calls",
+            [(*key, cost, calls) for key, (cost, calls) in batch.items()],
+        )
+
+    def flush(self) -> None:
+        """Write behind now (safe from a worker thread)."""
+        self._load()
+
+    def _schedule_flush(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval_s)
+        await asyncio.to_thread(self.flush)
+
+    def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # --- Public API ---
 
     def reset(self):
         logger.info(f"Budget reset. Previous spend: ${self.current_spend:.4f}")
-        self.current_spend = 0.0
-        self.last_reset = time.time()
+        self.flush()
+        now = time.time()
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    conn.execute("INSERT OR REPLACE INTO budget_meta VALUES ('last_reset', ?)", (now,))
+        except Exception as e:
+            logger.error(f"Failed to save budget reset: {e}")
+        self.last_reset = now
+        with self._lock:
+            self._synced_spend = 0.0
+            self._unflushed_spend = sum(cost for cost, _ in self._pending.values())
         self.alert_level = 0
-        self._save()
 
-    def record_usage(self, provider: str, cost_usd: float):
+    def record_usage(self, provider: str, cost_usd: float, model: str = "", request_type: str = "chat"):
         """Record a successful API call cost and trigger alerts."""
-        self.current_spend += cost_usd
-        self._save()
+        # Spend in the minute of a reset lands in the first bucket after it
+        bucket = max(int(time.time() // BUDGET_BUCKET_S), math.ceil(self.last_reset / BUDGET_BUCKET_S))
+        key = (bucket, provider, model, request_type)
+        with self._lock:
+            entry = self._pending.setdefault(key, [0.0, 0])
+            entry[0] += cost_usd
+            entry[1] += 1
+            self._unflushed_spend += cost_usd
+        self._schedule_flush()
         
         ratio = self.current_spend / self.daily_limit_usd
         
@@ -83,6 +246,9 @@ class BudgetTracker:
 
     def check_budget(self, estimated_cost: float = 0.0) -> bool:
         """Returns True if request is allowed, False if budget exceeded."""
+        if time.time() - self._synced_at > self.flush_interval_s:
+            # Pick up other processes' spend and window roll-off in the background
+            self._schedule_flush()
         if self.current_spend + estimated_cost > self.daily_limit_usd:
             logger.error(f"⛔ Budget Blocked: Request would exceed limit (${self.current_spend:.4f} >= ${self.daily_limit_usd:.2f})")
             
@@ -99,6 +265,25 @@ class BudgetTracker:
             return False
         return True
 
+    def get_breakdown(self, window_s: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Spend per (provider, model, request_type) over a rolling window (flushes first)."""
+        self.flush()
+        since = self._first_bucket(time.time(), window_s)
+        try:
+            with self._db_lock:
+                rows = self._connection().execute(
+                    "SELECT provider, model, request_type, SUM(cost_usd), SUM(calls) FROM cost_ledger "
+                    "WHERE bucket >= ? GROUP BY provider, model, request_type ORDER BY SUM(cost_usd) DESC",
+                    (since,),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"Failed to read budget breakdown: {e}")
+            return []
+        return [
+            {"provider": p, "model": m, "request_type": t, "cost_usd": round(c, 6), "calls": n}
+            for p, m, t, c, n in rows
+        ]
+
     def estimate_cost(self, model: str, input_tokens: int, output_tokens: int) -> float:
         """Rough estimation of cost."""
         # Pricing Table (Apr 2024 / Dec 2025 Estimates)
@@ -4,15 +4,28 @@ Aggressive multi-layer caching system for performance optimization.
 Implements Phase 2 caching strategy:
 - MCP tool response caching (deterministic operations)
 - LLM response caching (identical prompts)
+- Single-flight coalescing of identical in-flight model calls
 - Embedding caching (reduce RAG latency)
+- Persistent, memory-mapped embedding store (survives restarts)
+- Persistent TTL key/value store on SQLite (intent and router analyses)
 - Tool metadata caching (reduce discovery overhead)
 """
+import asyncio
+import copy
+import fcntl
 import hashlib
 import json
+import mmap
+import os
+import sqlite3
+import threading
 import time
 import logging
-from typing import Any, Dict, Optional, Tuple
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from collections import OrderedDict
+from contextlib import contextmanager
 from dataclasses import dataclass
 from enum import Enum
 
@@ -324,7 +337,7 @@ class LLMResponseCache:
             return await llm_func()
         
         # Check cache
-        cached_response = self.cache.get(self.namespace, cache_key)
+        cached_response = self.lookup(cache_key)
         if cached_response is not None:
             logger.debug(f"LLM Cache HIT: {model} with {len(messages)} messages")
             return cached_response
@@ -333,9 +346,111 @@ class LLMResponseCache:
         logger.debug(f"LLM Cache MISS: {model} with {len(messages)} messages")
         response = await llm_func()
         
-        self.cache.set(self.namespace, cache_key, response, ttl=ttl)
+        self.store(cache_key, response, ttl=ttl)
         return response
 
+    def lookup(self, cache_key: str) -> Optional[Any]:
+        """Cached response for a precomputed request key"""
+        return self.cache.get(self.namespace, cache_key)
+
+    def store(self, cache_key: str, response: Any, ttl: float = 1800.0) -> None:
+        """Cache a response under a precomputed request key"""
+        self.cache.set(self.namespace, cache_key, response, ttl=ttl)
+
+
+class RequestCoalescer:
+    """
+    Single-flight layer for identical model calls.
+    
+    Concurrent calls with the same canonical payload share one upstream
+    request; followers get a copy of the leader's result (or its exception).
+    Deterministic payloads (temperature 0, non-streaming) can additionally be
+    served from LLMResponseCache for a short TTL.
+    """
+    
+    def __init__(self, llm_cache: Optional[LLMResponseCache] = None, cache_ttl: float = 30.0):
+        self.llm_cache = llm_cache
+        self.cache_ttl = cache_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Metrics
+        self.calls = 0
+        self.upstream_calls = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+    
+    @staticmethod
+    def make_key(payload: Dict[str, Any]) -> str:
+        """Canonical hash of a request payload (key order independent)"""
+        content = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+        return hashlib.sha256(content.encode()).hexdigest()
+    
+    @staticmethod
+    def is_deterministic(payload: Dict[str, Any]) -> bool:
+        return payload.get("temperature") == 0 and not payload.get("stream")
+    
+    @staticmethod
+    def _detach(result: Any) -> Any:
+        # Callers may mutate response dicts; never hand out the shared object
+        return copy.deepcopy(result) if isinstance(result, (dict, list)) else result
+    
+    async def run(self, payload: Dict[str, Any], call, cache: bool = True) -> Any:
+        """Await call() once per distinct in-flight payload"""
+        self.calls += 1
+        key = self.make_key(payload)
+        use_cache = cache and self.llm_cache is not None and self.is_deterministic(payload)
+        
+        if use_cache:
+            cached = self.llm_cache.lookup(key)
+            if cached is not None:
+                self.cache_hits += 1
+                return self._detach(cached)
+        
+        leader = self._inflight.get(key)
+        if leader is not None:
+            self.coalesced += 1
+            try:
+                return self._detach(await asyncio.shield(leader))
+            except asyncio.CancelledError:
+                # Leader was cancelled (e.g. its client disconnected): make our own call
+                if leader.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.run(payload, call, cache)
+                raise
+        
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        self.upstream_calls += 1
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # Mark retrieved: there may be no followers
+            raise
+        finally:
+            self._inflight.pop(key, None)
+        
+        # Followers and the cache share one private snapshot (each reader copies it again);
+        # the leader keeps the object call() returned, which nothing else references
+        snapshot = self._detach(result)
+        future.set_result(snapshot)
+        if use_cache:
+            self.llm_cache.store(key, snapshot, ttl=self.cache_ttl)
+        return result
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        return {
+            "calls": self.calls,
+            "upstream_calls": self.upstream_calls,
+            "coalesced": self.coalesced,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._inflight),
+            "saved_rate": (self.coalesced + self.cache_hits) / self.calls if self.calls > 0 else 0.0,
+        }
+
 
 class EmbeddingCache:
     """
@@ -375,6 +490,583 @@ class EmbeddingCache:
         return embedding
 
 
+class PersistentEmbeddingCache:
+    """
+    Content-addressed, on-disk embedding cache.
+
+    Vectors are stored as float32 in fixed-size slots of a memory-mapped file,
+    keyed by sha256(model, text). An LRU index (digest -> slot) is kept in
+    memory and written atomically on flush; a lost or stale index only costs
+    re-embedding. Switching models or dimensions wipes the store.
+
+    Several processes (agent runner, rag_server, scripts) may map the same
+    directory. Each slot therefore carries the digest of its vector, written
+    around the vector so a reader can detect a slot another process reused or
+    is rewriting; such reads are misses, never another text's vector. The
+    index file only orders the LRU on load: entries are validated against the
+    slot headers. Layout changes (wipe, activate, index writes) hold an
+    exclusive flock on `lock`; loading holds it shared. Within a process,
+    write_index (run in a worker thread) and mmap teardown are serialized.
+
+    Loading scans every slot header and may wait on another process's flock,
+    so async callers run open() and activate() in a worker thread (at startup
+    and on a model switch). While either runs, get() misses and set() skips
+    instead of blocking; synchronous callers may rely on the lazy load.
+
+    Layout (under cache_dir):
+        meta.json    {"model": ..., "dim": ..., "capacity": ..., "layout": ...}
+        vectors.f32  capacity slots of [32-byte digest][dim float32]
+        index.bin    repeated [32-byte digest][uint32 slot], LRU -> MRU order
+        lock         flock target
+    """
+
+    DIGEST_SIZE = 32
+    INDEX_RECORD = DIGEST_SIZE + 4
+    LAYOUT = 2
+    _EMPTY = bytes(DIGEST_SIZE)
+
+    def __init__(self, cache_dir: Optional[str] = None, capacity: int = 20000, flush_every: int = 256):
+        self.cache_dir = Path(cache_dir) if cache_dir else Path(__file__).parent.parent / "data" / "embedding_cache"
+        self.capacity = capacity
+        self.flush_every = flush_every
+        self.model: Optional[str] = None
+        self.dim: Optional[int] = None
+        self._index: "OrderedDict[bytes, int]" = OrderedDict()
+        self._free_slots: List[int] = []
+        self._next_slot = 0
+        self._mmap: Optional[mmap.mmap] = None
+        self._file = None
+        self._dirty = 0
+        self._loaded = False
+        self._io_lock = threading.Lock()  # write_index (worker thread) vs mmap teardown
+        self._state_lock = threading.Lock()  # open/activate (worker thread) vs get/set (never waits)
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.conflicts = 0  # Slots found reused by another process
+
+    @staticmethod
+    def _digest(model: str, text: str) -> bytes:
+        return hashlib.sha256(f"{model}\0{text}".encode("utf-8")).digest()
+
+    @property
+    def _stride(self) -> int:
+        return self.DIGEST_SIZE + self.dim * 4
+
+    @contextmanager
+    def _flock(self, shared: bool = False):
+        """Cross-process lock on the store layout (brief, blocking)."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.cache_dir / "lock", os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(fd)  # Releases the flock
+
+    # --- Storage lifecycle ---
+
+    def _load(self) -> None:
+        """Lazily open the store from disk (first access)."""
+        self._loaded = True
+        if not (self.cache_dir / "meta.json").exists():
+            return
+        with self._flock(shared=True):
+            if self._read_store():
+                return
+        with self._flock():
+            if not self._read_store():
+                logger.info("Embedding cache layout changed or unreadable; resetting store")
+                self._wipe()
+
+    def _read_store(self) -> bool:
+        """Map the store described by meta.json and rebuild the index (caller holds the flock)."""
+        self._close_vectors()
+        self._index.clear()
+        self._free_slots, self._next_slot, self._dirty = [], 0, 0
+        self.model = self.dim = None
+        try:
+            meta = json.loads((self.cache_dir / "meta.json").read_text())
+            if meta.get("capacity") != self.capacity or meta.get("layout") != self.LAYOUT:
+                return False
+            self.model, self.dim = meta["model"], int(meta["dim"])
+            self._open_vectors()
+            index_path = self.cache_dir / "index.bin"
+            raw = index_path.read_bytes() if index_path.exists() else b""
+        except Exception as e:
+            logger.warning(f"Embedding cache unreadable: {e}")
+            self._close_vectors()
+            self.model = self.dim = None
+            return False
+
+        # Slot headers are authoritative; the index file only supplies LRU order
+        headers = {}
+        for slot in range(self.capacity):
+            start = slot * self._stride
+            digest = self._mmap[start:start + self.DIGEST_SIZE]
+            if digest != self._EMPTY:
+                headers[slot] = digest
+        for off in range(0, len(raw) - self.INDEX_RECORD + 1, self.INDEX_RECORD):
+            digest = raw[off:off + self.DIGEST_SIZE]
+            slot = int.from_bytes(raw[off + self.DIGEST_SIZE:off + self.INDEX_RECORD], "little")
+            if headers.get(slot) == digest:
+                self._index[digest] = slot
+                del headers[slot]
+        for slot, digest in headers.items():
+            self._index[digest] = slot
+            self._index.move_to_end(digest, last=False)
+        used = set(self._index.values())
+        self._next_slot = max(used) + 1 if used else 0
+        self._free_slots = [i for i in range(self._next_slot) if i not in used]
+        logger.info(f"Loaded persistent embedding cache: {len(self._index)} vectors ({self.model}, dim={self.dim})")
+        return True
+
+    def _open_vectors(self) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self.cache_dir / "vectors.f32"
+        size = self.capacity * self._stride
+        self._file = open(path, "r+b" if path.exists() else "w+b")
+        if os.fstat(self._file.fileno()).st_size != size:
+            self._file.truncate(size)  # Sparse on most filesystems
+        self._mmap = mmap.mmap(self._file.fileno(), size)
+
+    def _close_vectors(self) -> None:
+        with self._io_lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _wipe(self) -> None:
+        """Drop the store (caller holds the exclusive flock)."""
+        self._close_vectors()
+        self._index.clear()
+        self._free_slots = []
+        self._next_slot = 0
+        self._dirty = 0
+        self.model = None
+        self.dim = None
+        for name in ("meta.json", "vectors.f32", "index.bin"):
+            try:
+                (self.cache_dir / name).unlink()
+            except FileNotFoundError:
+                pass
+
+    def _activate(self, model: str, dim: int) -> None:
+        """Bind the store to (model, dim), invalidating anything from a different model."""
+        if self.model == model and self.dim == dim:
+            return
+        with self._flock():
+            meta_path = self.cache_dir / "meta.json"
+            try:
+                meta = json.loads(meta_path.read_text())
+            except (OSError, ValueError):
+                meta = {}
+            if meta.get("model") == model and meta.get("dim") == dim and self._read_store():
+                # Another process already switched the store to this model: join it
+                return
+            if self.model is not None or meta:
+                logger.info(f"Embedding model changed ({self.model}/{self.dim} -> {model}/{dim}); invalidating cache")
+                self.invalidations += 1
+            self._wipe()
+            self.model, self.dim = model, dim
+            self._open_vectors()
+            meta_path.write_text(json.dumps(
+                {"model": model, "dim": dim, "capacity": self.capacity, "layout": self.LAYOUT}
+            ))
+
+    # --- Public API ---
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    def open(self) -> None:
+        """Load the store from disk (blocking; run in a worker thread from async code)."""
+        with self._state_lock:
+            if not self._loaded:
+                self._load()
+
+    def needs_activation(self, model: str, dim: int) -> bool:
+        return self.model != model or self.dim != dim
+
+    def activate(self, model: str, dim: int) -> None:
+        """Bind the store to (model, dim) ahead of set() (blocking; run in a worker thread)."""
+        with self._state_lock:
+            if not self._loaded:
+                self._load()
+            self._activate(model, dim)
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Return the cached vector for (model, text) or None."""
+        if not self._state_lock.acquire(blocking=False):
+            self.misses += 1  # open()/activate() in progress
+            return None
+        try:
+            return self._get(model, text)
+        finally:
+            self._state_lock.release()
+
+    def _get(self, model: str, text: str) -> Optional[List[float]]:
+        if not self._loaded:
+            self._load()
+        if model != self.model or self._mmap is None:
+            self.misses += 1
+            return None
+        digest = self._digest(model, text)
+        slot = self._index.get(digest)
+        if slot is None:
+            self.misses += 1
+            return None
+        start = slot * self._stride
+        body = start + self.DIGEST_SIZE
+        # Header before and after the vector: a slot reused or being rewritten by another process fails the check
+        before = self._mmap[start:body]
+        vector = array("f", self._mmap[body:body + self.dim * 4]).tolist()
+        if before != digest or self._mmap[start:body] != digest:
+            del self._index[digest]
+            self.conflicts += 1
+            self.misses += 1
+            return None
+        self._index.move_to_end(digest)
+        self.hits += 1
+        return vector
+
+    def set(self, model: str, text: str, vector: List[float]) -> None:
+        """Store a vector, evicting the least recently used entry when full."""
+        if not vector or not self._state_lock.acquire(blocking=False):
+            return  # open()/activate() in progress: skip rather than wait
+        try:
+            self._set(model, text, vector)
+        finally:
+            self._state_lock.release()
+
+    def _set(self, model: str, text: str, vector: List[float]) -> None:
+        if not self._loaded:
+            self._load()
+        if self.needs_activation(model, len(vector)):
+            self._activate(model, len(vector))
+
+        digest = self._digest(model, text)
+        slot = self._index.get(digest)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+            elif self._claim_next_slot():
+                slot = self._next_slot
+                self._next_slot += 1
+            else:
+                _, slot = self._index.popitem(last=False)
+                self.evictions += 1
+        self._index[digest] = slot
+        self._index.move_to_end(digest)
+
+        start = slot * self._stride
+        body = start + self.DIGEST_SIZE
+        self._mmap[start:body] = self._EMPTY
+        self._mmap[body:body + self.dim * 4] = array("f", vector).tobytes()
+        self._mmap[start:body] = digest
+        self._dirty += 1
+
+    def _claim_next_slot(self) -> bool:
+        """Advance past never-used slots another process has filled since load (adopting them)."""
+        while self._next_slot < self.capacity:
+            start = self._next_slot * self._stride
+            digest = self._mmap[start:start + self.DIGEST_SIZE]
+            if digest == self._EMPTY:
+                return True
+            if digest not in self._index:
+                self._index[digest] = self._next_slot
+                self._index.move_to_end(digest, last=False)
+            self._next_slot += 1
+        return False
+
+    def needs_flush(self) -> bool:
+        return self._dirty >= self.flush_every
+
+    def index_snapshot(self) -> bytes:
+        """Serialize the LRU index (call on the owning thread, write anywhere)."""
+        self._dirty = 0
+        return b"".join(d + s.to_bytes(4, "little") for d, s in self._index.items())
+
+    def write_index(self, snapshot: bytes) -> None:
+        """Atomically persist an index snapshot and sync vector pages."""
+        with self._io_lock:
+            if self._mmap is None:
+                return
+            self._mmap.flush()
+            with self._flock():
+                tmp = self.cache_dir / f"index.bin.{os.getpid()}.tmp"
+                tmp.write_bytes(snapshot)
+                os.replace(tmp, self.cache_dir / "index.bin")
+
+    def flush(self) -> None:
+        self.write_index(self.index_snapshot())
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self.flush()
+        self._close_vectors()
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._index),
+            "capacity": self.capacity,
+            "model": self.model,
+            "dim": self.dim,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "conflicts": self.conflicts,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+        }
+
+
+class PersistentTTLCache:
+    """
+    TTL + LRU key/value cache for one namespace of a shared SQLite file.
+
+    open() (startup, in a worker thread) creates the database, runs the legacy
+    JSON import and loads the namespace's live rows, newest max_entries first.
+    Reads are served from memory only and never touch SQLite. Writes land in
+    memory immediately and are queued; a background task writes the queue in
+    one transaction and, every compact_interval_s, deletes expired rows and
+    rows past max_entries (oldest first). Without a running event loop writes
+    go straight to disk. Values must be JSON-serializable.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        ttl_s: float,
+        max_entries: int = 10000,
+        db_path: Optional[str] = None,
+        flush_interval_s: float = 1.0,
+        compact_interval_s: float = 300.0,
+        legacy_json: Optional[Path] = None,
+    ):
+        default_path = Path(__file__).parent.parent / "data" / "kv_cache.db"
+        self.db_path = Path(db_path or os.getenv("KV_CACHE_DB") or default_path)
+        self.namespace = namespace
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.flush_interval_s = flush_interval_s
+        self.compact_interval_s = compact_interval_s
+        self.legacy_json = legacy_json
+
+        self._memory: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()  # key -> (expires_at, value)
+        self._pending: Dict[str, Tuple[float, str]] = {}  # key -> (expires_at, json) not yet on disk
+        self._lock = threading.Lock()      # memory + pending
+        self._db_lock = threading.Lock()   # connection (open/flush/compaction, never get)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._flush_task: Optional[asyncio.Task] = None
+        self._last_compact = time.time()
+        self._opened = False
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.loaded = 0
+        self.evictions = 0
+        self.writes = 0
+        self.flushes = 0
+        self.compacted = 0
+
+    # --- Storage ---
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open (first use) the database and import the legacy file; call with _db_lock held."""
+        if self._conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS kv_cache ("
+                "namespace TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "expires_at REAL NOT NULL, updated_at REAL NOT NULL, "
+                "PRIMARY KEY (namespace, key)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_kv_cache_updated ON kv_cache (namespace, updated_at)")
+            self._conn = conn
+            if self.legacy_json is not None and self.legacy_json.exists():
+                self._import_legacy(conn)
+        return self._conn
+
+    def _import_legacy(self, conn: sqlite3.Connection) -> None:
+        """One-time import of a {key: {"timestamp", "result"}} JSON cache file (left in place)."""
+        marker = ("_meta", f"imported:{self.namespace}")
+        if conn.execute("SELECT 1 FROM kv_cache WHERE namespace = ? AND key = ?", marker).fetchone():
+            return
+        try:
+            entries = json.loads(self.legacy_json.read_text())
+            now = time.time()
+            rows = [
+                (self.namespace, key, json.dumps(entry["result"], default=str),
+                 entry.get("timestamp", 0) + self.ttl_s, entry.get("timestamp", 0))
+                for key, entry in entries.items()
+                if isinstance(entry, dict) and "result" in entry and entry.get("timestamp", 0) + self.ttl_s > now
+            ]
+            with conn:
+                conn.executemany("INSERT OR IGNORE INTO kv_cache VALUES (?, ?, ?, ?, ?)", rows)
+                conn.execute("INSERT OR REPLACE INTO kv_cache VALUES (?, ?, '', ?, ?)",
+                             (*marker, float("inf"), now))
+            logger.info(f"Imported {len(rows)} entries from {self.legacy_json.name} into {self.namespace} cache")
+        except Exception as e:
+            logger.warning(f"Legacy cache import from {self.legacy_json} failed: {e}")
+
+    def open(self) -> None:
+        """Open the database and load live rows into memory (blocking; call at startup)."""
+        if self._opened:
+            return
+        now = time.time()
+        try:
+            with self._db_lock:
+                rows = self._connection().execute(
+                    "SELECT key, expires_at, value FROM kv_cache WHERE namespace = ? AND expires_at > ? "
+                    "ORDER BY updated_at DESC LIMIT ?",
+                    (self.namespace, now, self.max_entries),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning(f"{self.namespace} cache open failed: {e}")
+            return
+        decoded = []
+        for key, expires_at, value in reversed(rows):
+            try:
+                decoded.append((key, expires_at, json.loads(value)))
+            except ValueError:
+                continue
+        with self._lock:
+            # Entries set before open() are newer than anything on disk
+            loaded = [item for item in decoded if item[0] not in self._memory]
+            self._memory = OrderedDict(
+                [(key, (expires_at, value)) for key, expires_at, value in loaded] + list(self._memory.items())
+            )
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+            self.loaded += len(loaded)
+            self._opened = True
+
+    # --- Public API ---
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None if missing/expired (memory only)."""
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None and item[0] > now:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            if item is not None:
+                del self._memory[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; it is persisted by the next background flush."""
+        expires_at = time.time() + (ttl if ttl is not None else self.ttl_s)
+        encoded = json.dumps(value, default=str)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._pending[key] = (expires_at, encoded)
+        self._schedule_flush()
+
+    def _remember(self, key: str, expires_at: float, value: Any) -> None:
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _schedule_flush(self) -> None:
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval_s)
+        await asyncio.to_thread(self.flush)
+
+    def flush(self) -> None:
+        """Write queued entries (and compact when due). Safe to call from a worker thread."""
+        with self._lock:
+            batch, self._pending = self._pending, {}
+        now = time.time()
+        compact = now - self._last_compact >= self.compact_interval_s
+        if not batch and not compact:
+            return
+        try:
+            with self._db_lock:
+                conn = self._connection()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO kv_cache VALUES (?, ?, ?, ?, ?)",
+                        [(self.namespace, key, encoded, expires_at, now) for key, (expires_at, encoded) in batch.items()],
+                    )
+                    if compact:
+                        self._compact(conn, now)
+            self.writes += len(batch)
+            self.flushes += 1
+        except sqlite3.Error as e:
+            logger.warning(f"{self.namespace} cache flush failed ({len(batch)} entries dropped): {e}")
+
+    def _compact(self, conn: sqlite3.Connection, now: float) -> None:
+        self._last_compact = now
+        removed = conn.execute(
+            "DELETE FROM kv_cache WHERE namespace = ? AND expires_at <= ?", (self.namespace, now)
+        ).rowcount
+        removed += conn.execute(
+            "DELETE FROM kv_cache WHERE namespace = ? AND key IN ("
+            "SELECT key FROM kv_cache WHERE namespace = ? ORDER BY updated_at DESC LIMIT -1 OFFSET ?)",
+            (self.namespace, self.namespace, self.max_entries),
+        ).rowcount
+        self.compacted += removed
+
+    def compact(self) -> None:
+        """Force compaction on the next flush and run it now."""
+        self._last_compact = 0.0
+        self.flush()
+
+    def close(self) -> None:
+        if self._flush_task is not None and not self._flush_task.done():
+            self._flush_task.cancel()
+        self.flush()
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "size": len(self._memory),
+            "pending": len(self._pending),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "loaded": self.loaded,
+            "evictions": self.evictions,
+            "writes": self.writes,
+            "flushes": self.flushes,
+            "compacted": self.compacted,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+            "db_path": str(self.db_path),
+        }
+
+
 # Global cache instance (initialized by state)
 _global_cache: Optional[MultiLayerCache] = None
 
@@ -401,6 +1093,57 @@ def get_llm_cache() -> LLMResponseCache:
     return LLMResponseCache(get_cache())
 
 
+_request_coalescer: Optional[RequestCoalescer] = None
+
+
+def get_request_coalescer() -> RequestCoalescer:
+    """Get the process-wide single-flight coalescer for model calls"""
+    global _request_coalescer
+    if _request_coalescer is None:
+        _request_coalescer = RequestCoalescer(
+            llm_cache=get_llm_cache(),
+            cache_ttl=float(os.getenv("LLM_RESPONSE_CACHE_TTL", "30")),
+        )
+    return _request_coalescer
+
+
 def get_embedding_cache() -> EmbeddingCache:
     """Get embedding cache"""
     return EmbeddingCache(get_cache())
+
+
+_persistent_embedding_cache: Optional[PersistentEmbeddingCache] = None
+
+
+def get_persistent_embedding_cache() -> PersistentEmbeddingCache:
+    """Get the process-wide on-disk embedding cache"""
+    global _persistent_embedding_cache
+    if _persistent_embedding_cache is None:
+        _persistent_embedding_cache = PersistentEmbeddingCache(
+            cache_dir=os.getenv("EMBEDDING_CACHE_DIR") or None,
+            capacity=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "20000")),
+        )
+    return _persistent_embedding_cache
+
+
+_persistent_ttl_caches: Dict[str, PersistentTTLCache] = {}
+
+
+def get_persistent_ttl_cache(namespace: str, ttl_s: float, max_entries: int = 10000, **kwargs) -> PersistentTTLCache:
+    """Get the process-wide persistent cache for a namespace (created on first use)"""
+    cache = _persistent_ttl_caches.get(namespace)
+    if cache is None:
+        cache = _persistent_ttl_caches[namespace] = PersistentTTLCache(namespace, ttl_s, max_entries, **kwargs)
+    return cache
+
+
+async def open_persistent_ttl_caches() -> None:
+    """Open every registered persistent TTL cache off the event loop (startup)"""
+    for cache in list(_persistent_ttl_caches.values()):
+        await asyncio.to_thread(cache.open)
+
+
+def close_persistent_ttl_caches() -> None:
+    """Flush and close every persistent TTL cache (shutdown)"""
+    for cache in _persistent_ttl_caches.values():
+        cache.close()
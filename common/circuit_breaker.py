@@ -373,8 +373,7 @@ class CircuitBreaker:
                         try:
                             engine = ServiceRegistry.get_engine()
                             if hasattr(engine, 'executor') and hasattr(engine.executor, 'mcp_tool_cache'):
-                                if self.name in engine.executor.mcp_tool_cache:
-                                    del engine.executor.mcp_tool_cache[self.name]
+                                if engine.executor.remove_server_tools(self.name):
                                     logger.info(f"Removed '{self.name}' from tool cache. Server can be re-enabled later.")
                         except (RuntimeError, AttributeError):
                             pass  # Engine not available yet
@@ -0,0 +1,102 @@
+"""
+Asyncio-native cross-process file lock.
+
+fcntl.flock with LOCK_EX blocks the calling thread, and every caller of the
+old memory lock ran on the event loop, so one task waiting for a backup to
+finish froze every request on that loop. This lock never blocks: it tries
+flock with LOCK_NB and, while the lock is held elsewhere, sleeps on the loop
+with capped exponential backoff before trying again. Waiting is therefore
+cancellable and can be bounded by a timeout.
+
+flock locks belong to the open file description, so every acquisition opens
+its own descriptor. Two coroutines in the same process then exclude each other
+exactly like two processes do. Shared (LOCK_SH) holders may overlap with each
+other but not with an exclusive (LOCK_EX) holder.
+"""
+
+import asyncio
+import fcntl
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional, Union
+
+from common.metrics_core import Counter, LatencyHistogram, MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+POLL_MIN_S = 0.01
+POLL_MAX_S = 0.25
+
+
+class AsyncFileLock:
+    """
+    Cross-process reader/writer lock on a file, awaited without blocking the loop.
+
+    Wait times (ms) are recorded per mode; pass a MetricsRegistry and a metric
+    name to export them, otherwise they are kept on the instance.
+    """
+
+    def __init__(self, path: Union[str, Path], registry: Optional[MetricsRegistry] = None,
+                 metric: str = "file_lock"):
+        self.path = Path(path)
+        if registry is not None:
+            self.wait_ms = {
+                mode: registry.histogram(f"{metric}_wait_ms", "Time spent waiting for the lock (ms)",
+                                         labels={"mode": mode})
+                for mode in ("shared", "exclusive")
+            }
+            self.timeouts = registry.counter(f"{metric}_timeouts_total", "Lock acquisitions that timed out")
+        else:
+            self.wait_ms = {"shared": LatencyHistogram(), "exclusive": LatencyHistogram()}
+            self.timeouts = Counter(f"{metric}_timeouts_total")
+
+    def _open(self) -> int:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+
+    @asynccontextmanager
+    async def acquire(self, shared: bool = False, timeout: Optional[float] = None) -> AsyncIterator[None]:
+        """
+        Hold the lock for the body of the block.
+
+        Raises asyncio.TimeoutError if the lock is not obtained within
+        `timeout` seconds (None waits indefinitely).
+        """
+        mode = "shared" if shared else "exclusive"
+        op = (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB
+        fd = self._open()
+        start = time.monotonic()
+        delay = POLL_MIN_S
+        logged = False
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, op)
+                    break
+                except BlockingIOError:
+                    waited = time.monotonic() - start
+                    if timeout is not None and waited >= timeout:
+                        self.timeouts.inc()
+                        raise asyncio.TimeoutError(f"{self.path} not acquired ({mode}) within {timeout:.1f}s")
+                    if not logged:
+                        logger.info(f"Waiting for {mode} lock ({self.path})...")
+                        logged = True
+                    if timeout is not None:
+                        delay = min(delay, max(timeout - waited, POLL_MIN_S))
+                    await asyncio.sleep(delay)
+                    delay = min(delay * 2, POLL_MAX_S)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self.wait_ms[mode].observe((time.monotonic() - start) * 1000)
+        logger.debug(f"Acquired {mode} lock ({self.path})")
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+            logger.debug(f"Released {mode} lock ({self.path})")
@@ -1,9 +1,33 @@
 import re
+import time
 import yaml
 import os
-from typing import List, Dict, Optional, Tuple
+import logging
+from typing import Callable, Generic, List, Dict, Optional, Tuple, TypeVar
 from dataclasses import dataclass
 
+try:
+    import re._parser as _sre_parse  # 3.11+
+except ImportError:  # pragma: no cover
+    import sre_parse as _sre_parse
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+LEARNED_FILE = "learned_patterns.yaml"
+RELOAD_CHECK_S = 5.0  # How often classify() stats the lexicon files for edits by other processes
+
+# Bumped by invalidate_lexicons(); registries reload on their next classify()
+_generation = 0
+
+
+def invalidate_lexicons():
+    """Tell every LexiconRegistry in this process to reload before the next lookup."""
+    global _generation
+    _generation += 1
+
+
 @dataclass
 class Pattern:
     regex: str
@@ -19,6 +43,68 @@ class MatchResult:
     formatted_message: Optional[str] = None
     leads: List[str] = None
 
+
+def _required_literal(regex: str) -> Optional[str]:
+    """Longest run of literal characters every match must contain, if any."""
+    try:
+        parsed = _sre_parse.parse(regex)
+    except Exception:
+        return None
+    if parsed.state.flags & re.IGNORECASE:
+        return None
+    best, run = "", []
+    # Top-level items are all required; a top-level '|' parses as a single BRANCH item
+    for op, arg in list(parsed) + [(None, None)]:
+        if op is _sre_parse.LITERAL:
+            run.append(chr(arg))
+            continue
+        if len(run) > len(best):
+            best = "".join(run)
+        run = []
+    return best or None
+
+
+class PatternMatcher(Generic[T]):
+    """
+    Ordered regex set with first-match semantics, compiled once.
+
+    Patterns are tried in order and the first one that matches wins, exactly
+    like a loop of re.search (or re.match when anchored) would. Each pattern
+    is compiled at construction, together with the longest literal substring
+    every match of it must contain. A pattern whose literal is not in the
+    text is skipped with a substring check instead of a regex scan, so a
+    noise line costs one `in` per pattern.
+
+    A single alternation of all patterns was measured slower: it defeats the
+    literal-prefix scan the re module does per pattern
+    (scripts/benchmark_lexicon.py). Invalid patterns are skipped.
+    """
+
+    def __init__(self, items: List[Tuple[str, T]], anchored: bool = False):
+        self.anchored = anchored
+        self._entries: List[Tuple[Optional[str], Callable[[str], Optional[re.Match]], T]] = []
+        for regex, value in items:
+            try:
+                compiled = re.compile(regex)
+            except (re.error, TypeError) as e:
+                logger.warning(f"Skipping invalid pattern {regex!r}: {e}")
+                continue
+            find = compiled.match if anchored else compiled.search
+            self._entries.append((_required_literal(regex), find, value))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def match(self, text: str) -> Optional[Tuple[T, re.Match]]:
+        for literal, find, value in self._entries:
+            if literal and literal not in text:
+                continue
+            m = find(text)
+            if m:
+                return value, m
+        return None
+
+
 class Lexicon:
     def __init__(self, system_name: str, definitions: List[dict]):
         self.system_name = system_name
@@ -34,24 +120,36 @@ class Lexicon:
                 ))
             except KeyError:
                 pass
+        self._matcher = PatternMatcher([(p.regex, p) for p in self.patterns])
 
     def match(self, text: str) -> Optional[Tuple[Pattern, re.Match]]:
-        for p in self.patterns:
-            m = re.search(p.regex, text)
-            if m:
-                return p, m
-        return None
+        return self._matcher.match(text)
 
 class LexiconRegistry:
     def __init__(self, config_dir: str):
         self.config_dir = config_dir
         self.lexicons: Dict[str, Lexicon] = {}
+        self._learned: List[dict] = []
         self._load()
 
+    def _snapshot(self) -> Dict[str, float]:
+        try:
+            return {
+                f: os.stat(os.path.join(self.config_dir, f)).st_mtime
+                for f in os.listdir(self.config_dir) if f.endswith(".yaml")
+            }
+        except OSError:
+            return {}
+
     def _load(self):
+        self._generation = _generation
+        self._checked_at = time.monotonic()
+        self._mtimes = self._snapshot()
         if not os.path.exists(self.config_dir):
             return
-        
+
+        definitions: Dict[str, List[dict]] = {}
+        learned: List[dict] = []
         for f in os.listdir(self.config_dir):
             if f.endswith(".yaml"):
                 system_name = f.replace(".yaml", "")
@@ -59,25 +157,55 @@ class LexiconRegistry:
                     with open(os.path.join(self.config_dir, f), 'r') as fh:
                         data = yaml.safe_load(fh)
                         if isinstance(data, list):
-                            self.lexicons[system_name] = Lexicon(system_name, data)
+                            definitions[system_name] = data
+                        elif f == LEARNED_FILE and isinstance(data, dict):
+                            # Written by tool_add_lexicon_entry: {"patterns": [{"pattern", "label", ...}]}
+                            learned = [
+                                {**entry, "regex": entry["pattern"]}
+                                for entry in data.get("patterns") or [] if "pattern" in entry
+                            ]
                 except Exception:
                     pass
 
+        # Learned patterns apply to every system, after its own definitions
+        self._learned = learned
+        self.lexicons = {name: Lexicon(name, defs + learned) for name, defs in definitions.items()}
+
+    def reload(self):
+        """Recompile every lexicon from disk."""
+        self._load()
+        logger.info(f"Reloaded {len(self.lexicons)} lexicons ({len(self._learned)} learned patterns)")
+
+    def _maybe_reload(self):
+        if self._generation != _generation:
+            self.reload()
+            return
+        now = time.monotonic()
+        if now - self._checked_at < RELOAD_CHECK_S:
+            return
+        self._checked_at = now
+        if self._snapshot() != self._mtimes:
+            self.reload()
+
     def classify(self, system: str, text: str) -> MatchResult:
         """Returns MatchResult or MatchResult(label='NOISE')"""
-        if system not in self.lexicons:
-            return MatchResult(label="NOISE", severity="UNKNOWN")
-        
-        result = self.lexicons[system].match(text)
+        self._maybe_reload()
+        lexicon = self.lexicons.get(system)
+        if lexicon is None:
+            if not self._learned:
+                return MatchResult(label="NOISE", severity="UNKNOWN")
+            lexicon = self.lexicons[system] = Lexicon(system, self._learned)
+
+        result = lexicon.match(text)
         if result:
             pattern, match_obj = result
-            
+
             # Format logic
             try:
                 # Support named groups: {port}
                 # Support indexed groups: {0}, {1}
                 # Support simple replacement of whole match if no groups
-                
+
                 groups = match_obj.groupdict()
                 if not groups:
                     # Fallback to indexed groups
@@ -91,11 +219,11 @@ class LexiconRegistry:
                 formatted = pattern.template.format(**groups)
             except Exception:
                 formatted = f"{pattern.label}: {text[:50]}..." # Fallback
-                
+
             return MatchResult(
-                label=pattern.label, 
-                severity=pattern.severity, 
+                label=pattern.label,
+                severity=pattern.severity,
                 formatted_message=formatted
             )
-            
+
         return MatchResult(label="NOISE", severity="UNKNOWN")
@@ -0,0 +1,278 @@
+"""
+Metrics core: counters, log-linear histograms, interval rollups, Prometheus text.
+
+Everything here is updated synchronously from the event loop thread: a counter
+increment is one integer add and a histogram observation is one bucket index
+computation plus three adds, with no task or lock per event. Histograms have a
+fixed bucket layout, so quantiles cost O(buckets) and memory does not grow with
+traffic; two histograms with the same layout can be merged bucket-by-bucket.
+"""
+
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Counter:
+    """Monotonic counter (reset only by reset_history)."""
+    __slots__ = ("name", "help", "value")
+
+    def __init__(self, name: str, help: str = ""):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount: int = 1):
+        self.value += amount
+
+    def reset(self):
+        self.value = 0
+
+
+class LatencyHistogram:
+    """
+    Fixed-bucket log-linear histogram.
+
+    Values up to `min_value` share the first bucket; above it every power of two
+    ("octave") is split into `sub_buckets` equal-width buckets, for `octaves`
+    octaves. Anything larger lands in the overflow bucket. With the defaults
+    (0.5 ms, 4 per octave, 22 octaves) buckets span 0.5 ms to ~35 minutes with
+    at most 25% relative error.
+    """
+    __slots__ = ("min_value", "sub_buckets", "octaves", "bounds", "counts", "count", "sum", "min", "max")
+
+    def __init__(self, min_value: float = 0.5, sub_buckets: int = 4, octaves: int = 22):
+        self.min_value = min_value
+        self.sub_buckets = sub_buckets
+        self.octaves = octaves
+        # Upper bound of each finite bucket; counts has one extra overflow slot
+        self.bounds: List[float] = [min_value]
+        for e in range(octaves):
+            base = min_value * (2 ** e)
+            for s in range(sub_buckets):
+                self.bounds.append(base * (1 + (s + 1) / sub_buckets))
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def _index(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        ratio = value / self.min_value
+        e = int(math.log2(ratio))
+        if e >= self.octaves:
+            return len(self.counts) - 1
+        s = int((ratio / (2 ** e) - 1) * self.sub_buckets)
+        return 1 + e * self.sub_buckets + min(s, self.sub_buckets - 1)
+
+    def observe(self, value: float):
+        self.counts[self._index(value)] += 1
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add `other` (same layout) into this histogram."""
+        for i, c in enumerate(other.counts):
+            if c:
+                self.counts[i] += c
+        self.count += other.count
+        self.sum += other.sum
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    def copy_layout(self) -> "LatencyHistogram":
+        return LatencyHistogram(self.min_value, self.sub_buckets, self.octaves)
+
+    def reset(self):
+        self.counts = [0] * len(self.counts)
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """Approximate quantile, interpolated linearly inside the bucket."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for i, c in enumerate(self.counts):
+            if not c:
+                continue
+            if seen + c >= target:
+                if i >= len(self.bounds):
+                    return self.max
+                lower = self.bounds[i - 1] if i else 0.0
+                upper = self.bounds[i]
+                value = lower + (upper - lower) * ((target - seen) / c)
+                return min(max(value, self.min), self.max)
+            seen += c
+        return self.max
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "min_ms": self.min if self.count else 0.0,
+            "max_ms": self.max,
+            "avg_ms": self.mean,
+            "p50_ms": self.quantile(0.50),
+            "p95_ms": self.quantile(0.95),
+            "p99_ms": self.quantile(0.99),
+        }
+
+
+@dataclass
+class RequestRollup:
+    """Request totals for one rollup interval."""
+    completed: int = 0
+    errors: int = 0
+    tokens: int = 0
+    latency: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    def reset(self):
+        self.completed = 0
+        self.errors = 0
+        self.tokens = 0
+        self.latency.reset()
+
+
+class RollingWindow:
+    """
+    Ring of per-interval rollups. The slot for the current interval is reset
+    lazily the first time it is touched, so there is no background timer.
+    """
+
+    def __init__(self, factory: Callable[[], RequestRollup] = RequestRollup,
+                 interval_s: float = 10.0, intervals: int = 6):
+        self.interval_s = interval_s
+        self.intervals = intervals
+        self._slots = [factory() for _ in range(intervals)]
+        self._epochs = [-1] * intervals
+
+    def current(self, now: Optional[float] = None) -> RequestRollup:
+        epoch = int((now if now is not None else time.time()) // self.interval_s)
+        i = epoch % self.intervals
+        if self._epochs[i] != epoch:
+            self._slots[i].reset()
+            self._epochs[i] = epoch
+        return self._slots[i]
+
+    def window(self, now: Optional[float] = None) -> List[RequestRollup]:
+        """Rollups for the intervals still inside the window (current one included)."""
+        epoch = int((now if now is not None else time.time()) // self.interval_s)
+        return [slot for slot, e in zip(self._slots, self._epochs) if epoch - self.intervals < e <= epoch]
+
+    def reset(self):
+        for slot in self._slots:
+            slot.reset()
+        self._epochs = [-1] * self.intervals
+
+
+def _labels(labels: Optional[Dict[str, str]]) -> LabelSet:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _format_labels(labels: Iterable[Tuple[str, str]]) -> str:
+    parts = []
+    for k, v in labels:
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        parts.append(f'{k}="{v}"')
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Named counters, histograms and callback gauges, rendered as Prometheus text."""
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self.counters: Dict[str, Counter] = {}
+        self.histograms: Dict[str, Dict[LabelSet, LatencyHistogram]] = {}
+        self.gauges: Dict[str, Callable[[], float]] = {}
+        self._help: Dict[str, str] = {}
+
+    def _full(self, name: str) -> str:
+        return f"{self.namespace}_{name}" if self.namespace else name
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        counter = self.counters.get(name)
+        if counter is None:
+            counter = self.counters[name] = Counter(name, help)
+        return counter
+
+    def histogram(self, name: str, help: str = "", labels: Optional[Dict[str, str]] = None,
+                  **layout) -> LatencyHistogram:
+        family = self.histograms.setdefault(name, {})
+        key = _labels(labels)
+        hist = family.get(key)
+        if hist is None:
+            hist = family[key] = LatencyHistogram(**layout)
+            if help:
+                self._help[name] = help
+        return hist
+
+    def gauge(self, name: str, fn: Callable[[], float], help: str = ""):
+        self.gauges[name] = fn
+        if help:
+            self._help[name] = help
+
+    def render_prometheus(self) -> str:
+        """Prometheus text exposition format (0.0.4)."""
+        lines: List[str] = []
+        for name, counter in self.counters.items():
+            full = self._full(name)
+            if counter.help:
+                lines.append(f"# HELP {full} {counter.help}")
+            lines.append(f"# TYPE {full} counter")
+            lines.append(f"{full} {_format_value(counter.value)}")
+
+        for name, fn in self.gauges.items():
+            full = self._full(name)
+            try:
+                value = fn()
+            except Exception:
+                continue
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} gauge")
+            lines.append(f"{full} {_format_value(value)}")
+
+        for name, family in self.histograms.items():
+            full = self._full(name)
+            if name in self._help:
+                lines.append(f"# HELP {full} {self._help[name]}")
+            lines.append(f"# TYPE {full} histogram")
+            for labels, hist in family.items():
+                cumulative = 0
+                for bound, c in zip(hist.bounds, hist.counts):
+                    cumulative += c
+                    le = _format_labels(labels + (("le", _format_value(bound)),))
+                    lines.append(f"{full}_bucket{le} {cumulative}")
+                le = _format_labels(labels + (("le", "+Inf"),))
+                lines.append(f"{full}_bucket{le} {hist.count}")
+                lines.append(f"{full}_sum{_format_labels(labels)} {_format_value(hist.sum)}")
+                lines.append(f"{full}_count{_format_labels(labels)} {hist.count}")
+
+        return "\n".join(lines) + "\n"
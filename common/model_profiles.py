@@ -0,0 +1,115 @@
+"""
+Model profile registry shared by the router and the agent runner.
+
+One place decides, per model, the Ollama context size, default options,
+keep_alive and whether the model is local. Profiles are resolved once per
+model name and reused, so every caller sends the same num_ctx for the same
+model; Ollama reloads a model whenever num_ctx changes, which is a
+multi-second stall.
+"""
+
+import logging
+import os
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+LOCAL_PREFIXES = ("ollama:", "local:")
+
+# Resident Model Policy: one unified 32k window so models are never reloaded for a different num_ctx.
+# Keys are bare Ollama model names.
+DEFAULT_CONTEXT_WINDOWS: Dict[str, int] = {
+    "llama3.3:70b": 32768,          # Brain (Deep Context)
+    "qwen2.5:32b": 32768,           # Auditor
+    "llama3.1:latest": 32768,       # Router
+    "llama3.2:latest": 32768,       # Small Tasks
+    "llama3.2-vision:latest": 32768,  # Vision
+    "qwen2.5:7b-instruct": 32768,   # Query Refinement
+}
+
+
+@dataclass(frozen=True)
+class ModelProfile:
+    """Resolved settings for one model."""
+    name: str                 # Model name as sent upstream (local prefix stripped)
+    is_local: bool
+    num_ctx: int
+    options: Dict[str, Any] = field(default_factory=dict)  # Ollama options, num_ctx included
+    keep_alive: Optional[str] = None
+
+    def ollama_options(self, overrides: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Profile options with request-level overrides applied on top."""
+        if not overrides:
+            return dict(self.options)
+        return {**self.options, **overrides}
+
+
+class ModelProfileRegistry:
+    """Resolves and memoizes ModelProfile per model name."""
+
+    def __init__(self, context_windows: Optional[Dict[str, int]] = None, default_ctx: Optional[int] = None,
+                 model_options: Optional[Dict[str, Dict[str, Any]]] = None, keep_alive: Optional[str] = None):
+        self.context_windows = dict(DEFAULT_CONTEXT_WINDOWS if context_windows is None else context_windows)
+        self.default_ctx = default_ctx or int(os.getenv("OLLAMA_NUM_CTX", "32768"))
+        self.model_options = model_options or {}
+        self.keep_alive = keep_alive if keep_alive is not None else (os.getenv("OLLAMA_KEEP_ALIVE") or None)
+        self._profiles: Dict[str, ModelProfile] = {}
+
+    def configure(self, model_options: Optional[Dict[str, Dict[str, Any]]] = None,
+                  default_ctx: Optional[int] = None, keep_alive: Optional[str] = None):
+        """Replace per-model options / defaults; resolved profiles are dropped."""
+        if model_options is not None:
+            self.model_options = model_options
+        if default_ctx:
+            self.default_ctx = default_ctx
+        if keep_alive is not None:
+            self.keep_alive = keep_alive
+        self._profiles.clear()
+
+    def resolve(self, model: str) -> ModelProfile:
+        profile = self._profiles.get(model)
+        if profile is None:
+            profile = self._build(model)
+            self._profiles[model] = profile
+            logger.debug(f"Model profile resolved: {model} -> num_ctx={profile.num_ctx}, local={profile.is_local}")
+        return profile
+
+    def _build(self, model: str) -> ModelProfile:
+        name = model
+        is_local = False
+        for prefix in LOCAL_PREFIXES:
+            if model.startswith(prefix):
+                name = model[len(prefix):]
+                is_local = True
+                break
+
+        model_opts = dict(self.model_options.get(name, self.model_options.get("default", {})))
+        keep_alive = model_opts.pop("keep_alive", None) or self.keep_alive
+        num_ctx = int(model_opts.pop("num_ctx", 0) or self.context_windows.get(name) or self.default_ctx)
+
+        return ModelProfile(
+            name=name,
+            is_local=is_local,
+            num_ctx=num_ctx,
+            options={"num_ctx": num_ctx, **model_opts},
+            keep_alive=keep_alive,
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "default_ctx": self.default_ctx,
+            "profiles": {m: {"num_ctx": p.num_ctx, "local": p.is_local, "keep_alive": p.keep_alive}
+                         for m, p in self._profiles.items()}
+        }
+
+
+_model_profiles: Optional[ModelProfileRegistry] = None
+
+
+def get_model_profiles() -> ModelProfileRegistry:
+    """Get the process-wide model profile registry"""
+    global _model_profiles
+    if _model_profiles is None:
+        _model_profiles = ModelProfileRegistry()
+    return _model_profiles
@@ -8,7 +8,11 @@ This module provides:
 - Resource usage tracking
 - Error tracking with full context
 - Data export for analysis
-- Real-time monitoring endpoints
+- Real-time monitoring endpoints (JSON and Prometheus text)
+
+Counters and latency histograms live in a MetricsRegistry (common.metrics_core)
+and are updated synchronously; 1-minute figures come from 10s rollups rather
+than rescanning completed requests.
 """
 
 from __future__ import annotations
@@ -17,7 +21,7 @@ import asyncio
 import json
 import logging
 import time
-from collections import defaultdict, deque
+from collections import deque
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 from enum import Enum
@@ -25,6 +29,8 @@ from pathlib import Path
 from typing import Any, Dict, List, Optional
 from contextlib import asynccontextmanager
 
+from common.metrics_core import LatencyHistogram, MetricsRegistry, RequestRollup, RollingWindow
+
 logger = logging.getLogger("observability")
 
 
@@ -217,20 +223,26 @@ class ObservabilitySystem:
         # Aggregated metrics
         self.system_metrics_history: deque = deque(maxlen=max_metrics_history)
         
-        # Request counters (for rate calculations)
-        self.request_counters: Dict[str, deque] = defaultdict(lambda: deque(maxlen=60))  # 1 minute windows
-        
-        # Efficiency tracking
-        self.semaphore_wait_times: deque = deque(maxlen=1000)  # Track wait times for concurrency slots
-        self.stage_durations: Dict[str, deque] = defaultdict(lambda: deque(maxlen=5000))  # stage -> durations
-        self.request_sizes: deque = deque(maxlen=1000)  # Request body sizes in bytes
-        self.response_sizes: deque = deque(maxlen=1000)  # Response sizes in bytes
-        self.network_bytes_sent: int = 0
-        self.network_bytes_received: int = 0
-        self.cache_hits: int = 0
-        self.cache_misses: int = 0
-        self.connection_reuses: int = 0
-        self.connection_creates: int = 0
+        # Metrics core: synchronous counters + fixed-bucket histograms, no task or lock per event
+        self.metrics = MetricsRegistry(namespace="ai_gateway")
+        m = self.metrics
+        self.requests_total = m.counter("requests_total", "Requests started")
+        self.requests_completed = m.counter("requests_completed_total", "Requests completed")
+        self.requests_errors = m.counter("requests_errors_total", "Requests completed in error")
+        self.cache_hits = m.counter("cache_hits_total", "Cache hits")
+        self.cache_misses = m.counter("cache_misses_total", "Cache misses")
+        self.connection_reuses = m.counter("connection_reuses_total", "Pooled connections reused")
+        self.connection_creates = m.counter("connection_creates_total", "Connections created")
+        self.network_bytes_sent = m.counter("network_sent_bytes_total", "Bytes sent upstream")
+        self.network_bytes_received = m.counter("network_received_bytes_total", "Bytes received from upstream")
+        self.request_latency = m.histogram("request_duration_ms", "Request duration")
+        self.semaphore_wait_times = m.histogram("semaphore_wait_ms", "Wait for a concurrency slot")
+        self.request_sizes = m.histogram("request_size_bytes", "Request body size", min_value=64.0, octaves=20)
+        self.response_sizes = m.histogram("response_size_bytes", "Response size", min_value=64.0, octaves=20)
+        m.gauge("active_requests", lambda: len(self.active_requests), "Requests in flight")
+
+        # 1-minute window as 6 x 10s rollups
+        self.rollups = RollingWindow(RequestRollup, interval_s=10.0, intervals=6)
         
         # Lock for thread safety
         self._lock = asyncio.Lock()
@@ -283,7 +295,7 @@ class ObservabilitySystem:
                         self.completed_requests.append(req)
             
             self.active_requests[request_id] = lifecycle
-            self._increment_counter("requests_total")
+            self.requests_total.inc()
             return lifecycle
     
     async def get_request(self, request_id: str) -> Optional[RequestLifecycle]:
@@ -304,23 +316,41 @@ class ObservabilitySystem:
                 if lifecycle.performance_metrics:
                     self.performance_metrics.extend(lifecycle.performance_metrics)
                 
+                    for metric in lifecycle.performance_metrics:
+                        self.metrics.histogram(
+                            "operation_duration_ms", "Per-component operation duration",
+                            labels={"component": metric.component, "operation": metric.operation},
+                        ).observe(metric.duration_ms)
+                
                 # Track stage durations for efficiency analysis
                 if lifecycle.stages and len(lifecycle.stages) > 1:
                     stage_times = sorted(lifecycle.stages.items(), key=lambda x: x[1])
                     for i in range(len(stage_times) - 1):
                         stage_name = stage_times[i][0]
                         duration_ms = (stage_times[i + 1][1] - stage_times[i][1]) * 1000
-                        self.stage_durations[stage_name].append(duration_ms)
+                        self.metrics.histogram(
+                            "stage_duration_ms", "Time spent in each request stage", labels={"stage": stage_name}
+                        ).observe(duration_ms)
                 
                 # Track errors
                 if lifecycle.errors:
                     error_records = [{"request_id": request_id, **error} for error in lifecycle.errors]
                     self.recent_errors.extend(error_records)
                 
-                # Update counters
-                self._increment_counter("requests_completed")
-                if lifecycle.stage == RequestStage.ERROR:
-                    self._increment_counter("requests_errors")
+                # Update counters and the current rollup
+                is_error = lifecycle.stage == RequestStage.ERROR
+                self.requests_completed.inc()
+                rollup = self.rollups.current(lifecycle.completed_at)
+                rollup.completed += 1
+                if is_error:
+                    self.requests_errors.inc()
+                    rollup.errors += 1
+                if lifecycle.duration_ms:
+                    self.request_latency.observe(lifecycle.duration_ms)
+                    rollup.latency.observe(lifecycle.duration_ms)
+                usage = lifecycle.metadata.get("usage") if lifecycle.metadata else None
+                if isinstance(usage, dict):
+                    rollup.tokens += usage.get("total_tokens", 0) or 0
     
     async def record_component_health(
         self,
@@ -332,70 +362,61 @@ class ObservabilitySystem:
     ):
         """Record component health check."""
         async with self._lock:
-            key = f"{component_type.value}:{component_id}"
-            health = self.component_health.get(key)
-            
-            if not health:
-                health = ComponentHealth(
-                    component_type=component_type,
-                    component_id=component_id,
-                    status=status,
-                    last_check=time.time(),
-                    response_time_ms=response_time_ms,
-                    metadata=metadata or {}
-                )
-            else:
-                health.status = status
-                health.last_check = time.time()
-                health.response_time_ms = response_time_ms
-                if metadata:
-                    health.metadata.update(metadata)
-            
-            if status == "healthy":
-                health.success_count += 1
-            else:
-                health.error_count += 1
-            
-            self.component_health[key] = health
+            self.record_component_health_sync(component_type, component_id, status, response_time_ms, metadata)
+
+    def record_component_health_sync(
+        self,
+        component_type: ComponentType,
+        component_id: str,
+        status: str,
+        response_time_ms: Optional[float] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Record component health check from code without a running event loop (never awaits)."""
+        key = f"{component_type.value}:{component_id}"
+        health = self.component_health.get(key)
+        
+        if not health:
+            health = ComponentHealth(
+                component_type=component_type,
+                component_id=component_id,
+                status=status,
+                last_check=time.time(),
+                response_time_ms=response_time_ms,
+                metadata=metadata or {}
+            )
+        else:
+            health.status = status
+            health.last_check = time.time()
+            health.response_time_ms = response_time_ms
+            if metadata:
+                health.metadata.update(metadata)
+        
+        if status == "healthy":
+            health.success_count += 1
+        else:
+            health.error_count += 1
+        
+        self.component_health[key] = health
     
     async def get_system_metrics(self) -> SystemMetrics:
         """Get current system metrics snapshot."""
         now = time.time()
-        one_minute_ago = now - 60
         
-        # Optimize: Only iterate through deque once, use early exit for old requests
-        # Since deque is ordered (newest last), iterate backwards for efficiency
+        # Sum the rollups in the last minute: O(intervals), independent of traffic
         async with self._lock:
-            # Use single pass to calculate metrics
             completed_count = 0
             error_count = 0
-            response_time_sum = 0.0
-            response_time_count = 0
-            
-            # Iterate backwards (newest first) - can exit early when we hit old requests
-            for r in reversed(self.completed_requests):
-                if not r.completed_at or r.completed_at < one_minute_ago:
-                    break  # All older requests are older than 1 minute
-                
-                completed_count += 1
-                if r.stage == RequestStage.ERROR:
-                    error_count += 1
-                if r.duration_ms:
-                    response_time_sum += r.duration_ms
-                    response_time_count += 1
+            total_tokens = 0
+            latency = self.request_latency.copy_layout()
+            for rollup in self.rollups.window(now):
+                completed_count += rollup.completed
+                error_count += rollup.errors
+                total_tokens += rollup.tokens
+                latency.merge(rollup.latency)
             
             error_rate = error_count / max(completed_count, 1)
-            avg_response_time = response_time_sum / response_time_count if response_time_count > 0 else 0.0
-            
-            # Extract token counts from metadata for throughput calculation
-            total_tokens = 0
-            for r in reversed(self.completed_requests):
-                if not r.completed_at or r.completed_at < one_minute_ago:
-                    break
-                if r.metadata:
-                    usage = r.metadata.get("usage", {})
-                    if isinstance(usage, dict):
-                        total_tokens += usage.get("total_tokens", 0)
+            avg_response_time = latency.mean
             
             # Calculate efficiency metrics
             efficiency = self._calculate_efficiency_metrics(completed_count, total_tokens)
@@ -505,33 +526,30 @@ class ObservabilitySystem:
         tokens_per_second = total_tokens / 60.0 if total_tokens > 0 else 0.0
         
         # Cache efficiency
-        total_cache_ops = self.cache_hits + self.cache_misses
-        cache_hit_rate = (self.cache_hits / total_cache_ops * 100) if total_cache_ops > 0 else 0.0
+        hits, misses = self.cache_hits.value, self.cache_misses.value
+        cache_hit_rate = (hits / (hits + misses) * 100) if hits + misses > 0 else 0.0
         
         # Connection pool utilization
-        total_connections = self.connection_creates + self.connection_reuses
-        connection_reuse_rate = (self.connection_reuses / total_connections * 100) if total_connections > 0 else 0.0
+        reuses, creates = self.connection_reuses.value, self.connection_creates.value
+        connection_reuse_rate = (reuses / (reuses + creates) * 100) if reuses + creates > 0 else 0.0
         
         # Semaphore wait times
-        if self.semaphore_wait_times:
-            wait_times = list(self.semaphore_wait_times)
-            avg_wait_time = sum(wait_times) / len(wait_times)
-        else:
-            avg_wait_time = 0.0
+        avg_wait_time = self.semaphore_wait_times.mean
         
         # Time breakdown by stage
-        time_breakdown = {}
-        for stage, durations in self.stage_durations.items():
-            if durations:
-                time_breakdown[stage] = sum(durations) / len(durations)
+        time_breakdown = {
+            dict(labels)["stage"]: hist.mean
+            for labels, hist in self.metrics.histograms.get("stage_duration_ms", {}).items()
+            if hist.count
+        }
         
         # Network metrics
-        network_bytes_sent = self.network_bytes_sent
-        network_bytes_received = self.network_bytes_received
+        network_bytes_sent = self.network_bytes_sent.value
+        network_bytes_received = self.network_bytes_received.value
         
         # Average request/response sizes
-        avg_request_size = sum(self.request_sizes) / len(self.request_sizes) if self.request_sizes else 0
-        avg_response_size = sum(self.response_sizes) / len(self.response_sizes) if self.response_sizes else 0
+        avg_request_size = self.request_sizes.mean
+        avg_response_size = self.response_sizes.mean
         
         return EfficiencyMetrics(
             requests_per_second=requests_per_second,
@@ -563,54 +581,29 @@ class ObservabilitySystem:
         except Exception as e:
             return {"error": str(e)}
     
-    def _increment_counter(self, counter_name: str):
-        """Increment a counter for the current minute."""
-        now = time.time()
-        minute = int(now // 60)
-        self.request_counters[counter_name].append((minute, now))
-    
     def record_semaphore_wait(self, wait_time_ms: float):
         """Record semaphore wait time (for efficiency analysis)."""
-        async def _record():
-            async with self._lock:
-                self.semaphore_wait_times.append(wait_time_ms)
-        # Fire and forget - don't block
-        asyncio.create_task(_record())
+        self.semaphore_wait_times.observe(wait_time_ms)
     
     def record_request_size(self, size_bytes: int):
         """Record request body size."""
-        async def _record():
-            async with self._lock:
-                self.request_sizes.append(size_bytes)
-        asyncio.create_task(_record())
+        self.request_sizes.observe(size_bytes)
     
     def record_response_size(self, size_bytes: int):
         """Record response size."""
-        async def _record():
-            async with self._lock:
-                self.response_sizes.append(size_bytes)
-        asyncio.create_task(_record())
+        self.response_sizes.observe(size_bytes)
     
     def record_cache_hit(self):
         """Record a cache hit."""
-        async def _record():
-            async with self._lock:
-                self.cache_hits += 1
-        asyncio.create_task(_record())
+        self.cache_hits.inc()
     
     def record_cache_miss(self):
         """Record a cache miss."""
-        async def _record():
-            async with self._lock:
-                self.cache_misses += 1
-        asyncio.create_task(_record())
+        self.cache_misses.inc()
     
     def record_connection_reuse(self):
         """Record connection pool reuse."""
-        async def _record():
-            async with self._lock:
-                self.connection_reuses += 1
-        asyncio.create_task(_record())
+        self.connection_reuses.inc()
 
     async def reset_history(self, targets: Optional[List[str]] = None):
         """
@@ -624,9 +617,14 @@ class ObservabilitySystem:
             if 'traces' in targets:
                 self.completed_requests.clear()
                 self.performance_metrics.clear()
+                self.rollups.reset()
+                for name in ("request_duration_ms", "operation_duration_ms"):
+                    for hist in self.metrics.histograms.get(name, {}).values():
+                        hist.reset()
             
             if 'counters' in targets:
-                self.request_counters.clear()
+                for counter in (self.requests_total, self.requests_completed, self.requests_errors):
+                    counter.reset()
             
             if 'errors' in targets:
                 self.recent_errors.clear()
@@ -635,16 +633,12 @@ class ObservabilitySystem:
                 self.component_health.clear()
                 
             if 'efficiency' in targets:
-                self.semaphore_wait_times.clear()
-                self.stage_durations.clear()
-                self.request_sizes.clear()
-                self.response_sizes.clear()
-                self.network_bytes_sent = 0
-                self.network_bytes_received = 0
-                self.cache_hits = 0
-                self.cache_misses = 0
-                self.connection_creates = 0
-                self.connection_reuses = 0
+                for hist in (self.semaphore_wait_times, self.request_sizes, self.response_sizes):
+                    hist.reset()
+                self.metrics.histograms.pop("stage_duration_ms", None)
+                for counter in (self.network_bytes_sent, self.network_bytes_received, self.cache_hits,
+                                self.cache_misses, self.connection_creates, self.connection_reuses):
+                    counter.reset()
                 
         logger.info(f"Observability history reset for targets: {targets}")
         return {"ok": True, "reset": targets}
@@ -652,18 +646,18 @@ class ObservabilitySystem:
     
     def record_connection_create(self):
         """Record new connection creation."""
-        async def _record():
-            async with self._lock:
-                self.connection_creates += 1
-        asyncio.create_task(_record())
+        self.connection_creates.inc()
     
     def record_network_bytes(self, sent: int = 0, received: int = 0):
         """Record network bytes sent/received."""
-        async def _record():
-            async with self._lock:
-                self.network_bytes_sent += sent
-                self.network_bytes_received += received
-        asyncio.create_task(_record())
+        if sent:
+            self.network_bytes_sent.inc(sent)
+        if received:
+            self.network_bytes_received.inc(received)
+    
+    def render_prometheus(self) -> str:
+        """Counters, gauges and histograms in Prometheus text exposition format."""
+        return self.metrics.render_prometheus()
     
     def export_data(self, output_path: Optional[Path] = None) -> Dict[str, Any]:
         """Export all observability data for analysis."""
@@ -742,32 +736,22 @@ class ObservabilitySystem:
     
     async def get_performance_summary(self, component: Optional[str] = None, operation: Optional[str] = None) -> Dict[str, Any]:
         """Get performance summary for analysis."""
-        async with self._lock:
-            # Filter in single pass instead of multiple iterations
-            durations = []
-            for m in self.performance_metrics:
-                if component and m.component != component:
-                    continue
-                if operation and m.operation != operation:
-                    continue
-                durations.append(m.duration_ms)
-        
-        if not durations:
+        # Merge the per-(component, operation) histograms that match; quantiles are O(buckets)
+        merged: Optional[LatencyHistogram] = None
+        for labels, hist in self.metrics.histograms.get("operation_duration_ms", {}).items():
+            tags = dict(labels)
+            if component and tags.get("component") != component:
+                continue
+            if operation and tags.get("operation") != operation:
+                continue
+            if merged is None:
+                merged = hist.copy_layout()
+            merged.merge(hist)
+        
+        if merged is None or not merged.count:
             return {"error": "No metrics found"}
         
-        # Calculate statistics efficiently
-        sorted_durations = sorted(durations)  # Only sort once
-        count = len(sorted_durations)
-        
-        return {
-            "count": count,
-            "min_ms": sorted_durations[0],
-            "max_ms": sorted_durations[-1],
-            "avg_ms": sum(sorted_durations) / count,
-            "p50_ms": sorted_durations[count // 2],
-            "p95_ms": sorted_durations[int(count * 0.95)] if count > 0 else 0,
-            "p99_ms": sorted_durations[int(count * 0.99)] if count > 0 else 0,
-        }
+        return merged.summary()
     
     async def detect_anomalies(self) -> List[Any]:
         """Run anomaly detection on current metrics."""
@@ -0,0 +1,303 @@
+"""
+Ollama model residency scheduler.
+
+Ollama keeps a few models in memory and evicts the least recently used one
+when a request names a model that does not fit. Background work (librarian
+ingestion, memory consolidation, hallucination audits) tends to name a
+different model than the interactive turn in flight, so every background call
+can evict the chat model and the next user turn pays a full reload.
+
+The scheduler sits in front of those calls. It mirrors which models are
+resident (and their footprint against a memory budget), lets interactive
+requests through immediately, and holds background requests until their model
+is already resident or can be loaded without hurting interactive traffic:
+once idle, a model that fits next to the resident set is admitted, and one that
+would evict something only after a longer idle period. The model with the most
+queued background requests goes first, as one batch, so a swap is paid once
+per batch rather than once per call. Deferral is bounded by max_defer_s.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from enum import IntEnum
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from common.model_profiles import LOCAL_PREFIXES, get_model_profiles
+
+logger = logging.getLogger(__name__)
+
+OLLAMA_BASE = os.getenv("OLLAMA_BASE", "http://127.0.0.1:11434").rstrip("/")
+OLLAMA_RESIDENCY_BUDGET_GB = float(os.getenv("OLLAMA_RESIDENCY_BUDGET_GB", "48"))
+OLLAMA_BACKGROUND_MAX_DEFER_S = float(os.getenv("OLLAMA_BACKGROUND_MAX_DEFER_S", "120"))
+OLLAMA_IDLE_GRACE_S = float(os.getenv("OLLAMA_IDLE_GRACE_S", "2.0"))
+OLLAMA_EVICT_IDLE_S = float(os.getenv("OLLAMA_EVICT_IDLE_S", "30.0"))
+OLLAMA_BUSY_KEEP_ALIVE = os.getenv("OLLAMA_BUSY_KEEP_ALIVE", "30m")
+OLLAMA_PS_REFRESH_S = float(os.getenv("OLLAMA_PS_REFRESH_S", "5.0"))
+
+# Rough q4 footprint when a model is not listed in OLLAMA_MODEL_FOOTPRINTS_GB (JSON {name: gb})
+_PARAMS_RE = re.compile(r"(\d+(?:\.\d+)?)b\b")
+DEFAULT_FOOTPRINT_GB = 5.0
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+def estimate_footprint_gb(name: str) -> float:
+    """Approximate resident size from the parameter count in the tag (e.g. '70b')."""
+    match = _PARAMS_RE.search(name.lower())
+    if not match:
+        return DEFAULT_FOOTPRINT_GB
+    return round(float(match.group(1)) * 0.6 + 1.0, 1)
+
+
+def _load_footprints() -> Dict[str, float]:
+    raw = os.getenv("OLLAMA_MODEL_FOOTPRINTS_GB")
+    if not raw:
+        return {}
+    try:
+        return {k: float(v) for k, v in json.loads(raw).items()}
+    except Exception as e:
+        logger.warning(f"Ignoring OLLAMA_MODEL_FOOTPRINTS_GB: {e}")
+        return {}
+
+
+class ResidencyScheduler:
+    """Tracks resident Ollama models and orders background calls around them."""
+
+    def __init__(self, budget_gb: Optional[float] = None, footprints: Optional[Dict[str, float]] = None,
+                 max_defer_s: Optional[float] = None, idle_grace_s: Optional[float] = None,
+                 evict_idle_s: Optional[float] = None, busy_keep_alive: Optional[str] = None,
+                 ps_source: Optional[Callable[[], Awaitable[List[Dict[str, Any]]]]] = None,
+                 ps_refresh_s: Optional[float] = None):
+        self.budget_gb = budget_gb if budget_gb is not None else OLLAMA_RESIDENCY_BUDGET_GB
+        self.footprints = footprints if footprints is not None else _load_footprints()
+        self.max_defer_s = max_defer_s if max_defer_s is not None else OLLAMA_BACKGROUND_MAX_DEFER_S
+        self.idle_grace_s = idle_grace_s if idle_grace_s is not None else OLLAMA_IDLE_GRACE_S
+        self.evict_idle_s = evict_idle_s if evict_idle_s is not None else OLLAMA_EVICT_IDLE_S
+        self.busy_keep_alive = busy_keep_alive if busy_keep_alive is not None else OLLAMA_BUSY_KEEP_ALIVE
+        self.ps_source = ps_source
+        self.ps_refresh_s = ps_refresh_s if ps_refresh_s is not None else OLLAMA_PS_REFRESH_S
+
+        self.resident: "OrderedDict[str, float]" = OrderedDict()  # name -> GB, least recently used first
+        self._active: Dict[str, int] = {}
+        self._waiting: Dict[str, int] = {}  # queued background requests per model (insertion = arrival order)
+        self._changed = asyncio.Event()
+        self._last_interactive = 0.0
+        self._last_refresh = 0.0
+        self._http_client = None
+
+        self.swaps = 0                # model loads that were not already resident
+        self.evictions = 0
+        self.resident_hits = 0        # background calls admitted onto an already-resident model
+        self.deferred = 0             # background calls that had to wait
+        self.batches = 0              # idle-time admissions (one swap per batch)
+        self.deferral_timeouts = 0    # background calls released by max_defer_s
+        self.interactive_calls = 0
+        self.background_calls = 0
+
+    # --- Residency bookkeeping ---
+
+    @staticmethod
+    def model_name(model: str) -> str:
+        for prefix in LOCAL_PREFIXES:
+            if model.startswith(prefix):
+                return model[len(prefix):]
+        return model
+
+    def footprint(self, name: str) -> float:
+        return self.footprints.get(name) or estimate_footprint_gb(name)
+
+    def _notify(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    def _load(self, name: str):
+        """Mark `name` resident (most recently used), evicting idle LRU models past the budget."""
+        if name in self.resident:
+            self.resident.move_to_end(name)
+            return
+        self.swaps += 1
+        self.resident[name] = self.footprint(name)
+        used = sum(self.resident.values())
+        for other in list(self.resident):
+            if used <= self.budget_gb:
+                break
+            if other == name or self._active.get(other):
+                continue
+            used -= self.resident.pop(other)
+            self.evictions += 1
+            logger.debug(f"Residency: evicted {other} for {name}")
+
+    def _fits(self, name: str) -> bool:
+        return sum(self.resident.values()) + self.footprint(name) <= self.budget_gb
+
+    def _idle_for(self) -> float:
+        """Seconds since the last interactive call, or 0 while anything is running."""
+        if any(self._active.values()):
+            return 0.0
+        return time.monotonic() - self._last_interactive
+
+    def _next_batch(self) -> Optional[str]:
+        """Model with the most queued background work (earliest queued wins ties)."""
+        best, count = None, 0
+        for name, waiting in self._waiting.items():
+            if waiting > count:
+                best, count = name, waiting
+        return best
+
+    def keep_alive_for(self, model: str) -> Optional[str]:
+        """keep_alive to send: held longer while more work for this model is queued or running."""
+        name = self.model_name(model)
+        if self._waiting.get(name) or self._active.get(name, 0) > 1:
+            return self.busy_keep_alive
+        return get_model_profiles().resolve(f"ollama:{name}").keep_alive
+
+    async def refresh(self):
+        """Resync the resident set from Ollama's /api/ps (other processes load models too)."""
+        now = time.monotonic()
+        if now - self._last_refresh < self.ps_refresh_s:
+            return
+        self._last_refresh = now
+        try:
+            models = await (self.ps_source or self._fetch_ps)()
+        except Exception as e:
+            logger.debug(f"Residency: /api/ps unavailable: {e}")
+            return
+        loaded: "OrderedDict[str, float]" = OrderedDict()
+        for m in models:
+            name = m.get("name") or m.get("model")
+            if name:
+                size = m.get("size_vram") or m.get("size")
+                loaded[name] = size / 1e9 if size else self.footprint(name)
+        for name in self._active:
+            if self._active[name] and name not in loaded:
+                loaded[name] = self.resident.get(name, self.footprint(name))
+        self.resident = loaded
+        self._notify()
+
+    async def _fetch_ps(self) -> List[Dict[str, Any]]:
+        if self._http_client is None:
+            import httpx
+            self._http_client = httpx.AsyncClient(timeout=2.0)
+        resp = await self._http_client.get(f"{OLLAMA_BASE}/api/ps")
+        resp.raise_for_status()
+        return resp.json().get("models", [])
+
+    # --- Admission ---
+
+    def touch(self, model: str):
+        """Record interactive use of a model that bypasses slot() (e.g. the engine's direct lane)."""
+        profile = get_model_profiles().resolve(model)
+        if not profile.is_local:
+            return
+        self.interactive_calls += 1
+        self._last_interactive = time.monotonic()
+        self._load(profile.name)
+        self._notify()
+
+    async def _admit_background(self, name: str, max_defer_s: float):
+        self._waiting[name] = self._waiting.get(name, 0) + 1
+        deadline = time.monotonic() + max_defer_s
+        waited = False
+        try:
+            while True:
+                await self.refresh()
+                if name in self.resident:
+                    self.resident_hits += 1
+                    return
+                idle = self._idle_for()
+                if idle >= self.idle_grace_s and self._next_batch() == name and (
+                        self._fits(name) or idle >= self.evict_idle_s):
+                    self.batches += 1
+                    return
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.deferral_timeouts += 1
+                    logger.debug(f"Residency: {name} waited {max_defer_s}s, loading anyway")
+                    return
+                if not waited:
+                    waited = True
+                    self.deferred += 1
+                changed = self._changed
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=min(remaining, max(self.idle_grace_s, 0.01)))
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            self._waiting[name] -= 1
+            if not self._waiting[name]:
+                del self._waiting[name]
+
+    @asynccontextmanager
+    async def slot(self, model: str, priority: Priority = Priority.BACKGROUND,
+                   max_defer_s: Optional[float] = None) -> AsyncIterator[Optional[str]]:
+        """
+        Hold a slot on `model` for one Ollama call. Yields the keep_alive to send.
+
+        Interactive calls are admitted immediately; background calls wait for residency or idleness,
+        for at most max_defer_s (default: the scheduler's). Callers running under their own
+        deadline pass a smaller bound so the call is loaded late rather than cancelled.
+        """
+        name = self.model_name(model)
+        if priority == Priority.INTERACTIVE:
+            self.interactive_calls += 1
+            self._last_interactive = time.monotonic()
+        else:
+            self.background_calls += 1
+            await self._admit_background(name, self.max_defer_s if max_defer_s is None else max_defer_s)
+
+        self._load(name)
+        self._active[name] = self._active.get(name, 0) + 1
+        self._notify()
+        try:
+            yield self.keep_alive_for(name)
+        finally:
+            self._active[name] -= 1
+            if not self._active[name]:
+                del self._active[name]
+            self._notify()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "budget_gb": self.budget_gb,
+            "resident": {name: round(gb, 1) for name, gb in self.resident.items()},
+            "active": dict(self._active),
+            "queued": dict(self._waiting),
+            "swaps": self.swaps,
+            "evictions": self.evictions,
+            "resident_hits": self.resident_hits,
+            "deferred": self.deferred,
+            "batches": self.batches,
+            "deferral_timeouts": self.deferral_timeouts,
+            "interactive_calls": self.interactive_calls,
+            "background_calls": self.background_calls,
+        }
+
+
+_residency_scheduler: Optional[ResidencyScheduler] = None
+
+
+def get_residency_scheduler() -> ResidencyScheduler:
+    """Get the process-wide Ollama residency scheduler"""
+    global _residency_scheduler
+    if _residency_scheduler is None:
+        _residency_scheduler = ResidencyScheduler()
+    return _residency_scheduler
+
+
+@asynccontextmanager
+async def background_slot(model: Optional[str]) -> AsyncIterator[Optional[str]]:
+    """Background slot for gateway calls; models not served by Ollama pass straight through."""
+    if not model or not get_model_profiles().resolve(model).is_local:
+        yield None
+        return
+    async with get_residency_scheduler().slot(model, Priority.BACKGROUND) as keep_alive:
+        yield keep_alive
@@ -0,0 +1,185 @@
+"""
+Low-overhead helpers for OpenAI-compatible chat-completion SSE streams.
+
+- SSEFrameParser splits raw response bytes into `data:` payloads (no per-line
+  str decoding, no aiter_lines).
+- StreamChunk wraps one payload and decodes lazily: the content delta and
+  finish_reason are pulled out with a targeted scan, and the full json.loads
+  only happens for chunks that need it (tool calls, usage, logprobs on demand).
+- stream_confidence() turns retained logprob chunks into an average token
+  probability, once, at the end of a stream.
+- ChunkFrameEncoder renders outgoing token frames from a pre-built template so
+  only the token text is JSON-encoded per chunk.
+"""
+
+import json
+import logging
+import math
+import re
+import time
+from json.decoder import scanstring
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+DONE = b"[DONE]"
+
+# "delta": {"content": "...  (optionally preceded by "role": "...")
+_DELTA_CONTENT_RE = re.compile(r'"delta"\s*:\s*\{\s*(?:"role"\s*:\s*"[a-z]*"\s*,\s*)?"content"\s*:\s*')
+_FINISH_RE = re.compile(r'"finish_reason"\s*:\s*(?:null|"([^"]*)")')
+_USAGE_NULL_RE = re.compile(r'"usage"\s*:\s*null')
+
+
+class SSEFrameParser:
+    """
+    Incremental parser over raw SSE bytes.
+
+    Each `data:` line is returned as one payload (OpenAI-style streams put one
+    JSON document per line); comments and other SSE fields are skipped. Partial
+    lines stay buffered until the next feed().
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[bytes]:
+        self._buf += data
+        buf = self._buf
+        payloads = []
+        start = 0
+        while True:
+            nl = buf.find(b"\n", start)
+            if nl < 0:
+                break
+            end = nl - 1 if nl > start and buf[nl - 1] == 0x0D else nl  # Strip \r
+            if buf.startswith(b"data:", start):
+                value_start = start + 5
+                if value_start < end and buf[value_start] == 0x20:
+                    value_start += 1
+                payloads.append(bytes(buf[value_start:end]))
+            start = nl + 1
+        if start:
+            del buf[:start]
+        return payloads
+
+    def flush(self) -> List[bytes]:
+        """Payload of a final line that had no trailing newline."""
+        if not self._buf:
+            return []
+        return self.feed(b"\n")
+
+
+class StreamChunk:
+    """One streamed completion chunk, decoded only as far as callers ask."""
+
+    __slots__ = ("raw", "_text", "_data")
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self._text: Optional[str] = None
+        self._data: Optional[Dict[str, Any]] = None
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "StreamChunk":
+        chunk = cls(b"")
+        chunk._data = data
+        return chunk
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.raw.decode("utf-8", errors="replace") if self.raw else json.dumps(self._data or {})
+        return self._text
+
+    @property
+    def data(self) -> Dict[str, Any]:
+        """Fully decoded chunk ({} if the payload is not valid JSON)."""
+        if self._data is None:
+            try:
+                decoded = json.loads(self.text)
+                self._data = decoded if isinstance(decoded, dict) else {}
+            except ValueError:
+                logger.debug(f"Skipping undecodable stream chunk: {self.text[:80]}")
+                self._data = {}
+        return self._data
+
+    def _choice(self) -> Dict[str, Any]:
+        choices = self.data.get("choices") or []
+        return choices[0] if choices and isinstance(choices[0], dict) else {}
+
+    @property
+    def content(self) -> Optional[str]:
+        """Text delta of the first choice."""
+        if self._data is None:
+            m = _DELTA_CONTENT_RE.search(self.text)
+            if m:
+                pos = m.end()
+                if self.text.startswith('"', pos):
+                    try:
+                        return scanstring(self.text, pos + 1)[0]
+                    except ValueError:
+                        pass
+                elif self.text.startswith("null", pos):
+                    return None
+        return (self._choice().get("delta") or {}).get("content")
+
+    @property
+    def finish_reason(self) -> Optional[str]:
+        if self._data is None:
+            m = _FINISH_RE.search(self.text)
+            return m.group(1) if m else None
+        return self._choice().get("finish_reason")
+
+    @property
+    def tool_calls(self) -> Optional[List[Dict[str, Any]]]:
+        if self._data is None and '"tool_calls"' not in self.text:
+            return None
+        return (self._choice().get("delta") or {}).get("tool_calls")
+
+    @property
+    def usage(self) -> Optional[Dict[str, Any]]:
+        if self._data is None and ('"usage"' not in self.text or _USAGE_NULL_RE.search(self.text)):
+            return None
+        return self.data.get("usage") or None
+
+    @property
+    def has_choices(self) -> bool:
+        if self._data is None:
+            return '"choices"' in self.text and '"choices":[]' not in self.text
+        return bool(self.data.get("choices"))
+
+    @property
+    def has_logprobs(self) -> bool:
+        return '"logprob"' in self.text
+
+
+def stream_confidence(chunks: Iterable[StreamChunk]) -> Optional[float]:
+    """Average linear token probability (e^logprob) over choices[0].logprobs.content."""
+    total = 0.0
+    count = 0
+    for chunk in chunks:
+        logprobs = chunk._choice().get("logprobs") or {}
+        for cp in logprobs.get("content") or []:
+            try:
+                total += math.exp(cp["logprob"])
+                count += 1
+            except (KeyError, TypeError, OverflowError):
+                pass
+    return total / count if count else None
+
+
+class ChunkFrameEncoder:
+    """Renders `chat.completion.chunk` SSE frames; only the delta text is encoded per call."""
+
+    def __init__(self, chunk_id: str, model: str, created: Optional[int] = None):
+        head = json.dumps({
+            "id": chunk_id,
+            "object": "chat.completion.chunk",
+            "created": created if created is not None else int(time.time()),
+            "model": model,
+        })
+        self._prefix = "data: " + head[:-1] + ', "choices": [{"index": 0, "delta": {"content": '
+        self._suffix = '}, "finish_reason": null}]}\n\n'
+
+    def content(self, text: str) -> str:
+        return self._prefix + json.dumps(text) + self._suffix
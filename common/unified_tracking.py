@@ -9,17 +9,36 @@ Provides a single entry point for all tracking systems:
 - Dashboard tracker (dashboard-specific errors)
 
 This unifies the previously siloed tracking systems.
+
+track_event only enqueues: events go into a bounded in-memory queue and a
+background drainer delivers them in batches (file writes off the event loop).
+Under pressure low-severity events are sampled, then dropped, and repeats of an
+event still waiting in the queue are coalesced into one delivery with a count.
+Without a running event loop events are delivered inline, as before.
 """
 
 from __future__ import annotations
 
+import asyncio
+import json
 import logging
+import os
 import time
+import traceback
+from collections import deque
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Any, Dict, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 logger = logging.getLogger("unified_tracking")
 
+EVENT_QUEUE_CAPACITY = int(os.getenv("EVENT_QUEUE_CAPACITY", "2048"))
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "128"))
+EVENT_FLUSH_INTERVAL_S = float(os.getenv("EVENT_FLUSH_INTERVAL_S", "0.25"))
+# Above this fill ratio only 1 in EVENT_SAMPLE_EVERY low-severity events is kept
+EVENT_PRESSURE_RATIO = float(os.getenv("EVENT_PRESSURE_RATIO", "0.75"))
+EVENT_SAMPLE_EVERY = int(os.getenv("EVENT_SAMPLE_EVERY", "10"))
+
 
 class EventSeverity(Enum):
     """Event severity levels."""
@@ -45,6 +64,44 @@ class EventCategory(Enum):
     ANOMALY = "anomaly"
 
 
+LOW_SEVERITIES = frozenset({EventSeverity.LOW, EventSeverity.INFO, EventSeverity.DEBUG})
+
+
+@dataclass
+class TrackedEvent:
+    """One queued event; formatting (tracebacks, payloads) happens at delivery."""
+    event: str
+    severity: EventSeverity
+    category: EventCategory
+    message: Optional[str]
+    metadata: Dict[str, Any]
+    request_id: Optional[str]
+    component: Optional[str]
+    error: Optional[Exception]
+    write_to_blog: bool
+    notify: bool
+    timestamp: float = field(default_factory=time.time)
+    repeat: int = 1
+    _key: Optional[Tuple] = field(default=None, init=False, repr=False, compare=False)
+
+    def key(self) -> Tuple:
+        """Coalescing key; only events with equal metadata merge. Computed once, at enqueue."""
+        if self._key is None:
+            self._key = (self.event, self.severity, self.category, self.component, self.message, self.request_id,
+                         repr(self.error) if self.error else None, _metadata_digest(self.metadata))
+        return self._key
+
+
+def _metadata_digest(metadata: Optional[Dict[str, Any]]) -> Optional[str]:
+    """Stable text form of an event's metadata (key order independent)."""
+    if not metadata:
+        return None
+    try:
+        return json.dumps(metadata, sort_keys=True, default=repr, separators=(",", ":"))
+    except (TypeError, ValueError):  # Keys that cannot be sorted or serialized
+        return repr(sorted(metadata.items(), key=lambda item: repr(item[0])))
+
+
 class UnifiedTracker:
     """
     Unified tracking system that routes events to all appropriate subsystems.
@@ -71,6 +128,19 @@ class UnifiedTracker:
         
         # Lazy initialization to avoid circular imports
         self._initialized = False
+        
+        # Event queue + drainer (bound to the running loop)
+        self.capacity = EVENT_QUEUE_CAPACITY
+        self._queue: Deque[TrackedEvent] = deque()
+        self._queued: Dict[Tuple, TrackedEvent] = {}  # coalescing index for events not yet delivered
+        self._wakeup: Optional[asyncio.Event] = None
+        self._drainer: Optional[asyncio.Task] = None
+        self._drainer_loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats: Dict[str, int] = {
+            "enqueued": 0, "delivered": 0, "coalesced": 0, "sampled_out": 0,
+            "dropped": 0, "overflow_dropped": 0, "batches": 0, "inline": 0,
+        }
+        self._low_seen = 0
     
     def _ensure_initialized(self):
         """Lazy initialization of subsystems."""
@@ -193,6 +263,8 @@ class UnifiedTracker:
         """
         Track an event across all appropriate subsystems.
         
+        With a running event loop this only enqueues; the drainer delivers shortly after.
+        
         Args:
             event: Event name/type (e.g., "mcp_server_failed")
             severity: Event severity level
@@ -205,16 +277,6 @@ class UnifiedTracker:
             write_to_blog: Force write to system blog (default: only for CRITICAL/HIGH)
             notify: Force notification (default: auto for CRITICAL/HIGH)
         """
-        self._ensure_initialized()
-        
-        metadata = metadata or {}
-        if error:
-            metadata["error_type"] = type(error).__name__
-            metadata["error_message"] = str(error)
-            if hasattr(error, "__traceback__"):
-                import traceback
-                metadata["error_traceback"] = traceback.format_exc()
-        
         # Auto-determine notification based on severity
         if notify is None:
             notify = severity in (EventSeverity.CRITICAL, EventSeverity.HIGH)
@@ -223,105 +285,252 @@ class UnifiedTracker:
         if not write_to_blog:
             write_to_blog = severity in (EventSeverity.CRITICAL, EventSeverity.HIGH)
         
-        # 1. JSON Event Logging (always, for log parsing)
-        if self._json_logger:
+        tracked = TrackedEvent(
+            event=event,
+            severity=severity,
+            category=category,
+            message=message,
+            metadata=dict(metadata) if metadata else {},
+            request_id=request_id,
+            component=component,
+            error=error,
+            write_to_blog=write_to_blog,
+            notify=notify,
+        )
+        
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        
+        if loop is None:
+            # No loop to drain on (scripts, sync callers): deliver now
+            self.stats["inline"] += 1
+            self._deliver_inline(tracked)
+            return
+        
+        self._enqueue(tracked)
+        self._ensure_drainer(loop)
+    
+    # --- Queue ---
+    
+    def _enqueue(self, tracked: TrackedEvent):
+        """O(1): coalesce, sample/drop under pressure, append."""
+        key = tracked.key()
+        pending = self._queued.get(key)
+        if pending is not None:
+            pending.repeat += 1
+            self.stats["coalesced"] += 1
+            return
+        
+        depth = len(self._queue)
+        if tracked.severity in LOW_SEVERITIES:
+            if depth >= self.capacity:
+                self.stats["dropped"] += 1
+                return
+            if depth >= self.capacity * EVENT_PRESSURE_RATIO:
+                self._low_seen += 1
+                if self._low_seen % EVENT_SAMPLE_EVERY:
+                    self.stats["sampled_out"] += 1
+                    return
+        elif depth >= self.capacity + self.capacity // 4:
+            # Reserve for important events exhausted: shed the oldest
+            oldest = self._queue.popleft()
+            self._queued.pop(oldest.key(), None)
+            self.stats["overflow_dropped"] += 1
+        
+        self._queue.append(tracked)
+        self._queued[key] = tracked
+        self.stats["enqueued"] += 1
+        if self._wakeup is not None and len(self._queue) >= EVENT_BATCH_SIZE:
+            self._wakeup.set()
+    
+    def _ensure_drainer(self, loop: asyncio.AbstractEventLoop):
+        if self._drainer is not None and not self._drainer.done() and self._drainer_loop is loop:
+            return
+        self._wakeup = asyncio.Event()
+        self._drainer_loop = loop
+        self._drainer = loop.create_task(self._drain_forever())
+    
+    def _take_batch(self) -> List[TrackedEvent]:
+        batch = []
+        while self._queue and len(batch) < EVENT_BATCH_SIZE:
+            tracked = self._queue.popleft()
+            self._queued.pop(tracked.key(), None)
+            batch.append(tracked)
+        return batch
+    
+    async def _drain_forever(self):
+        wakeup = self._wakeup
+        while True:
             try:
-                json_payload = {
-                    "event": event,
-                    "severity": severity.value,
-                    "category": category.value,
-                    **(metadata or {})
-                }
-                if message:
-                    json_payload["message"] = message
-                if component:
-                    json_payload["component"] = component
-                self._json_logger(event, request_id=request_id, **json_payload)
+                await asyncio.wait_for(wakeup.wait(), timeout=EVENT_FLUSH_INTERVAL_S)
+            except asyncio.TimeoutError:
+                pass
+            wakeup.clear()
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                logger.debug(f"Failed to log JSON event: {e}")
-        
-        # 2. Observability System (for performance/request tracking)
+                logger.debug(f"Event drainer error: {e}")
+    
+    async def flush(self):
+        """Deliver everything queued so far."""
+        self._ensure_initialized()
+        while self._queue:
+            batch = self._take_batch()
+            self.stats["batches"] += 1
+            # File-backed sinks (JSON log lines, blog entries) for the whole batch in one thread hop
+            await asyncio.to_thread(self._write_batch, batch)
+            for tracked in batch:
+                await self._deliver_live(tracked)
+            self.stats["delivered"] += len(batch)
+    
+    async def close(self):
+        """Flush and stop the drainer (shutdown)."""
+        if self._drainer is not None:
+            self._drainer.cancel()
+            try:
+                await self._drainer
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._drainer = None
+        await self.flush()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {"queued": len(self._queue), "capacity": self.capacity, **self.stats}
+    
+    # --- Delivery ---
+    
+    def _prepare(self, tracked: TrackedEvent) -> Dict[str, Any]:
+        """Final metadata: error details and repeat count."""
+        metadata = tracked.metadata
+        error = tracked.error
+        if error is not None and "error_type" not in metadata:
+            metadata["error_type"] = type(error).__name__
+            metadata["error_message"] = str(error)
+            if error.__traceback__ is not None:
+                metadata["error_traceback"] = "".join(
+                    traceback.format_exception(type(error), error, error.__traceback__))
+        if tracked.repeat > 1:
+            metadata["repeat_count"] = tracked.repeat
+        return metadata
+    
+    def _deliver_inline(self, tracked: TrackedEvent):
+        self._ensure_initialized()
+        self._write_batch([tracked])
         if self._observability:
             try:
-                import asyncio
-                from common.observability import ComponentType
-                
-                # Record component health for HEALTH/MCP/ERROR events
-                if category in (EventCategory.HEALTH, EventCategory.MCP, EventCategory.ERROR):
-                    # Map component to ComponentType
-                    component_type_map = {
-                        "mcp": ComponentType.MCP_SERVER,
-                        "health_monitor": ComponentType.AGENT_RUNNER,
-                        "dashboard": ComponentType.AGENT_RUNNER,
-                        "circuit_breaker": ComponentType.MCP_SERVER,
+                update = self._health_update(tracked)
+                if update:
+                    self._observability.record_component_health_sync(*update)
+            except Exception as e:
+                logger.debug(f"Failed to record in observability: {e}")
+        self._deliver_notifications(tracked)
+    
+    def _write_batch(self, batch: List[TrackedEvent]):
+        """JSON event lines and blog entries; runs off the event loop when draining."""
+        for tracked in batch:
+            metadata = self._prepare(tracked)
+            severity, category, message, component = tracked.severity, tracked.category, tracked.message, tracked.component
+            
+            # 1. JSON Event Logging (always, for log parsing)
+            if self._json_logger:
+                try:
+                    json_payload = {
+                        "event": tracked.event,
+                        "severity": severity.value,
+                        "category": category.value,
+                        **metadata
                     }
-                    comp_type = component_type_map.get(component or "", ComponentType.AGENT_RUNNER)
-                    # For MCP events, use server name from metadata if available
-                    if category == EventCategory.MCP and metadata and "server" in metadata:
-                        comp_id = metadata["server"]
-                    else:
-                        comp_id = component or "unknown"
-                    
-                    # Determine health status from severity
-                    if severity in (EventSeverity.CRITICAL, EventSeverity.HIGH):
-                        status = "unhealthy"
-                    elif severity == EventSeverity.MEDIUM:
-                        status = "degraded"
-                    else:
-                        status = "healthy"
+                    if message:
+                        json_payload["message"] = message
+                    if component:
+                        json_payload["component"] = component
+                    self._json_logger(tracked.event, request_id=tracked.request_id, **json_payload)
+                except Exception as e:
+                    logger.debug(f"Failed to log JSON event: {e}")
+            
+            # 5. System Blog (for important events)
+            if tracked.write_to_blog and self._system_blog:
+                try:
+                    from common.system_blog import BlogCategory, BlogSeverity, BlogEntry
+                    blog_category = self._blog_category_map.get(category, BlogCategory.SYSTEM_EVENT)
+                    blog_severity = self._blog_severity_map.get(severity, BlogSeverity.INFO)
                     
-                    # Call async function using asyncio.create_task (fire-and-forget)
-                    # This matches the pattern used in observability_middleware.py
-                    try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            # Event loop is running, use create_task
-                            asyncio.create_task(
-                                self._observability.record_component_health(
-                                    comp_type,
-                                    comp_id,
-                                    status,
-                                    metadata={
-                                        "event": event,
-                                        "severity": severity.value,
-                                        "message": message,
-                                        **metadata
-                                    }
-                                )
-                            )
-                        else:
-                            # No event loop, run in new one
-                            asyncio.run(
-                                self._observability.record_component_health(
-                                    comp_type,
-                                    comp_id,
-                                    status,
-                                    metadata={
-                                        "event": event,
-                                        "severity": severity.value,
-                                        "message": message,
-                                        **metadata
-                                    }
-                                )
-                            )
-                    except RuntimeError:
-                        # No event loop available, skip observability
-                        logger.debug(f"No event loop available for observability recording: {event}")
+                    blog_entry = BlogEntry(
+                        timestamp=tracked.timestamp,
+                        category=blog_category,
+                        severity=blog_severity,
+                        title=message or tracked.event.replace("_", " ").title(),
+                        source=component or "unified_tracker",
+                        content=f"Event: {tracked.event}\n\n{message or ''}\n\nMetadata: {metadata}",
+                        metadata=metadata
+                    )
+                    self._system_blog.write_entry(blog_entry)
+                except Exception as e:
+                    logger.debug(f"Failed to write to system blog: {e}")
+    
+    def _health_update(self, tracked: TrackedEvent) -> Optional[Tuple]:
+        """(component_type, component_id, status, metadata) for HEALTH/MCP/ERROR events."""
+        if tracked.category not in (EventCategory.HEALTH, EventCategory.MCP, EventCategory.ERROR):
+            return None
+        from common.observability import ComponentType
+        
+        # Map component to ComponentType
+        component_type_map = {
+            "mcp": ComponentType.MCP_SERVER,
+            "health_monitor": ComponentType.AGENT_RUNNER,
+            "dashboard": ComponentType.AGENT_RUNNER,
+            "circuit_breaker": ComponentType.MCP_SERVER,
+        }
+        metadata = tracked.metadata
+        comp_type = component_type_map.get(tracked.component or "", ComponentType.AGENT_RUNNER)
+        # For MCP events, use server name from metadata if available
+        if tracked.category == EventCategory.MCP and "server" in metadata:
+            comp_id = metadata["server"]
+        else:
+            comp_id = tracked.component or "unknown"
+        
+        # Determine health status from severity
+        if tracked.severity in (EventSeverity.CRITICAL, EventSeverity.HIGH):
+            status = "unhealthy"
+        elif tracked.severity == EventSeverity.MEDIUM:
+            status = "degraded"
+        else:
+            status = "healthy"
+        
+        return comp_type, comp_id, status, None, {
+            "event": tracked.event,
+            "severity": tracked.severity.value,
+            "message": tracked.message,
+            **metadata
+        }
+    
+    async def _deliver_live(self, tracked: TrackedEvent):
+        """In-process sinks: observability, notifications, dashboard."""
+        # 2. Observability System (for performance/request tracking)
+        if self._observability:
+            try:
+                update = self._health_update(tracked)
+                if update:
+                    await self._observability.record_component_health(*update)
                 
                 # Record error in observability if it's an error event
-                if category == EventCategory.ERROR and request_id:
-                    # Try to add error to existing request lifecycle
-                    try:
-                        loop = asyncio.get_event_loop()
-                        if loop.is_running():
-                            asyncio.create_task(self._record_error_in_observability(request_id, error, metadata))
-                    except RuntimeError:
-                        logger.debug(f"No event loop available for error recording: {event}")
+                if tracked.category == EventCategory.ERROR and tracked.request_id:
+                    await self._record_error_in_observability(tracked.request_id, tracked.error, tracked.metadata)
             except Exception as e:
                 logger.debug(f"Failed to record in observability: {e}")
-
+        
+        self._deliver_notifications(tracked)
+    
+    def _deliver_notifications(self, tracked: TrackedEvent):
+        severity, category, message, component = tracked.severity, tracked.category, tracked.message, tracked.component
+        metadata, error, event = tracked.metadata, tracked.error, tracked.event
+        
         # 3. Notification System (for alerts)
-        if notify and self._notification_manager:
+        if tracked.notify and self._notification_manager:
             try:
                 notification_level = self._severity_to_notification.get(severity)
                 if not notification_level:
@@ -354,32 +563,10 @@ class UnifiedTracker:
                         error_stack=metadata.get("error_traceback") if metadata else None,
                         component=component,
                         context=metadata,
-                        request_id=request_id
+                        request_id=tracked.request_id
                     )
             except Exception as e:
                 logger.debug(f"Failed to record in dashboard tracker: {e}")
-        
-        # 5. System Blog (for important events)
-        if write_to_blog and self._system_blog:
-            try:
-                from common.system_blog import BlogCategory, BlogSeverity
-                blog_category = self._blog_category_map.get(category, BlogCategory.SYSTEM_EVENT)
-                blog_severity = self._blog_severity_map.get(severity, BlogSeverity.INFO)
-                
-                # Create blog entry
-                from common.system_blog import BlogEntry
-                blog_entry = BlogEntry(
-                    timestamp=time.time(),
-                    category=blog_category,
-                    severity=blog_severity,
-                    title=message or event.replace("_", " ").title(),
-                    source=component or "unified_tracker",
-                    content=f"Event: {event}\n\n{message or ''}\n\nMetadata: {metadata}",
-                    metadata=metadata
-                )
-                self._system_blog.write_entry(blog_entry)
-            except Exception as e:
-                logger.debug(f"Failed to write to system blog: {e}")
 
     async def _record_error_in_observability(self, request_id: str, error: Optional[Exception], metadata: Dict[str, Any]):
         """Helper to record error in observability system."""
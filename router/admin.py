@@ -5,7 +5,7 @@ import time
 import logging
 from typing import Any, Optional
 from fastapi import APIRouter, Request, HTTPException, UploadFile, File, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from router.config import state, VERSION
 from router.providers import load_providers
 
@@ -309,6 +309,13 @@ async def get_observability_stats():
     except Exception as e:
         return {"ok": False, "error": str(e)}
 
+@router.get("/observability/prometheus")
+async def get_observability_prometheus():
+    """Counters and latency histograms in Prometheus text format (for scraping)."""
+    from common.metrics_core import PROMETHEUS_CONTENT_TYPE
+    from common.observability import get_observability
+    return PlainTextResponse(get_observability().render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 @router.get("/health-full")
 async def full_health():
     """Detailed health check including all provider connectivity."""
@@ -638,14 +645,16 @@ async def get_budget():
     """Return current budget status."""
     from common.budget import get_budget_tracker
     b = get_budget_tracker()
-    # Force reload to get latest file changes
-    b._load()
+    # Flush and re-read the shared ledger (all processes) off the event loop
+    breakdown = await asyncio.to_thread(b.get_breakdown)
     return {
         "ok": True,
         "current_spend": b.current_spend,
         "daily_limit_usd": b.daily_limit_usd,
         "last_reset": b.last_reset,
-        "percent_used": (b.current_spend / max(0.01, b.daily_limit_usd)) * 100
+        "window_s": b.window_s,
+        "percent_used": (b.current_spend / max(0.01, b.daily_limit_usd)) * 100,
+        "breakdown": breakdown
     }
 
 @router.post("/budget/reset")
@@ -653,7 +662,7 @@ async def reset_budget():
     """Reset the current budget spend."""
     from common.budget import get_budget_tracker
     b = get_budget_tracker()
-    b.reset()
+    await asyncio.to_thread(b.reset)
     return {"ok": True, "message": "Budget reset successfully."}
 
 @router.get("/config/yaml")
@@ -88,6 +88,8 @@ if "pytest" in sys.modules or os.getenv("PYTEST_CURRENT_TEST"):
     ROUTER_AUTH_TOKEN = ""
 ROUTER_MAX_CONCURRENCY = int(os.getenv("ROUTER_MAX_CONCURRENCY", "0"))
 FS_ROOT = os.getenv("FS_ROOT", os.path.expanduser("~/ai/agent_fs_root"))
+# Router-side hallucination checks: "inline" (may amend the response) or "async" (annotate after responding)
+HALLUCINATION_CHECK_MODE = os.getenv("HALLUCINATION_CHECK_MODE", "inline").lower()
 
 @dataclass
 class Provider:
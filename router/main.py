@@ -6,7 +6,7 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from common.logging_setup import setup_logger
-from common.unified_tracking import track_event, EventCategory, EventSeverity
+from common.unified_tracking import track_event, get_unified_tracker, EventCategory, EventSeverity
 
 from router.config import state, VERSION, OLLAMA_BASE, AGENT_RUNNER_URL, RAG_BASE
 from router.providers import load_providers
@@ -210,7 +210,12 @@ async def lifespan(app: FastAPI):
         await key_task
     except asyncio.CancelledError:
         pass
+    from agent_runner.hallucination_detector import close_detection_service
+    await close_detection_service()
     await state.client.aclose()
+    await get_unified_tracker().close()
+    from common.budget import get_budget_tracker
+    get_budget_tracker().close()
     
     obs = get_observability()
 
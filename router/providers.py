@@ -20,6 +20,7 @@ except ImportError:
 
 from router.config import Provider, state, PROVIDERS_YAML, DEFAULT_UPSTREAM_HEADERS, OLLAMA_BASE, PREFIX_OLLAMA, OBJ_CHAT_COMPLETION, ROLE_ASSISTANT, OBJ_CHAT_COMPLETION_CHUNK
 from router.utils import join_url, parse_default_headers, merge_headers
+from common.model_profiles import ModelProfile, get_model_profiles
 
 # Retry predicate for 429s (Rate Limits)
 def is_rate_limit_error(e: Exception) -> bool:
@@ -147,6 +148,45 @@ def flatten_content(c: Any) -> str:
         return "\n".join(parts)
     return str(c)
 
+def _ollama_profile(model_id: str) -> ModelProfile:
+    """Resolved profile (num_ctx, options, keep_alive) for a bare Ollama model name."""
+    profiles = get_model_profiles()
+    if profiles.model_options is not state.ollama_model_options:
+        profiles.configure(model_options=state.ollama_model_options, default_ctx=state.ollama_num_ctx)
+    return profiles.resolve(f"{PREFIX_OLLAMA}:{model_id}")
+
+def _encode_ollama_body(model_id: str, messages: List[Dict[str, Any]], stream: bool,
+                        num_ctx: Optional[int], kwargs: Dict[str, Any]) -> bytes:
+    """
+    Encode an /api/chat request body once.
+
+    Options come from the model profile; request options (and an explicit
+    num_ctx) override them, so a caller that already sends the profile's
+    num_ctx never triggers a reload.
+    """
+    profile = _ollama_profile(model_id)
+    extra = dict(kwargs)
+    overrides = dict(extra.pop("options", None) or {})
+    if num_ctx:
+        overrides["num_ctx"] = num_ctx
+
+    body = {
+        "model": model_id,
+        "messages": [
+            {"role": m.get("role"), "content": c if isinstance(c := m.get("content", ""), str) else flatten_content(c)}
+            for m in messages
+        ],
+        "stream": stream,
+    }
+    # [PATCH] Merge top-level kwargs (like keep_alive)
+    body.update(extra)
+    body["options"] = profile.ollama_options(overrides)
+    if profile.keep_alive and "keep_alive" not in body:
+        body["keep_alive"] = profile.keep_alive
+
+    logger.debug(f"[CTX_DEBUG] Model='{model_id}' | ProfileCtx={profile.num_ctx} | Final={body['options'].get('num_ctx')}")
+    return json.dumps(body, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
 # Mirascope-enhanced LLM calling functions
 if MIRASCOPE_AVAILABLE:
     from pydantic import BaseModel
@@ -162,33 +202,6 @@ if MIRASCOPE_AVAILABLE:
         eval_count: int = 0
         eval_duration: int = 0
 
-    @llm.call(provider="ollama", model=os.getenv("AGENT_MODEL"), stream=True)
-    async def mirascope_ollama_stream(
-        messages: List[Dict[str, Any]],
-        model: str = os.getenv("AGENT_MODEL"),
-        num_ctx: Optional[int] = None,
-        **kwargs
-    ):
-        """Mirascope-enhanced Ollama streaming call."""
-        # Convert messages to simple format for Mirascope
-        prompt = ""
-        for msg in messages:
-            role = msg.get("role", "")
-            content = flatten_content(msg.get("content", ""))
-            if role == "system":
-                prompt += f"System: {content}\n\n"
-            elif role == "user":
-                prompt += f"User: {content}\n\n"
-            elif role == "assistant":
-                prompt += f"Assistant: {content}\n\n"
-
-        # Add model options if specified
-        options = {}
-        if num_ctx:
-            options["num_ctx"] = num_ctx
-
-        return prompt
-
     @llm.call(provider="ollama", model=os.getenv("AGENT_MODEL"), response_model=OllamaChatResponse)
     async def mirascope_ollama_call(
         messages: List[Dict[str, Any]],
@@ -221,94 +234,20 @@ async def call_ollama_chat_stream(
     num_ctx: Optional[int] = None,
     **kwargs
 ):
-    """Yields OpenAI-compatible SSE chunks from Ollama stream."""
-
-    # Use Mirascope if enabled and available
-    if USE_MIRASCOPE and MIRASCOPE_AVAILABLE:
-        try:
-            logger.info(f"Using Mirascope for Ollama streaming call: {model_id}")
-            async for chunk in mirascope_ollama_stream(messages, model=model_id, num_ctx=num_ctx):
-                # Convert Mirascope chunk format to OpenAI-compatible format
-                if hasattr(chunk, 'content') and chunk.content:
-                    yield {
-                        "id": f"mirascope-{int(time.time())}",
-                        "object": OBJ_CHAT_COMPLETION_CHUNK,
-                        "created": int(time.time()),
-                        "model": f"{PREFIX_OLLAMA}:{model_id}",
-                        "choices": [{"index": 0, "delta": {"content": chunk.content}, "finish_reason": None}]
-                    }
-                elif hasattr(chunk, 'done') and chunk.done:
-                    yield {
-                        "id": f"mirascope-{int(time.time())}",
-                        "object": OBJ_CHAT_COMPLETION_CHUNK,
-                        "created": int(time.time()),
-                        "model": f"{PREFIX_OLLAMA}:{model_id}",
-                        "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
-                    }
-            return
-        except Exception as e:
-            logger.warning(f"Mirascope streaming failed, falling back to direct HTTP: {e}")
-            # Fall through to original implementation
+    """
+    Yields OpenAI-compatible SSE chunks from Ollama stream.
 
-    # Original implementation as fallback
+    Goes straight to Ollama's native /api/chat (no Mirascope detour) with a
+    body encoded once from the model profile.
+    """
     url = join_url(OLLAMA_BASE, "/api/chat")
-    
-    ollama_body = {
-        "model": model_id,
-        "messages": [{"role": m.get("role"), "content": flatten_content(m.get("content", ""))} for m in messages],
-        "stream": True,
-    }
-    
-    # [PATCH] Merge top-level kwargs (like keep_alive)
-    ollama_body.update(kwargs)
-    
-    # [Optimization] Smart Context Sizing (Gateway Level)
-    # Ensure the Gateway respects VRAM constraints even if the client didn't specify limits.
-    CONTEXT_WINDOW_MAP = {
-        "llama3.3:70b": 32768,      # Brain (Deep Context)
-        "ollama:llama3.3:70b": 32768,
-        "qwen2.5:32b": 8192,        # Auditor (Medium Context)
-        "ollama:qwen2.5:32b": 8192,
-        "llama3.1:latest": 2048,    # Router (Transactional)
-        "ollama:llama3.1:latest": 2048,
-        "llama3.2:latest": 2048,    # Small Tasks (Transactional)
-        "ollama:llama3.2:latest": 2048,
-        "llama3.2-vision:latest": 2048, # Vision (Transactional)
-        "ollama:llama3.2-vision:latest": 2048,
-        "qwen2.5:7b-instruct": 2048, # Query Refinement (Transactional)
-        "ollama:qwen2.5:7b-instruct": 2048,
-    }
-    
-    # Priority: 1. Request Options (num_ctx) -> 2. Map -> 3. Global Env -> 4. Default 2048
-    options = {}
-    base_ctx = CONTEXT_WINDOW_MAP.get(model_id, CONTEXT_WINDOW_MAP.get(f"ollama:{model_id}"))
-    
-    # Priority: 1. Request Options (num_ctx) -> 2. Map -> 3. Global Env -> 4. Default 2048
-    options = {}
-    base_ctx = CONTEXT_WINDOW_MAP.get(model_id, CONTEXT_WINDOW_MAP.get(f"ollama:{model_id}"))
-    
-    # Use request-provided ctx, or map, or global default
-    ctx_size = num_ctx or base_ctx or state.ollama_num_ctx
-    
-    logger.warning(f"🔍 [CTX_DEBUG] Stream Call: Model='{model_id}' | MapCtx={base_ctx} | ReqCtx={num_ctx} | Final={ctx_size}")
-
-    if ctx_size:
-        options["num_ctx"] = ctx_size
-    
-    if state.ollama_model_options:
-        model_opts = state.ollama_model_options.get(model_id, state.ollama_model_options.get("default", {}))
-        for k, v in model_opts.items():
-            if k not in options:
-                options[k] = v
-            
-    if options:
-        ollama_body["options"] = options
+    body = _encode_ollama_body(model_id, messages, True, num_ctx, kwargs)
 
     if not state.circuit_breakers.is_allowed("ollama"):
         raise HTTPException(status_code=503, detail="Ollama service is currently disabled via circuit breaker")
 
     try:
-        async with state.client.stream("POST", url, json=ollama_body, headers={"Content-Type": "application/json"}, timeout=300.0) as r:
+        async with state.client.stream("POST", url, content=body, headers={"Content-Type": "application/json"}, timeout=300.0) as r:
             if r.status_code >= 400:
                 state.circuit_breakers.record_failure("ollama")
                 content = await r.aread()
@@ -400,56 +339,13 @@ async def call_ollama_chat(
 
     # Original implementation as fallback
     url = join_url(OLLAMA_BASE, "/api/chat")
-    
-    ollama_body = {
-        "model": model_id,
-        "messages": [{"role": m.get("role"), "content": flatten_content(m.get("content", ""))} for m in messages],
-        "stream": False,
-    }
-    
-    # [PATCH] Merge top-level kwargs (like keep_alive)
-    ollama_body.update(kwargs)
-    
-    # [Optimization] Smart Context Sizing (Gateway Level)
-    CONTEXT_WINDOW_MAP = {
-        "llama3.3:70b": 32768,      # Brain (Deep Context)
-        "ollama:llama3.3:70b": 32768,
-        "qwen2.5:32b": 8192,        # Auditor (Medium Context)
-        "ollama:qwen2.5:32b": 8192,
-        "llama3.1:latest": 2048,    # Router (Transactional)
-        "ollama:llama3.1:latest": 2048,
-        "llama3.2:latest": 2048,    # Small Tasks (Transactional)
-        "ollama:llama3.2:latest": 2048,
-        "llama3.2-vision:latest": 2048, # Vision (Transactional)
-        "ollama:llama3.2-vision:latest": 2048,
-        "qwen2.5:7b-instruct": 2048, # Query Refinement (Transactional)
-        "ollama:qwen2.5:7b-instruct": 2048,
-    }
-    
-    options = {}
-    base_ctx = CONTEXT_WINDOW_MAP.get(model_id, CONTEXT_WINDOW_MAP.get(f"ollama:{model_id}"))
-    
-    ctx_size = num_ctx or base_ctx or state.ollama_num_ctx
-    
-    logger.warning(f"🔍 [CTX_DEBUG] Sync Call: Model='{model_id}' | MapCtx={base_ctx} | ReqCtx={num_ctx} | Final={ctx_size}")
-
-    if ctx_size:
-        options["num_ctx"] = ctx_size
-    
-    if state.ollama_model_options:
-        model_opts = state.ollama_model_options.get(model_id, state.ollama_model_options.get("default", {}))
-        for k, v in model_opts.items():
-            if k not in options:
-                options[k] = v
-            
-    if options:
-        ollama_body["options"] = options
+    body = _encode_ollama_body(model_id, messages, False, num_ctx, kwargs)
 
     if not state.circuit_breakers.is_allowed("ollama"):
         raise HTTPException(status_code=503, detail="Ollama service is currently disabled via circuit breaker")
 
     try:
-        r = await state.client.post(url, json=ollama_body, headers={"Content-Type": "application/json"})
+        r = await state.client.post(url, content=body, headers={"Content-Type": "application/json"})
         if r.status_code >= 400:
             state.circuit_breakers.record_failure("ollama")
             raise HTTPException(status_code=r.status_code, detail=r.text)
@@ -13,13 +13,14 @@ from common.constants import (
 )
 from router.config import (
     state, AGENT_RUNNER_URL, AGENT_RUNNER_CHAT_PATH, 
-    MAX_REQUEST_BODY_BYTES
+    MAX_REQUEST_BODY_BYTES, HALLUCINATION_CHECK_MODE
 )
 from common.constants import TIMEOUT_HTTP_LONG
 from router.utils import join_url, sanitize_messages, parse_model_string
 from router.providers import call_ollama_chat, call_ollama_chat_stream, provider_headers, retry_policy
 from router.rag import call_rag
 from common.logging_utils import log_time
+from common.caching import get_request_coalescer
 
 router = APIRouter(tags=["chat"])
 logger = logging.getLogger("router.chat")
@@ -280,7 +281,13 @@ async def _handle_chat_internal(request_id: str, body: Dict[str, Any], prefix: s
         if quality_tier:
             headers["X-Quality-Tier"] = quality_tier.value
         try:
-            r = await state.client.post(url, json=body, headers=headers, timeout=TIMEOUT_HTTP_LONG)
+            # Duplicate submits of the same body share one Agent Runner call
+            coalesce_key = {"url": url, "quality_tier": quality_tier.value if quality_tier else None, **body}
+            r = await get_request_coalescer().run(
+                coalesce_key,
+                lambda: state.client.post(url, json=body, headers=headers, timeout=TIMEOUT_HTTP_LONG),
+                cache=False  # Agent turns run tools; coalesce concurrent duplicates only
+            )
 
             # Handle different HTTP status codes appropriately
             if r.status_code >= 500:
@@ -402,21 +409,26 @@ async def _handle_chat_internal(request_id: str, body: Dict[str, Any], prefix: s
                             raise HTTPException(status_code=r.status_code, detail=r.text)
                         return r
 
-                    r = await fetch_provider()
-                    
-                    state.circuit_breakers.record_success(prefix)
-                    data = r.json()
-                    
-                    # BUDGET RECORDING
-                    try:
-                        usage = data.get("usage", {})
-                        in_tok = usage.get("prompt_tokens", 0)
-                        out_tok = usage.get("completion_tokens", 0)
-                        cost = budget.estimate_cost(body.get("model", ""), in_tok, out_tok)
-                        if cost > 0:
-                            budget.record_usage(prefix, cost)
-                    except Exception as e:
-                        logger.warning(f"Budget recording failed: {e}")
+                    async def fetch_and_record():
+                        r = await fetch_provider()
+                        
+                        state.circuit_breakers.record_success(prefix)
+                        data = r.json()
+                        
+                        # BUDGET RECORDING (once per upstream call, not per coalesced caller)
+                        try:
+                            usage = data.get("usage", {})
+                            in_tok = usage.get("prompt_tokens", 0)
+                            out_tok = usage.get("completion_tokens", 0)
+                            cost = budget.estimate_cost(body.get("model", ""), in_tok, out_tok)
+                            if cost > 0:
+                                budget.record_usage(prefix, cost, model=model_id, request_type="chat")
+                        except Exception as e:
+                            logger.warning(f"Budget recording failed: {e}")
+                        return data
+
+                    # Identical in-flight payloads share one provider call
+                    data = await get_request_coalescer().run({"url": url, **body}, fetch_and_record)
                     
                     return JSONResponse(data)
                 except Exception as e:
@@ -455,14 +467,11 @@ async def _handle_chat_internal(request_id: str, body: Dict[str, Any], prefix: s
                 content = message.get("content", "")
 
                 if content and len(content.strip()) > 10:  # Only check substantial responses
-                    # Import hallucination detector
-                    from agent_runner.hallucination_detector import HallucinationDetector, DetectorConfig
+                    # Long-lived detector service (keeps result cache + auditor client across requests)
+                    from agent_runner.hallucination_detector import get_detection_service
 
-                    # Get shared state
                     try:
-                        from router.config import state as router_state
-                        detector_config = DetectorConfig(enabled=True)
-                        detector = HallucinationDetector(router_state, detector_config)
+                        detection_service = get_detection_service(state)
 
                         # Prepare context for detection
                         user_messages = [msg for msg in messages_for_context if msg.get("role") == "user"]
@@ -475,33 +484,35 @@ async def _handle_chat_internal(request_id: str, body: Dict[str, Any], prefix: s
                             "model_info": {"model": requested_model or "unknown"}
                         }
 
-                        # Run hallucination detection
-                        logger.warning("HALLUCINATION_CHECK: Starting detection")
-                        detection_result = await detector.detect_hallucinations(**context)
-                        logger.warning(f"HALLUCINATION_CHECK: Detection completed - hallucination: {detection_result.is_hallucination}")
-
-                        # Log detection results
-                        if detection_result.is_hallucination:
-                            logger.warning(f"HALLUCINATION DETECTED in {prefix} response: severity={detection_result.severity.value}, confidence={detection_result.confidence:.2f}")
-
-                            # For critical hallucinations, replace with safe response
-                            if detection_result.severity.value == "critical":
-                                logger.warning("HALLUCINATION_CHECK: Replacing with safe response")
-                                choice["message"]["content"] = "I apologize, but I cannot provide accurate information about that topic. Please consult the official documentation or try rephrasing your question."
-                                choice["message"]["hallucination_detected"] = True
-                            elif detection_result.severity.value == "high":
-                                logger.warning("HALLUCINATION_CHECK: Adding warning to response")
-                                # Add warning but keep original response
-                                choice["message"]["content"] += "\n\n⚠️ *Note: This response may contain inaccuracies. Please verify the information.*"
-                                choice["message"]["hallucination_warning"] = True
+                        if HALLUCINATION_CHECK_MODE == "async":
+                            # Off the critical path: the verdict is recorded as an annotation
+                            response_id = response_to_check.get("id") or f"resp-{time.time_ns()}"
+                            detection_service.submit(response_id, **context)
+                            logger.info(f"HALLUCINATION_CHECK: Scheduled background check for {response_id}")
+                        else:
+                            # Run hallucination detection
+                            logger.warning("HALLUCINATION_CHECK: Starting detection")
+                            detection_result = await detection_service.check(**context)
+                            logger.warning(f"HALLUCINATION_CHECK: Detection completed - hallucination: {detection_result.is_hallucination}")
+
+                            # Log detection results
+                            if detection_result.is_hallucination:
+                                logger.warning(f"HALLUCINATION DETECTED in {prefix} response: severity={detection_result.severity.value}, confidence={detection_result.confidence:.2f}")
+
+                                # For critical hallucinations, replace with safe response
+                                if detection_result.severity.value == "critical":
+                                    logger.warning("HALLUCINATION_CHECK: Replacing with safe response")
+                                    choice["message"]["content"] = "I apologize, but I cannot provide accurate information about that topic. Please consult the official documentation or try rephrasing your question."
+                                    choice["message"]["hallucination_detected"] = True
+                                elif detection_result.severity.value == "high":
+                                    logger.warning("HALLUCINATION_CHECK: Adding warning to response")
+                                    # Add warning but keep original response
+                                    choice["message"]["content"] += "\n\n⚠️ *Note: This response may contain inaccuracies. Please verify the information.*"
+                                    choice["message"]["hallucination_warning"] = True
 
                         # Skip adding metadata to maintain OpenAI compatibility
                         logger.warning(f"HALLUCINATION_CHECK: Detection completed (metadata skipped for compatibility)")
 
-                        # Cleanup
-                        await detector.cleanup()
-                        logger.warning("HALLUCINATION_CHECK: Cleanup completed")
-
                     except Exception as detect_e:
                         logger.error(f"HALLUCINATION_CHECK: Detection failed: {detect_e}")
                         import traceback
@@ -7,6 +7,7 @@ from router.config import state, VERSION, OLLAMA_BASE
 from router.agent_manager import check_agent_runner_health
 from router.routes.chat import check_streaming_health
 from router.middleware import require_auth
+from common.caching import get_request_coalescer
 
 router = APIRouter()
 logger = logging.getLogger("router.misc")
@@ -397,6 +398,7 @@ async def evaluate_response(request: Request, query: str = "", response: str = "
 @router.get("/stats")
 async def stats(request: Request):
     require_auth(request)
+    from agent_runner.hallucination_detector import get_detection_stats
     return {
         "uptime_s": round(time.time() - state.started_at, 2),
         "requests": state.request_count,
@@ -407,5 +409,18 @@ async def stats(request: Request):
             "misses": state.cache_misses
         },
         "providers": state.provider_requests,
-        "status_codes": state.request_by_status
+        "status_codes": state.request_by_status,
+        "coalescing": get_request_coalescer().get_stats(),
+        "hallucination": get_detection_stats()
     }
+
+
+@router.get("/hallucination/{response_id}")
+async def hallucination_annotation(request: Request, response_id: str, wait_s: float = 0.0):
+    """Verdict of a background hallucination check (HALLUCINATION_CHECK_MODE=async)."""
+    require_auth(request)
+    from agent_runner.hallucination_detector import get_detection_service
+    annotation = await get_detection_service(state).get_annotation(response_id, wait_s=min(max(wait_s, 0.0), 30.0))
+    if annotation is None:
+        return {"ok": False, "error": f"No hallucination annotation for {response_id}"}
+    return {"ok": True, **annotation}
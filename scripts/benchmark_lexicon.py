@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Lexicon matcher benchmark (synthetic log corpus)
+
+Generates a log flood - mostly unclassified noise with a sprinkling of lines
+that hit known patterns - and classifies it twice: once with the old loop of
+re.search per pattern and once with the compiled PatternMatcher. Checks that
+both pick the same pattern for every line, then prints lines/second.
+
+Usage: python scripts/benchmark_lexicon.py [--lines 60000] [--patterns 80] [--hit-rate 0.1] [--seed 7]
+"""
+
+import argparse
+import os
+import random
+import re
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.lexicon import PatternMatcher
+
+SERVICES = ["agent_runner", "router", "rag_server", "memory", "mcp"]
+WORDS = ["request", "handled", "tool", "call", "cache", "miss", "latency", "ms", "user",
+         "stream", "chunk", "model", "loaded", "session", "opened", "closed", "ok", "retry"]
+
+
+def make_patterns(n: int, rng: random.Random):
+    """Lexicon-shaped patterns: a distinctive token, a gap, an optional capture."""
+    patterns = []
+    for i in range(n):
+        token = "".join(rng.choices(string.ascii_uppercase, k=6)) + f"_{i}"
+        shape = i % 4
+        if shape == 0:
+            patterns.append(rf"{token}.*port (\d+)")
+        elif shape == 1:
+            patterns.append(rf"(?P<svc>\w+) {token}")
+        elif shape == 2:
+            patterns.append(rf"{token} (failed|refused|timeout)")
+        else:
+            patterns.append(rf"{token}")
+    return patterns
+
+
+def make_line(patterns, hit_rate: float, rng: random.Random) -> str:
+    noise = " ".join(rng.choices(WORDS, k=rng.randint(6, 16)))
+    prefix = f"2026-01-01T00:00:{rng.randint(10, 59)} {rng.choice(SERVICES)} INFO "
+    if rng.random() >= hit_rate:
+        return prefix + noise
+    token = rng.choice(patterns).split(".*")[0].split(" (")[0].replace(r"(?P<svc>\w+) ", "")
+    return prefix + f"{noise} svc {token} failed port {rng.randint(1000, 9999)}"
+
+
+def naive(patterns, text):
+    for p in patterns:
+        if re.search(p, text):
+            return p
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, default=60000)
+    parser.add_argument("--patterns", type=int, default=80)
+    parser.add_argument("--hit-rate", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    patterns = make_patterns(args.patterns, rng)
+    corpus = [make_line(patterns, args.hit_rate, rng) for _ in range(args.lines)]
+
+    start = time.perf_counter()
+    expected = [naive(patterns, line) for line in corpus]
+    naive_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    matcher = PatternMatcher([(p, p) for p in patterns])
+    compile_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    got = [(hit[0] if hit else None) for hit in map(matcher.match, corpus)]
+    compiled_s = time.perf_counter() - start
+
+    mismatches = sum(1 for a, b in zip(expected, got) if a != b)
+    hits = sum(1 for e in expected if e)
+    print(f"corpus: {args.lines} lines, {args.patterns} patterns, {hits} classified")
+    print(f"re.search loop    {naive_s:8.3f}s  {args.lines / naive_s:12,.0f} lines/s")
+    print(f"PatternMatcher    {compiled_s:8.3f}s  {args.lines / compiled_s:12,.0f} lines/s"
+          f"  (compile {compile_s * 1000:.1f} ms)")
+    print(f"speedup           {naive_s / compiled_s:8.1f}x")
+    print(f"mismatches        {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Ollama residency benchmark (simulated backend)
+
+Replays a mixed workload - a steady interactive chat on the brain model plus
+bursts of background calls (consolidation, librarian, audits) on other models -
+against a simulated Ollama that holds models in a fixed memory budget and pays
+a load cost per GB on every swap. Runs once with calls sent straight through
+and once behind the ResidencyScheduler, then prints swaps and latencies.
+
+Usage: python scripts/benchmark_ollama_residency.py [--budget-gb 48] [--seed 7]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import time
+from collections import OrderedDict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.ollama_residency import Priority, ResidencyScheduler, estimate_footprint_gb
+
+CHAT_MODEL = "llama3.3:70b"
+BACKGROUND_MODELS = ["mistral:latest", "qwen2.5:32b", "llama3.2:latest"]
+LOAD_S_PER_GB = 0.004    # simulated cold-load cost
+INFER_S = 0.01           # simulated generation time
+
+
+class SimulatedOllama:
+    """One model runner at a time per model, LRU eviction past the memory budget."""
+
+    def __init__(self, budget_gb: float):
+        self.budget_gb = budget_gb
+        self.resident: "OrderedDict[str, float]" = OrderedDict()
+        self.busy: dict = {}
+        self.swaps = 0
+        self._lock = asyncio.Lock()
+
+    async def ps(self):
+        return [{"name": name, "size": int(gb * 1e9)} for name, gb in self.resident.items()]
+
+    async def generate(self, model: str):
+        async with self._lock:
+            if model in self.resident:
+                self.resident.move_to_end(model)
+                load = 0.0
+            else:
+                self.swaps += 1
+                gb = estimate_footprint_gb(model)
+                self.resident[model] = gb
+                while sum(self.resident.values()) > self.budget_gb:
+                    victim = next((m for m in self.resident if m != model and not self.busy.get(m)), None)
+                    if victim is None:
+                        break
+                    del self.resident[victim]
+                load = gb * LOAD_S_PER_GB
+            self.busy[model] = self.busy.get(model, 0) + 1
+        try:
+            await asyncio.sleep(load + INFER_S)
+        finally:
+            self.busy[model] -= 1
+
+
+async def run(budget_gb: float, seed: int, scheduled: bool):
+    rng = random.Random(seed)
+    backend = SimulatedOllama(budget_gb)
+    scheduler = ResidencyScheduler(budget_gb=budget_gb, footprints={}, max_defer_s=2.0, idle_grace_s=0.03,
+                                   evict_idle_s=0.3, busy_keep_alive="30m", ps_source=backend.ps,
+                                   ps_refresh_s=0.05)
+    chat_latency, background_latency = [], []
+
+    async def call(model, priority, sink):
+        start = time.perf_counter()
+        if scheduled:
+            async with scheduler.slot(model, priority):
+                await backend.generate(model)
+        else:
+            await backend.generate(model)
+        sink.append(time.perf_counter() - start)
+
+    async def chat():
+        for _ in range(40):
+            await call(CHAT_MODEL, Priority.INTERACTIVE, chat_latency)
+            await asyncio.sleep(rng.uniform(0.0, 0.06))
+
+    async def background():
+        tasks = []
+        for _ in range(12):
+            model = rng.choice(BACKGROUND_MODELS)
+            for _ in range(rng.randint(1, 5)):
+                tasks.append(asyncio.create_task(call(model, Priority.BACKGROUND, background_latency)))
+            await asyncio.sleep(rng.uniform(0.02, 0.15))
+        await asyncio.gather(*tasks)
+
+    start = time.perf_counter()
+    await asyncio.gather(chat(), background())
+    wall = time.perf_counter() - start
+
+    def ms(values, q):
+        return statistics.quantiles(values, n=20)[q] * 1000 if len(values) > 1 else 0.0
+
+    return {
+        "swaps": backend.swaps,
+        "chat_p50_ms": ms(chat_latency, 9),
+        "chat_p95_ms": ms(chat_latency, 18),
+        "background_p95_ms": ms(background_latency, 18),
+        "wall_s": wall,
+        "scheduler": scheduler.get_stats() if scheduled else None,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-gb", type=float, default=48.0)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"Simulated Ollama, budget {args.budget_gb:.0f} GB, chat model {CHAT_MODEL}")
+    for label, scheduled in (("direct", False), ("scheduled", True)):
+        r = await run(args.budget_gb, args.seed, scheduled)
+        print(f"\n[{label}]")
+        print(f"  swaps:              {r['swaps']}")
+        print(f"  chat p50 / p95:     {r['chat_p50_ms']:.1f} / {r['chat_p95_ms']:.1f} ms")
+        print(f"  background p95:     {r['background_p95_ms']:.1f} ms")
+        print(f"  wall:               {r['wall_s']:.2f} s")
+        if r["scheduler"]:
+            s = r["scheduler"]
+            print(f"  resident hits: {s['resident_hits']}  deferred: {s['deferred']}  "
+                  f"batches: {s['batches']}  timeouts: {s['deferral_timeouts']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
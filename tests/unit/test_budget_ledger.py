@@ -0,0 +1,77 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+import common.budget as budget
+from common.budget import BudgetTracker
+
+
+@pytest.fixture(autouse=True)
+def _no_legacy_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(budget, "BUDGET_FILE", str(tmp_path / "missing.json"))
+    monkeypatch.setattr("common.notifications.notify_high", lambda **kwargs: None)
+    monkeypatch.setattr("common.notifications.notify_critical", lambda **kwargs: None)
+
+
+def test_processes_share_one_ledger(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    router, runner = BudgetTracker(5.0, db_path=db), BudgetTracker(5.0, db_path=db)
+
+    router.record_usage("openai", 1.5, model="gpt-4o", request_type="chat")
+    runner.record_usage("agent_runner", 2.0, model="gpt-4o", request_type="agent_stream")
+    runner.record_usage("agent_runner", 0.5, model="gpt-4o-mini", request_type="agent_stream")
+    router.flush()
+
+    assert router.current_spend == pytest.approx(4.0)
+    assert router.check_budget(0.5) and not router.check_budget(1.5)
+    breakdown = runner.get_breakdown()
+    assert breakdown[0] == {"provider": "agent_runner", "model": "gpt-4o", "request_type": "agent_stream",
+                            "cost_usd": 2.0, "calls": 1}
+    assert sum(row["calls"] for row in breakdown) == 3
+
+
+@pytest.mark.asyncio
+async def test_record_usage_writes_behind(tmp_path):
+    tracker = BudgetTracker(10.0, db_path=str(tmp_path / "ledger.db"), flush_interval_s=0.01)
+    flushes = tracker.flushes
+
+    for _ in range(50):
+        tracker.record_usage("openai", 0.01, model="gpt-4o")
+    assert tracker.current_spend == pytest.approx(0.5)
+    assert tracker.flushes == flushes  # nothing written on the hot path
+
+    await asyncio.sleep(0.1)
+    assert tracker.flushes == flushes + 1
+    assert tracker.get_breakdown()[0]["calls"] == 50
+    tracker.close()
+
+
+def test_rolling_window_and_reset(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    tracker = BudgetTracker(10.0, db_path=db, window_s=3600)
+    tracker._pending[(int((time.time() - 7200) // budget.BUDGET_BUCKET_S), "openai", "gpt-4o", "chat")] = [3.0, 1]
+    tracker.record_usage("openai", 1.0, model="gpt-4o")
+    tracker.flush()
+    assert tracker.current_spend == pytest.approx(1.0)  # 2h-old spend is outside the window
+    assert len(tracker.get_breakdown(window_s=3 * 3600)) == 1
+
+    tracker.reset()
+    other = BudgetTracker(10.0, db_path=db, window_s=3600)
+    assert other.current_spend == 0.0 and other.last_reset == tracker.last_reset
+    other.record_usage("openai", 0.25, model="gpt-4o")
+    other.flush()
+    assert other.current_spend == pytest.approx(0.25)
+
+
+def test_legacy_budget_file_is_imported_once(monkeypatch, tmp_path):
+    legacy = tmp_path / "budget.json"
+    legacy.write_text(json.dumps({"current_spend": 2.5, "last_reset": time.time() - 60, "daily_limit_usd": 20.0}))
+    monkeypatch.setattr(budget, "BUDGET_FILE", str(legacy))
+    db = str(tmp_path / "ledger.db")
+
+    tracker = BudgetTracker(db_path=db)
+    assert tracker.daily_limit_usd == 20.0 and tracker.current_spend == pytest.approx(2.5)
+    tracker.close()
+    assert BudgetTracker(db_path=db).current_spend == pytest.approx(2.5)
@@ -0,0 +1,69 @@
+import pytest
+
+from common.caching import PersistentEmbeddingCache
+
+
+def test_round_trip_survives_reload(tmp_path):
+    cache = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=10)
+    cache.set("m1", "hello", [0.5, 0.25, -1.0])
+    assert cache.get("m1", "hello") == [0.5, 0.25, -1.0]
+    cache.close()
+
+    reloaded = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=10)
+    assert reloaded.get("m1", "hello") == [0.5, 0.25, -1.0]
+    assert reloaded.get("m1", "missing") is None
+    stats = reloaded.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.5)
+    reloaded.close()
+
+
+def test_lru_eviction_reuses_oldest_slot(tmp_path):
+    cache = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=2)
+    cache.set("m1", "a", [1.0])
+    cache.set("m1", "b", [2.0])
+    cache.get("m1", "a")  # 'b' is now least recently used
+    cache.set("m1", "c", [3.0])
+
+    assert cache.get("m1", "b") is None
+    assert cache.get("m1", "a") == [1.0]
+    assert cache.get("m1", "c") == [3.0]
+    assert cache.get_stats()["evictions"] == 1
+    cache.close()
+
+
+def test_model_change_invalidates_store(tmp_path):
+    cache = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=4)
+    cache.set("m1", "text", [1.0, 2.0])
+    cache.set("m2", "other", [3.0, 4.0, 5.0])
+
+    assert cache.get("m1", "text") is None
+    assert cache.get("m2", "other") == [3.0, 4.0, 5.0]
+    assert cache.get_stats()["invalidations"] == 1
+    cache.close()
+
+
+def test_two_caches_share_one_directory(tmp_path):
+    a = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=2)
+    b = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=2)
+    a.set("m1", "from-a", [1.0, 0.0])
+    b.set("m1", "from-b", [0.0, 1.0])  # Joins a's store and skips the slot a filled
+
+    assert a.get("m1", "from-a") == [1.0, 0.0]
+    assert b.get("m1", "from-a") == [1.0, 0.0]
+    assert b.get("m1", "from-b") == [0.0, 1.0]
+
+    # b evicts and reuses a slot a still indexes: a must miss, not return b's vector
+    b.set("m1", "third", [0.5, 0.5])
+    hits = [a.get("m1", t) for t in ("from-a", "from-b")]
+    assert [0.5, 0.5] not in hits
+    assert a.get_stats()["conflicts"] == 1
+
+    # Each process rewrites the index; entries are validated against the slots on load
+    a.flush()
+    b.close()
+    a.close()
+    reloaded = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=2)
+    assert reloaded.get("m1", "third") == [0.5, 0.5]
+    assert reloaded.get_stats()["size"] == 2
+    reloaded.close()
@@ -0,0 +1,106 @@
+import asyncio
+import json
+import threading
+
+import httpx
+import pytest
+
+from agent_runner.embedding_service import EmbeddingService
+from common.caching import PersistentEmbeddingCache
+
+
+def _service(handler, **kwargs):
+    service = EmbeddingService(state=None, **kwargs)
+    service._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return service
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_are_coalesced_into_one_call():
+    calls = []
+
+    def handler(request):
+        body = json.loads(request.content)
+        calls.append((request.url.path, body["input"]))
+        return httpx.Response(200, json={"embeddings": [[float(len(t))] for t in body["input"]]})
+
+    service = _service(handler, batch_window=0.02)
+    texts = ["a" * i for i in range(1, 21)]
+    vectors = await asyncio.gather(*(service.get_embedding(t) for t in texts))
+
+    assert vectors == [[float(i)] for i in range(1, 21)]
+    assert len(calls) == 1
+    assert calls[0][0] == "/api/embed"
+    assert calls[0][1] == texts
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_get_embeddings_respects_max_batch():
+    sizes = []
+
+    def handler(request):
+        inputs = json.loads(request.content)["input"]
+        sizes.append(len(inputs))
+        return httpx.Response(200, json={"embeddings": [[1.0]] * len(inputs)})
+
+    service = _service(handler, max_batch=8)
+    vectors = await service.get_embeddings([f"t{i}" for i in range(20)])
+
+    assert len(vectors) == 20
+    assert max(sizes) <= 8
+    assert sum(sizes) == 20
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_legacy_ollama_endpoint():
+    def handler(request):
+        if request.url.path == "/api/embed":
+            return httpx.Response(404)
+        prompt = json.loads(request.content)["prompt"]
+        return httpx.Response(200, json={"embedding": [float(len(prompt))]})
+
+    service = _service(handler)
+    assert await service.get_embeddings(["ab", "abcd"]) == [[2.0], [4.0]]
+    assert service._legacy_ollama
+    await service.aclose()
+
+
+@pytest.mark.asyncio
+async def test_persistent_cache_opens_and_activates_off_the_event_loop(tmp_path, monkeypatch):
+    seed = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=8)
+    seed.set("m1", "cached", [1.0, 0.0])
+    seed.close()
+
+    cache = PersistentEmbeddingCache(cache_dir=str(tmp_path), capacity=8)
+    loop_thread = threading.current_thread()
+    threads = []
+    for name in ("_load", "_activate"):
+        original = getattr(cache, name)
+
+        def record(*args, _original=original, _name=name):
+            threads.append((_name, threading.current_thread() is loop_thread))
+            return _original(*args)
+
+        monkeypatch.setattr(cache, name, record)
+
+    current = {"model": "m1"}
+    monkeypatch.setattr(EmbeddingService, "model", property(lambda self: current["model"]))
+    service = _service(lambda request: httpx.Response(200, json={
+        "data": [{"index": 0, "embedding": [0.5, 0.5, 0.5]}], "embeddings": [[0.5, 0.5, 0.5]],
+    }), cache=cache)
+    assert await service.get_embedding("cached") == [1.0, 0.0]
+    assert threads == [("_load", False)]
+
+    current["model"] = "m2"  # New model: the store is re-bound in a worker thread before set()
+    assert await service.get_embedding("fresh") == [0.5, 0.5, 0.5]
+    assert threads[1:] == [("_activate", False)]
+    assert cache.get("m2", "fresh") == [0.5, 0.5, 0.5]
+
+    # While a worker thread holds the store, the request path misses instead of waiting
+    with cache._state_lock:
+        assert cache.get("m1", "cached") is None
+        cache.set("m1", "other", [0.0, 1.0])
+    assert cache.get("m1", "other") is None
+    cache.close()
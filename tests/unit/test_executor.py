@@ -83,3 +83,144 @@ async def test_execute_tool_call_mcp(executor, mock_state):
         res = await executor.execute_tool_call(tool_call)
         assert res == {"ok": True, "result": "mcp result"}
         mock_proxy.assert_called_once_with(mock_state, "server1", "test_tool", {"arg1": "val1"})
+
+@pytest.mark.asyncio
+async def test_discovery_runs_servers_concurrently(executor, mock_state):
+    mock_state.mcp_servers = {f"srv{i}": {"cmd": ["x"]} for i in range(4)}
+    mock_state.vector_store = None
+    active = 0
+    peak = 0
+
+    async def fake_discover(server_name, cfg):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        executor._store_server_tools(server_name, [{"type": "function", "function": {"name": f"{server_name}_tool", "description": "d"}}])
+        return True
+
+    executor._discover_single_server = fake_discover
+    with patch.object(executor, "_persist_tool_registry"):
+        await executor.discover_mcp_tools()
+
+    assert peak > 1
+    assert set(executor.mcp_tool_cache) == set(mock_state.mcp_servers)
+    assert "srv0_tool" in executor.tool_menu_summary
+
+@pytest.mark.asyncio
+async def test_warm_start_from_snapshot(mock_state, tmp_path):
+    mock_state.agent_fs_root = str(tmp_path)
+    mock_state.mcp_servers = {"live": {"cmd": ["a"]}, "changed": {"cmd": ["b"]}}
+    mock_state.vector_store = None
+    tool = {"type": "function", "function": {"name": "t", "description": "d", "parameters": {}}}
+
+    writer = ToolExecutor(mock_state)
+    writer.mcp_tool_cache = {"live": [tool], "changed": [tool]}
+    writer._persist_tool_registry()
+
+    mock_state.mcp_servers["changed"] = {"cmd": ["b", "--new-flag"]}
+    reader = ToolExecutor(mock_state)
+    started = asyncio.Event()
+
+    async def slow_discover():
+        started.set()
+        await asyncio.sleep(3600)
+
+    reader.discover_mcp_tools = slow_discover
+    assert await reader.start_mcp_discovery() is True
+    # Catalog is usable before live discovery finishes; changed configs are not restored
+    assert list(reader.mcp_tool_cache) == ["live"]
+    assert reader._snapshot_servers == {"live"}
+    await started.wait()
+    reader._background_discovery.cancel()
+
+@pytest.mark.asyncio
+async def test_failed_refresh_drops_snapshot_tools(executor, mock_state):
+    mock_state.mcp_servers = {"stale": {"cmd": ["x"]}}
+    executor.mcp_tool_cache = {"stale": [{"type": "function", "function": {"name": "t", "description": ""}}]}
+    executor._snapshot_servers = {"stale"}
+    executor._discover_single_server = AsyncMock(return_value=False)
+
+    with patch.object(executor, "_persist_tool_registry"):
+        await executor.discover_mcp_tools()
+
+    assert "stale" not in executor.mcp_tool_cache
+
+@pytest.mark.asyncio
+async def test_catalog_rebuilt_only_when_tool_set_changes(executor, mock_state):
+    mock_state.mcp_servers = {"weather": {"cmd": ["x"]}}
+    mock_state.internet_available = True
+    executor._store_server_tools("weather", [
+        {"type": "function", "function": {"name": "forecast", "description": "Get forecast", "parameters": {"type": "object", "required": ["city"]}}}
+    ])
+
+    catalog = executor._get_catalog()
+    assert executor._get_catalog() is catalog
+    assert catalog.server_of["forecast"] == "weather"
+    assert executor._find_tool_schema("forecast") == {"type": "object", "required": ["city"]}
+    assert executor._find_tool_schema("list_dir") is not None
+
+    payload = catalog.mcp_payloads["weather"][0]
+    assert payload["function"]["name"] == "mcp__weather__forecast"
+    assert payload["function"]["description"] == "[MCP] Get forecast"
+
+    # Turns share the prebuilt payloads instead of re-tagging copies
+    first = await executor.get_all_tools(precomputed_intent={"target_servers": ["weather", "filesystem"]})
+    second = await executor.get_all_tools(precomputed_intent={"target_servers": ["weather", "filesystem"]})
+    wrapped = [t for t in first if t["function"]["name"] == "mcp__weather__forecast"]
+    assert wrapped and wrapped[0] is payload
+    assert [id(t) for t in first] == [id(t) for t in second]
+    assert executor._get_catalog() is catalog
+
+    executor._store_server_tools("weather", None)
+    assert executor._get_catalog() is not catalog
+    assert "forecast" not in executor._get_catalog().server_of
+
+def test_remove_server_tools_swaps_catalog(executor, mock_state):
+    mock_state.vector_store = MagicMock()
+    tool = {"type": "function", "function": {"name": "forecast", "description": "d"}}
+    executor._store_server_tools("weather", [tool])
+    before = executor.mcp_tool_cache
+    catalog = executor._get_catalog()
+
+    assert executor.remove_server_tools("weather") == [tool]
+    assert "weather" in before  # Readers holding the old dict are unaffected
+    assert "weather" not in executor.mcp_tool_cache
+    assert executor._get_catalog() is not catalog
+    mock_state.vector_store.remove_tools.assert_called_once_with(["forecast"])
+    assert executor.remove_server_tools("weather") == []
+
+@pytest.mark.asyncio
+async def test_wait_for_discovery_follows_background_task(mock_state, tmp_path):
+    executor = ToolExecutor(mock_state)
+    await executor.wait_for_discovery()  # No warm start: returns immediately
+
+    finished = []
+
+    async def discover():
+        await asyncio.sleep(0.01)
+        finished.append(True)
+
+    executor._background_discovery = asyncio.create_task(discover())
+    await executor.wait_for_discovery()
+    assert finished == [True]
+
+def test_keyword_filters_use_catalog_index(executor):
+    catalog = executor._get_catalog()
+    tagged_fs = list(catalog.tagged("filesystem", "[LOCAL SYSTEM]"))
+    assert tagged_fs and tagged_fs[0]["function"]["description"].startswith("[LOCAL SYSTEM]")
+    assert catalog.tagged("filesystem", "[LOCAL SYSTEM]")[0] is tagged_fs[0]
+
+    # Tagged payloads carry "system" via the tag, matching the old substring scan
+    assert executor._filter_tools_by_keywords("run it", tagged_fs) == tagged_fs
+    foreign = {"function": {"name": "weather_now", "description": "current conditions"}}
+    assert executor._filter_tools_by_keywords("weather today", [foreign]) == [foreign]
+    assert executor._filter_tools_by_domain("weather today", [foreign]) == [foreign]
+
+def test_catalog_vocabulary_covers_filter_tables():
+    from agent_runner.tool_catalog import (
+        KEYWORD_VOCABULARY, NAME_VOCABULARY, QUERY_DOMAINS, QUERY_KEYWORD_CATEGORIES,
+    )
+    assert {w for words in QUERY_KEYWORD_CATEGORIES.values() for w in words} == set(KEYWORD_VOCABULARY)
+    assert {w for _, words, _ in QUERY_DOMAINS for w in words} == set(NAME_VOCABULARY)
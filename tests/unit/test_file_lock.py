@@ -0,0 +1,58 @@
+import asyncio
+
+import pytest
+
+from common.file_lock import AsyncFileLock
+from common.metrics_core import MetricsRegistry
+
+
+@pytest.mark.asyncio
+async def test_exclusive_waiter_does_not_block_event_loop(tmp_path):
+    lock = AsyncFileLock(tmp_path / "memory.lock")
+    ticks = 0
+    order = []
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    async def holder():
+        async with lock.acquire():
+            order.append("holder")
+            await asyncio.sleep(0.1)
+        order.append("released")
+
+    async def waiter():
+        await asyncio.sleep(0.01)
+        async with lock.acquire():
+            order.append("waiter")
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.gather(holder(), waiter())
+    tick_task.cancel()
+
+    assert order == ["holder", "released", "waiter"]
+    assert ticks >= 10
+    assert lock.wait_ms["exclusive"].count == 2
+    assert lock.wait_ms["exclusive"].quantile(1.0) >= 50
+
+
+@pytest.mark.asyncio
+async def test_shared_holders_overlap_and_exclusive_times_out(tmp_path):
+    registry = MetricsRegistry()
+    lock = AsyncFileLock(tmp_path / "memory.lock", registry, "memory_lock")
+
+    async with lock.acquire(shared=True):
+        async with lock.acquire(shared=True, timeout=0.05):
+            pass
+        with pytest.raises(asyncio.TimeoutError):
+            async with lock.acquire(timeout=0.05):
+                pass
+
+    assert registry.counters["memory_lock_timeouts_total"].value == 1
+    assert "memory_lock_wait_ms" in registry.render_prometheus()
+    # Released: an exclusive holder gets it immediately
+    async with lock.acquire(timeout=0.05):
+        pass
@@ -0,0 +1,205 @@
+import asyncio
+
+import pytest
+
+import agent_runner.hallucination_detector as hallucination_detector
+from agent_runner.hallucination_detector import (
+    DetectionLayer,
+    DetectorConfig,
+    HallucinationDetectionService,
+    HallucinationDetector,
+)
+
+
+def _detector(**config):
+    detector = HallucinationDetector(None, DetectorConfig(enabled=True, **config))
+    for layer in detector.detectors:
+        detector.detectors[layer] = []
+    return detector
+
+
+@pytest.mark.asyncio
+async def test_layer_detectors_run_concurrently_in_order():
+    detector = _detector()
+    running = 0
+    peak = 0
+
+    def make(name, delay):
+        async def check(context):
+            nonlocal running, peak
+            running += 1
+            peak = max(peak, running)
+            await asyncio.sleep(delay)
+            running -= 1
+            return [{"type": name}]
+        check.__name__ = name
+        return check
+
+    detector.detectors[DetectionLayer.STATISTICAL] = [make("slow", 0.02), make("fast", 0.0)]
+    issues = await detector._run_detection_layer(DetectionLayer.STATISTICAL, {})
+
+    assert peak == 2
+    assert [i["type"] for i in issues] == ["slow", "fast"]
+
+
+@pytest.mark.asyncio
+async def test_llm_detector_bounded_by_timeout():
+    detector = _detector(llm_check_timeout_s=0.01)
+
+    async def _detect_llm_semantic_coherence(context):
+        await asyncio.sleep(1)
+        return [{"type": "late"}]
+
+    async def boom(context):
+        raise RuntimeError("detector bug")
+
+    detector.detectors[DetectionLayer.SEMANTIC] = [_detect_llm_semantic_coherence, boom]
+    assert await detector._run_detection_layer(DetectionLayer.SEMANTIC, {}) == []
+    assert detector.llm_timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_early_exit_cancels_pending_detectors_and_later_layers():
+    detector = _detector()
+    finished = []
+
+    def make(name, delay, severity=None):
+        async def check(context):
+            await asyncio.sleep(delay)
+            finished.append(name)
+            return [{"type": name, "severity": severity, "confidence": 0.9}] if severity else []
+        check.__name__ = name
+        return check
+
+    detector.detectors[DetectionLayer.STATISTICAL] = [make("slow", 1.0), make("critical", 0.0, "critical")]
+    detector.detectors[DetectionLayer.SEMANTIC] = [make("semantic", 0.0, "low")]
+
+    result = await detector.detect_hallucinations("Some answer.", user_query="what is it")
+    assert result.is_hallucination and result.early_exit
+    assert finished == ["critical"]
+    assert set(result.layer_results) == {"statistical"}
+    assert "critical" in result.detector_timings_ms and "slow" not in result.detector_timings_ms
+    stats = detector.get_stats()
+    assert stats["early_exits"] == 1 and stats["detectors_cancelled"] == 1
+    assert stats["detector_latency_ms"]["critical"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_llm_detectors_skipped_when_cheap_layers_clean():
+    detector = _detector(detector_timeout_s=0.01)
+    calls = []
+
+    async def _detect_llm_semantic_coherence(context):
+        calls.append("llm")
+        return [{"type": "llm", "severity": "medium", "confidence": 0.5}]
+
+    async def cheap(context):
+        return []
+
+    async def stuck(context):
+        await asyncio.sleep(1)
+
+    detector.detectors[DetectionLayer.SEMANTIC] = [cheap, stuck, _detect_llm_semantic_coherence]
+    result = await detector.detect_hallucinations("Clean answer.", user_query="hello there")
+    assert calls == [] and not result.detected_issues
+    assert detector.llm_skipped == 1 and detector.detector_timeouts == 1
+
+    async def suspicious(context):
+        return [{"type": "drift", "severity": "low", "confidence": 0.4}]
+
+    detector.detectors[DetectionLayer.SEMANTIC] = [suspicious, _detect_llm_semantic_coherence]
+    result = await detector.detect_hallucinations("Odd answer.", user_query="hello there")
+    assert calls == ["llm"]
+    assert [i["type"] for i in result.layer_results["semantic"]] == ["drift", "llm"]
+
+
+@pytest.mark.asyncio
+async def test_result_cache_is_bounded_and_keyed_on_full_response():
+    detector = _detector(cache_max_entries=2)
+    prefix = "x" * 600
+
+    first = await detector.detect_hallucinations(prefix + "a", user_query="q")
+    second = await detector.detect_hallucinations(prefix + "b", user_query="q")
+    assert first is not second
+    assert await detector.detect_hallucinations(prefix + "a", user_query="q") is first
+
+    await detector.detect_hallucinations("third response", user_query="q")
+    assert len(detector.result_cache) == 2
+    # "b" was least recently used and got evicted
+    assert detector._generate_cache_key(prefix + "b", None, "q") not in detector.result_cache
+
+
+@pytest.mark.asyncio
+async def test_service_records_background_annotations():
+    service = HallucinationDetectionService(None, DetectorConfig(enabled=True), max_annotations=1)
+    for layer in service.detector.detectors:
+        service.detector.detectors[layer] = []
+
+    service.submit("chatcmpl-1", "A perfectly ordinary answer.", user_query="question")
+    annotation = await service.get_annotation("chatcmpl-1", wait_s=1.0)
+    assert annotation["status"] == "done"
+    assert annotation["result"]["is_hallucination"] is False
+
+    service.submit("chatcmpl-2", "Another answer.", user_query="question")
+    await service.get_annotation("chatcmpl-2", wait_s=1.0)
+    assert await service.get_annotation("chatcmpl-1") is None
+    assert service.get_stats()["background_checks"] == 2
+    await service.close()
+
+
+@pytest.mark.asyncio
+async def test_llm_deferral_ends_inside_detector_deadline(monkeypatch):
+    import httpx
+
+    import common.ollama_residency as residency
+    from common.ollama_residency import Priority, ResidencyScheduler
+
+    async def no_ps():
+        raise RuntimeError("no ollama")
+
+    # Auditor never becomes resident and the chat model stays busy: the scheduler alone would defer 60s
+    scheduler = ResidencyScheduler(budget_gb=50.0, footprints={"chat:70b": 40.0, "auditor:70b": 40.0},
+                                   max_defer_s=60.0, idle_grace_s=60.0, evict_idle_s=60.0,
+                                   ps_source=no_ps, ps_refresh_s=60.0)
+    monkeypatch.setattr(residency, "_residency_scheduler", scheduler)
+
+    detector = _detector(llm_check_timeout_s=0.5, llm_max_defer_s=5.0)
+    detector.llm_analyzer.model_name = "auditor:70b"
+    assert detector.llm_analyzer.max_defer_s == 0.25  # Capped at half the detector budget
+
+    async def generate(request):
+        return httpx.Response(200, json={"response": "0.1"})
+
+    detector.llm_analyzer.client = httpx.AsyncClient(transport=httpx.MockTransport(generate))
+    context = {"response": "Paris is the capital of Germany.", "user_query": "What is the capital of France?"}
+    try:
+        async with scheduler.slot("chat:70b", Priority.INTERACTIVE):
+            issues = await detector._run_detector(detector._detect_llm_semantic_coherence, context)
+    finally:
+        await detector.llm_analyzer.client.aclose()
+
+    # Deferred, then loaded late and answered - not cancelled by the detector deadline
+    assert [i["type"] for i in issues] == ["llm_semantic_incoherence"]
+    assert scheduler.deferral_timeouts == 1 and detector.llm_timeouts == 0
+
+
+@pytest.mark.asyncio
+async def test_stats_do_not_build_service_and_close_settles_pending(monkeypatch):
+    monkeypatch.setattr(hallucination_detector, "_detection_service", None)
+    assert hallucination_detector.get_detection_stats() == {}
+    assert hallucination_detector._detection_service is None
+
+    service = hallucination_detector.get_detection_service(None, DetectorConfig(enabled=True))
+    started = asyncio.Event()
+
+    async def slow_detect(response, **kwargs):
+        started.set()
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(service.detector, "detect_hallucinations", slow_detect)
+    task = service.submit("chatcmpl-1", "answer")
+    await started.wait()
+    assert hallucination_detector.get_detection_stats()["pending"] == 1
+
+    await hallucination_detector.close_detection_service()
+    assert task.done() and hallucination_detector._detection_service is None
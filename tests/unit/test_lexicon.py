@@ -0,0 +1,74 @@
+import re
+
+import yaml
+
+import common.lexicon as lexicon
+from common.lexicon import LexiconRegistry, PatternMatcher
+
+PATTERNS = [
+    r"Truncating to (\d+)",
+    r"ConnectionRefusedError.*(8000|5432)",
+    r"(?P<svc>\w+) timed out",
+    r"(a+)b\1",                    # no required literal beyond "b"
+    r"(?i)warning",                # case-insensitive: no literal prefilter
+    r"Connection",
+    r"ok|fail",                    # top-level branch: no literal prefilter
+    r"[invalid",                   # skipped
+]
+
+LINES = [
+    "Truncating to 120 tools",
+    "ConnectionRefusedError: port 5432",
+    "late Connection then Truncating to 5",
+    "db timed out after ConnectionRefusedError 8000",
+    "aab aaba",
+    "WARNING: disk",
+    "nothing to see",
+    "it failed",
+    "",
+]
+
+
+def _naive(patterns, text, anchored=False):
+    for p in patterns:
+        try:
+            m = re.match(p, text) if anchored else re.search(p, text)
+        except re.error:
+            continue
+        if m:
+            return p, m.group(0)
+    return None
+
+
+def test_first_match_semantics_match_sequential_loop():
+    for anchored in (False, True):
+        matcher = PatternMatcher([(p, p) for p in PATTERNS], anchored=anchored)
+        assert len(matcher) == len(PATTERNS) - 1
+        for line in LINES:
+            hit = matcher.match(line)
+            got = (hit[0], hit[1].group(0)) if hit else None
+            assert got == _naive(PATTERNS, line, anchored), (anchored, line)
+
+
+def test_named_groups_survive_for_templates(tmp_path):
+    (tmp_path / "svc.yaml").write_text(yaml.safe_dump([
+        {"label": "TIMEOUT", "regex": r"(?P<svc>\w+) timed out", "template": "{svc} slow"},
+    ]))
+    registry = LexiconRegistry(str(tmp_path))
+    result = registry.classify("svc", "db timed out")
+    assert result.label == "TIMEOUT" and result.formatted_message == "db slow"
+
+
+def test_learned_patterns_hot_reload(tmp_path):
+    (tmp_path / "svc.yaml").write_text(yaml.safe_dump([{"label": "OK", "regex": "started"}]))
+    registry = LexiconRegistry(str(tmp_path))
+    assert registry.classify("svc", "TestError: ConnectionRefused").label == "NOISE"
+
+    (tmp_path / "learned_patterns.yaml").write_text(yaml.safe_dump({"patterns": [
+        {"pattern": "TestError.*ConnectionRefused", "label": "LEARNED", "severity": "WARNING"},
+    ]}))
+    lexicon.invalidate_lexicons()
+
+    assert registry.classify("svc", "TestError: ConnectionRefused").label == "LEARNED"
+    assert registry.classify("other", "TestError: ConnectionRefused").severity == "WARNING"
+    assert registry.classify("svc", "service started").label == "OK"
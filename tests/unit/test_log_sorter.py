@@ -0,0 +1,165 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+import yaml
+
+import agent_runner.services.log_sorter as log_sorter
+from agent_runner.services.log_sorter import LogSorterService
+
+
+def _sorter(monkeypatch, tmp_path, handler):
+    lex_dir = tmp_path / "config" / "lexicons"
+    lex_dir.mkdir(parents=True)
+    (lex_dir / "router.yaml").write_text(yaml.safe_dump([
+        {"label": "DB_DOWN", "regex": r"refused.*port (?P<port>\d+)", "severity": "CRITICAL", "template": "db {port}"},
+    ]))
+    monkeypatch.chdir(tmp_path)
+    sorter = LogSorterService({})
+    sorter.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return sorter
+
+
+def _rows(n, message="connection refused on port 8000"):
+    return [{"id": f"diagnostic_log:r{i}", "service": "router", "message": message, "timestamp": f"t{i}"}
+            for i in range(n)]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_acknowledged_in_one_statement(monkeypatch, tmp_path):
+    posts = []
+
+    def handler(request):
+        posts.append(request.content.decode())
+        return httpx.Response(200, json=[])
+
+    sorter = _sorter(monkeypatch, tmp_path, handler)
+    rows = _rows(120) + [{"id": "diagnostic_log:x", "service": "router", "message": "odd thing", "timestamp": "t"}]
+    assert all(sorter.submit(row) for row in rows)
+    assert not sorter.submit(rows[0])  # already queued
+
+    before = sorter.rows_processed.value
+    batch = await sorter._next_batch()
+    assert len(batch) == 121  # adaptive: everything queued, not a fixed 50
+    await sorter._process_batch(batch)
+
+    assert len(posts) == 1
+    assert "FOR $row IN $rows" in posts[0]
+    acks = json.loads(posts[0].split("LET $rows = ", 1)[1].split("; FOR", 1)[0])
+    assert acks[0] == {"k": "r0", "c": "DB_DOWN", "s": "CRITICAL", "r": False}
+    assert acks[-1] == {"k": "x", "c": "UNKNOWN", "s": None, "r": True}
+    assert sorter.rows_processed.value - before == 121
+    assert "db 8000" in (tmp_path / "logs" / "live_stream.md").read_text()
+
+
+@pytest.mark.asyncio
+async def test_deep_backlog_is_shed_with_one_delete(monkeypatch, tmp_path):
+    posts = []
+
+    def handler(request):
+        posts.append(request.content.decode())
+        return httpx.Response(200, json=[])
+
+    monkeypatch.setattr(log_sorter, "LOG_SORTER_SHED_DEPTH", 10)
+    sorter = _sorter(monkeypatch, tmp_path, handler)
+    for row in _rows(30):
+        sorter.submit(row)
+
+    before = sorter.rows_shed.value
+    batch = [sorter._queue.get_nowait() for _ in range(5)]
+    await sorter._process_batch(batch)
+
+    assert len(posts) == 1 and "DELETE type::thing('diagnostic_log', $k)" in posts[0]
+    assert sorter.rows_shed.value - before == 5
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_rows_already_queued(monkeypatch, tmp_path):
+    rows = _rows(3)
+
+    def handler(request):
+        return httpx.Response(200, json=[{"status": "OK", "result": None}] * 3 + [{"status": "OK", "result": rows}])
+
+    sorter = _sorter(monkeypatch, tmp_path, handler)
+    sorter.submit(rows[0])
+
+    assert await sorter._sweep() == 2
+    assert sorter._queue.qsize() == 3
+
+
+@pytest.mark.asyncio
+async def test_drain_loop_releases_keys_and_tracks_rate(monkeypatch, tmp_path):
+    sorter = _sorter(monkeypatch, tmp_path, lambda request: httpx.Response(200, json=[]))
+    sorter.running = True
+    before = sorter.rows_processed.value
+    for row in _rows(5):
+        sorter.submit(row)
+
+    task = asyncio.create_task(sorter._drain_loop())
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if sorter.rows_processed.value - before == 5:
+            break
+    task.cancel()
+
+    assert sorter.rows_processed.value - before == 5
+    assert not sorter._pending_keys and sorter.drain_rate > 0
+
+
+def test_record_keys_keep_their_type():
+    from surrealdb import RecordID
+
+    assert log_sorter._record_key("diagnostic_log:42") == 42
+    assert log_sorter._record_key("diagnostic_log:⟨42⟩") == "42"
+    assert log_sorter._record_key("diagnostic_log:abc") == "abc"
+    assert log_sorter._record_key(RecordID("diagnostic_log", 42)) == 42
+
+
+@pytest.mark.asyncio
+async def test_numeric_ids_are_acknowledged_as_numbers(monkeypatch, tmp_path):
+    posts = []
+
+    def handler(request):
+        posts.append(request.content.decode())
+        return httpx.Response(200, json=[])
+
+    sorter = _sorter(monkeypatch, tmp_path, handler)
+    sorter.submit({"id": "diagnostic_log:7", "service": "router", "message": "odd thing", "timestamp": "t"})
+    await sorter._process_batch(await sorter._next_batch())
+
+    acks = json.loads(posts[0].split("LET $rows = ", 1)[1].split("; FOR", 1)[0])
+    assert acks[0]["k"] == 7
+
+
+@pytest.mark.asyncio
+async def test_sweep_skips_rows_acked_while_its_select_was_in_flight(monkeypatch, tmp_path):
+    rows = _rows(3)
+    select_sent = asyncio.Event()
+    release_select = asyncio.Event()
+
+    async def handler(request):
+        if b"SELECT" in request.content:
+            select_sent.set()
+            await release_select.wait()
+            # Snapshot taken before the ack: r0 still reads as unhandled
+            return httpx.Response(200, json=[{"status": "OK", "result": None}] * 3 + [{"status": "OK", "result": rows}])
+        return httpx.Response(200, json=[])
+
+    sorter = _sorter(monkeypatch, tmp_path, handler)
+    sorter.running = True
+    sorter.submit(rows[0])  # Delivered by LIVE
+    sweep = asyncio.create_task(sorter._sweep())
+    await select_sent.wait()
+
+    drain = asyncio.create_task(sorter._drain_loop())
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if not sorter._pending_keys:
+            break
+    assert not sorter._pending_keys  # r0 acknowledged and released
+
+    release_select.set()
+    assert await sweep == 2
+    drain.cancel()
+    assert not sorter._open_sweeps
@@ -0,0 +1,152 @@
+import httpx
+import pytest
+
+import common.caching
+from agent_runner.memory_server import MemoryServer
+
+
+def _server(monkeypatch, tmp_path, handler):
+    monkeypatch.setenv("EMBEDDING_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(common.caching, "_persistent_embedding_cache", None)
+    server = MemoryServer()
+    server.query_mode = "http"
+    server.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return server
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_groups_records_and_reports_per_record(monkeypatch, tmp_path):
+    posts = []
+
+    def handler(request):
+        sql = request.content.decode()
+        posts.append(sql)
+        # One result per statement: USE + (LET name, LET emb, UPSERT) per record
+        statements = [line for line in sql.strip().split("\n") if line.strip()]
+        results = [{"status": "OK", "result": None} for _ in statements]
+        for i, line in enumerate(statements):
+            if line.startswith("UPSERT") and "$name__1" in line:
+                results[i] = {"status": "ERR", "result": "bad record"}
+        return httpx.Response(200, json=results)
+
+    server = _server(monkeypatch, tmp_path, handler)
+    records = [{"name": f"tool_{i}", "emb": [0.1, 0.2]} for i in range(5)]
+    result = await server.execute_batch("UPSERT type::thing('t', $name) SET embedding = $emb;", records, batch_size=3)
+
+    assert result["round_trips"] == 2
+    assert result["written"] == 3 and result["failed"] == 2
+    # Record 1 fails in both batches (local index 1 -> global 1 and 4)
+    assert [e["index"] for e in result["errors"]] == [1, 4]
+    assert result["errors"][0]["error"] == "bad record"
+    assert "LET $emb__2 = [0.1, 0.2];" in posts[0]
+    assert "SET embedding = $emb__2" in posts[0]
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_transaction_fails_whole_batch(monkeypatch, tmp_path):
+    def handler(request):
+        return httpx.Response(500, text="boom")
+
+    server = _server(monkeypatch, tmp_path, handler)
+    result = await server.execute_batch("CREATE t SET v = $v", [{"v": 1}, {"v": 2}], transaction=True)
+
+    assert result["ok"] is False
+    assert result["failed"] == 2 and result["round_trips"] == 1
+    assert all("HTTP 500" in e["error"] for e in result["errors"])
+
+
+class _FakeRPC:
+    def __init__(self, results, error=None):
+        self.results = results
+        self.error = error
+        self.calls = []
+        self.closed = False
+
+    async def query_raw(self, query, params):
+        self.calls.append((query, params))
+        if self.error:
+            raise self.error
+        return {"result": self.results}
+
+    async def close(self):
+        self.closed = True
+
+
+@pytest.mark.asyncio
+async def test_rpc_mode_sends_params_out_of_band(monkeypatch, tmp_path):
+    from surrealdb import RecordID
+
+    def handler(request):
+        raise AssertionError("HTTP must not be used when the RPC session is up")
+
+    server = _server(monkeypatch, tmp_path, handler)
+    server.query_mode = "rpc"
+    server._rpc = _FakeRPC([{"status": "OK", "result": [{"id": RecordID("fact", "a1"), "score": 0.9}]}])
+
+    rows = await server.execute_query("SELECT id FROM fact WHERE embedding <|4|> $emb;", {"emb": [0.5, 0.25]})
+
+    assert rows == [{"id": "fact:a1", "score": 0.9}]
+    query, params = server._rpc.calls[0]
+    assert "LET" not in query and params == {"emb": [0.5, 0.25]}
+
+
+@pytest.mark.asyncio
+async def test_rpc_batch_maps_errors_to_records(monkeypatch, tmp_path):
+    server = _server(monkeypatch, tmp_path, lambda request: httpx.Response(500))
+    server.query_mode = "rpc"
+    server._rpc = _FakeRPC([{"status": "OK", "result": []}, {"status": "ERR", "result": "nope"}])
+
+    result = await server.execute_batch("CREATE t SET v = $v", [{"v": 1}, {"v": 2}])
+
+    assert result["written"] == 1 and result["errors"] == [{"index": 1, "error": "nope"}]
+    assert server._rpc.calls[0][1] == {"v__0": 1, "v__1": 2}
+
+
+@pytest.mark.asyncio
+async def test_store_facts_skips_invalid_and_maps_indices(monkeypatch, tmp_path):
+    server = _server(monkeypatch, tmp_path, lambda request: httpx.Response(500))
+    server.initialized = True
+    server.query_mode = "rpc"
+    server._rpc = _FakeRPC([{"status": "OK", "result": []}, {"status": "ERR", "result": "dup"}])
+
+    async def noop():
+        pass
+
+    async def embed(texts):
+        return [[0.1] for _ in texts]
+
+    monkeypatch.setattr(server, "ensure_connected", noop)
+    monkeypatch.setattr(server, "get_embeddings", embed)
+    facts = [
+        {"entity": "a", "relation": "is", "target": "x"},
+        {"entity": "", "relation": "is", "target": "y"},
+        {"entity": "c", "relation": "is", "target": "z", "confidence": 0.5},
+    ]
+    result = await server.store_facts(facts)
+
+    assert result["round_trips"] == 1 and result["written"] == 1
+    assert [e["index"] for e in result["errors"]] == [1, 2]
+    assert result["ok"] is False
+
+
+@pytest.mark.asyncio
+async def test_rpc_query_failure_backs_off_to_http(monkeypatch, tmp_path):
+    posts = []
+
+    def handler(request):
+        posts.append(request.content.decode())
+        return httpx.Response(200, json=[{"status": "OK", "result": None}, {"status": "OK", "result": [{"v": 1}]}])
+
+    server = _server(monkeypatch, tmp_path, handler)
+    server.query_mode = "rpc"
+    broken = server._rpc = _FakeRPC([], error=ConnectionResetError("socket closed"))
+
+    def no_reconnect(url):
+        raise AssertionError("RPC must not reconnect during the backoff window")
+
+    monkeypatch.setattr("agent_runner.memory_server.AsyncSurreal", no_reconnect)
+
+    assert await server.execute_query("SELECT v FROM t;") == [{"v": 1}]
+    assert broken.closed and server._rpc is None
+    assert await server.execute_query("SELECT v FROM t;") == [{"v": 1}]
+    assert len(broken.calls) == 1 and len(posts) == 2
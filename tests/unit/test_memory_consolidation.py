@@ -0,0 +1,175 @@
+import contextlib
+import json
+import re
+
+import httpx
+import pytest
+
+import agent_runner.memory_tasks as memory_tasks
+import agent_runner.tools.mcp as mcp
+from agent_runner.state import AgentState
+
+
+def _wrap(payload):
+    return {"ok": True, "result": {"content": [{"type": "text", "text": json.dumps(payload)}]}}
+
+
+class _FakeMemory:
+    def __init__(self, count):
+        self.episodes = [{"request_id": f"r{i}", "messages": [], "timestamp": f"t{i:03d}"} for i in range(count)]
+        self.calls = []
+
+    async def __call__(self, state, server, tool, args=None, **kwargs):
+        self.calls.append((tool, args))
+        if tool == "get_unconsolidated_episodes":
+            after = args.get("after") or ""
+            page = [ep for ep in self.episodes if ep["timestamp"] > after][:args["limit"]]
+            return _wrap({"ok": True, "episodes": page})
+        if tool == "store_facts":
+            return _wrap({"ok": True, "written": len(args["facts"]), "failed": 0, "errors": [], "round_trips": 1})
+        if tool == "mark_episodes_consolidated":
+            return _wrap({"ok": True, "updated": len(args["request_ids"])})
+        raise AssertionError(tool)
+
+
+@pytest.fixture
+def state(tmp_path):
+    state = AgentState.__new__(AgentState)
+    state.agent_fs_root = str(tmp_path)
+    return state
+
+
+@pytest.mark.asyncio
+async def test_consolidation_writes_one_bulk_call_per_page(monkeypatch, state):
+    memory = _FakeMemory(7)
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", memory)
+    monkeypatch.setattr(memory_tasks, "CONSOLIDATION_PAGE_SIZE", 3)
+
+    async def extract(state, ep):
+        return [{"entity": ep["request_id"], "relation": "said", "target": "hi", "context": ""}]
+
+    monkeypatch.setattr(memory_tasks, "_extract_facts", extract)
+    result = await memory_tasks.memory_consolidation_task(state)
+
+    assert result["episodes"] == 7 and result["facts"] == 7 and result["pages"] == 3
+    tools = [tool for tool, _ in memory.calls]
+    assert tools.count("store_facts") == 3
+    assert tools.count("mark_episodes_consolidated") == 3
+    assert "store_fact" not in tools and "mark_episode_consolidated" not in tools
+    marked = [rid for tool, args in memory.calls if tool == "mark_episodes_consolidated" for rid in args["request_ids"]]
+    assert marked == [f"r{i}" for i in range(7)]
+    assert result["drain_rate"] > 0
+
+
+@pytest.mark.asyncio
+async def test_failed_fact_write_leaves_page_unconsolidated(monkeypatch, state):
+    memory = _FakeMemory(2)
+
+    async def proxy(state, server, tool, args=None, **kwargs):
+        if tool == "store_facts":
+            return _wrap({"ok": False, "error": "DB not connected"})
+        return await memory(state, server, tool, args)
+
+    async def extract(state, ep):
+        return [{"entity": "a", "relation": "b", "target": "c"}]
+
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", proxy)
+    monkeypatch.setattr(memory_tasks, "_extract_facts", extract)
+    result = await memory_tasks.memory_consolidation_task(state)
+
+    assert result["episodes"] == 0
+    assert all(tool != "mark_episodes_consolidated" for tool, _ in memory.calls)
+
+
+@pytest.mark.asyncio
+async def test_failed_extraction_leaves_episode_queued(monkeypatch, state):
+    memory = _FakeMemory(4)
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", memory)
+
+    async def extract(state, ep):
+        if ep["request_id"] == "r1":
+            return None  # gateway/model error
+        return [] if ep["request_id"] == "r2" else [{"entity": ep["request_id"], "relation": "r", "target": "t"}]
+
+    monkeypatch.setattr(memory_tasks, "_extract_facts", extract)
+    result = await memory_tasks.memory_consolidation_task(state)
+
+    assert result["episodes"] == 3 and result["failed"] == 1 and result["facts"] == 2
+    marked = [rid for tool, args in memory.calls if tool == "mark_episodes_consolidated" for rid in args["request_ids"]]
+    assert marked == ["r0", "r2", "r3"]
+
+
+@pytest.mark.asyncio
+async def test_summarizer_down_ends_cycle_without_marking(monkeypatch, state):
+    memory = _FakeMemory(7)
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", memory)
+    monkeypatch.setattr(memory_tasks, "CONSOLIDATION_PAGE_SIZE", 3)
+
+    async def extract(state, ep):
+        return None
+
+    monkeypatch.setattr(memory_tasks, "_extract_facts", extract)
+    result = await memory_tasks.memory_consolidation_task(state)
+
+    assert result["episodes"] == 0 and result["failed"] == 3 and result["pages"] == 1
+    tools = [tool for tool, _ in memory.calls]
+    assert "store_facts" not in tools and "mark_episodes_consolidated" not in tools
+
+
+@pytest.mark.asyncio
+async def test_memory_lock_not_held_during_extraction(monkeypatch, state):
+    memory = _FakeMemory(2)
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", memory)
+    acquired = []
+
+    async def extract(state, ep):
+        # A backup may run while the summarizer is working
+        async with memory_tasks.memory_lock(state, timeout=0.5):
+            acquired.append(ep["request_id"])
+        return []
+
+    monkeypatch.setattr(memory_tasks, "_extract_facts", extract)
+    result = await memory_tasks.memory_consolidation_task(state)
+
+    assert sorted(acquired) == ["r0", "r1"] and result["episodes"] == 2
+
+
+@pytest.mark.asyncio
+async def test_only_retryable_extraction_failures_stay_queued(monkeypatch, state):
+    memory = _FakeMemory(5)
+    for ep in memory.episodes:
+        ep["messages"] = [{"role": "user", "content": f"{ep['request_id']} said something worth keeping"}]
+    monkeypatch.setattr(mcp, "tool_mcp_proxy", memory)
+
+    @contextlib.asynccontextmanager
+    async def no_slot(model):
+        yield None
+
+    monkeypatch.setattr(memory_tasks, "background_slot", no_slot)
+
+    def handler(request):
+        rid = re.search(r"\br(\d) said", json.loads(request.content)["messages"][0]["content"]).group(1)
+        if rid == "0":
+            return httpx.Response(200, json={"choices": [{"message": {"content": "not json"}}]})
+        if rid == "1":
+            return httpx.Response(400, text="context length exceeded")
+        if rid == "2":
+            return httpx.Response(503, text="overloaded")
+        if rid == "3":
+            raise httpx.ConnectError("gateway down")
+        facts = {"facts": [{"entity": "r4", "relation": "said", "target": "something"}]}
+        return httpx.Response(200, json={"choices": [{"message": {"content": json.dumps(facts)}}]})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    async def get_http_client():
+        return client
+
+    state.get_http_client = get_http_client
+    state.gateway_base = "http://gateway.test"
+    result = await memory_tasks.memory_consolidation_task(state)
+    await client.aclose()
+
+    marked = [rid for tool, args in memory.calls if tool == "mark_episodes_consolidated" for rid in args["request_ids"]]
+    assert marked == ["r0", "r1", "r4"]  # Poison output and 4xx are not retried
+    assert result["failed"] == 2 and result["facts"] == 1
@@ -0,0 +1,79 @@
+import random
+
+import pytest
+
+from common.metrics_core import LatencyHistogram, MetricsRegistry, RollingWindow
+from common.observability import ObservabilitySystem
+
+
+def test_histogram_quantiles_within_bucket_error():
+    rng = random.Random(3)
+    values = [rng.lognormvariate(4, 1) for _ in range(5000)]
+    hist = LatencyHistogram()
+    for v in values:
+        hist.observe(v)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values))]
+        assert abs(hist.quantile(q) - exact) / exact < 0.25
+    assert hist.count == 5000 and hist.min == values[0] and hist.max == values[-1]
+
+    other = hist.copy_layout()
+    other.observe(10 ** 9)  # overflow bucket
+    hist.merge(other)
+    assert hist.quantile(1.0) == 10 ** 9 and hist.count == 5001
+
+
+def test_rolling_window_drops_expired_intervals():
+    window = RollingWindow(interval_s=10.0, intervals=6)
+    window.current(now=100.0).completed += 2
+    window.current(now=155.0).completed += 1
+    assert sum(r.completed for r in window.window(now=159.0)) == 3
+    assert sum(r.completed for r in window.window(now=165.0)) == 1
+    # Slot reused for a new interval starts from zero
+    assert window.current(now=160.0).completed == 0
+
+
+def test_prometheus_text_is_cumulative():
+    registry = MetricsRegistry(namespace="test")
+    registry.counter("hits_total", "Hits").inc(3)
+    registry.gauge("depth", lambda: 2)
+    hist = registry.histogram("latency_ms", labels={"stage": "parse"}, octaves=2)
+    for v in (0.1, 0.7, 5.0):
+        hist.observe(v)
+
+    text = registry.render_prometheus()
+    assert "# TYPE test_hits_total counter\ntest_hits_total 3" in text
+    assert "test_depth 2" in text
+    assert 'test_latency_ms_bucket{stage="parse",le="0.5"} 1' in text
+    assert 'test_latency_ms_bucket{stage="parse",le="2"} 2' in text
+    assert 'test_latency_ms_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 'test_latency_ms_count{stage="parse"} 3' in text
+
+
+@pytest.mark.asyncio
+async def test_observability_counters_are_synchronous(tmp_path):
+    obs = ObservabilitySystem(storage_path=tmp_path)
+    obs.record_cache_hit()
+    obs.record_cache_hit()
+    obs.record_cache_miss()
+    obs.record_network_bytes(sent=10, received=5)
+    assert obs.cache_hits.value == 2 and obs.network_bytes_received.value == 5
+
+    lifecycle = await obs.start_request("r1", "POST", "/v1/chat/completions", {"usage": {"total_tokens": 30}})
+    lifecycle.add_metric("router", "upstream", 12.0)
+    await obs.complete_request("r1")
+
+    metrics = await obs.get_system_metrics()
+    assert metrics.completed_requests_1min == 1
+    assert metrics.efficiency.cache_hit_rate == pytest.approx(200 / 3)
+    assert metrics.efficiency.tokens_per_second == pytest.approx(0.5)
+
+    summary = await obs.get_performance_summary(component="router")
+    assert summary["count"] == 1 and summary["p50_ms"] == pytest.approx(12.0)
+    assert "ai_gateway_requests_completed_total 1" in obs.render_prometheus()
+
+    await obs.reset_history(["traces", "efficiency"])
+    assert (await obs.get_system_metrics()).completed_requests_1min == 0
+    assert obs.cache_hits.value == 0
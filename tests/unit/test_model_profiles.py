@@ -0,0 +1,54 @@
+import json
+
+from common.model_profiles import ModelProfileRegistry
+
+
+def test_profiles_resolved_once_and_consistent_across_prefixes():
+    registry = ModelProfileRegistry(context_windows={"llama3.3:70b": 32768}, default_ctx=8192, keep_alive="")
+
+    local = registry.resolve("ollama:llama3.3:70b")
+    assert registry.resolve("ollama:llama3.3:70b") is local
+    assert local.name == "llama3.3:70b" and local.is_local
+    assert local.options == {"num_ctx": 32768}
+
+    remote = registry.resolve("openai:gpt-4o")
+    assert not remote.is_local and remote.num_ctx == 8192
+
+
+def test_model_options_and_keep_alive():
+    registry = ModelProfileRegistry(
+        context_windows={},
+        default_ctx=4096,
+        model_options={"default": {"temperature": 0.2}, "qwen2.5:32b": {"num_ctx": 16384, "keep_alive": "30m"}},
+        keep_alive="5m",
+    )
+    qwen = registry.resolve("ollama:qwen2.5:32b")
+    assert qwen.num_ctx == 16384 and qwen.keep_alive == "30m"
+    assert qwen.options == {"num_ctx": 16384}
+
+    other = registry.resolve("ollama:llama3.2:latest")
+    assert other.options == {"num_ctx": 4096, "temperature": 0.2}
+    assert other.keep_alive == "5m"
+    assert other.ollama_options({"temperature": 0.9}) == {"num_ctx": 4096, "temperature": 0.9}
+
+    registry.configure(model_options={})
+    assert registry.resolve("ollama:llama3.2:latest").options == {"num_ctx": 4096}
+
+
+def test_router_body_uses_profile_and_request_overrides():
+    from router import providers
+
+    body = json.loads(providers._encode_ollama_body(
+        "llama3.3:70b",
+        [{"role": "user", "content": [{"type": "text", "text": "hi"}]}, {"role": "assistant", "content": "yo"}],
+        True,
+        None,
+        {"options": {"temperature": 0.1}, "keep_alive": "1h"},
+    ))
+    assert body["messages"] == [{"role": "user", "content": "hi"}, {"role": "assistant", "content": "yo"}]
+    assert body["options"]["num_ctx"] == 32768
+    assert body["options"]["temperature"] == 0.1
+    assert body["keep_alive"] == "1h" and body["stream"] is True
+
+    body = json.loads(providers._encode_ollama_body("llama3.2:latest", [], False, 4096, {}))
+    assert body["options"]["num_ctx"] == 4096
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+
+from common.ollama_residency import Priority, ResidencyScheduler, background_slot
+
+
+def _scheduler(**kwargs):
+    async def no_ps():
+        raise RuntimeError("no ollama")
+
+    params = dict(budget_gb=50.0, footprints={"chat:70b": 40.0, "small:latest": 5.0, "mid:32b": 20.0},
+                  max_defer_s=5.0, idle_grace_s=0.01, evict_idle_s=0.05, busy_keep_alive="30m",
+                  ps_source=no_ps, ps_refresh_s=60.0)
+    params.update(kwargs)
+    return ResidencyScheduler(**params)
+
+
+@pytest.mark.asyncio
+async def test_background_waits_for_interactive_then_runs_as_one_batch():
+    scheduler = _scheduler()
+    order = []
+
+    async def background(i):
+        async with scheduler.slot("ollama:mid:32b") as keep_alive:
+            order.append((i, keep_alive))
+
+    async with scheduler.slot("chat:70b", Priority.INTERACTIVE):
+        tasks = [asyncio.create_task(background(i)) for i in range(3)]
+        await asyncio.sleep(0.03)
+        assert order == []
+        assert scheduler.get_stats()["queued"] == {"mid:32b": 3}
+
+    await asyncio.gather(*tasks)
+    stats = scheduler.get_stats()
+    assert len(order) == 3
+    assert stats["swaps"] == 2 and stats["evictions"] == 1
+    assert stats["batches"] == 1 and stats["resident_hits"] == 2 and stats["deferred"] == 3
+    assert list(stats["resident"]) == ["mid:32b"]
+    # Earlier members of the batch keep the model loaded for the rest of it
+    assert order[0][1] == "30m"
+
+
+@pytest.mark.asyncio
+async def test_resident_or_fitting_model_admitted_without_eviction():
+    scheduler = _scheduler(evict_idle_s=60.0)
+    scheduler.touch("ollama:chat:70b")
+    scheduler._last_interactive = 0.0
+
+    async with scheduler.slot("ollama:chat:70b"):
+        pass
+    async with scheduler.slot("small:latest"):
+        pass
+
+    stats = scheduler.get_stats()
+    assert stats["resident_hits"] == 1 and stats["evictions"] == 0
+    assert set(stats["resident"]) == {"chat:70b", "small:latest"}
+
+
+@pytest.mark.asyncio
+async def test_deferral_bounded_and_ps_resync():
+    loaded = [{"name": "mid:32b", "size": 20e9}]
+
+    async def ps():
+        return loaded
+
+    scheduler = _scheduler(max_defer_s=0.05, evict_idle_s=60.0, ps_source=ps, ps_refresh_s=0.0)
+    scheduler.touch("ollama:chat:70b")
+    assert "chat:70b" in scheduler.resident
+
+    async with scheduler.slot("mid:32b"):
+        pass
+    assert scheduler.resident_hits == 1
+
+    loaded = []
+    async with scheduler.slot("small:latest"):
+        pass
+    assert scheduler.deferral_timeouts == 0 and scheduler.batches == 1
+
+    scheduler._last_interactive = float("inf")
+    scheduler.resident.clear()
+    scheduler.footprints["small:latest"] = 100.0
+    async with scheduler.slot("small:latest"):
+        pass
+    assert scheduler.deferral_timeouts == 1
+
+
+@pytest.mark.asyncio
+async def test_background_slot_passes_remote_models_through():
+    async with background_slot("openai:gpt-4o") as keep_alive:
+        assert keep_alive is None
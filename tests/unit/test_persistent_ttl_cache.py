@@ -0,0 +1,102 @@
+import json
+import sqlite3
+import time
+
+import pytest
+
+from common.caching import PersistentTTLCache
+
+
+def _rows(path, namespace):
+    with sqlite3.connect(path) as conn:
+        return dict(conn.execute("SELECT key, value FROM kv_cache WHERE namespace = ?", (namespace,)).fetchall())
+
+
+def test_values_survive_reload_and_load_at_open(tmp_path):
+    db = tmp_path / "kv.db"
+    cache = PersistentTTLCache("intent", ttl_s=60, db_path=str(db))
+    cache.set("a", {"intent": "chat"})  # no event loop: written through
+    cache.set("gone", 1, ttl=-1)
+    cache.close()
+
+    reloaded = PersistentTTLCache("intent", ttl_s=60, db_path=str(db))
+    assert reloaded.get("a") is None and reloaded._conn is None  # get never opens the database
+    reloaded.open()
+    assert reloaded.get_stats()["loaded"] == 1
+    assert reloaded.get("a") == {"intent": "chat"}
+    assert reloaded.get("gone") is None
+    stats = reloaded.get_stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    # Namespaces sharing the file are independent
+    other = PersistentTTLCache("router", ttl_s=60, db_path=str(db))
+    other.open()
+    assert other.get("a") is None
+    reloaded.close()
+    other.close()
+
+
+def test_open_keeps_newer_entries_and_newest_rows(tmp_path):
+    db = tmp_path / "kv.db"
+    cache = PersistentTTLCache("intent", ttl_s=60, db_path=str(db))
+    for i in range(5):
+        cache.set(f"k{i}", i)
+    cache.set("a", "old")
+    cache.close()
+
+    reloaded = PersistentTTLCache("intent", ttl_s=60, max_entries=3, db_path=str(db))
+    reloaded.set("a", "new")  # written before open(): wins over the disk copy
+    reloaded.open()
+    assert reloaded.get("a") == "new"
+    assert list(reloaded._memory) == ["k3", "k4", "a"]
+    reloaded.close()
+
+
+def test_expiry_lru_and_compaction(tmp_path):
+    db = tmp_path / "kv.db"
+    cache = PersistentTTLCache("intent", ttl_s=60, max_entries=2, db_path=str(db))
+    cache.set("old", 1, ttl=-1)
+    assert cache.get("old") is None
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.evictions == 1 and list(cache._memory) == ["a", "c"]
+    assert cache.get("b") is None  # Evicted from memory; the disk row goes at compaction
+
+    cache.compact()
+    assert len(_rows(db, "intent")) == 2 and cache.compacted == 2
+    cache.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_batched_by_background_flush(tmp_path):
+    db = tmp_path / "kv.db"
+    cache = PersistentTTLCache("router_analysis", ttl_s=60, db_path=str(db), flush_interval_s=0.01)
+    for i in range(50):
+        cache.set(f"k{i}", {"n": i})
+    assert cache.get_stats()["pending"] == 50 and cache.flushes == 0
+
+    await cache._flush_task
+    assert cache.flushes == 1 and cache.writes == 50
+    assert json.loads(_rows(db, "router_analysis")["k7"]) == {"n": 7}
+    cache.close()
+
+
+def test_legacy_json_imported_once(tmp_path):
+    legacy = tmp_path / "maitre_d_cache.json"
+    legacy.write_text(json.dumps({
+        "fresh": {"timestamp": time.time(), "result": {"intent": "search"}},
+        "stale": {"timestamp": 0, "result": {"intent": "old"}},
+    }))
+    cache = PersistentTTLCache("intent", ttl_s=86400, db_path=str(tmp_path / "kv.db"), legacy_json=legacy)
+    cache.open()
+    assert cache.get("fresh") == {"intent": "search"}
+    assert cache.get("stale") is None
+    cache.close()
+
+    legacy.write_text(json.dumps({"late": {"timestamp": time.time(), "result": {}}}))
+    again = PersistentTTLCache("intent", ttl_s=86400, db_path=str(tmp_path / "kv.db"), legacy_json=legacy)
+    again.open()
+    assert again.get("late") is None and legacy.exists()
+    again.close()
@@ -0,0 +1,86 @@
+import pytest
+
+from agent_runner.engine import _with_context_appended
+from agent_runner.prefix_cache import PrefixCacheManager, PromptSegmentCache
+
+
+@pytest.mark.asyncio
+async def test_segment_rebuilt_only_on_version_change():
+    cache = PromptSegmentCache()
+    builds = []
+
+    async def build():
+        builds.append(1)
+        return f"menu v{len(builds)}"
+
+    assert await cache.get("tool_menu", "a", build) == "menu v1"
+    assert await cache.get("tool_menu", "a", build) == "menu v1"
+    assert len(builds) == 1
+
+    assert await cache.get("tool_menu", "b", build) == "menu v2"
+    cache.invalidate("tool_menu")
+    assert await cache.get("tool_menu", "b", build) == "menu v3"
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 1 and stats["rebuilds"] == 3 and stats["invalidations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_empty_segment_not_memoized_when_requested():
+    cache = PromptSegmentCache()
+    results = iter(["", "facts"])
+
+    async def build():
+        return next(results)
+
+    assert await cache.get("architecture", 1, build, keep_empty=False) == ""
+    assert await cache.get("architecture", 1, build, keep_empty=False) == "facts"
+
+
+@pytest.mark.asyncio
+async def test_fingerprint_tracks_segment_contents():
+    cache = PromptSegmentCache()
+
+    async def static():
+        return "instructions"
+
+    async def menu_a():
+        return "tools A"
+
+    async def menu_b():
+        return "tools B"
+
+    await cache.get("static", 1, static)
+    await cache.get("tool_menu", "A", menu_a)
+    first = cache.fingerprint(("static", "tool_menu"))
+    assert cache.fingerprint(("static", "tool_menu")) == first
+
+    await cache.get("tool_menu", "B", menu_b)
+    assert cache.fingerprint(("static", "tool_menu")) != first
+
+    manager = PrefixCacheManager()
+    cache_id, is_new = await manager.get_or_create_cache("prefix", "conv", prefix_hash=first)
+    assert is_new and first in manager.cache
+    _, is_new = await manager.get_or_create_cache("different text, same hash", "conv", prefix_hash=first)
+    assert not is_new
+
+
+def test_context_appended_copy_on_write():
+    history = [
+        {"role": "user", "content": "hi"},
+        {"role": "assistant", "content": "hello"},
+        {"role": "user", "content": "question"},
+    ]
+    result = _with_context_appended(history, "\n[CTX]")
+
+    assert result[-1]["content"] == "question\n[CTX]"
+    assert history[-1]["content"] == "question"
+    assert result[0] is history[0] and result[1] is history[1]
+
+    multimodal = [{"role": "user", "content": [{"type": "text", "text": "look"}]}]
+    appended = _with_context_appended(multimodal, "ctx")
+    assert appended[-1]["content"][-1] == {"type": "text", "text": "ctx"}
+    assert len(multimodal[-1]["content"]) == 1
+
+    assistant_last = [{"role": "assistant", "content": "x"}]
+    assert _with_context_appended(assistant_last, "ctx")[0] is assistant_last[0]
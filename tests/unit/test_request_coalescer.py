@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from common.caching import LLMResponseCache, MultiLayerCache, RequestCoalescer
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_share_one_call():
+    coalescer = RequestCoalescer()
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"choices": [{"message": {"content": "hi"}}]}
+
+    payload = {"model": "m", "messages": [{"role": "user", "content": "q"}], "tools": []}
+    reordered = {"tools": [], "messages": payload["messages"], "model": "m"}
+    results = await asyncio.gather(*(coalescer.run(p, call) for p in [payload, reordered, payload]))
+
+    assert calls == 1
+    assert all(r == results[0] for r in results)
+    results[1]["choices"].clear()  # Followers get independent copies
+    assert results[0]["choices"]
+    stats = coalescer.get_stats()
+    assert stats["upstream_calls"] == 1 and stats["coalesced"] == 2
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_followers():
+    coalescer = RequestCoalescer()
+
+    async def call():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(*(coalescer.run({"model": "m"}, call) for _ in range(3)), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert coalescer.get_stats()["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_deterministic_requests_use_short_ttl_cache():
+    coalescer = RequestCoalescer(llm_cache=LLMResponseCache(MultiLayerCache()), cache_ttl=60)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        return {"n": calls}
+
+    await coalescer.run({"model": "m", "temperature": 0}, call)
+    assert await coalescer.run({"model": "m", "temperature": 0}, call) == {"n": 1}
+    await coalescer.run({"model": "m", "temperature": 0.7}, call)
+    await coalescer.run({"model": "m", "temperature": 0.7}, call)
+
+    assert calls == 3
+    assert coalescer.get_stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_leader_mutation_does_not_leak_to_followers_or_cache():
+    coalescer = RequestCoalescer(llm_cache=LLMResponseCache(MultiLayerCache()))
+    payload = {"model": "m", "temperature": 0, "messages": [{"role": "user", "content": "q"}]}
+
+    async def call():
+        await asyncio.sleep(0.01)
+        return {"choices": [{"message": {"content": "raw", "tool_calls": [{"id": "1"}]}}]}
+
+    async def leader():
+        result = await coalescer.run(payload, call)
+        # Post-processing in place, before any follower has resumed
+        message = result["choices"][0]["message"]
+        message["content"] = "rewritten"
+        message["tool_calls"].clear()
+        return result
+
+    led = asyncio.create_task(leader())
+    await asyncio.sleep(0)
+    followed = await coalescer.run(payload, call)
+    led = await led
+
+    pristine = {"choices": [{"message": {"content": "raw", "tool_calls": [{"id": "1"}]}}]}
+    assert led["choices"][0]["message"]["content"] == "rewritten"
+    assert followed == pristine
+    assert await coalescer.run(payload, call) == pristine  # served from the cache
+    assert coalescer.get_stats()["cache_hits"] == 1
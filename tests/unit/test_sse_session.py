@@ -0,0 +1,139 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import httpx
+import pytest
+import pytest_asyncio
+
+import agent_runner.constants as constants
+from agent_runner.transports.sse import SSESession
+
+
+class FakeSSEServer:
+    """MCP SSE server over MockTransport: one event queue per GET stream, replies pushed on POST."""
+
+    def __init__(self, auto_reply: bool = True, status: int = 200):
+        self.auto_reply = auto_reply
+        self.status = status
+        self.gets = 0
+        self.posts = []
+        self.streams = []
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        if request.method == "GET":
+            self.gets += 1
+            if self.status >= 400:
+                return httpx.Response(self.status)
+            queue: asyncio.Queue = asyncio.Queue()
+            self.streams.append(queue)
+
+            async def events():
+                yield b"event: endpoint\ndata: /mcp/messages?session=1\n\n"
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    yield f"event: message\ndata: {json.dumps(item)}\n\n".encode()
+
+            return httpx.Response(200, headers={"content-type": "text/event-stream"}, content=events())
+
+        body = json.loads(request.content)
+        self.posts.append(body)
+        if self.auto_reply:
+            self.reply(body)
+        return httpx.Response(202)
+
+    def reply(self, body):
+        self.streams[-1].put_nowait({"jsonrpc": "2.0", "id": body["id"], "result": body["params"]})
+
+    def drop(self):
+        self.streams[-1].put_nowait(None)
+
+
+@pytest_asyncio.fixture
+async def make_session():
+    sessions, clients = [], []
+
+    def factory(server: FakeSSEServer) -> SSESession:
+        client = httpx.AsyncClient(transport=httpx.MockTransport(server.handler))
+
+        async def get_http_client():
+            return client
+
+        state = SimpleNamespace(http_timeout=5.0, get_http_client=get_http_client, mcp_circuit_breaker=MagicMock())
+        session = SSESession(state, "fake", "http://mcp.test/sse", {})
+        sessions.append(session)
+        clients.append(client)
+        return session
+
+    yield factory
+    for session in sessions:
+        await session.close()
+    for client in clients:
+        await client.aclose()
+
+
+def _call(n: int):
+    return {"jsonrpc": "2.0", "method": "tools/call", "params": {"n": n}}
+
+
+async def _wait_for(predicate, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        assert asyncio.get_running_loop().time() < deadline
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_responses_are_routed_by_id(make_session):
+    server = FakeSSEServer(auto_reply=False)
+    session = make_session(server)
+
+    calls = [asyncio.create_task(session.request(_call(n), timeout=2.0)) for n in range(3)]
+    await _wait_for(lambda: len(server.posts) == 3)
+    for body in reversed(server.posts):
+        server.reply(body)
+
+    results = await asyncio.gather(*calls)
+    assert [r["result"]["n"] for r in results] == [0, 1, 2]
+    assert server.gets == 1
+    assert session.stats["connects"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disconnect_fails_pending_and_reconnects(make_session, monkeypatch):
+    monkeypatch.setattr(constants, "SLEEP_BRIEF_BACKOFF_BASE", 0.01)
+    server = FakeSSEServer(auto_reply=False)
+    session = make_session(server)
+
+    pending = asyncio.create_task(session.request(_call(1), timeout=2.0))
+    await _wait_for(lambda: len(server.posts) == 1)
+    server.drop()
+    with pytest.raises(ConnectionError, match="disconnected"):
+        await pending
+
+    server.auto_reply = True
+    result = await session.request(_call(2), timeout=2.0)
+    assert result["result"] == {"n": 2}
+    assert server.gets == 2
+    assert session.stats["reconnects"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dead_server_gives_up_after_bounded_backoff(make_session, monkeypatch):
+    monkeypatch.setattr(constants, "SLEEP_BRIEF_BACKOFF_BASE", 0.001)
+    monkeypatch.setattr(constants, "SSE_RECONNECT_MAX_ATTEMPTS", 4)
+    server = FakeSSEServer(status=503)
+    session = make_session(server)
+
+    with pytest.raises(ConnectionError, match="unreachable after 4 connection attempts"):
+        await session.request(_call(1), timeout=5.0)
+    assert server.gets == 4
+    assert session._task.done()
+
+    # A closed session fails fast instead of reconnecting
+    with pytest.raises(ConnectionError):
+        await session.request(_call(2), timeout=5.0)
+    assert server.gets == 4
@@ -0,0 +1,49 @@
+import json
+
+from common.sse_stream import ChunkFrameEncoder, SSEFrameParser, StreamChunk, stream_confidence
+
+
+def test_parser_handles_split_frames_crlf_and_comments():
+    parser = SSEFrameParser()
+    stream = b': keep-alive\r\ndata: {"a": 1}\r\n\r\ndata: {"b"' + b': 2}\n\ndata: [DONE]\n\n'
+    payloads = []
+    for i in range(0, len(stream), 7):
+        payloads.extend(parser.feed(stream[i:i + 7]))
+    assert payloads == [b'{"a": 1}', b'{"b": 2}', b"[DONE]"]
+    assert parser.flush() == []
+
+
+def test_chunk_fast_path_matches_full_decode():
+    payload = {
+        "choices": [{"index": 0, "delta": {"role": "assistant", "content": "héllo \"x\"\n"}, "finish_reason": None}],
+    }
+    for raw in (json.dumps(payload), json.dumps(payload, separators=(",", ":"))):
+        chunk = StreamChunk(raw.encode())
+        assert chunk.content == "héllo \"x\"\n"
+        assert chunk.finish_reason is None
+        assert chunk.tool_calls is None and chunk.usage is None
+        assert chunk._data is None  # Never fully decoded
+
+    final = StreamChunk(b'{"choices":[{"delta":{},"finish_reason":"stop"}],"usage":{"total_tokens":9}}')
+    assert final.content is None
+    assert final.finish_reason == "stop"
+    assert final.usage == {"total_tokens": 9}
+
+
+def test_tool_calls_and_confidence_decode_on_demand():
+    tool = StreamChunk(b'{"choices":[{"delta":{"tool_calls":[{"index":0,"function":{"name":"f"}}]}}]}')
+    assert tool.tool_calls[0]["function"]["name"] == "f"
+
+    lp = StreamChunk(b'{"choices":[{"delta":{"content":"a"},"logprobs":{"content":[{"token":"a","logprob":0.0}]}}]}')
+    assert lp.has_logprobs
+    assert stream_confidence([lp, lp]) == 1.0
+    assert stream_confidence([]) is None
+
+
+def test_frame_encoder_emits_valid_chunk():
+    frame = ChunkFrameEncoder("chatcmpl-1", "agent", created=5).content('say "hi"')
+    assert frame.startswith("data: ") and frame.endswith("\n\n")
+    body = json.loads(frame[6:])
+    assert body["choices"][0]["delta"]["content"] == 'say "hi"'
+    assert body["id"] == "chatcmpl-1" and body["created"] == 5
+    assert body["choices"][0]["finish_reason"] is None
@@ -0,0 +1,184 @@
+import asyncio
+import sys
+import time
+
+import pytest
+
+from types import SimpleNamespace
+
+import agent_runner.transports.stdio as stdio_transport
+from agent_runner.transports.stdio import StdioMultiplexer, get_stdio_multiplexer
+
+# Minimal JSON-RPC server: answers each request after a delay on its own thread,
+# so responses come back out of order and interleaved with log noise.
+ECHO_SERVER = r"""
+import json, sys, threading, time
+lock = threading.Lock()
+def handle(req):
+    time.sleep(req["params"].get("delay", 0))
+    with lock:
+        sys.stdout.write("not json log line\n")
+        sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": req["id"], "result": req["params"]}) + "\n")
+        sys.stdout.flush()
+for line in sys.stdin:
+    threading.Thread(target=handle, args=(json.loads(line),)).start()
+"""
+
+
+async def _spawn():
+    return await asyncio.create_subprocess_exec(
+        sys.executable, "-c", ECHO_SERVER,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_overlap_and_route_by_id():
+    proc = await _spawn()
+    mux = StdioMultiplexer("echo", proc)
+    try:
+        start = time.time()
+        results = await asyncio.gather(*[
+            mux.request("tools/call", {"n": i, "delay": 0.3 - i * 0.02}) for i in range(10)
+        ])
+        elapsed = time.time() - start
+
+        assert [r["result"]["n"] for r in results] == list(range(10))
+        # Serialized round-trips would take ~2.1s
+        assert elapsed < 1.5
+        assert mux.in_flight == 0
+    finally:
+        await mux.close()
+        proc.kill()
+        await proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_pending_requests_fail_when_process_exits():
+    proc = await _spawn()
+    mux = StdioMultiplexer("echo", proc)
+    try:
+        pending = asyncio.create_task(mux.request("tools/call", {"delay": 5}))
+        await asyncio.sleep(0.1)
+        proc.kill()
+        with pytest.raises(ConnectionError):
+            await pending
+        assert mux.closed
+    finally:
+        await mux.close()
+        await proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_replacing_process_closes_stale_multiplexer():
+    state = SimpleNamespace(stdio_multiplexers={})
+    old_proc, new_proc = await _spawn(), await _spawn()
+    try:
+        old = await get_stdio_multiplexer(state, "echo", old_proc)
+        assert await get_stdio_multiplexer(state, "echo", old_proc) is old
+
+        new = await get_stdio_multiplexer(state, "echo", new_proc)
+        assert new is not old
+        assert old.closed and old._reader_task.done()
+        assert old_proc.stdin.is_closing()
+        assert (await new.request("ping", {"n": 1}))["result"]["n"] == 1
+        await new.close()
+    finally:
+        for proc in (old_proc, new_proc):
+            proc.kill()
+            await proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_callers_share_replacement_multiplexer():
+    state = SimpleNamespace(stdio_multiplexers={})
+    old_proc, new_proc = await _spawn(), await _spawn()
+    try:
+        old = await get_stdio_multiplexer(state, "echo", old_proc)
+        first, second = await asyncio.gather(
+            get_stdio_multiplexer(state, "echo", new_proc),
+            get_stdio_multiplexer(state, "echo", new_proc),
+        )
+        assert first is second is state.stdio_multiplexers["echo"]
+        assert old.closed and not first.closed
+        assert (await first.request("ping", {"n": 2}))["result"]["n"] == 2
+        await first.close()
+    finally:
+        for proc in (old_proc, new_proc):
+            proc.kill()
+            await proc.wait()
+
+
+# Answers every request with one huge text result, envelope members in either order
+BIG_SERVER = r"""
+import json, sys
+for line in sys.stdin:
+    req = json.loads(line)
+    params = req["params"]
+    text = "".join(f'row {i}: "ok"\n' if i != 30000 else "row 30000: ERROR disk full\n" for i in range(60000))
+    if params.get("kind") == "rpc_error":
+        body = {"jsonrpc": "2.0", "id": req["id"], "error": {"code": -32001, "message": text}}
+    else:
+        result = {"content": [{"type": "text", "text": text}], "isError": params.get("kind") == "is_error"}
+        if params.get("id_last"):
+            body = {"result": result, "jsonrpc": "2.0", "id": req["id"]}
+        else:
+            body = {"jsonrpc": "2.0", "id": req["id"], "result": result}
+    sys.stdout.write(json.dumps(body) + "\n")
+    sys.stdout.write(json.dumps({"jsonrpc": "2.0", "id": req["id"] + 1000, "result": {}}) + "\n")
+    sys.stdout.flush()
+"""
+
+
+async def _big_mux(monkeypatch):
+    monkeypatch.setattr(stdio_transport, "STDIO_MAX_LINE_BYTES", 128 * 1024)
+    proc = await asyncio.create_subprocess_exec(
+        sys.executable, "-c", BIG_SERVER,
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    return proc, StdioMultiplexer("big", proc)
+
+
+@pytest.mark.asyncio
+async def test_oversized_response_reduced_while_streaming(monkeypatch):
+    proc, mux = await _big_mux(monkeypatch)
+    try:
+        for id_last in (False, True):
+            response = await mux.request("tools/call", {"id_last": id_last}, timeout=10)
+            result = response["result"]
+            text = result["content"][0]["text"]
+            assert len(text) <= stdio_transport.STDIO_OVERSIZED_RESULT_CHARS
+            # Envelope stripped: the text is the tool output itself
+            assert text.startswith('row 0: "ok"\nrow 1: "ok"') and text.endswith('row 59999: "ok"\n')
+            assert "row 30000: ERROR disk full" in text
+            assert result["isError"] is False
+            assert result["reduced"]["streamed"] is True
+            assert result["reduced"]["original_bytes"] > 600_000
+        assert mux.stats["oversized"] == 2
+        # Normal-sized lines after an oversized one still parse (the stray id is just orphaned)
+        assert mux.stats["orphaned"] == 2
+    finally:
+        await mux.close()
+        proc.kill()
+        await proc.wait()
+
+
+@pytest.mark.asyncio
+async def test_oversized_errors_stay_errors(monkeypatch):
+    proc, mux = await _big_mux(monkeypatch)
+    try:
+        result = (await mux.request("tools/call", {"kind": "is_error"}, timeout=10))["result"]
+        assert result["isError"] is True and result["content"][0]["text"].startswith('row 0: "ok"')
+
+        response = await mux.request("tools/call", {"kind": "rpc_error"}, timeout=10)
+        assert "result" not in response
+        error = response["error"]
+        assert error["code"] == -32001
+        assert error["message"].startswith('row 0: "ok"') and "row 30000: ERROR disk full" in error["message"]
+        assert error["data"]["reduced"]["original_bytes"] > 600_000
+    finally:
+        await mux.close()
+        proc.kill()
+        await proc.wait()
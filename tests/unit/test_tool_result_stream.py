@@ -0,0 +1,79 @@
+import json
+
+import pytest
+
+from agent_runner.tool_result_processor import (
+    QualityTier,
+    StreamingResultReducer,
+    ToolResultProcessor,
+)
+
+
+def _log_lines(n, error_at=()):
+    for i in range(n):
+        if i in error_at:
+            yield f"line {i}: ERROR connection refused by upstream\n"
+        else:
+            yield f"line {i}: ok processing item {i}\n"
+
+
+def test_reducer_keeps_full_text_under_limit():
+    reducer = StreamingResultReducer(max_chars=100, full_limit=1000)
+    for chunk in ("hello ", "wor".encode(), "ld".encode()):
+        reducer.feed(chunk)
+    text, metadata = reducer.finish()
+    assert text == "hello world" and metadata is None
+
+
+def test_reducer_windows_large_output_with_errors():
+    reducer = StreamingResultReducer(max_chars=2000, full_limit=4000)
+    for line in _log_lines(20000, error_at={5000, 12000}):
+        reducer.feed(line)
+    text, metadata = reducer.finish()
+
+    assert len(text) <= 2000
+    assert text.startswith("line 0: ok")
+    assert text.rstrip().endswith("line 19999: ok processing item 19999")
+    assert "line 5000: ERROR connection refused" in text
+    assert "line 12000: ERROR connection refused" in text
+    assert metadata["strategy"] == "streaming_window" and metadata["error_lines"] == 2
+    # Only windows are retained once past the limit
+    assert len(reducer.tail) <= 2000 and reducer.overflowed
+
+
+def test_reducer_decodes_split_utf8_and_extracts_keys_from_one_long_line():
+    payload = json.dumps({"status": "ok", "items": ["é" * 50] * 2000, "count": 2000}).encode()
+    reducer = StreamingResultReducer(max_chars=1500, full_limit=8000)
+    for i in range(0, len(payload), 777):  # odd size splits multi-byte characters
+        reducer.feed(payload[i:i + 777])
+    text, metadata = reducer.finish()
+
+    assert "�" not in text
+    assert '"status": "ok"' in text and '"count": 2000' in text
+    assert metadata["structured_keys"] == ["status", "count"]
+
+
+@pytest.mark.asyncio
+async def test_process_tool_stream_and_oversized_strings_record_savings():
+    processor = ToolResultProcessor()
+
+    async def chunks():
+        for line in _log_lines(10000, error_at={42}):
+            yield line.encode()
+
+    text, metadata = await processor.process_tool_stream("run_terminal", chunks(), QualityTier.MEDIUM)
+    assert metadata["streamed"] and "line 42: ERROR" in text
+    assert len(text) <= 2000
+
+    small, small_meta = await processor.process_tool_stream("read_text", ["short ", "result"])
+    assert small == "short result" and not small_meta.get("streamed")
+
+    # Critical tools still keep small results, but huge strings are reduced in slices
+    huge = "".join(_log_lines(20000))
+    text, metadata = await processor.process_tool_result("run_terminal", huge)
+    assert metadata["strategy"] == "streaming_window" and len(text) < len(huge)
+
+    metrics = processor.get_quality_metrics()
+    assert metrics["streamed"] == 2
+    assert metrics["bytes_saved_by_tool"]["run_terminal"] > len(huge)
+    assert "read_text" not in metrics["bytes_saved_by_tool"]
@@ -0,0 +1,71 @@
+import pytest
+
+from agent_runner.tool_vector_index import ToolVectorIndex
+from agent_runner.tools.vector_tool_retrieval import ToolVector, VectorToolRetriever
+
+
+def test_search_returns_top_k_by_cosine():
+    index = ToolVectorIndex(initial_capacity=2)
+    index.upsert("web_search", [1.0, 0.0, 0.0])
+    index.upsert("read_file", [0.0, 1.0, 0.0])
+    index.upsert("write_file", [0.0, 0.9, 0.1])  # Forces capacity growth
+
+    results = index.search([0.0, 2.0, 0.0], k=2)
+    assert [name for name, _ in results] == ["read_file", "write_file"]
+    assert results[0][1] == pytest.approx(1.0)
+    assert index.search([0.0, 1.0, 0.0], k=5, min_score=0.5) == results
+
+
+def test_remove_swaps_last_row_and_upsert_replaces():
+    index = ToolVectorIndex()
+    index.upsert("a", [1.0, 0.0])
+    index.upsert("b", [0.0, 1.0])
+    index.upsert("c", [-1.0, 0.0])
+
+    assert index.remove("a") is True
+    assert index.remove("a") is False
+    assert len(index) == 2 and "a" not in index
+    assert index.search([-1.0, 0.0], k=1)[0][0] == "c"
+
+    index.upsert("b", [-1.0, 0.1], {"description": "moved"})
+    assert len(index) == 2
+    assert index.get_meta("b") == {"description": "moved"}
+
+
+def test_rejects_zero_vectors_and_rebuilds_on_dimension_change():
+    index = ToolVectorIndex()
+    assert index.upsert("zero", [0.0, 0.0]) is False
+    index.upsert("old", [1.0, 0.0])
+    index.upsert("new", [1.0, 0.0, 0.0])
+
+    assert index.names() == ["new"]
+    assert index.search([1.0, 0.0], k=3) == []  # Query dimension mismatch
+
+
+def test_retriever_rebuilds_index_when_content_changes_at_same_size():
+    retriever = VectorToolRetriever(state=None)
+    retriever.tool_vectors = {"a": ToolVector("a", "find files", "fs", [1.0, 0.0])}
+    first = retriever._get_index()
+    assert retriever._get_index() is first
+
+    # Same mapping object, same size, different text: must not reuse the old index
+    retriever.tool_vectors["a"] = ToolVector("a", "search the web", "web", [0.0, 1.0])
+    second = retriever._get_index()
+    assert second is not first
+    assert second.search([0.0, 1.0], k=1)[0][0] == "a"
+
+
+def test_retriever_reuses_index_until_tool_vectors_change(monkeypatch):
+    retriever = VectorToolRetriever(state=None)
+    retriever.tool_vectors = {"a": ToolVector("a", "find files", "fs", [1.0, 0.0])}
+    first = retriever._get_index()
+
+    # Queries never rehash tool descriptions
+    monkeypatch.setattr(ToolVector, "description", property(lambda self: pytest.fail("description read")), raising=False)
+    assert retriever._get_index() is first
+    monkeypatch.undo()
+
+    retriever.tool_vectors.pop("a")
+    assert retriever._get_index() is not first and len(retriever._get_index()) == 0
+    retriever.tool_vectors = {"b": ToolVector("b", "web", "web", [0.0, 1.0])}
+    assert retriever._get_index().names() == ["b"]
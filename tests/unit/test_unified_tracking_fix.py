@@ -26,10 +26,8 @@ async def test_track_event_flow():
         write_to_blog=True
     )
     
-    # Since these are run in tasks or sync callbacks, we might need a tiny sleep 
-    # if they were async, but here I mocked them to be checked immediately if sync.
-    # The Notification system, Dashboard and Blog are now called DIRECTLY in track_event
-    # (not in tasks, although the callbacks they trigger might be tasks).
+    # With a running loop track_event only enqueues; flush delivers the queued batch
+    await tracker.flush()
     
     # Verify notification manager was called
     assert tracker._notification_manager.notify.called
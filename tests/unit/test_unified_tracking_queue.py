@@ -0,0 +1,97 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from common.unified_tracking import EventCategory, EventSeverity, UnifiedTracker
+
+
+def _tracker(capacity=2048):
+    tracker = UnifiedTracker()
+    tracker._ensure_initialized()
+    tracker._observability = None
+    tracker._system_blog = None
+    tracker._notification_manager = MagicMock()
+    tracker._json_logger = MagicMock()
+    tracker.capacity = capacity
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_track_event_enqueues_and_coalesces_repeats():
+    tracker = _tracker()
+    for _ in range(5):
+        tracker.track_event("mcp_timeout", severity=EventSeverity.HIGH, category=EventCategory.MCP,
+                            message="server x timed out", metadata={"server": "x"})
+    tracker.track_event("other", message="different")
+
+    # Nothing delivered on the hot path
+    assert not tracker._json_logger.called
+    assert tracker.get_stats()["queued"] == 2 and tracker.stats["coalesced"] == 4
+
+    await tracker.flush()
+    assert tracker._json_logger.call_count == 2
+    first = tracker._json_logger.call_args_list[0].kwargs
+    assert first["repeat_count"] == 5 and first["server"] == "x"
+    assert tracker._notification_manager.notify.call_count == 1
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_events_with_different_metadata_are_not_coalesced():
+    tracker = _tracker()
+    tracker.track_event("stream_completed", message="Stream done (2 meta)", metadata={"model": "a", "tokens": 10})
+    tracker.track_event("stream_completed", message="Stream done (2 meta)", metadata={"model": "b", "tokens": 99})
+    tracker.track_event("stream_completed", message="Stream done (2 meta)", metadata={"tokens": 10, "model": "a"})
+    assert tracker.get_stats()["queued"] == 2 and tracker.stats["coalesced"] == 1
+
+    await tracker.flush()
+    delivered = [call.kwargs for call in tracker._json_logger.call_args_list]
+    assert [(d["model"], d["tokens"]) for d in delivered] == [("a", 10), ("b", 99)]
+    assert not tracker._queued
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_low_severity_sampled_then_dropped_under_pressure():
+    tracker = _tracker(capacity=8)
+    for i in range(40):
+        tracker.track_event(f"debug_{i}", severity=EventSeverity.DEBUG)
+    stats = tracker.get_stats()
+    assert stats["queued"] <= 8
+    assert stats["sampled_out"] > 0 and stats["dropped"] > 0
+
+    # Important events still get in past capacity (up to the reserve), shedding the oldest after that
+    for i in range(10):
+        tracker.track_event(f"fail_{i}", severity=EventSeverity.CRITICAL, notify=False)
+    assert tracker.get_stats()["queued"] == 10
+    assert tracker.stats["overflow_dropped"] > 0
+    await tracker.close()
+
+
+@pytest.mark.asyncio
+async def test_error_traceback_formatted_at_delivery():
+    tracker = _tracker()
+    try:
+        raise ValueError("bad input")
+    except ValueError as e:
+        tracker.track_event("parse_failed", severity=EventSeverity.MEDIUM, category=EventCategory.ERROR, error=e)
+
+    await tracker.flush()
+    payload = tracker._json_logger.call_args.kwargs
+    assert payload["error_type"] == "ValueError"
+    assert "bad input" in payload["error_traceback"]
+    await tracker.close()
+
+
+def test_inline_delivery_records_health_without_an_event_loop():
+    from common.observability import ObservabilitySystem
+
+    tracker = _tracker()
+    tracker._observability = ObservabilitySystem()
+    tracker.track_event("mcp_down", severity=EventSeverity.HIGH, category=EventCategory.MCP,
+                        component="mcp", metadata={"server": "weather"}, notify=False)
+
+    assert tracker.stats["inline"] == 1
+    health = tracker._observability.component_health["mcp_server:weather"]
+    assert health.status == "unhealthy" and health.error_count == 1
+    assert health.metadata["event"] == "mcp_down"
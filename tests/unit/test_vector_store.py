@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agent_runner.vector_store import ToolsetVectorIndex
+
+VOCAB = ["web", "file", "memory"]
+
+
+def _embed(text):
+    return [1.0 if word in text.lower() else 0.0 for word in VOCAB] + [0.0] * 5
+
+
+class FakeMemory:
+    """MemoryServer stand-in: keyword embeddings and a dict-backed tool_definition table."""
+
+    initialized = True
+
+    def __init__(self):
+        self.rows = {}
+        self.batches = []
+        self.searches = []
+
+    async def get_embedding(self, text):
+        return _embed(text)
+
+    async def get_embeddings(self, texts):
+        return [_embed(text) for text in texts]
+
+    async def execute_query(self, query, params=None):
+        if query.startswith("DELETE FROM tool_definition"):
+            self.rows.clear()
+            return []
+        self.searches.append(params)
+        return [{"name": "from_db", "score": 0.9}]
+
+    async def execute_batch(self, statement, records, **kwargs):
+        self.batches.append(statement)
+        for record in records:
+            if statement.lstrip().startswith("UPSERT"):
+                self.rows[record["name"]] = record
+            else:
+                self.rows.pop(record["name"], None)
+        return {"ok": True, "written": len(records), "failed": 0, "errors": [], "round_trips": 1}
+
+
+@pytest.fixture
+def store():
+    memory = FakeMemory()
+    event = asyncio.Event()
+    event.set()
+    state = SimpleNamespace(memory=memory, memory_initialized_event=event)
+    return ToolsetVectorIndex(state)
+
+
+def _tool(name, description):
+    return {"type": "function", "function": {"name": name, "description": description}}
+
+
+@pytest.mark.asyncio
+async def test_index_search_remove_end_to_end(store):
+    tools = [_tool("web_search", "Search the web"), _tool("read_file", "Read a file"), {"name": "recall", "description": "Query memory"}]
+    await store.index_tools(tools)
+
+    assert store.indexed_count == 3 and len(store.local_index) == 3
+    assert set(store.memory.rows) == {"web_search", "read_file", "recall"}
+    assert len(store.memory.batches) == 1  # one batched upsert
+
+    results = await store.search_tools("look something up on the web", limit=2)
+    assert results[0]["name"] == "web_search" and results[0]["description"] == "Search the web"
+
+    store.remove_tools(["web_search"])
+    await asyncio.sleep(0)
+    assert "web_search" not in store.local_index and "web_search" not in store.memory.rows
+    assert all(r["name"] != "web_search" for r in await store.search_tools("web", limit=3))
+
+
+@pytest.mark.asyncio
+async def test_sync_local_index_embeds_only_changes(store):
+    await store.index_tools([_tool("web_search", "Search the web"), _tool("read_file", "Read a file")])
+
+    embedded = await store.sync_local_index([_tool("web_search", "Search the web"), _tool("recall", "Query memory")])
+    await asyncio.sleep(0)
+
+    assert embedded == 1
+    assert sorted(store.local_index.names()) == ["recall", "web_search"]
+    assert set(store.memory.rows) == {"recall", "web_search"}
+
+
+@pytest.mark.asyncio
+async def test_empty_local_result_falls_back_to_surrealdb(store):
+    await store.index_tools([_tool("web_search", "Search the web")])
+
+    assert await store.search_tools("read a file", limit=2) == [{"name": "from_db", "score": 0.9}]
+    # The query vector was embedded (and normalized) by memory, like the indexed ones
+    assert store.memory.searches[0]["vec"] == _embed("read a file")